@@ -0,0 +1,208 @@
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from bridge.metrics import (
+    DROPPED_EVENTS,
+    LATENCY_UPPER_BOUNDS,
+    SeriesChildren,
+    sample_weight,
+    series_children,
+)
+from bridge.merge import PartialMerger
+from bridge.quantiles import QuantileTracker
+from bridge.sketch import Bins, SketchMapping, merge_bins, rebin
+from bridge.slo import SliTracker
+
+SeriesKey = tuple[str, str, str]  # (service, endpoint, region)
+
+# `type` of a pre-aggregated record: counts and a latency sketch for one series over
+# an interval, sent by the workload simulator in place of the individual events
+AGGREGATE_TYPE = "aggregate"
+
+
+@dataclass
+class SeriesDelta:
+    """Locally accumulated counts for one (service, endpoint, region) series."""
+
+    bucket_counts: list[int] = field(default_factory=lambda: [0] * len(LATENCY_UPPER_BOUNDS))
+    latency_sum: float = 0.0
+    status_counts: dict[Any, int] = field(default_factory=dict)
+    error_count: int = 0
+    latencies: list[float] = field(default_factory=list)
+    # Sketch bins from aggregate records and sampled events, in the quantile tracker's mapping
+    bins: Bins = field(default_factory=dict)
+
+
+class MetricBatch:
+    """Pre-aggregates a batch of metric events before touching the Prometheus registry.
+
+    Every `observe()`/`inc()` on a prometheus_client metric takes a lock that
+    `/metrics` scrapes also take. Folding a batch into plain Python counters first
+    and applying the deltas once per series keeps lock traffic proportional to the
+    number of live series rather than the number of events.
+
+    With a `QuantileTracker`, raw latencies are also kept per series and handed to
+    the tracker in bulk when the batch is applied. An `SliTracker` receives each
+    series' totals once per batch. Aggregate records and sampled events (with a
+    `sample_weight`) fold in through the same deltas, counted once per request
+    they stand for. With a `PartialMerger`, quantile bins, SLI counts and services
+    go to the merger instead of the trackers (see bridge.merge).
+    """
+
+    def __init__(
+        self,
+        quantiles: Optional[QuantileTracker] = None,
+        slis: Optional[SliTracker] = None,
+        merger: Optional[PartialMerger] = None,
+    ) -> None:
+        self._series: dict[SeriesKey, SeriesDelta] = {}
+        self._quantiles = quantiles
+        self._slis = slis
+        self._merger = merger
+        self._mappings: dict[float, SketchMapping] = {}
+        self.event_count = 0
+
+    def __len__(self) -> int:
+        return self.event_count
+
+    def add(self, payload: dict[str, Any]) -> None:
+        """Fold a raw Kafka metric event payload into the batch.
+
+        Raises TypeError or ValueError for a malformed event, before anything is added.
+        """
+        if payload.get("type") == AGGREGATE_TYPE:
+            self.add_aggregate(payload)
+            return
+        key = (
+            payload.get("service", "unknown"),
+            payload.get("endpoint", "/"),
+            payload.get("region", "unknown"),
+        )
+        status_code = payload.get("status_code", 0)
+        if isinstance(status_code, bool) or not isinstance(status_code, (int, str)):
+            raise TypeError(f"status_code must be an integer or string, got {status_code!r}")
+        latency_ms = float(payload.get("latency_ms", 0))
+        if not 0 <= latency_ms < float("inf"):
+            raise ValueError(f"latency_ms must be finite and non-negative, got {latency_ms!r}")
+        error = bool(payload.get("error", False))
+        weight = sample_weight(payload)
+
+        delta = self._series.get(key)
+        if delta is None:
+            delta = self._series[key] = SeriesDelta()
+        delta.bucket_counts[bisect_left(LATENCY_UPPER_BOUNDS, latency_ms)] += weight
+        delta.latency_sum += latency_ms * weight
+        delta.status_counts[status_code] = delta.status_counts.get(status_code, 0) + weight
+        if error:
+            delta.error_count += weight
+        if self._quantiles is not None:
+            if weight == 1:
+                delta.latencies.append(latency_ms)
+            else:
+                index = self._quantiles.mapping.index(latency_ms)
+                delta.bins[index] = delta.bins.get(index, 0) + weight
+        self.event_count += weight
+
+    def add_aggregate(self, payload: dict[str, Any]) -> None:
+        """Fold a pre-aggregated record into the batch.
+
+        Histogram buckets are filled from each sketch bin's representative value,
+        so a latency within the sketch's relative accuracy of a bucket bound may be
+        counted in the neighbouring bucket. Raises ValueError if the counts disagree
+        or a bin lies outside the sketch's range, before anything is added.
+        """
+        key = (
+            payload.get("service", "unknown"),
+            payload.get("endpoint", "/"),
+            payload.get("region", "unknown"),
+        )
+        count = int(payload["count"])
+        errors = int(payload.get("error_count", 0))
+        status_counts = {int(code): int(n) for code, n in payload["status_codes"].items()}
+        sketch = payload["latency_sketch"]
+        bins = {int(index): int(n) for index, n in sketch["bins"].items()}
+        if (
+            min(count, errors, *status_counts.values(), *bins.values()) < 0
+            or errors > count
+            or sum(status_counts.values()) != count
+            or sum(bins.values()) != count
+        ):
+            raise ValueError("Aggregate record counts do not add up")
+        accuracy = float(sketch["relative_accuracy"])
+        mapping = self._mappings.get(accuracy)
+        if mapping is None:
+            mapping = self._mappings[accuracy] = SketchMapping(accuracy)
+        if not all(mapping.has_index(index) for index in bins):
+            raise ValueError("Aggregate sketch bin out of range")
+
+        delta = self._series.get(key)
+        if delta is None:
+            delta = self._series[key] = SeriesDelta()
+        for index, n in bins.items():
+            delta.bucket_counts[bisect_left(LATENCY_UPPER_BOUNDS, mapping.value(index))] += n
+        delta.latency_sum += float(payload.get("latency_sum_ms", 0))
+        for status_code, n in status_counts.items():
+            delta.status_counts[status_code] = delta.status_counts.get(status_code, 0) + n
+        delta.error_count += errors
+        if self._quantiles is not None:
+            merge_bins(delta.bins, rebin(bins, mapping, self._quantiles.mapping))
+        self.event_count += count
+
+    def apply(self) -> set[str]:
+        """Apply the accumulated deltas to the registry in one pass and reset the batch.
+
+        Returns the service labels of the series written, after label validation and
+        series limits, so callers can count services without growing on bad input.
+        With a merger, the services are handed to it and none are returned.
+        """
+        now = time.monotonic()
+        services: set[str] = set()
+        for (service, endpoint, region), delta in self._series.items():
+            if self._slis is not None:
+                total = sum(delta.status_counts.values())
+                if self._merger is None:
+                    self._slis.observe(
+                        service, total, delta.error_count, delta.bucket_counts, now
+                    )
+                elif self._slis.tracks(service):
+                    self._merger.observe_sli(
+                        service, total, delta.error_count, delta.bucket_counts
+                    )
+            series: SeriesChildren | None = None
+            for status_code, count in delta.status_counts.items():
+                children = series_children(service, endpoint, region, status_code)
+                if children is None:
+                    DROPPED_EVENTS.labels("invalid_labels").inc(count)
+                    continue
+                series = children
+                series.last_seen = now
+                series.requests.inc(count)
+                for counter in series.overflow:
+                    counter.inc(count)
+            if series is None:
+                continue
+            # Labels the histogram child was admitted under
+            _, _, labels = series.bound[0]
+            if self._merger is None:
+                services.add(labels[0])
+            else:
+                self._merger.observe_service(labels[0])
+            # Histogram buckets are stored non-cumulatively; prometheus_client sums them
+            # at collection time, so per-bucket deltas can be added directly.
+            histogram = series.latency
+            histogram._sum.inc(delta.latency_sum)
+            for i, count in enumerate(delta.bucket_counts):
+                if count:
+                    histogram._buckets[i].inc(count)
+            if delta.error_count:
+                series.errors.inc(delta.error_count)
+            if self._merger is not None:
+                if self._quantiles is not None:
+                    self._merger.observe_quantiles(labels, delta.latencies, delta.bins)
+            elif self._quantiles is not None:
+                self._quantiles.observe(labels, delta.latencies, now, delta.bins)
+        self._series.clear()
+        self.event_count = 0
+        return services
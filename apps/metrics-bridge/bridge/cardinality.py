@@ -0,0 +1,80 @@
+import re
+
+from bridge.config import Config
+
+# Label value substituted for every label of a series that would exceed its limit
+OVERFLOW_LABEL = "other"
+
+_NUMERIC_SEGMENT = re.compile(r"^\d+$")
+_UUID_SEGMENT = re.compile(
+    r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
+)
+_HEX_SEGMENT = re.compile(r"^(?=.*\d)[0-9a-fA-F]{16,}$")
+_TEMPLATE_PARAM = re.compile(r"^\{[^/{}]*\}$")
+
+
+def _compile_template(template: str) -> re.Pattern[str]:
+    """Compile a route template such as `/users/{id}/orders` into a path matcher."""
+    parts = []
+    for segment in template.split("/"):
+        parts.append("[^/]+" if _TEMPLATE_PARAM.match(segment) else re.escape(segment))
+    return re.compile("^" + "/".join(parts) + "$")
+
+
+def _collapse_segment(segment: str) -> str:
+    if _NUMERIC_SEGMENT.match(segment):
+        return "{id}"
+    if _UUID_SEGMENT.match(segment):
+        return "{uuid}"
+    if _HEX_SEGMENT.match(segment):
+        return "{hash}"
+    return segment
+
+
+class CardinalityLimiter:
+    """Normalizes endpoint labels and caps the number of series per metric.
+
+    Series are admitted first come, first served until a metric reaches its
+    limit; any further label combination is folded into a single overflow
+    series whose labels are all `OVERFLOW_LABEL`, so the exposition stays
+    bounded no matter what producers send.
+    """
+
+    def __init__(self, config: Config) -> None:
+        self._normalize = config.normalize_endpoints
+        self._templates = [(_compile_template(t), t) for t in config.endpoint_templates]
+        self._max_label_length = config.max_label_length
+        self._default_limit = config.max_series_per_metric
+        self._limits = dict(config.series_limits)
+        self._series: dict[str, set[tuple[str, ...]]] = {}
+
+    def normalize_endpoint(self, endpoint: str) -> str:
+        """Map a raw request path onto its route template."""
+        endpoint = endpoint.split("?", 1)[0]
+        if not self._normalize:
+            return endpoint
+        for pattern, template in self._templates:
+            if pattern.match(endpoint):
+                return template
+        return "/".join(_collapse_segment(s) for s in endpoint.split("/"))
+
+    def is_valid(self, *values: str) -> bool:
+        """Reject label values too long to be anything but garbage."""
+        return all(len(v) <= self._max_label_length for v in values)
+
+    def admit(self, metric: str, labels: tuple[str, ...]) -> tuple[tuple[str, ...], bool]:
+        """Return the label values to use for a series and whether it overflowed."""
+        seen = self._series.setdefault(metric, set())
+        if labels in seen:
+            return labels, False
+        if len(seen) < self._limits.get(metric, self._default_limit):
+            seen.add(labels)
+            return labels, False
+        return (OVERFLOW_LABEL,) * len(labels), True
+
+    def forget(self, metric: str, labels: tuple[str, ...]) -> None:
+        """Release a series slot after the series was removed from the registry."""
+        self._series.get(metric, set()).discard(labels)
+
+    def series_count(self, metric: str) -> int:
+        return len(self._series.get(metric, ()))
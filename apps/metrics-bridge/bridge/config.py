@@ -3,9 +3,45 @@ from pydantic_settings import BaseSettings
 
 
 class Config(BaseSettings):
+    kafka_enabled: bool = Field(default=True)
     kafka_brokers: str = Field(default="kafka:9092")
     metrics_topic: str = Field(default="metrics.raw")
     consumer_group: str = Field(default="metrics-bridge-group")
+    consumer_processes: int = Field(default=1)
+    consumer_batch_size: int = Field(default=500)
+    consumer_timeout_ms: int = Field(default=1000)
+    normalize_endpoints: bool = Field(default=True)
+    endpoint_templates: list[str] = Field(default=[])
+    max_label_length: int = Field(default=128)
+    max_series_per_metric: int = Field(default=10000)
+    series_limits: dict[str, int] = Field(default={})
+    series_ttl_seconds: float = Field(default=600.0)
+    series_sweep_interval_seconds: float = Field(default=30.0)
+    readiness_max_event_age_seconds: float = Field(default=120.0)
+    lag_refresh_interval_seconds: float = Field(default=5.0)
+    metrics_cache_ttl_seconds: float = Field(default=2.0)
+    quantile_windows_seconds: list[int] = Field(default=[60, 300])
+    quantile_slot_seconds: float = Field(default=10.0)
+    quantile_refresh_interval_seconds: float = Field(default=10.0)
+    sketch_relative_accuracy: float = Field(default=0.01)
+    slo_definitions_dir: str = Field(default="")
+    slo_windows_seconds: list[int] = Field(
+        default=[300, 1800, 3600, 21600, 259200, 2592000]
+    )
+    slo_refresh_interval_seconds: float = Field(default=15.0)
+    merge_topic: str = Field(default="")
+    merge_interval_seconds: float = Field(default=5.0)
+    http_ingest_enabled: bool = Field(default=False)
+    ingest_queue_max_batches: int = Field(default=64)
+    ingest_max_body_bytes: int = Field(default=16 * 1024 * 1024)
+    remote_write_url: str = Field(default="")
+    remote_write_interval_seconds: float = Field(default=5.0)
+    remote_write_resend_seconds: float = Field(default=60.0)
+    remote_write_max_samples_per_request: int = Field(default=2000)
+    # 0 limits ticks only when snappy compression falls back to pure Python
+    remote_write_max_samples_per_tick: int = Field(default=0)
+    remote_write_queue_max_requests: int = Field(default=100)
+    remote_write_timeout_seconds: float = Field(default=10.0)
     server_host: str = Field(default="0.0.0.0")
     server_port: int = Field(default=8080)
 
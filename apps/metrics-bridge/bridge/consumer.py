@@ -1,42 +1,156 @@
 import json
+import queue
 import threading
+import time
+
+from typing import Any, Optional
 
 import structlog
-from confluent_kafka import Consumer, KafkaError
+from confluent_kafka import Consumer, KafkaError, Message, TopicPartition
 
+from bridge.aggregator import MetricBatch
 from bridge.config import Config
-from bridge.metrics import record_metric_event, ACTIVE_SERVICES
+from bridge.health import IngestionState, IngestionTracker
+from bridge.merge import PartialMerger, parse_partial
+from bridge.metrics import ACTIVE_SERVICES, DROPPED_EVENTS, configure_cardinality, expire_series
+from bridge.quantiles import QuantileTracker
+from bridge.sketch import SketchMapping
+from bridge.slo import SliTracker, load_slo_definitions
 
 logger = structlog.get_logger(__name__)
 
+# Idle series entries expired per sweep step; larger expiries continue after the next batch
+_SWEEP_STEP = 2000
+
 
 class MetricsBridgeConsumer:
-    """Background Kafka consumer that updates Prometheus metrics."""
+    """Background Kafka consumer that updates Prometheus metrics.
+
+    Batches posted to the HTTP ingest endpoint are queued here and applied by a
+    second thread through the same aggregation path. Both threads hold `_lock`
+    while they touch the registry, the series caches or the quantile sketches.
+
+    With `merge_topic` set, per-service state is merged across consumers through
+    that topic (see bridge.merge); this consumer exports it only for the services
+    whose `merge_topic` partitions it owns.
+    """
 
     def __init__(self, config: Config) -> None:
         self._config = config
-        self._consumer = Consumer({
-            "bootstrap.servers": config.kafka_brokers,
-            "group.id": config.consumer_group,
-            "auto.offset.reset": "latest",
-            "enable.auto.commit": True,
-        })
+        configure_cardinality(config)
+        self._consumer: Optional[Consumer] = None
+        if config.kafka_enabled:
+            self._consumer = Consumer({
+                "bootstrap.servers": config.kafka_brokers,
+                "group.id": config.consumer_group,
+                "auto.offset.reset": "latest",
+                "enable.auto.commit": True,
+            })
         self._running = False
         self._thread: threading.Thread | None = None
-        self._seen_services: set[str] = set()
+        self._ingest_thread: threading.Thread | None = None
+        self._ingest_queue: queue.Queue[list[dict[str, Any]]] = queue.Queue(
+            maxsize=config.ingest_queue_max_batches
+        )
+        self._lock = threading.Lock()
+        self._seen_services: dict[str, float] = {}  # service -> last seen (monotonic)
+        self._quantiles = QuantileTracker(config) if config.quantile_windows_seconds else None
+        self._slis: Optional[SliTracker] = None
+        if config.slo_definitions_dir:
+            definitions = load_slo_definitions(config.slo_definitions_dir)
+            self._slis = SliTracker(config, definitions)
+            logger.info("Tracking SLIs", slos=len(definitions))
+        self._mapping = SketchMapping(config.sketch_relative_accuracy)
+        self._merger: Optional[PartialMerger] = None
+        if config.merge_topic and self._consumer is not None:
+            self._merger = PartialMerger(config, self._mapping)
+        # service -> partition of merge_topic its partials arrive on
+        self._merged_services: dict[str, Optional[int]] = {}
+        self._batch = MetricBatch(self._quantiles, self._slis, self._merger)
+        self._tracker = IngestionTracker(config)
+        self._next_sweep = time.monotonic() + config.series_sweep_interval_seconds
 
     def start(self) -> None:
-        self._consumer.subscribe([self._config.metrics_topic])
         self._running = True
-        self._thread = threading.Thread(target=self._run, daemon=True, name="kafka-consumer")
-        self._thread.start()
-        logger.info("Metrics bridge consumer started", topic=self._config.metrics_topic)
+        if self._consumer is not None:
+            topics = [self._config.metrics_topic]
+            if self._merger is not None:
+                topics.append(self._config.merge_topic)
+            self._consumer.subscribe(
+                topics,
+                on_assign=self._tracker.on_assign,
+                on_revoke=self._on_revoke,
+                on_lost=self._on_revoke,
+            )
+            self._thread = threading.Thread(
+                target=self._run, args=(self._consumer,), daemon=True, name="kafka-consumer"
+            )
+            self._thread.start()
+            logger.info("Metrics bridge consumer started", topics=topics)
+        if self._config.http_ingest_enabled:
+            self._ingest_thread = threading.Thread(
+                target=self._run_ingest, daemon=True, name="http-ingest"
+            )
+            self._ingest_thread.start()
+            logger.info(
+                "HTTP ingest started", queue_max_batches=self._config.ingest_queue_max_batches
+            )
 
-    def _run(self) -> None:
+    def _run(self, consumer: Consumer) -> None:
         while self._running:
-            msg = self._consumer.poll(timeout=1.0)
-            if msg is None:
-                continue
+            msgs = consumer.consume(
+                num_messages=self._config.consumer_batch_size,
+                timeout=self._config.consumer_timeout_ms / 1000,
+            )
+            if msgs:
+                self._process_batch(msgs)
+            now = time.monotonic()
+            self._tracker.maybe_refresh(consumer, now)
+            self._maintain(now)
+
+    def _run_ingest(self) -> None:
+        while self._running:
+            try:
+                events = self._ingest_queue.get(timeout=self._config.consumer_timeout_ms / 1000)
+            except queue.Empty:
+                events = []
+            if events:
+                self._apply_events(events)
+            self._maintain(time.monotonic())
+
+    def _maintain(self, now: float) -> None:
+        """Periodic quantile/SLI refresh and idle-series sweep, from whichever thread runs."""
+        with self._lock:
+            if self._merger is not None and self._merger.due(now):
+                self._merger.publish(now)
+            if self._quantiles is not None:
+                self._quantiles.maybe_refresh(now)
+            if self._slis is not None:
+                self._slis.maybe_refresh(now)
+            if now >= self._next_sweep:
+                complete = self._expire_idle(now)
+                self._next_sweep = now + (
+                    self._config.series_sweep_interval_seconds if complete else 0.0
+                )
+
+    def submit(self, events: list[dict[str, Any]]) -> bool:
+        """Queue decoded events from the HTTP ingest endpoint.
+
+        Never blocks: returns False when the queue is full so the caller can push
+        back on the client.
+        """
+        try:
+            self._ingest_queue.put_nowait(events)
+        except queue.Full:
+            return False
+        return True
+
+    def _process_batch(self, msgs: list[Message]) -> None:
+        """Decode a batch of Kafka messages, then apply it to the registry once."""
+        self._tracker.observe_batch(msgs)
+        payloads: list[dict[str, Any]] = []
+        partials: list[tuple[Optional[int], dict[str, Any]]] = []
+        for msg in msgs:
             err = msg.error()
             if err:
                 if err.code() != KafkaError._PARTITION_EOF:  # type: ignore[attr-defined]
@@ -47,18 +161,123 @@ class MetricsBridgeConsumer:
                 if raw is None:
                     continue
                 payload = json.loads(raw.decode("utf-8"))
-                record_metric_event(payload)
-
-                service = payload.get("service")
-                if service and service not in self._seen_services:
-                    self._seen_services.add(service)
-                    ACTIVE_SERVICES.set(len(self._seen_services))
             except (json.JSONDecodeError, Exception) as e:
+                DROPPED_EVENTS.labels("malformed").inc()
                 logger.warning("Failed to process metric event", error=str(e))
+                continue
+            if self._merger is not None and msg.topic() == self._config.merge_topic:
+                partials.append((msg.partition(), payload))
+            else:
+                payloads.append(payload)
+        self._apply_events(payloads)
+        if partials:
+            self._apply_partials(partials)
+
+    def _apply_events(self, payloads: list[dict[str, Any]]) -> None:
+        """Aggregate decoded events locally, then apply them to the registry once."""
+        with self._lock:
+            for payload in payloads:
+                try:
+                    self._batch.add(payload)
+                except (TypeError, ValueError, ArithmeticError, AttributeError, KeyError) as e:
+                    DROPPED_EVENTS.labels("malformed").inc()
+                    logger.warning("Failed to process metric event", error=str(e))
+            # Only services admitted as series labels, so the set stays within series limits
+            services = self._batch.apply()
+
+            now = time.monotonic()
+            known = len(self._seen_services)
+            for service in services:
+                self._seen_services[service] = now
+            if len(self._seen_services) != known:
+                ACTIVE_SERVICES.set(len(self._seen_services))
+
+    def _apply_partials(self, partials: list[tuple[Optional[int], dict[str, Any]]]) -> None:
+        """Feed partials from `merge_topic` into this consumer's trackers."""
+        with self._lock:
+            now = time.monotonic()
+            known = len(self._seen_services)
+            for partition, payload in partials:
+                try:
+                    service, partial = parse_partial(payload, self._mapping)
+                except (TypeError, ValueError, AttributeError, KeyError) as e:
+                    DROPPED_EVENTS.labels("malformed").inc()
+                    logger.warning("Failed to process partial", error=str(e))
+                    continue
+                self._merged_services[service] = partition
+                if self._slis is not None and partial.sli is not None:
+                    total, errors, *bucket_counts = partial.sli
+                    self._slis.observe(service, total, errors, bucket_counts, now)
+                if self._quantiles is not None:
+                    for (endpoint, region), bins in partial.series.items():
+                        self._quantiles.observe((service, endpoint, region), [], now, bins)
+                if partial.active:
+                    self._seen_services[service] = now
+            if len(self._seen_services) != known:
+                ACTIVE_SERVICES.set(len(self._seen_services))
+
+    def _on_revoke(self, consumer: Consumer, partitions: list[TopicPartition]) -> None:
+        """Drop merged state of services whose `merge_topic` partition moved away."""
+        self._tracker.on_revoke(consumer, partitions)
+        revoked = {tp.partition for tp in partitions if tp.topic == self._config.merge_topic}
+        if not revoked:
+            return
+        with self._lock:
+            moved = [s for s, p in self._merged_services.items() if p in revoked]
+            for service in moved:
+                del self._merged_services[service]
+                if self._quantiles is not None:
+                    self._quantiles.forget(service)
+                if self._slis is not None:
+                    self._slis.forget(service)
+                self._seen_services.pop(service, None)
+            if moved:
+                ACTIVE_SERVICES.set(len(self._seen_services))
+                logger.info("Dropped merged services after rebalance", services=len(moved))
+
+    def _expire_idle(self, now: float) -> bool:
+        """Drop series and services idle for longer than the series TTL.
+
+        Runs between batches on the consumer thread, so it never races ingestion, and
+        expires a bounded number of series per step. Returns False if more are pending.
+        A zero TTL keeps everything.
+        """
+        if self._config.series_ttl_seconds <= 0:
+            return True
+        cutoff = now - self._config.series_ttl_seconds
+        removed, complete = expire_series(cutoff, limit=_SWEEP_STEP)
+        idle = [s for s, last_seen in self._seen_services.items() if last_seen < cutoff]
+        for service in idle:
+            del self._seen_services[service]
+        if idle:
+            ACTIVE_SERVICES.set(len(self._seen_services))
+        if removed or idle:
+            logger.info("Expired idle series", series=removed, services=len(idle))
+        return complete
+
+    def readiness(self) -> tuple[bool, dict[str, Any]]:
+        if self._consumer is None:
+            alive = self._ingest_thread is not None and self._ingest_thread.is_alive()
+            details: dict[str, Any] = {
+                "kafka_enabled": False,
+                "ingest_queued_batches": self._ingest_queue.qsize(),
+            }
+            if not alive:
+                return False, {**details, "reason": "ingest not running"}
+            return True, details
+        return self._tracker.readiness()
+
+    def ingestion_state(self) -> IngestionState:
+        return self._tracker.state()
 
     def stop(self) -> None:
         self._running = False
-        if self._thread:
-            self._thread.join(timeout=5)
-        self._consumer.close()
+        for thread in (self._thread, self._ingest_thread):
+            if thread:
+                thread.join(timeout=5)
+        if self._merger is not None:
+            with self._lock:
+                self._merger.close()
+        if self._consumer is not None:
+            self._consumer.close()
         logger.info("Metrics bridge consumer stopped")
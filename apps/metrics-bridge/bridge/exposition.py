@@ -0,0 +1,61 @@
+import gzip
+import threading
+import time
+from collections.abc import Callable
+
+from prometheus_client import REGISTRY, CollectorRegistry
+from prometheus_client.exposition import choose_encoder, gzip_accepted
+
+# Favour render latency over ratio; exposition text compresses well at any level
+_GZIP_LEVEL = 1
+
+
+class ExpositionCache:
+    """Renders the registry off the event loop and shares each render between scrapers.
+
+    Rendered bytes are kept per (content type, encoding) for `ttl_seconds`, so an HA
+    Prometheus pair scraping the same pod within the TTL costs one render. Renders
+    are serialized: a scrape that arrives mid-render waits for it and reuses the
+    result instead of starting its own.
+    """
+
+    def __init__(self, ttl_seconds: float, registry: CollectorRegistry = REGISTRY) -> None:
+        self._ttl = ttl_seconds
+        self._registry = registry
+        self._lock = threading.Lock()
+        self._cache: dict[tuple[str, bool], tuple[float, bytes]] = {}
+
+    def render(self, accept: str, accept_encoding: str) -> tuple[bytes, str, bool]:
+        """Return (body, content type, gzipped) for the given request headers.
+
+        Blocking — call from a worker thread.
+        """
+        encoder, content_type = choose_encoder(accept)
+        compress = gzip_accepted(accept_encoding)
+        key = (content_type, compress)
+        with self._lock:
+            cached = self._cache.get(key)
+            now = time.monotonic()
+            if cached is not None and now - cached[0] < self._ttl:
+                return cached[1], content_type, compress
+            body = self._encode(encoder, content_type, compress, now)
+            self._cache[key] = (now, body)
+        return body, content_type, compress
+
+    def _encode(
+        self,
+        encoder: Callable[[CollectorRegistry], bytes],
+        content_type: str,
+        compress: bool,
+        now: float,
+    ) -> bytes:
+        # The gzip and identity variants of one format share a single registry walk
+        plain = self._cache.get((content_type, False))
+        if plain is not None and now - plain[0] < self._ttl:
+            body = plain[1]
+        else:
+            body = encoder(self._registry)
+            self._cache[(content_type, False)] = (now, body)
+        if compress:
+            return gzip.compress(body, compresslevel=_GZIP_LEVEL)
+        return body
@@ -0,0 +1,146 @@
+import time
+from typing import Any, NamedTuple, Optional
+
+from confluent_kafka import TIMESTAMP_NOT_AVAILABLE, Consumer, Message, TopicPartition
+from prometheus_client import Gauge
+
+from bridge.config import Config
+
+ASSIGNED_PARTITIONS = Gauge(
+    "bridge_assigned_partitions",
+    "Number of metrics topic partitions assigned to the bridge consumer",
+    multiprocess_mode="livesum",
+)
+
+CONSUMER_LAG = Gauge(
+    "bridge_consumer_lag_messages",
+    "Messages between the consumer position and the partition high watermark",
+    ["topic", "partition"],
+    multiprocess_mode="livesum",
+)
+
+LAST_EVENT_AGE = Gauge(
+    "bridge_last_event_age_seconds",
+    "Age of the most recently consumed message, by its Kafka timestamp",
+    multiprocess_mode="livemax",
+)
+
+INGEST_RATE = Gauge(
+    "bridge_ingest_messages_per_second",
+    "Messages consumed per second over the last lag refresh interval",
+    multiprocess_mode="livesum",
+)
+
+
+class IngestionState(NamedTuple):
+    """Assignment, lag and freshness of one consumer, as readiness is decided on them."""
+
+    assigned: int
+    lag: int
+    last_event_ts: Optional[float]
+    rate: float
+
+
+def readiness_of(
+    states: list[IngestionState], max_event_age: float
+) -> tuple[bool, dict[str, Any]]:
+    """Ready once partitions are assigned and every consumer is caught up or fresh.
+
+    A consumer with zero lag is ready however old its last event is, so an idle
+    topic does not fail the probe; nor does a consumer left without partitions
+    while others in the group have them.
+    """
+    now = time.time()
+    ages = [None if s.last_event_ts is None else now - s.last_event_ts for s in states]
+    known = [age for age in ages if age is not None]
+    assigned = sum(s.assigned for s in states)
+    details: dict[str, Any] = {
+        "assigned_partitions": assigned,
+        "lag_messages": sum(s.lag for s in states),
+        "last_event_age_seconds": round(min(known), 3) if known else None,
+        "messages_per_second": round(sum(s.rate for s in states), 1),
+    }
+    if not assigned:
+        return False, {**details, "reason": "no partitions assigned"}
+    if any(s.lag > 0 and (age is None or age > max_event_age) for s, age in zip(states, ages)):
+        return False, {**details, "reason": "consumer lagging"}
+    return True, details
+
+
+class IngestionTracker:
+    """Tracks partition assignment, lag and freshness of the bridge consumer.
+
+    All updates happen on the consumer thread; readiness is read from the HTTP
+    event loop, which only ever sees whole attribute values.
+    """
+
+    def __init__(self, config: Config) -> None:
+        self._max_event_age = config.readiness_max_event_age_seconds
+        self._refresh_interval = config.lag_refresh_interval_seconds
+        self._assigned: set[tuple[str, int]] = set()
+        self._lag: dict[tuple[str, int], int] = {}
+        self._last_event_ts: Optional[float] = None
+        self._consumed = 0
+        self._window_start = time.monotonic()
+        self._next_refresh = self._window_start
+        self.rate = 0.0
+
+    def on_assign(self, consumer: Consumer, partitions: list[TopicPartition]) -> None:
+        for tp in partitions:
+            self._assigned.add((tp.topic, tp.partition))
+        ASSIGNED_PARTITIONS.set(len(self._assigned))
+
+    def on_revoke(self, consumer: Consumer, partitions: list[TopicPartition]) -> None:
+        for tp in partitions:
+            key = (tp.topic, tp.partition)
+            self._assigned.discard(key)
+            if self._lag.pop(key, None) is not None:
+                CONSUMER_LAG.remove(tp.topic, str(tp.partition))
+        ASSIGNED_PARTITIONS.set(len(self._assigned))
+
+    def observe_batch(self, msgs: list[Message]) -> None:
+        """Record a consumed batch; only the newest timestamped message is inspected."""
+        self._consumed += len(msgs)
+        for msg in reversed(msgs):
+            ts_type, ts_ms = msg.timestamp()
+            if ts_type != TIMESTAMP_NOT_AVAILABLE:
+                self._last_event_ts = ts_ms / 1000
+                break
+
+    def maybe_refresh(self, consumer: Consumer, now: float) -> None:
+        """Recompute lag and rate once per refresh interval.
+
+        High watermarks come from the client's fetch cache, so this never blocks on
+        a broker round trip.
+        """
+        if now < self._next_refresh:
+            return
+        elapsed = now - self._window_start
+        if elapsed > 0:
+            self.rate = self._consumed / elapsed
+            INGEST_RATE.set(self.rate)
+        self._consumed = 0
+        self._window_start = now
+        self._next_refresh = now + self._refresh_interval
+
+        partitions = [TopicPartition(topic, partition) for topic, partition in self._assigned]
+        if partitions:
+            for tp in consumer.position(partitions):
+                _, high = consumer.get_watermark_offsets(tp, cached=True)
+                if tp.offset < 0 or high < 0:
+                    continue
+                lag = max(0, high - tp.offset)
+                self._lag[(tp.topic, tp.partition)] = lag
+                CONSUMER_LAG.labels(tp.topic, str(tp.partition)).set(lag)
+        if self._last_event_ts is not None:
+            LAST_EVENT_AGE.set(max(0.0, time.time() - self._last_event_ts))
+
+    @property
+    def total_lag(self) -> int:
+        return sum(self._lag.values())
+
+    def state(self) -> IngestionState:
+        return IngestionState(len(self._assigned), self.total_lag, self._last_event_ts, self.rate)
+
+    def readiness(self) -> tuple[bool, dict[str, Any]]:
+        return readiness_of([self.state()], self._max_event_age)
@@ -0,0 +1,153 @@
+"""Decoding of metric event batches posted to the bridge's HTTP ingest endpoint.
+
+Two body formats are accepted:
+
+* NDJSON (`application/x-ndjson`): one metric event JSON object per line, the same
+  shape as a `metrics.raw` record value (a raw event or an aggregate record).
+* Compact binary (`application/vnd.metrics-bridge.batch`), little-endian:
+
+      magic            b"MBB1"
+      string count     u16
+      strings          count x (u16 length, UTF-8 bytes)
+      record count     u32
+      records          count x (u16 service, u16 endpoint, u16 region,
+                                u16 status_code, f32 latency_ms, u8 error)
+
+  where service, endpoint and region index into the string table, so repeated
+  labels are sent once per batch.
+"""
+
+import json
+import struct
+from typing import Any
+
+from prometheus_client import Counter
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+BINARY_CONTENT_TYPE = "application/vnd.metrics-bridge.batch"
+CONTENT_TYPES = (NDJSON_CONTENT_TYPE, BINARY_CONTENT_TYPE)
+
+_MAGIC = b"MBB1"
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_RECORD = struct.Struct("<HHHHfB")
+
+INGEST_BATCHES = Counter(
+    "bridge_ingest_batches_total",
+    "Batches posted to the HTTP ingest endpoint by outcome",
+    ["outcome"],
+)
+
+INGEST_EVENTS = Counter(
+    "bridge_ingest_events_total",
+    "Metric events accepted through the HTTP ingest endpoint",
+)
+
+
+class BatchFormatError(ValueError):
+    """Raised when an ingest body cannot be decoded at all."""
+
+
+def decode_ndjson(body: bytes) -> tuple[list[dict[str, Any]], int]:
+    """Decode an NDJSON body, returning (events, malformed line count).
+
+    The lines are parsed as a single JSON array so the whole batch goes through the
+    C decoder in one call; only a batch containing a bad line is re-parsed per line.
+    """
+    lines = [line for line in body.split(b"\n") if line.strip()]
+    if not lines:
+        return [], 0
+    try:
+        events = json.loads(b"[" + b",".join(lines) + b"]")
+        if all(isinstance(event, dict) for event in events):
+            return events, 0
+    except ValueError:
+        pass
+    events = []
+    malformed = 0
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            malformed += 1
+            continue
+        if isinstance(event, dict):
+            events.append(event)
+        else:
+            malformed += 1
+    return events, malformed
+
+
+def decode_binary(body: bytes) -> list[dict[str, Any]]:
+    """Decode a compact binary batch into metric event payloads."""
+    try:
+        if body[:4] != _MAGIC:
+            raise BatchFormatError("Bad magic; expected a metrics-bridge binary batch")
+        (string_count,) = _U16.unpack_from(body, 4)
+        offset = 6
+        strings: list[str] = []
+        for _ in range(string_count):
+            (length,) = _U16.unpack_from(body, offset)
+            offset += 2
+            strings.append(body[offset:offset + length].decode("utf-8"))
+            offset += length
+        (record_count,) = _U32.unpack_from(body, offset)
+        offset += 4
+        records = body[offset:]
+        if len(records) != record_count * _RECORD.size:
+            raise BatchFormatError(
+                f"Expected {record_count} records, got {len(records)} bytes of record data"
+            )
+        return [
+            {
+                "service": strings[service],
+                "endpoint": strings[endpoint],
+                "region": strings[region],
+                "status_code": status_code,
+                "latency_ms": latency_ms,
+                "error": bool(error),
+            }
+            for service, endpoint, region, status_code, latency_ms, error
+            in _RECORD.iter_unpack(records)
+        ]
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise BatchFormatError(str(e)) from e
+
+
+def encode_binary(events: list[dict[str, Any]]) -> bytes:
+    """Encode metric events as a compact binary batch, e.g. for load generators."""
+    index: dict[str, int] = {}
+    records = bytearray()
+    for event in events:
+        labels = []
+        for name, default in (("service", "unknown"), ("endpoint", "/"), ("region", "unknown")):
+            value = str(event.get(name, default))
+            labels.append(index.setdefault(value, len(index)))
+        records += _RECORD.pack(
+            *labels,
+            int(event.get("status_code", 0)),
+            float(event.get("latency_ms", 0)),
+            bool(event.get("error", False)),
+        )
+    out = bytearray(_MAGIC)
+    out += _U16.pack(len(index))
+    for value in index:
+        encoded = value.encode("utf-8")
+        out += _U16.pack(len(encoded)) + encoded
+    out += _U32.pack(len(events)) + records
+    return bytes(out)
+
+
+def media_type(content_type: str) -> str:
+    """Strip parameters such as charset from a Content-Type header value."""
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+def decode_batch(body: bytes, content_type: str) -> tuple[list[dict[str, Any]], int]:
+    """Decode an ingest body by content type, returning (events, malformed count)."""
+    kind = media_type(content_type)
+    if kind == BINARY_CONTENT_TYPE:
+        return decode_binary(body), 0
+    if kind == NDJSON_CONTENT_TYPE:
+        return decode_ndjson(body)
+    raise BatchFormatError(f"Unsupported content type {content_type!r}")
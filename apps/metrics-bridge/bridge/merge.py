@@ -0,0 +1,169 @@
+"""Cross-process merging of the bridge's per-service state.
+
+Counters and histograms add up across consumer processes and replicas, but
+quantile sketches, SLIs and the active-services gauge do not. Keyed by service
+(the workload simulator's default partition strategy), each service is consumed
+by one process, which exports it alone. Keyed by series or request, or unkeyed,
+a service spans partitions and every process would export a partial value.
+
+With `merge_topic` set, processes fold the quantile bins, SLI counts and
+service labels of what they consume into per-service partials and send them to
+`merge_topic` once per `merge_interval_seconds`, keyed by service. The process
+owning a service's partition of `merge_topic` feeds them into its trackers and
+alone exports the service's quantiles, SLIs and activity; when the partition
+moves, the previous owner drops that state. Merged counts land in the owner's
+current time slot, up to one interval after they were consumed.
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import structlog
+from confluent_kafka import KafkaException, Producer
+
+from bridge.config import Config
+from bridge.metrics import LATENCY_UPPER_BOUNDS
+from bridge.sketch import Bins, SketchMapping, merge_bins
+
+logger = structlog.get_logger(__name__)
+
+# `type` of a partial record on `merge_topic`
+PARTIAL_TYPE = "bridge_partial"
+
+
+@dataclass
+class Partial:
+    """What one process observed of a service over a merge interval."""
+
+    active: bool = False
+    # [total, errors, *bucket_counts], for services with an SLO
+    sli: Optional[list[int]] = None
+    # (endpoint, region) -> quantile sketch bins
+    series: dict[tuple[str, str], Bins] = field(default_factory=dict)
+
+
+class PartialAggregator:
+    """Per-service partials of one consumer process, built up until `drain`."""
+
+    def __init__(self, mapping: SketchMapping) -> None:
+        self._mapping = mapping
+        self._partials: dict[str, Partial] = {}
+
+    def _get(self, service: str) -> Partial:
+        partial = self._partials.get(service)
+        if partial is None:
+            partial = self._partials[service] = Partial()
+        return partial
+
+    def observe_service(self, service: str) -> None:
+        self._get(service).active = True
+
+    def observe_sli(self, service: str, total: int, errors: int, bucket_counts: list[int]) -> None:
+        partial = self._get(service)
+        if partial.sli is None:
+            partial.sli = [0] * (2 + len(bucket_counts))
+        for i, count in enumerate((total, errors, *bucket_counts)):
+            partial.sli[i] += count
+
+    def observe_quantiles(
+        self, key: tuple[str, ...], latencies: list[float], bins: Bins
+    ) -> None:
+        service, endpoint, region = key
+        counts = self._mapping.bins(latencies)
+        merge_bins(counts, bins)
+        merge_bins(self._get(service).series.setdefault((endpoint, region), {}), counts)
+
+    def drain(self) -> list[dict[str, Any]]:
+        """Partial records of everything observed since the last drain."""
+        drained, self._partials = self._partials, {}
+        return [
+            {
+                "type": PARTIAL_TYPE,
+                "service": service,
+                "active": partial.active,
+                "sli": partial.sli,
+                "relative_accuracy": self._mapping.relative_accuracy,
+                "series": [
+                    [endpoint, region, {str(index): n for index, n in bins.items()}]
+                    for (endpoint, region), bins in partial.series.items()
+                ],
+            }
+            for service, partial in drained.items()
+        ]
+
+
+def parse_partial(payload: dict[str, Any], mapping: SketchMapping) -> tuple[str, Partial]:
+    """The service and contents of a partial record.
+
+    Raises TypeError or ValueError unless it was sent by a process with the same
+    sketch mapping and histogram buckets.
+    """
+    service = payload["service"]
+    if not isinstance(service, str):
+        raise TypeError(f"Partial record service must be a string, got {service!r}")
+    if float(payload["relative_accuracy"]) != mapping.relative_accuracy:
+        raise ValueError("Partial record was sketched with a different relative accuracy")
+    partial = Partial(active=bool(payload.get("active")))
+    if payload.get("sli") is not None:
+        sli = partial.sli = [int(n) for n in payload["sli"]]
+        if len(sli) != 2 + len(LATENCY_UPPER_BOUNDS) or min(sli) < 0 or sli[1] > sli[0]:
+            raise ValueError("Partial record SLI counts do not add up")
+    for endpoint, region, raw_bins in payload["series"]:
+        bins = {int(index): int(n) for index, n in raw_bins.items()}
+        if not all(mapping.has_index(index) and n >= 0 for index, n in bins.items()):
+            raise ValueError("Partial record sketch bin out of range")
+        partial.series[(str(endpoint), str(region))] = bins
+    return service, partial
+
+
+class PartialMerger:
+    """Sends a consumer process's partials to `merge_topic` once per interval."""
+
+    def __init__(self, config: Config, mapping: SketchMapping) -> None:
+        self._config = config
+        self._aggregator = PartialAggregator(mapping)
+        self._started = time.monotonic()
+        self._producer = Producer({
+            "bootstrap.servers": config.kafka_brokers,
+            "client.id": "metrics-bridge-merger",
+            "linger.ms": 5,
+        })
+
+    def observe_service(self, service: str) -> None:
+        self._aggregator.observe_service(service)
+
+    def observe_sli(self, service: str, total: int, errors: int, bucket_counts: list[int]) -> None:
+        self._aggregator.observe_sli(service, total, errors, bucket_counts)
+
+    def observe_quantiles(
+        self, key: tuple[str, ...], latencies: list[float], bins: Bins
+    ) -> None:
+        self._aggregator.observe_quantiles(key, latencies, bins)
+
+    def due(self, now: float) -> bool:
+        return now - self._started >= self._config.merge_interval_seconds
+
+    def publish(self, now: Optional[float] = None) -> int:
+        """Send the partials observed since the last publish; returns how many were sent."""
+        self._started = time.monotonic() if now is None else now
+        sent = 0
+        for partial in self._aggregator.drain():
+            try:
+                self._producer.produce(
+                    topic=self._config.merge_topic,
+                    key=partial["service"].encode("utf-8"),
+                    value=json.dumps(partial).encode("utf-8"),
+                )
+                sent += 1
+            except (BufferError, KafkaException) as e:
+                logger.error(
+                    "Failed to publish partial", service=partial["service"], error=str(e)
+                )
+        self._producer.poll(0)
+        return sent
+
+    def close(self) -> None:
+        self.publish()
+        self._producer.flush(timeout=10)
@@ -1,13 +1,31 @@
-from typing import Any
+import math
+import os
+import sys
+import time
+from typing import Any, Optional
 
 from prometheus_client import Counter, Histogram, Gauge
 
-# Request latency histogram with SLO-friendly buckets (ms)
+from bridge.cardinality import CardinalityLimiter
+from bridge.config import Config
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# What a removed gauge child is set to in multiprocess mode, where values outlive
+# remove(): it loses to any live value under livemax and is dropped at exposition
+REMOVED_GAUGE_VALUE = -math.inf
+
+# SLO-friendly latency buckets (ms)
+LATENCY_BUCKETS = [10, 25, 50, 100, 200, 300, 500, 750, 1000, 2500, 5000]
+# Upper bounds as prometheus_client stores them, including the implicit +Inf bucket
+LATENCY_UPPER_BOUNDS = [float(b) for b in LATENCY_BUCKETS] + [float("inf")]
+
+# Request latency histogram
 REQUEST_LATENCY = Histogram(
     "workload_request_latency_ms",
     "HTTP request latency in milliseconds",
     ["service", "endpoint", "region"],
-    buckets=[10, 25, 50, 100, 200, 300, 500, 750, 1000, 2500, 5000],
+    buckets=LATENCY_BUCKETS,
 )
 
 # Request counters for golden signals
@@ -23,25 +41,218 @@ ERROR_TOTAL = Counter(
     ["service", "endpoint", "region"],
 )
 
-# Gauge for live service discovery
+# Gauge for live service discovery. Each service must be counted by one consumer process:
+# the one consuming it when records are keyed by service, otherwise the one merging it
+# (see bridge.merge).
 ACTIVE_SERVICES = Gauge(
     "workload_active_services",
     "Number of unique services emitting metrics",
+    multiprocess_mode="livesum",
+)
+
+
+# Cardinality guard accounting
+DROPPED_EVENTS = Counter(
+    "bridge_dropped_events_total",
+    "Metric events discarded by the bridge",
+    ["reason"],
+)
+
+OVERFLOW_EVENTS = Counter(
+    "bridge_overflow_events_total",
+    "Metric events folded into the overflow series after a series limit was reached",
+    ["metric"],
 )
 
+_limiter = CardinalityLimiter(Config())
+
+# Raw label tuples cached before the cache is reset, so hostile input can't grow it forever
+_CHILDREN_CACHE_MAX = 65536
+
+
+# (parent metric, exported name, resolved label values) of one registry child
+BoundSeries = tuple[Any, str, tuple[str, ...]]
+
+
+class SeriesChildren:
+    """Bound metric children for one (service, endpoint, region, status_code) series."""
+
+    __slots__ = ("bound", "errors", "last_seen", "latency", "overflow", "requests")
+
+    def __init__(
+        self,
+        latency: Histogram,
+        requests: Counter,
+        errors: Counter,
+        overflow: tuple[Counter, ...],
+        bound: tuple[BoundSeries, ...],
+    ) -> None:
+        self.latency = latency
+        self.requests = requests
+        self.errors = errors
+        # Overflow counters to bump for every event routed through this entry
+        self.overflow = overflow
+        # Registry children this entry writes to, for staleness expiry
+        self.bound = bound
+        self.last_seen = time.monotonic()
+
+
+# Cache of bound children keyed by the raw (service, endpoint, region, status_code)
+# payload values. `.labels()` validates, stringifies and looks up label values under
+# the parent metric's lock on every call; repeat series skip all of that, as well as
+# endpoint normalization and the cardinality check.
+_children_cache: dict[tuple[Any, ...], SeriesChildren] = {}
+
+# Every entry handed out by series_children() that may still own registry children,
+# keyed by the children it writes to. Outlives cache resets so that expiry can find
+# series whose cache entry is gone; a series cached again after a reset gets its
+# tracked entry back, so this is bounded by the series limits, not by raw labels.
+_tracked: dict[tuple[Any, ...], SeriesChildren] = {}
+
+
+def multiprocess_dir() -> Optional[str]:
+    return os.environ.get(MULTIPROC_DIR_ENV)
+
+
+def remove_gauge(gauge: Gauge, labels: tuple[str, ...]) -> None:
+    """Remove a gauge child, marking it `REMOVED_GAUGE_VALUE` first in multiprocess mode."""
+    if multiprocess_dir() is not None:
+        gauge.labels(*labels).set(REMOVED_GAUGE_VALUE)
+    gauge.remove(*labels)
+
+
+def configure_cardinality(config: Config) -> None:
+    """Apply series limits and endpoint normalization rules from config."""
+    global _limiter
+    _limiter = CardinalityLimiter(config)
+    _children_cache.clear()
+
+
+def _bind(
+    metric: Any,
+    name: str,
+    labels: tuple[str, ...],
+    overflow: list[Counter],
+    bound: list[BoundSeries],
+) -> Any:
+    labels, overflowed = _limiter.admit(name, labels)
+    if overflowed:
+        overflow.append(OVERFLOW_EVENTS.labels(name))
+    bound.append((metric, name, labels))
+    return metric.labels(*labels)
+
+
+def series_children(
+    service: Any, endpoint: Any, region: Any, status_code: Any
+) -> SeriesChildren | None:
+    """Return the cached bound metric children for a series, creating them on first use.
+
+    Returns None when the label values are rejected outright.
+    """
+    key = (service, endpoint, region, status_code)
+    children = _children_cache.get(key)
+    if children is not None:
+        return children
+
+    service, region, status = str(service), str(region), str(status_code)
+    endpoint = _limiter.normalize_endpoint(str(endpoint))
+    if not _limiter.is_valid(service, endpoint, region, status):
+        return None
+    service, endpoint, region = sys.intern(service), sys.intern(endpoint), sys.intern(region)
+    status = sys.intern(status)
+
+    overflow: list[Counter] = []
+    bound: list[BoundSeries] = []
+    series = (service, endpoint, region)
+    latency = _bind(REQUEST_LATENCY, "workload_request_latency_ms", series, overflow, bound)
+    requests = _bind(REQUEST_TOTAL, "workload_requests_total", (*series, status), overflow, bound)
+    errors = _bind(ERROR_TOTAL, "workload_errors_total", series, overflow, bound)
+    written = (latency, requests, errors, *overflow)
+    children = _tracked.get(written)
+    if children is None:
+        children = _tracked[written] = SeriesChildren(
+            latency, requests, errors, tuple(overflow), tuple(bound)
+        )
+    if len(_children_cache) >= _CHILDREN_CACHE_MAX:
+        _children_cache.clear()
+    _children_cache[key] = children
+    return children
+
+
+def expire_series(cutoff: float, limit: int | None = None) -> tuple[int, bool]:
+    """Remove registry series not written to since `cutoff` (a time.monotonic() value).
+
+    A registry child is only removed once every entry writing to it is idle, since
+    histogram, error and overflow children are shared between status codes. Must run
+    on the thread that records events. At most `limit` idle entries are handled per
+    call so a mass expiry can be spread between batches.
+
+    In multiprocess mode nothing is removed: counter and histogram values stay in the
+    process's mmap files after remove(), so the series would still be exported while
+    its series-limit slot was handed to another.
+
+    Returns the number of children removed and whether every idle entry was handled.
+    """
+    if multiprocess_dir() is not None:
+        return 0, True
+    idle = [written for written, s in _tracked.items() if s.last_seen < cutoff]
+    complete = limit is None or len(idle) <= limit
+    if not complete:
+        idle = idle[:limit]
+    if not idle:
+        return 0, True
+    stale = {_tracked.pop(written) for written in idle}
+    live = {(name, labels) for s in _tracked.values() for _, name, labels in s.bound}
+    removed = 0
+    for entry in stale:
+        for metric, name, labels in entry.bound:
+            if (name, labels) in live:
+                continue
+            live.add((name, labels))
+            try:
+                metric.remove(*labels)
+            except KeyError:
+                continue
+            _limiter.forget(name, labels)
+            removed += 1
+    for key, entry in list(_children_cache.items()):
+        if entry in stale:
+            del _children_cache[key]
+    return removed, complete
+
+
+def clear_series_cache() -> None:
+    """Drop all cached children, e.g. after series were removed from the registry."""
+    _children_cache.clear()
+
+
+def sample_weight(payload: dict[str, Any]) -> int:
+    """Requests a metric event stands for: its `sample_weight`, or 1 when unsampled.
+
+    Raises ValueError unless the weight is a positive integer.
+    """
+    weight = payload.get("sample_weight")
+    if weight is None:
+        return 1
+    if (
+        isinstance(weight, bool)
+        or not isinstance(weight, (int, float))
+        or not 1 <= weight < float("inf")
+        or weight != int(weight)
+    ):
+        raise ValueError(f"sample_weight must be a positive integer, got {weight!r}")
+    return int(weight)
+
+
 
 def record_metric_event(payload: dict[str, Any]) -> None:
-    """Update Prometheus metrics from a raw Kafka metric event payload."""
-    service = payload.get("service", "unknown")
-    endpoint = payload.get("endpoint", "/")
-    region = payload.get("region", "unknown")
-    status_code = str(payload.get("status_code", 0))
-    latency_ms = float(payload.get("latency_ms", 0))
-    error = bool(payload.get("error", False))
-
-    REQUEST_LATENCY.labels(service=service, endpoint=endpoint, region=region).observe(latency_ms)
-    REQUEST_TOTAL.labels(
-        service=service, endpoint=endpoint, region=region, status_code=status_code
-    ).inc()
-    if error:
-        ERROR_TOTAL.labels(service=service, endpoint=endpoint, region=region).inc()
+    """Update Prometheus metrics from a raw Kafka metric event payload.
+
+    A one-event `MetricBatch`, the path the consumer records batches through.
+    """
+    # bridge.aggregator builds on this module
+    from bridge.aggregator import MetricBatch
+
+    batch = MetricBatch()
+    batch.add(payload)
+    batch.apply()
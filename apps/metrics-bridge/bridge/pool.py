@@ -0,0 +1,172 @@
+import glob
+import math
+import multiprocessing
+import os
+import signal
+import threading
+from collections.abc import Iterator
+from multiprocessing.process import BaseProcess
+from multiprocessing.sharedctypes import SynchronizedArray
+from types import FrameType
+from typing import Any, Optional
+
+import structlog
+from prometheus_client import REGISTRY, CollectorRegistry
+from prometheus_client.metrics_core import Metric
+from prometheus_client.multiprocess import MultiProcessCollector, mark_process_dead
+
+from bridge.config import Config
+from bridge.consumer import MetricsBridgeConsumer
+from bridge.health import IngestionState, readiness_of
+from bridge.metrics import MULTIPROC_DIR_ENV, REMOVED_GAUGE_VALUE, multiprocess_dir
+
+logger = structlog.get_logger(__name__)
+
+# How often workers copy their ingestion state to the parent for readiness
+STATE_PUBLISH_SECONDS = 1.0
+_STATE_FIELDS = len(IngestionState._fields)
+
+
+class _LiveCollector:
+    """Merged per-process values, without gauge children marked removed (see remove_gauge)."""
+
+    def __init__(self, path: str) -> None:
+        self._collector = MultiProcessCollector(None, path=path)  # type: ignore[no-untyped-call]
+
+    def collect(self) -> Iterator[Metric]:
+        for family in self._collector.collect():  # type: ignore[no-untyped-call]
+            if family.type == "gauge":
+                family.samples = [s for s in family.samples if s.value != REMOVED_GAUGE_VALUE]
+            yield family
+
+
+def exposition_registry() -> CollectorRegistry:
+    """Registry to serve on /metrics: the merged per-process view in multiprocess mode."""
+    path = multiprocess_dir()
+    if path is None:
+        return REGISTRY
+    registry = CollectorRegistry()
+    registry.register(_LiveCollector(path))  # type: ignore[arg-type]
+    return registry
+
+
+def _publish_state(states: "SynchronizedArray[float]", index: int, state: IngestionState) -> None:
+    """Write one worker's state into its slot; a missing last event is stored as NaN."""
+    last_event_ts = math.nan if state.last_event_ts is None else state.last_event_ts
+    start = index * _STATE_FIELDS
+    with states.get_lock():
+        states[start : start + _STATE_FIELDS] = [
+            state.assigned,
+            state.lag,
+            last_event_ts,
+            state.rate,
+        ]
+
+
+def _read_states(states: "SynchronizedArray[float]") -> list[IngestionState]:
+    with states.get_lock():
+        values = states[:]
+    result = []
+    for start in range(0, len(values), _STATE_FIELDS):
+        assigned, lag, last_event_ts, rate = values[start : start + _STATE_FIELDS]
+        result.append(
+            IngestionState(
+                int(assigned),
+                int(lag),
+                None if math.isnan(last_event_ts) else last_event_ts,
+                rate,
+            )
+        )
+    return result
+
+
+def _worker_main(config: Config, index: int, states: "SynchronizedArray[float]") -> None:
+    """Entry point of a consumer worker process."""
+    stop = threading.Event()
+
+    def handle_signal(signum: int, frame: Optional[FrameType]) -> None:
+        stop.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    # Ctrl+C reaches the whole process group; let the parent drive shutdown
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    consumer = MetricsBridgeConsumer(config)
+    consumer.start()
+    logger.info("Consumer worker started", worker=index, pid=os.getpid())
+    while not stop.wait(STATE_PUBLISH_SECONDS):
+        _publish_state(states, index, consumer.ingestion_state())
+    consumer.stop()
+
+
+class ConsumerPool:
+    """Runs N bridge consumers as separate processes in the same consumer group.
+
+    A single consumer thread is bound by the GIL; separate processes let ingest scale
+    with cores while Kafka spreads partitions across them. Metric values live in
+    prometheus_client's multiprocess mmap files, which the HTTP process merges at
+    scrape time. Series limits and the label cache apply per worker process, and
+    idle series are not expired (see expire_series).
+    """
+
+    def __init__(self, config: Config) -> None:
+        path = multiprocess_dir()
+        if path is None:
+            raise ValueError(
+                f"{MULTIPROC_DIR_ENV} must be set before startup to run "
+                f"{config.consumer_processes} consumer processes"
+            )
+        self._config = config
+        self._path = path
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: list[BaseProcess] = []
+        # Per-worker IngestionState slots; zero assigned partitions until a worker reports
+        self._states = self._context.Array("d", config.consumer_processes * _STATE_FIELDS)
+        for index in range(config.consumer_processes):
+            _publish_state(self._states, index, IngestionState(0, 0, None, 0.0))
+
+    def _clear_stale_files(self) -> None:
+        """Remove values left behind by previous runs, keeping this process's own files."""
+        own_suffix = f"_{os.getpid()}.db"
+        for path in glob.glob(os.path.join(self._path, "*.db")):
+            if not path.endswith(own_suffix):
+                os.remove(path)
+
+    def start(self) -> None:
+        os.makedirs(self._path, exist_ok=True)
+        self._clear_stale_files()
+        for index in range(self._config.consumer_processes):
+            process = self._context.Process(
+                target=_worker_main,
+                args=(self._config, index, self._states),
+                name=f"kafka-consumer-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        logger.info(
+            "Metrics bridge consumer pool started",
+            processes=len(self._processes),
+            topic=self._config.metrics_topic,
+        )
+
+    def readiness(self) -> tuple[bool, dict[str, Any]]:
+        """Ready while every worker is alive and the ingestion rules hold across workers."""
+        alive = sum(1 for p in self._processes if p.is_alive())
+        details: dict[str, Any] = {"workers": len(self._processes), "workers_alive": alive}
+        if not self._processes or alive < len(self._processes):
+            return False, {**details, "reason": "consumer workers not running"}
+        ready, ingestion = readiness_of(
+            _read_states(self._states), self._config.readiness_max_event_age_seconds
+        )
+        return ready, {**details, **ingestion}
+
+    def stop(self) -> None:
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            process.join(timeout=10)
+            if process.pid is not None:
+                mark_process_dead(process.pid, self._path)  # type: ignore[no-untyped-call]
+        self._processes.clear()
+        logger.info("Metrics bridge consumer pool stopped")
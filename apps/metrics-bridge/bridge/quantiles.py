@@ -0,0 +1,187 @@
+import math
+from collections import deque
+
+from prometheus_client import Gauge
+
+from bridge.config import Config
+from bridge.metrics import remove_gauge
+from bridge.sketch import Bins, SketchMapping, merge_bins, quantiles, subtract_bins
+
+# Quantiles exported for every window, with their label values
+QUANTILES = [0.5, 0.95, 0.99, 0.999]
+_QUANTILE_LABELS = [str(q) for q in QUANTILES]
+
+# Each series and service must be exported by one consumer process: the one consuming it
+# when records are keyed by service, otherwise the one merging it (see bridge.merge).
+LATENCY_QUANTILE = Gauge(
+    "workload_request_latency_quantile_ms",
+    "Request latency quantiles over a rolling window, from a streaming sketch",
+    ["service", "endpoint", "region", "window", "quantile"],
+    multiprocess_mode="livemax",
+)
+
+SERVICE_LATENCY_QUANTILE = Gauge(
+    "workload_service_latency_quantile_ms",
+    "Request latency quantiles per service over a rolling window, across endpoints and regions",
+    ["service", "window", "quantile"],
+    multiprocess_mode="livemax",
+)
+
+_Slot = tuple[int, Bins]
+
+
+def window_label(seconds: int) -> str:
+    """Prometheus-style duration label for a window, e.g. 300 -> "5m"."""
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds % size == 0:
+            return f"{seconds // size}{unit}"
+    return f"{seconds}s"
+
+
+class RollingSketch:
+    """Sketch bins for the last few time slots, summed per rolling window.
+
+    Counts accumulate in the current slot only. Once time moves past it the slot is
+    sealed: its counts are added to the running total of every window, and
+    subtracted again when the slot ages out of that window. Reading a window merges
+    just its total and the current slot.
+    """
+
+    __slots__ = ("_current", "_windows")
+
+    def __init__(self, spans: list[int]) -> None:
+        self._current: _Slot | None = None
+        # (span in slots, sealed slots covered, running total) per window
+        self._windows: list[tuple[int, deque[_Slot], Bins]] = [
+            (span, deque(), {}) for span in spans
+        ]
+
+    def add(self, slot: int, bins: Bins) -> None:
+        if self._current is not None and self._current[0] != slot:
+            self._seal(self._current)
+        if self._current is None:
+            self._current = (slot, {})
+        merge_bins(self._current[1], bins)
+
+    def _seal(self, current: _Slot) -> None:
+        for _, covered, total in self._windows:
+            covered.append(current)
+            merge_bins(total, current[1])
+        self._current = None
+
+    def advance(self, slot: int) -> None:
+        """Seal a finished slot and drop slots that have aged out of each window."""
+        if self._current is not None and self._current[0] < slot:
+            self._seal(self._current)
+        for span, covered, total in self._windows:
+            while covered and covered[0][0] <= slot - span:
+                subtract_bins(total, covered.popleft()[1])
+
+    def totals(self) -> list[Bins]:
+        if self._current is None:
+            return [total for _, _, total in self._windows]
+        merged = []
+        for _, _, total in self._windows:
+            window = dict(total)
+            merge_bins(window, self._current[1])
+            merged.append(window)
+        return merged
+
+    def is_empty(self) -> bool:
+        return self._current is None and not any(covered for _, covered, _ in self._windows)
+
+
+class QuantileTracker:
+    """Keeps a rolling quantile sketch per (service, endpoint, region) series.
+
+    `MetricBatch` hands over each series' latencies once per batch, and they are
+    binned in bulk into the current time slot. Quantile gauges are recomputed
+    on the consumer thread once per refresh interval; series whose longest window
+    is empty are dropped along with their gauges.
+    """
+
+    def __init__(self, config: Config) -> None:
+        self._mapping = SketchMapping(config.sketch_relative_accuracy)
+        self._slot_seconds = config.quantile_slot_seconds
+        windows = sorted(set(config.quantile_windows_seconds))
+        self._window_labels = [window_label(w) for w in windows]
+        self._spans = [max(1, math.ceil(w / self._slot_seconds)) for w in windows]
+        self._refresh_interval = config.quantile_refresh_interval_seconds
+        self._next_refresh = 0.0
+        # (service, endpoint, region) -> sketch
+        self._series: dict[tuple[str, ...], RollingSketch] = {}
+        self._exported: set[tuple[str, ...]] = set()
+        self._exported_services: set[tuple[str, ...]] = set()
+
+    @property
+    def mapping(self) -> SketchMapping:
+        return self._mapping
+
+    def observe(
+        self,
+        key: tuple[str, ...],
+        latencies: list[float],
+        now: float,
+        bins: Bins | None = None,
+    ) -> None:
+        """Add raw `latencies` and, optionally, counts already binned with `mapping`."""
+        sketch = self._series.get(key)
+        if sketch is None:
+            sketch = self._series[key] = RollingSketch(self._spans)
+        counts = self._mapping.bins(latencies)
+        if bins:
+            merge_bins(counts, bins)
+        sketch.add(int(now // self._slot_seconds), counts)
+
+    def maybe_refresh(self, now: float) -> None:
+        if now >= self._next_refresh:
+            self.refresh(now)
+            self._next_refresh = now + self._refresh_interval
+
+    def refresh(self, now: float) -> None:
+        """Recompute every quantile gauge and remove those of series gone idle."""
+        slot = int(now // self._slot_seconds)
+        exported: set[tuple[str, ...]] = set()
+        service_bins: dict[tuple[str, str], Bins] = {}
+        for key, sketch in list(self._series.items()):
+            sketch.advance(slot)
+            if sketch.is_empty():
+                del self._series[key]
+                continue
+            for window, bins in zip(self._window_labels, sketch.totals()):
+                merge_bins(service_bins.setdefault((key[0], window), {}), bins)
+                self._export(LATENCY_QUANTILE, (*key, window), bins, exported)
+
+        exported_services: set[tuple[str, ...]] = set()
+        for (service, window), bins in service_bins.items():
+            self._export(SERVICE_LATENCY_QUANTILE, (service, window), bins, exported_services)
+
+        for labels in self._exported - exported:
+            remove_gauge(LATENCY_QUANTILE, labels)
+        for labels in self._exported_services - exported_services:
+            remove_gauge(SERVICE_LATENCY_QUANTILE, labels)
+        self._exported = exported
+        self._exported_services = exported_services
+
+    def forget(self, service: str) -> None:
+        """Drop a service's sketches and gauges, e.g. once another process merges it."""
+        for key in [k for k in self._series if k[0] == service]:
+            del self._series[key]
+        for gauge, exported in (
+            (LATENCY_QUANTILE, self._exported),
+            (SERVICE_LATENCY_QUANTILE, self._exported_services),
+        ):
+            stale = [labels for labels in exported if labels[0] == service]
+            for labels in stale:
+                remove_gauge(gauge, labels)
+                exported.discard(labels)
+
+    def _export(
+        self, gauge: Gauge, labels: tuple[str, ...], bins: Bins, exported: set[tuple[str, ...]]
+    ) -> None:
+        values = quantiles(bins, self._mapping, QUANTILES)
+        if values is None:
+            return
+        for quantile, value in zip(_QUANTILE_LABELS, values):
+            gauge.labels(*labels, quantile).set(value)
+            exported.add((*labels, quantile))
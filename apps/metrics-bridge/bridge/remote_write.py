@@ -0,0 +1,238 @@
+import http.client
+import math
+import struct
+import threading
+import time
+from collections import deque
+from typing import Optional
+from urllib.parse import urlsplit
+
+import structlog
+from prometheus_client import CollectorRegistry, Counter, Gauge
+
+from bridge import snappy
+from bridge.config import Config
+
+logger = structlog.get_logger(__name__)
+
+REMOTE_WRITE_SAMPLES = Counter(
+    "bridge_remote_write_samples_total",
+    "Samples handed to the remote-write queue",
+)
+
+REMOTE_WRITE_REQUESTS = Counter(
+    "bridge_remote_write_requests_total",
+    "Remote-write requests by outcome",
+    ["outcome"],
+)
+
+REMOTE_WRITE_QUEUE = Gauge(
+    "bridge_remote_write_queue_requests",
+    "Encoded remote-write requests waiting to be sent",
+)
+
+# Samples queued per tick by default when snappy compression runs in pure Python,
+# about 0.4 s of CPU per tick
+FALLBACK_MAX_SAMPLES_PER_TICK = 10000
+
+# (sorted label pairs including __name__, value)
+Sample = tuple[tuple[tuple[str, str], ...], float]
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _field(number: int, payload: bytes) -> bytes:
+    """Length-delimited protobuf field."""
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+
+def encode_write_request(samples: list[Sample], timestamp_ms: int) -> bytes:
+    """Encode a prometheus.WriteRequest protobuf with one sample per time series.
+
+    The schema is small and fixed, so it is written by hand rather than pulling in
+    a protobuf runtime and generated code.
+    """
+    sample_tail = b"\x10" + _varint(timestamp_ms)
+    out = bytearray()
+    for labels, value in samples:
+        series = bytearray()
+        for name, label_value in labels:
+            series += _field(1, _field(1, name.encode()) + _field(2, label_value.encode()))
+        series += _field(2, b"\x09" + struct.pack("<d", value) + sample_tail)
+        out += _field(1, bytes(series))
+    return bytes(out)
+
+
+def collect_samples(registry: CollectorRegistry) -> list[Sample]:
+    samples: list[Sample] = []
+    for family in registry.collect():
+        for sample in family.samples:
+            if sample.name.endswith("_created"):
+                continue
+            labels = tuple(sorted({**sample.labels, "__name__": sample.name}.items()))
+            samples.append((labels, sample.value))
+    return samples
+
+
+class RemoteWriteExporter:
+    """Pushes the registry to a Prometheus remote-write endpoint on an interval.
+
+    Only samples whose value changed since they were last queued are sent, plus a
+    periodic resend of unchanged series so receivers don't mark them stale. Encoded
+    requests wait in a bounded queue and are retried in order; when the queue is
+    full the oldest request is dropped. With `max_samples_per_tick`, the samples
+    sent longest ago go first and the rest wait for later ticks.
+    """
+
+    def __init__(self, config: Config, registry: CollectorRegistry) -> None:
+        url = urlsplit(config.remote_write_url)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError(f"Invalid remote_write_url: {config.remote_write_url!r}")
+        self._config = config
+        self._registry = registry
+        self._url = url
+        self._path = (url.path or "/") + (f"?{url.query}" if url.query else "")
+        self._connection: Optional[http.client.HTTPConnection] = None
+        self._queue: deque[bytes] = deque()
+        self._last_sent: dict[tuple[tuple[str, str], ...], tuple[float, float]] = {}
+        self.max_samples_per_tick = config.remote_write_max_samples_per_tick or (
+            0 if snappy.NATIVE else FALLBACK_MAX_SAMPLES_PER_TICK
+        )
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True, name="remote-write")
+        self._thread.start()
+        logger.info("Remote-write exporter started", url=self._config.remote_write_url)
+        if not snappy.NATIVE:
+            logger.warning(
+                "cramjam is not installed; remote-write compresses in pure Python",
+                max_samples_per_tick=self.max_samples_per_tick,
+            )
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self._config.remote_write_timeout_seconds)
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+        logger.info("Remote-write exporter stopped", queued=len(self._queue))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._config.remote_write_interval_seconds):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.exception("Remote-write tick failed", error=str(e))
+
+    def tick(self) -> None:
+        self.enqueue(self.select(collect_samples(self._registry), time.monotonic()))
+        self.flush()
+
+    def select(self, samples: list[Sample], now: float) -> list[Sample]:
+        """Keep changed samples and unchanged ones due for a resend."""
+        resend_after = self._config.remote_write_resend_seconds
+        selected: list[Sample] = []
+        last_sent: dict[tuple[tuple[str, str], ...], tuple[float, float]] = {}
+        for labels, value in samples:
+            previous = self._last_sent.get(labels)
+            if (
+                previous is None
+                or now - previous[1] >= resend_after
+                or (previous[0] != value and not (math.isnan(value) and math.isnan(previous[0])))
+            ):
+                selected.append((labels, value))
+                last_sent[labels] = (value, now)
+            else:
+                last_sent[labels] = previous
+        limit = self.max_samples_per_tick
+        if limit and len(selected) > limit:
+            selected.sort(key=lambda sample: self._last_sent.get(sample[0], (0.0, -math.inf))[1])
+            # Deferred samples keep their previous state, so they are selected again
+            for labels, _ in selected[limit:]:
+                previous = self._last_sent.get(labels)
+                if previous is None:
+                    del last_sent[labels]
+                else:
+                    last_sent[labels] = previous
+            selected = selected[:limit]
+        # Rebuilt from the current collection, so removed series are forgotten
+        self._last_sent = last_sent
+        return selected
+
+    def enqueue(self, samples: list[Sample]) -> None:
+        if not samples:
+            return
+        timestamp_ms = int(time.time() * 1000)
+        size = self._config.remote_write_max_samples_per_request
+        for i in range(0, len(samples), size):
+            chunk = samples[i:i + size]
+            payload = snappy.compress(encode_write_request(chunk, timestamp_ms))
+            if len(self._queue) >= self._config.remote_write_queue_max_requests:
+                self._queue.popleft()
+                REMOTE_WRITE_REQUESTS.labels("dropped").inc()
+            self._queue.append(payload)
+            REMOTE_WRITE_SAMPLES.inc(len(chunk))
+        REMOTE_WRITE_QUEUE.set(len(self._queue))
+
+    def flush(self) -> None:
+        """Send queued requests in order, stopping at the first retryable failure."""
+        while self._queue:
+            status = self._send(self._queue[0])
+            if status is None or status == 429 or status >= 500:
+                REMOTE_WRITE_REQUESTS.labels("retried").inc()
+                break
+            self._queue.popleft()
+            if status >= 400:
+                REMOTE_WRITE_REQUESTS.labels("rejected").inc()
+                logger.warning("Remote-write request rejected", status=status)
+            else:
+                REMOTE_WRITE_REQUESTS.labels("success").inc()
+        REMOTE_WRITE_QUEUE.set(len(self._queue))
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._connection is None:
+            cls = (
+                http.client.HTTPSConnection if self._url.scheme == "https"
+                else http.client.HTTPConnection
+            )
+            self._connection = cls(
+                self._url.hostname or "",
+                self._url.port,
+                timeout=self._config.remote_write_timeout_seconds,
+            )
+        return self._connection
+
+    def _send(self, payload: bytes) -> Optional[int]:
+        """POST one request over the kept-alive connection; None on transport failure."""
+        try:
+            connection = self._connect()
+            connection.request("POST", self._path, body=payload, headers={
+                "Content-Encoding": "snappy",
+                "Content-Type": "application/x-protobuf",
+                "X-Prometheus-Remote-Write-Version": "0.1.0",
+                "User-Agent": "metrics-bridge",
+            })
+            response = connection.getresponse()
+            response.read()
+            if response.will_close:
+                self._reset_connection()
+            return response.status
+        except (OSError, http.client.HTTPException) as e:
+            logger.warning("Remote-write send failed", error=str(e))
+            self._reset_connection()
+            return None
+
+    def _reset_connection(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
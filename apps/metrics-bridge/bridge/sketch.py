@@ -0,0 +1,102 @@
+import math
+import sys
+from collections import Counter
+from collections.abc import Iterable
+
+# Bin index of values too small to map onto the logarithmic scale; sorts below every real bin
+ZERO_BIN = -(1 << 30)
+# Smallest value given its own logarithmic bin (ms); anything lower counts as zero
+_MIN_VALUE = 1e-3
+
+Bins = dict[int, int]
+
+
+class SketchMapping:
+    """Maps values onto logarithmic bins with a bounded relative error.
+
+    Bin `i` covers `(gamma**(i-1), gamma**i]`; reporting its midpoint puts every
+    quantile estimate within `relative_accuracy` of a value actually observed in
+    that bin, regardless of the latency range. This is the DDSketch mapping.
+    """
+
+    def __init__(self, relative_accuracy: float) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy must be in (0, 1), got {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._multiplier = 1 / math.log(self.gamma)
+        # Range of bins `index()` can produce whose values `value()` can represent
+        self.min_index = math.ceil(math.log(_MIN_VALUE) * self._multiplier)
+        self.max_index = math.floor(math.log(sys.float_info.max / 2) * self._multiplier)
+
+    def index(self, value: float) -> int:
+        if value <= _MIN_VALUE:
+            return ZERO_BIN
+        return math.ceil(math.log(value) * self._multiplier)
+
+    def bins(self, values: Iterable[float]) -> Bins:
+        """Count `values` per bin; the bulk equivalent of calling `index()` per value."""
+        log, ceil, multiplier = math.log, math.ceil, self._multiplier
+        return Counter([
+            ceil(log(v) * multiplier) if v > _MIN_VALUE else ZERO_BIN for v in values
+        ])
+
+    def has_index(self, index: int) -> bool:
+        return index == ZERO_BIN or self.min_index <= index <= self.max_index
+
+    def value(self, index: int) -> float:
+        if index == ZERO_BIN:
+            return 0.0
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+
+def merge_bins(into: Bins, other: Bins) -> None:
+    for index, count in other.items():
+        into[index] = into.get(index, 0) + count
+
+
+def subtract_bins(into: Bins, other: Bins) -> None:
+    """Remove counts previously merged in; bins that reach zero are dropped."""
+    for index, count in other.items():
+        remaining = into[index] - count
+        if remaining:
+            into[index] = remaining
+        else:
+            del into[index]
+
+
+def rebin(bins: Bins, source: SketchMapping, target: SketchMapping) -> Bins:
+    """Move counts binned with `source` onto `target`'s bins.
+
+    Bins are shared as-is when the mappings match; otherwise each bin's
+    representative value is re-binned, which adds `source`'s error to `target`'s.
+    """
+    if source.gamma == target.gamma:
+        return bins
+    rebinned: Bins = {}
+    for index, count in bins.items():
+        target_index = target.index(source.value(index))
+        rebinned[target_index] = rebinned.get(target_index, 0) + count
+    return rebinned
+
+
+def quantiles(
+    bins: Bins, mapping: SketchMapping, qs: list[float]
+) -> list[float] | None:
+    """Estimate the quantiles `qs` (ascending) in one pass over the bins.
+
+    Returns None for an empty sketch.
+    """
+    total = sum(bins.values())
+    if not total:
+        return None
+    ranks = [q * (total - 1) for q in qs]
+    results: list[float] = []
+    cumulative = 0
+    for index in sorted(bins):
+        cumulative += bins[index]
+        while len(results) < len(ranks) and cumulative > ranks[len(results)]:
+            results.append(mapping.value(index))
+        if len(results) == len(ranks):
+            break
+    return results
@@ -0,0 +1,227 @@
+import glob
+import os
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import structlog
+import yaml
+from prometheus_client import Gauge
+
+from bridge.config import Config
+from bridge.metrics import LATENCY_UPPER_BOUNDS, remove_gauge
+from bridge.quantiles import window_label
+
+logger = structlog.get_logger(__name__)
+
+# Counts are kept per SLO-tracked service, so these stay small. Each service must be
+# exported by one consumer process: the one consuming it when records are keyed by
+# service, otherwise the one merging it (see bridge.merge).
+SLI_ERROR_RATIO = Gauge(
+    "sli_error_ratio",
+    "Fraction of bad events over a rolling window, per SLO",
+    ["service", "slo", "window"],
+    multiprocess_mode="livemax",
+)
+
+SLO_BURN_RATE = Gauge(
+    "slo_burn_rate",
+    "Error budget burn rate over a rolling window: error ratio / (1 - target)",
+    ["service", "slo", "window"],
+    multiprocess_mode="livemax",
+)
+
+_MINUTE = 60
+SLI_TYPES = ("availability", "latency")
+
+
+@dataclass(frozen=True)
+class SloDefinition:
+    """A ratio SLO the bridge can evaluate from the events it aggregates."""
+
+    service: str
+    name: str
+    target: float  # percent, e.g. 99.9
+    sli_type: str  # "availability" (bad = errored) or "latency" (bad = slower than threshold)
+    threshold_ms: Optional[float] = None
+
+    @property
+    def error_budget(self) -> float:
+        return 1 - self.target / 100
+
+
+def _parse_file(path: str) -> list[SloDefinition]:
+    with open(path) as f:
+        document: dict[str, Any] = yaml.safe_load(f) or {}
+    service = document["service"]
+    definitions = []
+    for slo in document.get("slos", []):
+        sli = slo.get("sli", {})
+        sli_type = sli.get("type")
+        if sli_type not in SLI_TYPES:
+            logger.info(
+                "Skipping SLO without a ratio SLI type", service=service, slo=slo.get("name")
+            )
+            continue
+        threshold = sli.get("threshold_ms")
+        if sli_type == "latency":
+            if threshold is None:
+                raise ValueError(f"{path}: latency SLO {slo['name']!r} needs sli.threshold_ms")
+            if float(threshold) not in LATENCY_UPPER_BOUNDS:
+                logger.warning(
+                    "Latency SLO threshold is not a histogram bucket bound; "
+                    "events up to the next lower bound count as good",
+                    service=service,
+                    slo=slo["name"],
+                    threshold_ms=threshold,
+                )
+        if not 0 < float(slo["target"]) < 100:
+            raise ValueError(f"{path}: SLO {slo['name']!r} target must be between 0 and 100")
+        definitions.append(SloDefinition(
+            service=service,
+            name=slo["name"],
+            target=float(slo["target"]),
+            sli_type=sli_type,
+            threshold_ms=None if threshold is None else float(threshold),
+        ))
+    return definitions
+
+
+def load_slo_definitions(directory: str) -> list[SloDefinition]:
+    """Load every ratio SLO from the `*.yaml` files in `directory` (docs/slos layout)."""
+    definitions: list[SloDefinition] = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.yaml"))):
+        definitions.extend(_parse_file(path))
+    return definitions
+
+
+class MinuteRing:
+    """Per-minute bad/total counters with running sums over several trailing windows.
+
+    Advancing a minute subtracts the minute that leaves each window from that
+    window's sums, so reading any window is O(1) whatever its length.
+    """
+
+    __slots__ = ("_bad", "_bad_sums", "_minute", "_spans", "_total", "_total_sums")
+
+    def __init__(self, spans: list[int]) -> None:
+        size = max(spans)
+        self._bad = array("q", bytes(8 * size))
+        self._total = array("q", bytes(8 * size))
+        self._spans = spans
+        self._bad_sums = [0] * len(spans)
+        self._total_sums = [0] * len(spans)
+        self._minute: Optional[int] = None
+
+    def advance(self, minute: int) -> None:
+        if self._minute is None:
+            self._minute = minute
+            return
+        size = len(self._total)
+        if minute - self._minute >= size:
+            self._bad = array("q", bytes(8 * size))
+            self._total = array("q", bytes(8 * size))
+            self._bad_sums = [0] * len(self._spans)
+            self._total_sums = [0] * len(self._spans)
+            self._minute = minute
+            return
+        for current in range(self._minute + 1, minute + 1):
+            for i, span in enumerate(self._spans):
+                leaving = (current - span) % size
+                self._bad_sums[i] -= self._bad[leaving]
+                self._total_sums[i] -= self._total[leaving]
+            slot = current % size
+            self._bad[slot] = 0
+            self._total[slot] = 0
+        self._minute = max(self._minute, minute)
+
+    def add(self, minute: int, bad: int, total: int) -> None:
+        self.advance(minute)
+        slot = minute % len(self._total)
+        self._bad[slot] += bad
+        self._total[slot] += total
+        for i in range(len(self._spans)):
+            self._bad_sums[i] += bad
+            self._total_sums[i] += total
+
+    def sums(self) -> list[tuple[int, int]]:
+        """(bad, total) per window, in the order of the spans."""
+        return list(zip(self._bad_sums, self._total_sums))
+
+
+class SliTracker:
+    """Maintains SLIs for the SLOs in `slo_definitions_dir` from aggregated batches.
+
+    Replaces range queries over raw counters (e.g. `rate(...[30d])`) with per-minute
+    ring buffers updated once per batch and series. State lives in memory, so
+    windows longer than the bridge's uptime cover only the events seen since start.
+    """
+
+    def __init__(self, config: Config, definitions: list[SloDefinition]) -> None:
+        windows = sorted(set(config.slo_windows_seconds))
+        self._window_labels = [window_label(w) for w in windows]
+        spans = self._spans = [max(1, w // _MINUTE) for w in windows]
+        self._refresh_interval = config.slo_refresh_interval_seconds
+        self._next_refresh = 0.0
+        self._exported: set[tuple[str, str, str]] = set()
+        # service -> [(definition, first bad bucket index or None, ring)]
+        self._slos: dict[str, list[tuple[SloDefinition, Optional[int], MinuteRing]]] = {}
+        for definition in definitions:
+            cut = None
+            if definition.sli_type == "latency" and definition.threshold_ms is not None:
+                cut = bisect_right(LATENCY_UPPER_BOUNDS, definition.threshold_ms)
+            self._slos.setdefault(definition.service, []).append(
+                (definition, cut, MinuteRing(spans))
+            )
+
+    def observe(
+        self, service: Any, total: int, errors: int, bucket_counts: list[int], now: float
+    ) -> None:
+        """Record one series' batch delta; services without an SLO are ignored."""
+        slos = self._slos.get(service)
+        if slos is None:
+            return
+        minute = int(now // _MINUTE)
+        for _, cut, ring in slos:
+            bad = errors if cut is None else sum(bucket_counts[cut:])
+            ring.add(minute, bad, total)
+
+    def tracks(self, service: Any) -> bool:
+        return service in self._slos
+
+    def forget(self, service: str) -> None:
+        """Reset a service's rings and drop its gauges, e.g. once another process merges it."""
+        slos = self._slos.get(service, [])
+        for i, (definition, cut, _) in enumerate(slos):
+            slos[i] = (definition, cut, MinuteRing(self._spans))
+        stale = [labels for labels in self._exported if labels[0] == service]
+        for labels in stale:
+            remove_gauge(SLI_ERROR_RATIO, labels)
+            remove_gauge(SLO_BURN_RATE, labels)
+            self._exported.discard(labels)
+
+    def maybe_refresh(self, now: float) -> None:
+        if now >= self._next_refresh:
+            self.refresh(now)
+            self._next_refresh = now + self._refresh_interval
+
+    def refresh(self, now: float) -> None:
+        """Advance every ring to the current minute and export the window gauges."""
+        minute = int(now // _MINUTE)
+        for service, slos in self._slos.items():
+            for definition, _, ring in slos:
+                ring.advance(minute)
+                for window, (bad, total) in zip(self._window_labels, ring.sums()):
+                    labels = (service, definition.name, window)
+                    if not total:
+                        # No traffic left in the window: drop the gauges rather than report 0
+                        if labels in self._exported:
+                            remove_gauge(SLI_ERROR_RATIO, labels)
+                            remove_gauge(SLO_BURN_RATE, labels)
+                            self._exported.discard(labels)
+                        continue
+                    ratio = bad / total
+                    SLI_ERROR_RATIO.labels(*labels).set(ratio)
+                    SLO_BURN_RATE.labels(*labels).set(ratio / definition.error_budget)
+                    self._exported.add(labels)
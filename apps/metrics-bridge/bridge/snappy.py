@@ -0,0 +1,140 @@
+"""Raw (unframed) snappy block compression for remote-write bodies.
+
+Prometheus remote-write bodies must be snappy-compressed. `compress` uses cramjam's
+native encoder when it is installed. Otherwise it falls back to the pure-Python
+encoder here, which holds the GIL for roughly 40 ms per 1000 samples. That time
+comes out of the consume loop, so without cramjam the exporter limits the samples
+it queues per tick (see `Config.remote_write_max_samples_per_tick`).
+"""
+
+# Whether `compress` runs natively
+try:
+    import cramjam
+except ImportError:
+    NATIVE = False
+else:
+    NATIVE = True
+
+# Hash table key length and the longest copy a single element can express
+_MIN_MATCH = 4
+_MAX_COPY = 64
+# Literal runs are emitted in chunks of at most this many bytes
+_MAX_LITERAL = 1 << 16
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _emit_literal(out: bytearray, data: bytes, start: int, end: int) -> None:
+    while start < end:
+        chunk = min(end - start, _MAX_LITERAL)
+        n = chunk - 1
+        if n < 60:
+            out.append(n << 2)
+        elif n < 1 << 8:
+            out += bytes((60 << 2, n))
+        else:
+            out += bytes((61 << 2, n & 0xFF, n >> 8))
+        out += data[start:start + chunk]
+        start += chunk
+
+
+def _emit_copy(out: bytearray, offset: int, length: int) -> None:
+    while length > 0:
+        chunk = min(length, _MAX_COPY)
+        if 4 <= chunk <= 11 and offset < 2048:
+            out += bytes((1 | (chunk - 4) << 2 | (offset >> 8) << 5, offset & 0xFF))
+        else:
+            out += bytes((2 | (chunk - 1) << 2, offset & 0xFF, offset >> 8))
+        length -= chunk
+
+
+def compress(data: bytes) -> bytes:
+    """Compress `data` into a snappy block."""
+    if NATIVE:
+        return bytes(cramjam.snappy.compress_raw(data))
+    return compress_python(data)
+
+
+def compress_python(data: bytes) -> bytes:
+    """Compress `data` into a snappy block in pure Python (greedy LZ77 over 4-byte hashes)."""
+    out = bytearray(_varint(len(data)))
+    table: dict[bytes, int] = {}
+    size = len(data)
+    literal_start = pos = 0
+    limit = size - _MIN_MATCH
+    while pos <= limit:
+        key = data[pos:pos + _MIN_MATCH]
+        candidate = table.get(key)
+        table[key] = pos
+        if candidate is None or pos - candidate > 0xFFFF:
+            pos += 1
+            continue
+        # Extend the match eight bytes at a time, then byte by byte
+        length = _MIN_MATCH
+        while (
+            pos + length + 8 <= size
+            and data[candidate + length:candidate + length + 8]
+            == data[pos + length:pos + length + 8]
+        ):
+            length += 8
+        while pos + length < size and data[candidate + length] == data[pos + length]:
+            length += 1
+        _emit_literal(out, data, literal_start, pos)
+        _emit_copy(out, pos - candidate, length)
+        pos += length
+        literal_start = pos
+    _emit_literal(out, data, literal_start, size)
+    return bytes(out)
+
+
+def decompress(data: bytes) -> bytes:
+    """Decompress a raw snappy block, e.g. in a stand-in remote-write receiver."""
+    size = shift = pos = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        size |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+        shift += 7
+    out = bytearray()
+    while pos < len(data):
+        tag = data[pos]
+        kind = tag & 3
+        if kind == 0:
+            n = tag >> 2
+            pos += 1
+            if n >= 60:
+                extra = n - 59
+                n = int.from_bytes(data[pos:pos + extra], "little")
+                pos += extra
+            out += data[pos:pos + n + 1]
+            pos += n + 1
+            continue
+        if kind == 1:
+            length = 4 + ((tag >> 2) & 7)
+            offset = (tag >> 5) << 8 | data[pos + 1]
+            pos += 2
+        elif kind == 2:
+            length = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos + 1:pos + 3], "little")
+            pos += 3
+        else:
+            length = (tag >> 2) + 1
+            offset = int.from_bytes(data[pos + 1:pos + 5], "little")
+            pos += 5
+        if offset == 0 or offset > len(out):
+            raise ValueError("Corrupt snappy block: invalid copy offset")
+        start = len(out) - offset
+        for i in range(length):
+            out.append(out[start + i])
+    if len(out) != size:
+        raise ValueError("Corrupt snappy block: length mismatch")
+    return bytes(out)
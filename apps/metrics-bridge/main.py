@@ -4,12 +4,24 @@ from typing import Any
 
 import structlog
 import uvicorn
-from fastapi import FastAPI
-from fastapi.responses import Response
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
 
 from bridge.config import Config
 from bridge.consumer import MetricsBridgeConsumer
+from bridge.exposition import ExpositionCache
+from bridge.ingest import (
+    CONTENT_TYPES,
+    INGEST_BATCHES,
+    INGEST_EVENTS,
+    BatchFormatError,
+    decode_batch,
+    media_type,
+)
+from bridge.metrics import DROPPED_EVENTS
+from bridge.pool import ConsumerPool, exposition_registry
+from bridge.remote_write import RemoteWriteExporter
 
 structlog.configure(
     processors=[
@@ -24,14 +36,23 @@ structlog.configure(
 
 logger = structlog.get_logger(__name__)
 config = Config()
-consumer = MetricsBridgeConsumer(config)
+consumer: MetricsBridgeConsumer | ConsumerPool = (
+    ConsumerPool(config) if config.consumer_processes > 1 else MetricsBridgeConsumer(config)
+)
+registry = exposition_registry()
+exposition = ExpositionCache(config.metrics_cache_ttl_seconds, registry)
+remote_writer = RemoteWriteExporter(config, registry) if config.remote_write_url else None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     consumer.start()
+    if remote_writer is not None:
+        remote_writer.start()
     logger.info("Metrics bridge started", port=config.server_port)
     yield
+    if remote_writer is not None:
+        remote_writer.stop()
     consumer.stop()
     logger.info("Metrics bridge stopped")
 
@@ -45,12 +66,20 @@ app = FastAPI(
 
 
 @app.get("/metrics", response_class=Response)
-async def metrics() -> Response:
-    """Prometheus metrics endpoint — scraped by Prometheus via ServiceMonitor."""
-    return Response(
-        content=generate_latest(),
-        media_type=CONTENT_TYPE_LATEST,
+async def metrics(request: Request) -> Response:
+    """Prometheus metrics endpoint — scraped by Prometheus via ServiceMonitor.
+
+    Rendering runs in a worker thread so a large registry never stalls the probes.
+    """
+    body, content_type, gzipped = await run_in_threadpool(
+        exposition.render,
+        request.headers.get("accept", ""),
+        request.headers.get("accept-encoding", ""),
     )
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=content_type, headers=headers)
 
 
 @app.get("/healthz")
@@ -60,9 +89,64 @@ async def health() -> dict[str, str]:
 
 
 @app.get("/readyz")
-async def ready() -> dict[str, str]:
-    """Readiness probe endpoint — indicates Kafka consumer is connected."""
-    return {"status": "ready", "kafka_topic": config.metrics_topic}
+async def ready() -> JSONResponse:
+    """Readiness probe endpoint — partitions assigned and consumer caught up or fresh."""
+    is_ready, details = consumer.readiness()
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={
+            "status": "ready" if is_ready else "not_ready",
+            "kafka_topic": config.metrics_topic,
+            **details,
+        },
+    )
+
+
+@app.post("/ingest")
+async def ingest(request: Request) -> JSONResponse:
+    """Bulk ingest of NDJSON or binary metric event batches, for sites without Kafka.
+
+    Batches are decoded in a worker thread and queued for the aggregation thread;
+    a full queue is answered with 429 so clients back off instead of piling up.
+    """
+    if not config.http_ingest_enabled:
+        return JSONResponse(status_code=404, content={"detail": "HTTP ingest is disabled"})
+    if not isinstance(consumer, MetricsBridgeConsumer):
+        return JSONResponse(
+            status_code=501,
+            content={"detail": "HTTP ingest requires a single consumer process"},
+        )
+    content_type = request.headers.get("content-type", "")
+    if media_type(content_type) not in CONTENT_TYPES:
+        INGEST_BATCHES.labels("rejected").inc()
+        return JSONResponse(
+            status_code=415,
+            content={"detail": f"Content-Type must be one of {', '.join(CONTENT_TYPES)}"},
+        )
+    declared = request.headers.get("content-length", "")
+    # A declared length is checked before reading the body, a chunked one after
+    too_large = declared.isdigit() and int(declared) > config.ingest_max_body_bytes
+    body = b"" if too_large else await request.body()
+    if too_large or len(body) > config.ingest_max_body_bytes:
+        INGEST_BATCHES.labels("rejected").inc()
+        return JSONResponse(status_code=413, content={"detail": "Batch too large"})
+    try:
+        events, malformed = await run_in_threadpool(decode_batch, body, content_type)
+    except BatchFormatError as e:
+        INGEST_BATCHES.labels("rejected").inc()
+        return JSONResponse(status_code=400, content={"detail": str(e)})
+    if malformed:
+        DROPPED_EVENTS.labels("malformed").inc(malformed)
+    if events and not consumer.submit(events):
+        INGEST_BATCHES.labels("throttled").inc()
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": "1"},
+            content={"detail": "Ingest queue is full"},
+        )
+    INGEST_BATCHES.labels("accepted").inc()
+    INGEST_EVENTS.inc(len(events))
+    return JSONResponse(status_code=202, content={"accepted": len(events), "malformed": malformed})
 
 
 if __name__ == "__main__":
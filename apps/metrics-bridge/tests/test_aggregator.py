@@ -0,0 +1,193 @@
+import copy
+import time
+from typing import Any
+
+import pytest
+
+from bridge.aggregator import AGGREGATE_TYPE, MetricBatch
+from bridge.config import Config
+from bridge.metrics import ERROR_TOTAL, LATENCY_UPPER_BOUNDS, REQUEST_LATENCY, REQUEST_TOTAL
+from bridge.quantiles import LATENCY_QUANTILE, QuantileTracker
+from bridge.sketch import SketchMapping
+
+
+def _bucket_counts(service: str, endpoint: str, region: str) -> tuple[list[float], float]:
+    child = REQUEST_LATENCY.labels(service=service, endpoint=endpoint, region=region)
+    return [b.get() for b in child._buckets], child._sum.get()
+
+
+class TestMetricBatch:
+    def test_add_counts_events(self):
+        batch = MetricBatch()
+        batch.add({"service": "agg-count-svc", "latency_ms": 10})
+        batch.add({"service": "agg-count-svc", "latency_ms": 20})
+        assert len(batch) == 2
+
+    def test_apply_resets_batch(self):
+        batch = MetricBatch()
+        batch.add({"service": "agg-reset-svc", "latency_ms": 10})
+        batch.apply()
+        assert len(batch) == 0
+        assert batch._series == {}
+
+    def test_apply_matches_per_event_observe(self):
+        """Bucket counts and sum must equal what observe() would have produced."""
+        latencies = [5.0, 10.0, 10.5, 99.0, 750.0, 4999.0, 9000.0]
+        batch = MetricBatch()
+        for latency in latencies:
+            batch.add({
+                "service": "agg-hist-svc",
+                "endpoint": "/a",
+                "region": "us-east-1",
+                "latency_ms": latency,
+            })
+        batch.apply()
+
+        reference = REQUEST_LATENCY.labels(
+            service="agg-hist-ref", endpoint="/a", region="us-east-1"
+        )
+        for latency in latencies:
+            reference.observe(latency)
+
+        assert _bucket_counts("agg-hist-svc", "/a", "us-east-1") == \
+            _bucket_counts("agg-hist-ref", "/a", "us-east-1")
+        buckets, total = _bucket_counts("agg-hist-svc", "/a", "us-east-1")
+        assert len(buckets) == len(LATENCY_UPPER_BOUNDS)
+        assert total == sum(latencies)
+
+    def test_apply_counters_per_status_code(self):
+        labels = {"service": "agg-status-svc", "endpoint": "/s", "region": "us-west-2"}
+        batch = MetricBatch()
+        for status_code, error in [(200, False), (200, False), (503, True), (429, True)]:
+            batch.add({**labels, "status_code": status_code, "latency_ms": 1, "error": error})
+        batch.apply()
+
+        assert REQUEST_TOTAL.labels(**labels, status_code="200")._value.get() == 2
+        assert REQUEST_TOTAL.labels(**labels, status_code="503")._value.get() == 1
+        assert REQUEST_TOTAL.labels(**labels, status_code="429")._value.get() == 1
+        assert ERROR_TOTAL.labels(**labels)._value.get() == 2
+
+    def test_defaults_for_missing_fields(self):
+        batch = MetricBatch()
+        batch.add({})
+        batch.apply()
+        assert REQUEST_TOTAL.labels(
+            service="unknown", endpoint="/", region="unknown", status_code="0"
+        )._value.get() >= 1
+
+
+    @pytest.mark.parametrize("overrides", [
+        {"status_code": [200]},
+        {"status_code": {"code": 200}},
+        {"status_code": True},
+        {"latency_ms": -1},
+        {"latency_ms": float("nan")},
+        {"latency_ms": "slow"},
+        {"sample_weight": 0},
+    ])
+    def test_malformed_event_leaves_batch_untouched(self, overrides):
+        batch = MetricBatch(quantiles=QuantileTracker(Config(quantile_windows_seconds=[60])))
+        payload = {"service": "agg-bad-svc", "status_code": 200, "latency_ms": 10}
+        batch.add(payload)
+        before = copy.deepcopy(batch._series)
+        with pytest.raises((TypeError, ValueError)):
+            batch.add({**payload, **overrides})
+        assert len(batch) == 1
+        assert batch._series == before
+
+
+def _aggregate(labels: dict[str, str], latencies: list[float], **overrides: Any) -> dict[str, Any]:
+    """An aggregate record as the workload simulator serializes it."""
+    mapping = SketchMapping(0.01)
+    record: dict[str, Any] = {
+        "type": AGGREGATE_TYPE,
+        **labels,
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "interval_seconds": 10.0,
+        "count": len(latencies),
+        "error_count": 1,
+        "status_codes": {"200": len(latencies) - 1, "503": 1},
+        "latency_sum_ms": sum(latencies),
+        "latency_sketch": {
+            "relative_accuracy": 0.01,
+            "bins": {str(index): n for index, n in mapping.bins(latencies).items()},
+        },
+    }
+    return {**record, **overrides}
+
+
+class TestAggregateRecords:
+    def test_counts_match_raw_events(self):
+        latencies = [5.0, 20.0, 20.0, 180.0, 600.0, 3000.0]
+        raw = {"service": "agg-raw", "endpoint": "/a", "region": "eu"}
+        folded = {"service": "agg-folded", "endpoint": "/a", "region": "eu"}
+        batch = MetricBatch()
+        for i, latency in enumerate(latencies):
+            error = i == 0
+            batch.add({
+                **raw, "latency_ms": latency, "error": error, "status_code": 503 if error else 200
+            })
+        batch.add(_aggregate(folded, latencies))
+        assert len(batch) == 2 * len(latencies)
+        batch.apply()
+
+        assert _bucket_counts(*folded.values()) == _bucket_counts(*raw.values())
+        for status in ("200", "503"):
+            assert REQUEST_TOTAL.labels(**folded, status_code=status)._value.get() == \
+                REQUEST_TOTAL.labels(**raw, status_code=status)._value.get()
+        assert ERROR_TOTAL.labels(**folded)._value.get() == 1
+
+    def test_feeds_quantiles(self):
+        tracker = QuantileTracker(Config(quantile_windows_seconds=[60]))
+        batch = MetricBatch(tracker)
+        labels = {"service": "agg-q", "endpoint": "/a", "region": "eu"}
+        latencies = [float(v) for v in range(1, 101)]
+        batch.add(_aggregate(labels, latencies))
+        batch.apply()
+        tracker.refresh(time.monotonic())
+        p50: Any = LATENCY_QUANTILE._metrics[("agg-q", "/a", "eu", "1m", "0.5")]
+        assert abs(p50._value.get() - 50) <= 1
+
+    @pytest.mark.parametrize("overrides", [
+        {"count": 7},
+        {"error_count": 99},
+        {"status_codes": {"200": 4}},
+        {"latency_sketch": {"relative_accuracy": 2, "bins": {}}},
+        {"count": 1, "status_codes": {"200": 1}, "error_count": 0,
+         "latency_sketch": {"relative_accuracy": 0.01, "bins": {"100000": 1}}},
+        {"count": 1, "status_codes": {"200": 1}, "error_count": 0,
+         "latency_sketch": {"relative_accuracy": 0.01, "bins": {"-100000": 1}}},
+    ])
+    def test_inconsistent_records_rejected(self, overrides):
+        labels = {"service": "agg-bad", "endpoint": "/a", "region": "eu"}
+        batch = MetricBatch()
+        with pytest.raises(ValueError):
+            batch.add(_aggregate(labels, [1.0, 2.0, 3.0, 4.0, 5.0, 6.0], **overrides))
+        # Rejected before any series delta is created
+        assert len(batch) == 0 and not batch._series
+
+
+class TestSampledEvents:
+    def test_weights_match_unsampled_events(self):
+        tracker = QuantileTracker(Config(quantile_windows_seconds=[60]))
+        full = {"service": "w-full", "endpoint": "/a", "region": "eu"}
+        sampled = {"service": "w-sampled", "endpoint": "/a", "region": "eu"}
+        batch = MetricBatch(tracker)
+        for latency in (30.0, 30.0, 30.0, 30.0, 800.0):
+            batch.add({**full, "latency_ms": latency, "status_code": 200})
+        batch.add({**sampled, "latency_ms": 30.0, "status_code": 200, "sample_weight": 4})
+        batch.add({**sampled, "latency_ms": 800.0, "status_code": 200})
+        assert len(batch) == 10
+        batch.apply()
+        tracker.refresh(time.monotonic())
+
+        assert _bucket_counts(*sampled.values()) == _bucket_counts(*full.values())
+        assert REQUEST_TOTAL.labels(**sampled, status_code="200")._value.get() == 5
+        for quantile in ("0.5", "0.99"):
+            weighted: Any = LATENCY_QUANTILE._metrics[(*sampled.values(), "1m", quantile)]
+            reference: Any = LATENCY_QUANTILE._metrics[(*full.values(), "1m", quantile)]
+            assert weighted._value.get() == reference._value.get()
+
+    def test_invalid_weight_rejected(self):
+        with pytest.raises(ValueError):
+            MetricBatch().add({"service": "w-bad", "sample_weight": 0})
@@ -1,15 +1,22 @@
+import json
 from unittest.mock import patch, MagicMock
 
 import pytest
 from fastapi.testclient import TestClient
 
+from bridge.consumer import MetricsBridgeConsumer
+from bridge.exposition import ExpositionCache
+from bridge.ingest import BINARY_CONTENT_TYPE, NDJSON_CONTENT_TYPE, encode_binary
+
 
 @pytest.fixture
 def client():
     # Patch the consumer so it doesn't try to connect to Kafka
-    with patch("main.consumer") as mock_consumer:
+    with patch("main.consumer") as mock_consumer, \
+            patch("main.exposition", ExpositionCache(ttl_seconds=0)):
         mock_consumer.start = MagicMock()
         mock_consumer.stop = MagicMock()
+        mock_consumer.readiness = MagicMock(return_value=(True, {"assigned_partitions": 3}))
         from main import app
         with TestClient(app) as c:
             yield c
@@ -29,6 +36,18 @@ class TestHealthEndpoints:
         assert data["status"] == "ready"
         assert data["kafka_topic"] == "metrics.raw"
 
+    def test_readyz_not_ready_returns_503(self, client):
+        from main import consumer
+
+        consumer.readiness = MagicMock(  # type: ignore[method-assign]
+            return_value=(False, {"reason": "consumer lagging"})
+        )
+        response = client.get("/readyz")
+        assert response.status_code == 503
+        data = response.json()
+        assert data["status"] == "not_ready"
+        assert data["reason"] == "consumer lagging"
+
 
 class TestMetricsEndpoint:
     def test_metrics_returns_prometheus_format(self, client):
@@ -55,3 +74,102 @@ class TestMetricsEndpoint:
         assert response.status_code == 200
         assert "workload_requests_total" in response.text
         assert "workload_request_latency_ms" in response.text
+
+    def test_metrics_gzip_when_accepted(self, client):
+        response = client.get("/metrics", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        # httpx transparently decompresses the body
+        assert "process_" in response.text or "python_" in response.text
+
+    def test_metrics_identity_when_gzip_not_accepted(self, client):
+        response = client.get("/metrics", headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+
+    def test_metrics_openmetrics_negotiation(self, client):
+        response = client.get(
+            "/metrics", headers={"Accept": "application/openmetrics-text; version=1.0.0"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/openmetrics-text")
+        assert response.text.rstrip().endswith("# EOF")
+
+
+@pytest.fixture
+def ingest_client():
+    import main
+
+    mock_consumer = MagicMock(spec=MetricsBridgeConsumer)
+    mock_consumer.submit.return_value = True
+    with (
+        patch("main.consumer", mock_consumer),
+        patch.object(main.config, "http_ingest_enabled", True),
+        TestClient(main.app) as c,
+    ):
+        yield c, mock_consumer
+
+
+EVENT = {"service": "ingest-svc", "endpoint": "/i", "region": "us-east-1",
+         "status_code": 200, "latency_ms": 5.0, "error": False}
+
+
+class TestIngestEndpoint:
+    def test_disabled_by_default(self, client):
+        response = client.post(
+            "/ingest", content=b"{}", headers={"Content-Type": NDJSON_CONTENT_TYPE}
+        )
+        assert response.status_code == 404
+
+    def test_accepts_ndjson(self, ingest_client):
+        client, consumer = ingest_client
+        body = b"\n".join([json.dumps(EVENT).encode(), b"not-json"])
+        response = client.post(
+            "/ingest", content=body, headers={"Content-Type": NDJSON_CONTENT_TYPE}
+        )
+        assert response.status_code == 202
+        assert response.json() == {"accepted": 1, "malformed": 1}
+        consumer.submit.assert_called_once_with([EVENT])
+
+    def test_accepts_binary(self, ingest_client):
+        client, consumer = ingest_client
+        response = client.post(
+            "/ingest",
+            content=encode_binary([EVENT, EVENT]),
+            headers={"Content-Type": BINARY_CONTENT_TYPE},
+        )
+        assert response.status_code == 202
+        assert response.json()["accepted"] == 2
+        assert consumer.submit.call_args[0][0] == [EVENT, EVENT]
+
+    def test_full_queue_returns_429(self, ingest_client):
+        client, consumer = ingest_client
+        consumer.submit.return_value = False
+        response = client.post(
+            "/ingest", content=json.dumps(EVENT), headers={"Content-Type": NDJSON_CONTENT_TYPE}
+        )
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+
+    def test_rejects_unsupported_content_type(self, ingest_client):
+        client, _ = ingest_client
+        response = client.post("/ingest", content=b"{}", headers={"Content-Type": "text/plain"})
+        assert response.status_code == 415
+
+    def test_rejects_corrupt_binary(self, ingest_client):
+        client, consumer = ingest_client
+        response = client.post(
+            "/ingest", content=b"MBB1\x01", headers={"Content-Type": BINARY_CONTENT_TYPE}
+        )
+        assert response.status_code == 400
+        consumer.submit.assert_not_called()
+
+    def test_rejects_oversized_batch(self, ingest_client):
+        import main
+
+        client, _ = ingest_client
+        with patch.object(main.config, "ingest_max_body_bytes", 10):
+            response = client.post(
+                "/ingest", content=json.dumps(EVENT), headers={"Content-Type": NDJSON_CONTENT_TYPE}
+            )
+        assert response.status_code == 413
@@ -0,0 +1,62 @@
+from bridge.cardinality import OVERFLOW_LABEL, CardinalityLimiter
+from bridge.config import Config
+
+
+class TestEndpointNormalization:
+    def test_collapses_numeric_segments(self):
+        limiter = CardinalityLimiter(Config())
+        assert limiter.normalize_endpoint("/users/12345/orders/9") == "/users/{id}/orders/{id}"
+
+    def test_collapses_uuid_segments(self):
+        limiter = CardinalityLimiter(Config())
+        endpoint = "/orders/3f2b8c1e-9a4d-4e6f-8b2a-1c3d5e7f9a0b"
+        assert limiter.normalize_endpoint(endpoint) == "/orders/{uuid}"
+
+    def test_collapses_long_hex_segments(self):
+        limiter = CardinalityLimiter(Config())
+        assert limiter.normalize_endpoint("/blobs/deadbeef0123456789") == "/blobs/{hash}"
+
+    def test_keeps_static_segments(self):
+        limiter = CardinalityLimiter(Config())
+        assert limiter.normalize_endpoint("/api/v1/users") == "/api/v1/users"
+
+    def test_strips_query_string(self):
+        limiter = CardinalityLimiter(Config())
+        assert limiter.normalize_endpoint("/search?q=abc") == "/search"
+
+    def test_templates_take_precedence(self):
+        limiter = CardinalityLimiter(Config(endpoint_templates=["/users/{name}/profile"]))
+        assert limiter.normalize_endpoint("/users/alice/profile") == "/users/{name}/profile"
+        assert limiter.normalize_endpoint("/users/alice/other") == "/users/alice/other"
+
+    def test_normalization_disabled(self):
+        limiter = CardinalityLimiter(Config(normalize_endpoints=False))
+        assert limiter.normalize_endpoint("/users/42") == "/users/42"
+
+
+class TestSeriesLimits:
+    def test_admits_until_limit(self):
+        limiter = CardinalityLimiter(Config(max_series_per_metric=2))
+        assert limiter.admit("m", ("a",)) == (("a",), False)
+        assert limiter.admit("m", ("b",)) == (("b",), False)
+        assert limiter.admit("m", ("c",)) == ((OVERFLOW_LABEL,), True)
+        # Already admitted series keep their labels
+        assert limiter.admit("m", ("a",)) == (("a",), False)
+
+    def test_per_metric_override(self):
+        limiter = CardinalityLimiter(Config(max_series_per_metric=10, series_limits={"m": 1}))
+        limiter.admit("m", ("a", "x"))
+        assert limiter.admit("m", ("b", "y")) == ((OVERFLOW_LABEL, OVERFLOW_LABEL), True)
+        assert limiter.admit("n", ("b", "y")) == (("b", "y"), False)
+
+    def test_forget_frees_slot(self):
+        limiter = CardinalityLimiter(Config(max_series_per_metric=1))
+        limiter.admit("m", ("a",))
+        limiter.forget("m", ("a",))
+        assert limiter.series_count("m") == 0
+        assert limiter.admit("m", ("b",)) == (("b",), False)
+
+    def test_label_length_validation(self):
+        limiter = CardinalityLimiter(Config(max_label_length=4))
+        assert limiter.is_valid("abcd", "ab")
+        assert not limiter.is_valid("abcde")
@@ -7,6 +7,34 @@ class TestConfig:
         assert config.kafka_brokers == "kafka:9092"
         assert config.metrics_topic == "metrics.raw"
         assert config.consumer_group == "metrics-bridge-group"
+        assert config.consumer_processes == 1
+        assert config.consumer_batch_size == 500
+        assert config.consumer_timeout_ms == 1000
+        assert config.normalize_endpoints is True
+        assert config.max_series_per_metric == 10000
+        assert config.series_limits == {}
+        assert config.series_ttl_seconds == 600.0
+        assert config.series_sweep_interval_seconds == 30.0
+        assert config.readiness_max_event_age_seconds == 120.0
+        assert config.lag_refresh_interval_seconds == 5.0
+        assert config.metrics_cache_ttl_seconds == 2.0
+        assert config.quantile_windows_seconds == [60, 300]
+        assert config.quantile_slot_seconds == 10.0
+        assert config.quantile_refresh_interval_seconds == 10.0
+        assert config.sketch_relative_accuracy == 0.01
+        assert config.slo_definitions_dir == ""
+        assert config.slo_windows_seconds == [300, 1800, 3600, 21600, 259200, 2592000]
+        assert config.slo_refresh_interval_seconds == 15.0
+        assert config.kafka_enabled is True
+        assert config.http_ingest_enabled is False
+        assert config.ingest_queue_max_batches == 64
+        assert config.ingest_max_body_bytes == 16 * 1024 * 1024
+        assert config.remote_write_url == ""
+        assert config.remote_write_interval_seconds == 5.0
+        assert config.remote_write_resend_seconds == 60.0
+        assert config.remote_write_max_samples_per_request == 2000
+        assert config.remote_write_queue_max_requests == 100
+        assert config.remote_write_timeout_seconds == 10.0
         assert config.server_host == "0.0.0.0"
         assert config.server_port == 8080
 
@@ -1,10 +1,23 @@
 import json
+import time
+from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
+from confluent_kafka import TIMESTAMP_CREATE_TIME
 
+from bridge.cardinality import OVERFLOW_LABEL
 from bridge.config import Config
 from bridge.consumer import MetricsBridgeConsumer
+from bridge.metrics import configure_cardinality
+
+
+def _make_msg(payload: dict[str, Any] | None = None, raw: bytes | None = None) -> MagicMock:
+    msg = MagicMock()
+    msg.error.return_value = None
+    msg.value.return_value = raw if raw is not None else json.dumps(payload).encode("utf-8")
+    msg.timestamp.return_value = (TIMESTAMP_CREATE_TIME, int(time.time() * 1000))
+    return msg
 
 
 @pytest.fixture
@@ -18,6 +31,7 @@ def mock_kafka_consumer():
         mock = MockConsumer.return_value
         mock.subscribe = MagicMock()
         mock.poll = MagicMock(return_value=None)
+        mock.consume = MagicMock(return_value=[])
         mock.close = MagicMock()
         yield mock
 
@@ -31,7 +45,8 @@ def consumer(config, mock_kafka_consumer):
 class TestMetricsBridgeConsumer:
     def test_start_subscribes_and_runs(self, consumer, mock_kafka_consumer):
         consumer.start()
-        mock_kafka_consumer.subscribe.assert_called_once_with(["metrics.raw"])
+        mock_kafka_consumer.subscribe.assert_called_once()
+        assert mock_kafka_consumer.subscribe.call_args[0][0] == ["metrics.raw"]
         assert consumer._running is True
         assert consumer._thread is not None
         consumer.stop()
@@ -65,7 +80,7 @@ class TestMetricsBridgeConsumer:
 
         service = payload.get("service")
         if service and service not in consumer._seen_services:
-            consumer._seen_services.add(service)
+            consumer._seen_services[service] = time.monotonic()
         assert "api-service" in consumer._seen_services
 
     def test_invalid_json_does_not_crash(self, consumer):
@@ -79,3 +94,137 @@ class TestMetricsBridgeConsumer:
             json.loads(msg.value().decode("utf-8"))
         except json.JSONDecodeError:
             pass  # Expected — consumer should not crash
+
+    def test_process_batch_applies_aggregated_counts(self, consumer):
+        from bridge.metrics import ERROR_TOTAL, REQUEST_TOTAL
+
+        labels = {"service": "batch-svc", "endpoint": "/batch", "region": "us-east-1"}
+        msgs = [
+            _make_msg({**labels, "status_code": 200, "latency_ms": 10.0, "error": False}),
+            _make_msg({**labels, "status_code": 200, "latency_ms": 20.0, "error": False}),
+            _make_msg({**labels, "status_code": 500, "latency_ms": 900.0, "error": True}),
+        ]
+        consumer._process_batch(msgs)
+
+        assert REQUEST_TOTAL.labels(**labels, status_code="200")._value.get() == 2
+        assert REQUEST_TOTAL.labels(**labels, status_code="500")._value.get() == 1
+        assert ERROR_TOTAL.labels(**labels)._value.get() == 1
+        assert "batch-svc" in consumer._seen_services
+        assert len(consumer._batch) == 0
+
+    def test_process_batch_skips_malformed_messages(self, consumer):
+        from bridge.metrics import REQUEST_TOTAL
+
+        labels = {"service": "batch-bad-svc", "endpoint": "/", "region": "eu-west-1"}
+        msgs = [
+            _make_msg(raw=b"not-json"),
+            _make_msg({**labels, "status_code": 200, "latency_ms": 5.0}),
+        ]
+        consumer._process_batch(msgs)
+        assert REQUEST_TOTAL.labels(**labels, status_code="200")._value.get() == 1
+
+    def test_process_batch_skips_out_of_range_aggregate(self, consumer):
+        from bridge.metrics import REQUEST_TOTAL
+
+        labels = {"service": "batch-range-svc", "endpoint": "/", "region": "eu-west-1"}
+        aggregate = {
+            **labels, "type": "aggregate", "count": 1, "error_count": 0,
+            "status_codes": {"200": 1},
+            "latency_sketch": {"relative_accuracy": 0.01, "bins": {"100000": 1}},
+        }
+        msgs = [
+            _make_msg(aggregate),
+            _make_msg({**labels, "status_code": 200, "latency_ms": 5.0}),
+        ]
+        consumer._process_batch(msgs)
+        assert REQUEST_TOTAL.labels(**labels, status_code="200")._value.get() == 1
+
+    def test_seen_services_only_counts_admitted_labels(self, mock_kafka_consumer):
+        from bridge.metrics import ACTIVE_SERVICES
+
+        consumer = MetricsBridgeConsumer(
+            Config(max_label_length=16, series_limits={"workload_request_latency_ms": 1})
+        )
+        msgs: list[Any] = [
+            _make_msg({"service": f"svc-{i}", "status_code": 200, "latency_ms": 5.0})
+            for i in range(5)
+        ]
+        msgs.append(_make_msg({"service": "x" * 100, "status_code": 200, "latency_ms": 5.0}))
+        try:
+            consumer._process_batch(msgs)
+        finally:
+            configure_cardinality(Config())
+        # One admitted service, the overflow series, and never the rejected label
+        assert set(consumer._seen_services) == {"svc-0", OVERFLOW_LABEL}
+        assert ACTIVE_SERVICES._value.get() == 2
+
+    def test_expire_idle_drops_stale_services(self, consumer):
+        from bridge.metrics import ACTIVE_SERVICES
+
+        now = time.monotonic()
+        consumer._seen_services = {"fresh-svc": now, "gone-svc": now - 3600}
+        consumer._expire_idle(now)
+        assert set(consumer._seen_services) == {"fresh-svc"}
+        assert ACTIVE_SERVICES._value.get() == 1
+
+    def test_expire_idle_removes_idle_series(self, consumer):
+        from bridge.metrics import REQUEST_TOTAL
+
+        labels = {"service": "idle-svc", "endpoint": "/idle", "region": "us-east-1"}
+        consumer._process_batch([_make_msg({**labels, "status_code": 200, "latency_ms": 1})])
+        assert (("idle-svc", "/idle", "us-east-1", "200")) in REQUEST_TOTAL._metrics
+
+        consumer._expire_idle(time.monotonic() + consumer._config.series_ttl_seconds + 1)
+        assert (("idle-svc", "/idle", "us-east-1", "200")) not in REQUEST_TOTAL._metrics
+        assert "idle-svc" not in consumer._seen_services
+
+    def test_zero_ttl_keeps_idle_series(self, consumer):
+        from bridge.metrics import REQUEST_TOTAL
+
+        consumer._config = consumer._config.model_copy(update={"series_ttl_seconds": 0})
+        labels = {"service": "kept-svc", "endpoint": "/kept", "region": "us-east-1"}
+        consumer._process_batch([_make_msg({**labels, "status_code": 200, "latency_ms": 1})])
+        assert consumer._expire_idle(time.monotonic() + 86400)
+        assert ("kept-svc", "/kept", "us-east-1", "200") in REQUEST_TOTAL._metrics
+        assert "kept-svc" in consumer._seen_services
+
+    def test_not_ready_before_assignment(self, consumer):
+        is_ready, details = consumer.readiness()
+        assert is_ready is False
+        assert details["reason"] == "no partitions assigned"
+
+
+class TestHttpIngest:
+    def test_submit_is_bounded(self, mock_kafka_consumer):
+        with patch("bridge.consumer.Consumer", return_value=mock_kafka_consumer):
+            consumer = MetricsBridgeConsumer(Config(ingest_queue_max_batches=2))
+        assert consumer.submit([{"service": "q"}]) is True
+        assert consumer.submit([{"service": "q"}]) is True
+        assert consumer.submit([{"service": "q"}]) is False
+
+    def test_ingest_only_mode_applies_submitted_events(self):
+        from bridge.metrics import REQUEST_TOTAL
+
+        with patch("bridge.consumer.Consumer") as MockConsumer:
+            consumer = MetricsBridgeConsumer(
+                Config(kafka_enabled=False, http_ingest_enabled=True, consumer_timeout_ms=50)
+            )
+            MockConsumer.assert_not_called()
+        consumer.start()
+        try:
+            labels = {"service": "http-svc", "endpoint": "/h", "region": "us-east-1"}
+            assert consumer.submit([
+                {**labels, "status_code": 200, "latency_ms": 3.0},
+                {**labels, "status_code": 200, "latency_ms": "bad"},
+            ])
+            deadline = time.monotonic() + 5
+            child = ("http-svc", "/h", "us-east-1", "200")
+            while child not in REQUEST_TOTAL._metrics and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert REQUEST_TOTAL.labels(*child)._value.get() == 1
+            assert consumer.readiness() == (
+                True, {"kafka_enabled": False, "ingest_queued_batches": 0}
+            )
+        finally:
+            consumer.stop()
+        assert consumer.readiness()[0] is False
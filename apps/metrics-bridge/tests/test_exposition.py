@@ -0,0 +1,79 @@
+import gzip
+import threading
+
+from prometheus_client import CollectorRegistry, Counter
+from prometheus_client.openmetrics.exposition import CONTENT_TYPE_LATEST as OPENMETRICS_TYPE
+
+from bridge.exposition import ExpositionCache
+
+
+def _registry() -> tuple[CollectorRegistry, Counter]:
+    registry = CollectorRegistry()
+    counter = Counter("exposition_test", "Test counter", registry=registry)
+    return registry, counter
+
+
+class TestExpositionCache:
+    def test_renders_text_format(self):
+        registry, counter = _registry()
+        counter.inc()
+        body, content_type, gzipped = ExpositionCache(0, registry).render("", "")
+        assert content_type.startswith("text/plain")
+        assert gzipped is False
+        assert b"exposition_test_total 1.0" in body
+
+    def test_openmetrics_negotiation(self):
+        registry, _ = _registry()
+        cache = ExpositionCache(0, registry)
+        body, content_type, _ = cache.render("application/openmetrics-text; version=1.0.0", "")
+        assert content_type == OPENMETRICS_TYPE
+        assert body.endswith(b"# EOF\n")
+
+    def test_gzip_when_accepted(self):
+        registry, counter = _registry()
+        counter.inc(3)
+        body, _, gzipped = ExpositionCache(0, registry).render("", "deflate, gzip;q=0.9")
+        assert gzipped is True
+        assert b"exposition_test_total 3.0" in gzip.decompress(body)
+
+    def test_cached_within_ttl(self):
+        registry, counter = _registry()
+        cache = ExpositionCache(60, registry)
+        first, _, _ = cache.render("", "")
+        counter.inc()
+        second, _, _ = cache.render("", "")
+        assert first is second
+
+    def test_zero_ttl_always_renders(self):
+        registry, counter = _registry()
+        cache = ExpositionCache(0, registry)
+        cache.render("", "")
+        counter.inc()
+        body, _, _ = cache.render("", "")
+        assert b"exposition_test_total 1.0" in body
+
+    def test_gzip_variant_reuses_plain_render(self):
+        registry, counter = _registry()
+        cache = ExpositionCache(60, registry)
+        plain, _, _ = cache.render("", "")
+        counter.inc()
+        compressed, _, _ = cache.render("", "gzip")
+        assert gzip.decompress(compressed) == plain
+
+    def test_concurrent_scrapes_share_one_render(self):
+        registry, _ = _registry()
+        calls = []
+        cache = ExpositionCache(60, registry)
+        original = cache._encode
+
+        def counting_encode(*args, **kwargs):
+            calls.append(1)
+            return original(*args, **kwargs)
+
+        cache._encode = counting_encode  # type: ignore[method-assign]
+        threads = [threading.Thread(target=cache.render, args=("", "")) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
@@ -0,0 +1,87 @@
+import time
+from typing import Any
+from unittest.mock import MagicMock
+
+from confluent_kafka import TIMESTAMP_CREATE_TIME, TIMESTAMP_NOT_AVAILABLE, TopicPartition
+
+from bridge.config import Config
+from bridge.health import CONSUMER_LAG, IngestionTracker
+
+
+def _msg(age_seconds: float, ts_type: int = TIMESTAMP_CREATE_TIME) -> MagicMock:
+    msg = MagicMock()
+    msg.timestamp.return_value = (ts_type, int((time.time() - age_seconds) * 1000))
+    return msg
+
+
+def _kafka(position: int, high: int) -> MagicMock:
+    consumer = MagicMock()
+    consumer.position.side_effect = lambda tps: [
+        TopicPartition(tp.topic, tp.partition, position) for tp in tps
+    ]
+    consumer.get_watermark_offsets.return_value = (0, high)
+    return consumer
+
+
+def _tracker(**overrides: Any) -> IngestionTracker:
+    return IngestionTracker(Config(**overrides))
+
+
+class TestIngestionTracker:
+    def test_not_ready_without_assignment(self):
+        is_ready, details = _tracker().readiness()
+        assert is_ready is False
+        assert details["assigned_partitions"] == 0
+
+    def test_ready_when_assigned_and_caught_up(self):
+        tracker = _tracker()
+        tracker.on_assign(MagicMock(), [TopicPartition("metrics.raw", 0)])
+        tracker.maybe_refresh(_kafka(position=100, high=100), time.monotonic())
+        assert tracker.readiness()[0] is True
+
+    def test_idle_topic_with_old_event_is_ready(self):
+        tracker = _tracker(readiness_max_event_age_seconds=10)
+        tracker.on_assign(MagicMock(), [TopicPartition("metrics.raw", 0)])
+        tracker.observe_batch([_msg(age_seconds=3600)])
+        tracker.maybe_refresh(_kafka(position=50, high=50), time.monotonic())
+        assert tracker.readiness()[0] is True
+
+    def test_lagging_with_stale_events_not_ready(self):
+        tracker = _tracker(readiness_max_event_age_seconds=10)
+        tracker.on_assign(MagicMock(), [TopicPartition("metrics.raw", 1)])
+        tracker.observe_batch([_msg(age_seconds=3600)])
+        tracker.maybe_refresh(_kafka(position=50, high=5000), time.monotonic())
+        is_ready, details = tracker.readiness()
+        assert is_ready is False
+        assert details["lag_messages"] == 4950
+        assert CONSUMER_LAG.labels("metrics.raw", "1")._value.get() == 4950
+
+    def test_lagging_but_fresh_is_ready(self):
+        tracker = _tracker(readiness_max_event_age_seconds=60)
+        tracker.on_assign(MagicMock(), [TopicPartition("metrics.raw", 2)])
+        tracker.observe_batch([_msg(age_seconds=1)])
+        tracker.maybe_refresh(_kafka(position=50, high=80), time.monotonic())
+        assert tracker.readiness()[0] is True
+
+    def test_observe_batch_uses_newest_timestamped_message(self):
+        tracker = _tracker()
+        tracker.observe_batch([_msg(age_seconds=5), _msg(0, ts_type=TIMESTAMP_NOT_AVAILABLE)])
+        age = tracker.readiness()[1]["last_event_age_seconds"]
+        assert 4 < age < 6
+
+    def test_revoke_clears_lag(self):
+        tracker = _tracker()
+        tp = TopicPartition("metrics.raw", 3)
+        tracker.on_assign(MagicMock(), [tp])
+        tracker.maybe_refresh(_kafka(position=0, high=10), time.monotonic())
+        tracker.on_revoke(MagicMock(), [tp])
+        assert tracker.total_lag == 0
+        assert ("metrics.raw", "3") not in CONSUMER_LAG._metrics
+
+    def test_rate_computed_per_refresh_window(self):
+        tracker = _tracker(lag_refresh_interval_seconds=0)
+        start = time.monotonic()
+        tracker.maybe_refresh(_kafka(0, 0), start)
+        tracker.observe_batch([_msg(0)] * 100)
+        tracker.maybe_refresh(_kafka(0, 0), start + 2)
+        assert tracker.rate == 50.0
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from bridge.ingest import (
+    BINARY_CONTENT_TYPE,
+    NDJSON_CONTENT_TYPE,
+    BatchFormatError,
+    decode_batch,
+    decode_binary,
+    decode_ndjson,
+    encode_binary,
+)
+
+EVENTS = [
+    {"service": "api-service", "endpoint": "/a", "region": "us-east-1",
+     "status_code": 200, "latency_ms": 12.5, "error": False},
+    {"service": "api-service", "endpoint": "/b", "region": "us-east-1",
+     "status_code": 503, "latency_ms": 900.0, "error": True},
+]
+
+
+class TestNdjson:
+    def test_decodes_lines(self):
+        body = b"\n".join(json.dumps(e).encode() for e in EVENTS) + b"\n"
+        assert decode_ndjson(body) == (EVENTS, 0)
+
+    def test_counts_malformed_lines(self):
+        body = json.dumps(EVENTS[0]).encode() + b"\nnot-json\n[1, 2]\n\n"
+        assert decode_ndjson(body) == ([EVENTS[0]], 2)
+
+    def test_empty_body(self):
+        assert decode_ndjson(b"") == ([], 0)
+
+
+class TestBinary:
+    def test_round_trip(self):
+        assert decode_binary(encode_binary(EVENTS)) == EVENTS
+
+    def test_labels_sent_once(self):
+        single = encode_binary(EVENTS[:1])
+        repeated = encode_binary(EVENTS[:1] * 100)
+        assert len(repeated) - len(single) == 99 * 13
+
+    def test_rejects_bad_magic(self):
+        with pytest.raises(BatchFormatError):
+            decode_binary(b"XXXX" + encode_binary(EVENTS)[4:])
+
+    def test_rejects_truncated_batch(self):
+        with pytest.raises(BatchFormatError):
+            decode_binary(encode_binary(EVENTS)[:-3])
+
+
+class TestDecodeBatch:
+    def test_dispatches_on_content_type(self):
+        assert decode_batch(encode_binary(EVENTS), BINARY_CONTENT_TYPE) == (EVENTS, 0)
+        body = json.dumps(EVENTS[0]).encode()
+        assert decode_batch(body, f"{NDJSON_CONTENT_TYPE}; charset=utf-8") == ([EVENTS[0]], 0)
+
+    def test_rejects_unknown_content_type(self):
+        with pytest.raises(BatchFormatError):
+            decode_batch(b"{}", "text/plain")
@@ -0,0 +1,134 @@
+import json
+import time
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from confluent_kafka import TIMESTAMP_CREATE_TIME, TopicPartition
+
+from bridge.config import Config
+from bridge.consumer import MetricsBridgeConsumer
+from bridge.merge import PartialAggregator, parse_partial
+from bridge.metrics import ACTIVE_SERVICES
+from bridge.quantiles import LATENCY_QUANTILE, SERVICE_LATENCY_QUANTILE
+from bridge.sketch import SketchMapping
+from bridge.slo import SLI_ERROR_RATIO
+
+MERGE_TOPIC = "metrics.bridge-partials"
+
+
+def _msg(payload: dict[str, Any], topic: str = "metrics.raw", partition: int = 0) -> MagicMock:
+    msg = MagicMock()
+    msg.error.return_value = None
+    msg.topic.return_value = topic
+    msg.partition.return_value = partition
+    msg.value.return_value = json.dumps(payload).encode("utf-8")
+    msg.timestamp.return_value = (TIMESTAMP_CREATE_TIME, int(time.time() * 1000))
+    return msg
+
+
+@pytest.fixture
+def replicas(tmp_path, monkeypatch):
+    (tmp_path / "merge-svc.yaml").write_text(
+        "service: merge-svc\nslos:\n  - name: availability\n    target: 99\n"
+        "    sli:\n      type: availability\n"
+    )
+    monkeypatch.setattr("bridge.consumer.Consumer", MagicMock())
+    monkeypatch.setattr("bridge.merge.Producer", MagicMock())
+    config = Config(
+        merge_topic=MERGE_TOPIC,
+        slo_definitions_dir=str(tmp_path),
+        slo_windows_seconds=[300],
+        quantile_windows_seconds=[60],
+    )
+    return MetricsBridgeConsumer(config), MetricsBridgeConsumer(config)
+
+
+def _partials(replica: MetricsBridgeConsumer, partition: int) -> list[MagicMock]:
+    assert replica._merger is not None
+    replica._merger.publish()
+    producer: Any = replica._merger._producer
+    return [
+        _msg(json.loads(c.kwargs["value"]), topic=c.kwargs["topic"], partition=partition)
+        for c in producer.produce.call_args_list
+    ]
+
+
+class TestPartialAggregator:
+    def test_round_trip(self):
+        mapping = SketchMapping(0.01)
+        aggregator = PartialAggregator(mapping)
+        aggregator.observe_service("svc")
+        aggregator.observe_sli("svc", 10, 2, [1] * 12)
+        aggregator.observe_sli("svc", 5, 0, [0] * 12)
+        aggregator.observe_quantiles(("svc", "/a", "eu"), [5.0, 5.0], {mapping.index(80.0): 3})
+        (record,) = json.loads(json.dumps(aggregator.drain()))
+        service, partial = parse_partial(record, mapping)
+        assert service == "svc" and partial.active
+        assert partial.sli == [15, 2, *[1] * 12]
+        assert partial.series == {("/a", "eu"): {mapping.index(5.0): 2, mapping.index(80.0): 3}}
+        assert aggregator.drain() == []
+
+    @pytest.mark.parametrize("overrides", [
+        {"relative_accuracy": 0.02},
+        {"sli": [1, 2, *[0] * 12]},
+        {"sli": [1, 0]},
+        {"series": [["/a", "eu", {"100000": 1}]]},
+        {"service": 7},
+    ])
+    def test_rejects_bad_partials(self, overrides):
+        record = {
+            "service": "svc", "active": True, "sli": None, "relative_accuracy": 0.01,
+            "series": [], **overrides,
+        }
+        with pytest.raises((TypeError, ValueError)):
+            parse_partial(record, SketchMapping(0.01))
+
+
+class TestCrossProcessMerge:
+    def test_owner_exports_merged_state(self, replicas):
+        owner, other = replicas
+        labels = {"service": "merge-svc", "endpoint": "/m", "region": "eu"}
+        # One service spread over partitions: each process consumes a slice of it
+        owner._process_batch([
+            _msg({**labels, "latency_ms": 10.0 + i, "status_code": 200}) for i in range(90)
+        ])
+        other._process_batch([
+            _msg({**labels, "latency_ms": 1000.0, "status_code": 500, "error": True})
+            for _ in range(10)
+        ])
+        # Nothing per service is exported before the partials are merged
+        for replica in replicas:
+            replica._maintain(time.monotonic() + 60)
+            assert not replica._seen_services
+        assert ("merge-svc", "/m", "eu", "1m", "0.99") not in LATENCY_QUANTILE._metrics
+
+        owner._process_batch(_partials(owner, partition=1) + _partials(other, partition=1))
+        assert set(owner._seen_services) == {"merge-svc"}
+        assert ACTIVE_SERVICES._value.get() == 1
+        now = time.monotonic()
+        assert owner._slis is not None and owner._quantiles is not None
+        owner._slis.refresh(now)
+        owner._quantiles.refresh(now)
+        ratio: Any = SLI_ERROR_RATIO._metrics[("merge-svc", "availability", "5m")]
+        assert ratio._value.get() == pytest.approx(0.1)
+        p99: Any = SERVICE_LATENCY_QUANTILE._metrics[("merge-svc", "1m", "0.99")]
+        assert p99._value.get() == pytest.approx(1000.0, rel=0.01)
+
+        # The service's merge_topic partition moves: its state goes with it
+        owner._on_revoke(MagicMock(), [TopicPartition(MERGE_TOPIC, 1)])
+        assert not owner._seen_services
+        assert ("merge-svc", "availability", "5m") not in SLI_ERROR_RATIO._metrics
+        assert ("merge-svc", "1m", "0.99") not in SERVICE_LATENCY_QUANTILE._metrics
+
+    def test_malformed_partial_is_dropped(self, replicas):
+        owner, _ = replicas
+        owner._process_batch([_msg({"service": ["x"]}, topic=MERGE_TOPIC)])
+        assert not owner._seen_services
+
+    def test_subscribes_to_merge_topic(self, replicas):
+        owner, _ = replicas
+        owner.start()
+        consumer: Any = owner._consumer
+        assert consumer.subscribe.call_args[0][0] == ["metrics.raw", MERGE_TOPIC]
+        owner.stop()
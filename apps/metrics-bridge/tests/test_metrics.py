@@ -1,4 +1,20 @@
-from bridge.metrics import record_metric_event
+import time
+
+import pytest
+from prometheus_client import generate_latest
+
+from bridge.config import Config
+from bridge.metrics import (
+    DROPPED_EVENTS,
+    ERROR_TOTAL,
+    OVERFLOW_EVENTS,
+    REQUEST_LATENCY,
+    REQUEST_TOTAL,
+    configure_cardinality,
+    expire_series,
+    record_metric_event,
+    sample_weight,
+)
 
 
 class TestRecordMetricEvent:
@@ -96,3 +112,175 @@ class TestRecordMetricEvent:
             region="us-east-1",
         )._value.get()
         assert after_err == before + 1
+
+    def test_sample_weight_scales_counters_and_histogram(self):
+        labels = {"service": "weight-svc", "endpoint": "/w", "region": "us-east-1"}
+        record_metric_event({
+            **labels, "status_code": 200, "latency_ms": 40, "error": False, "sample_weight": 10
+        })
+        record_metric_event({**labels, "status_code": 503, "latency_ms": 40, "error": True})
+        assert REQUEST_TOTAL.labels(**labels, status_code="200")._value.get() == 10
+        assert ERROR_TOTAL.labels(**labels)._value.get() == 1
+        histogram = REQUEST_LATENCY.labels(**labels)
+        assert [b.get() for b in histogram._buckets][:3] == [0, 0, 11]
+        assert histogram._sum.get() == 440
+
+    @pytest.mark.parametrize("weight", [0, -2, 2.5, "10", True, float("inf")])
+    def test_invalid_sample_weight_rejected(self, weight):
+        with pytest.raises(ValueError):
+            sample_weight({"sample_weight": weight})
+
+    def test_sample_weight_defaults_to_one(self):
+        assert sample_weight({}) == 1
+        assert sample_weight({"sample_weight": None}) == 1
+        assert sample_weight({"sample_weight": 4.0}) == 4
+
+    def test_series_children_are_cached(self):
+        from bridge.metrics import series_children
+
+        first = series_children("cache-svc", "/c", "us-east-1", 200)
+        second = series_children("cache-svc", "/c", "us-east-1", 200)
+        assert first is second
+
+    def test_series_children_stringify_status_code(self):
+        from bridge.metrics import REQUEST_TOTAL, series_children
+
+        series = series_children("cache-status-svc", "/c", "us-east-1", 404)
+        assert series is not None
+        assert series.requests is REQUEST_TOTAL.labels(
+            service="cache-status-svc", endpoint="/c", region="us-east-1", status_code="404"
+        )
+
+    def test_clear_series_cache(self):
+        from bridge.metrics import clear_series_cache, series_children
+
+        first = series_children("cache-clear-svc", "/c", "us-east-1", 200)
+        clear_series_cache()
+        # Registry children survive, and so does the entry tracking them
+        assert series_children("cache-clear-svc", "/c", "us-east-1", 200) is first
+
+    def test_cache_resets_keep_tracking_bounded(self, monkeypatch):
+        from bridge import metrics
+
+        monkeypatch.setattr(metrics, "_CHILDREN_CACHE_MAX", 2)
+        tracked = len(metrics._tracked)
+        # Raw endpoints of one series, enough of them to reset the cache repeatedly
+        entries = {
+            metrics.series_children("cache-reset-svc", f"/users/{i}", "us-east-1", 200)
+            for i in range(10)
+        }
+        assert len(entries) == 1
+        assert len(metrics._tracked) == tracked + 1
+
+
+class TestCardinalityGuard:
+    @pytest.fixture(autouse=True)
+    def limited(self):
+        configure_cardinality(Config(max_series_per_metric=5))
+        yield
+        configure_cardinality(Config())
+
+    def test_numeric_endpoint_segments_share_a_series(self):
+        for user_id in range(50):
+            record_metric_event({
+                "service": "norm-svc",
+                "endpoint": f"/users/{user_id}",
+                "region": "us-east-1",
+                "status_code": 200,
+                "latency_ms": 10,
+            })
+        assert REQUEST_TOTAL.labels(
+            service="norm-svc", endpoint="/users/{id}", region="us-east-1", status_code="200"
+        )._value.get() == 50
+
+    def test_overflow_series_absorbs_excess(self):
+        before = OVERFLOW_EVENTS.labels("workload_request_latency_ms")._value.get()
+        for i in range(20):
+            record_metric_event({
+                "service": "hostile-svc",
+                "endpoint": f"/x/abc{i}",
+                "region": "us-east-1",
+                "status_code": 200,
+                "latency_ms": 10,
+            })
+        after = OVERFLOW_EVENTS.labels("workload_request_latency_ms")._value.get()
+        assert after - before == 15
+        assert REQUEST_TOTAL.labels(
+            service="other", endpoint="other", region="other", status_code="other"
+        )._value.get() >= 15
+
+    def test_scrape_size_bounded_under_hostile_input(self):
+        def scrape_size() -> int:
+            return len(generate_latest())
+
+        for i in range(10):
+            record_metric_event({"service": f"warm-{i}", "latency_ms": 1})
+        baseline = scrape_size()
+        for i in range(2000):
+            record_metric_event({
+                "service": f"hostile-{i}",
+                "endpoint": f"/p/session-{i}",
+                "region": f"r{i}",
+                "status_code": 200 + i,
+                "latency_ms": 1,
+            })
+        assert scrape_size() - baseline < 1024
+
+    def test_overlong_labels_dropped(self):
+        before = DROPPED_EVENTS.labels("invalid_labels")._value.get()
+        record_metric_event({"service": "x" * 1000, "latency_ms": 1})
+        assert DROPPED_EVENTS.labels("invalid_labels")._value.get() == before + 1
+
+
+class TestSeriesExpiry:
+    def _record(self, service: str, status_code: int = 200) -> None:
+        record_metric_event({
+            "service": service,
+            "endpoint": "/ttl",
+            "region": "us-east-1",
+            "status_code": status_code,
+            "latency_ms": 5,
+            "error": True,
+        })
+
+    def test_idle_series_removed(self):
+        self._record("ttl-idle-svc")
+        removed, complete = expire_series(time.monotonic() + 1)
+        assert removed >= 3
+        assert complete is True
+        assert ("ttl-idle-svc", "/ttl", "us-east-1", "200") not in REQUEST_TOTAL._metrics
+        assert ("ttl-idle-svc", "/ttl", "us-east-1") not in REQUEST_LATENCY._metrics
+        assert ("ttl-idle-svc", "/ttl", "us-east-1") not in ERROR_TOTAL._metrics
+
+    def test_recent_series_kept(self):
+        self._record("ttl-live-svc")
+        expire_series(time.monotonic() - 60)
+        assert ("ttl-live-svc", "/ttl", "us-east-1", "200") in REQUEST_TOTAL._metrics
+
+    def test_shared_children_kept_while_any_status_is_live(self):
+        self._record("ttl-shared-svc", status_code=200)
+        cutoff = time.monotonic()
+        self._record("ttl-shared-svc", status_code=500)
+        expire_series(cutoff)
+        # The idle 200 counter goes; histogram and error counter are still written via 500
+        assert ("ttl-shared-svc", "/ttl", "us-east-1", "200") not in REQUEST_TOTAL._metrics
+        assert ("ttl-shared-svc", "/ttl", "us-east-1", "500") in REQUEST_TOTAL._metrics
+        assert ("ttl-shared-svc", "/ttl", "us-east-1") in REQUEST_LATENCY._metrics
+        assert ("ttl-shared-svc", "/ttl", "us-east-1") in ERROR_TOTAL._metrics
+
+    def test_expired_series_recreated_on_next_event(self):
+        self._record("ttl-back-svc")
+        expire_series(time.monotonic() + 1)
+        self._record("ttl-back-svc")
+        assert REQUEST_TOTAL.labels(
+            service="ttl-back-svc", endpoint="/ttl", region="us-east-1", status_code="200"
+        )._value.get() == 1
+
+    def test_limit_spreads_expiry(self):
+        for status_code in (200, 201, 202):
+            self._record("ttl-limit-svc", status_code=status_code)
+        cutoff = time.monotonic() + 1
+        _, complete = expire_series(cutoff, limit=1)
+        assert complete is False
+        assert expire_series(cutoff)[1] is True
+        assert not any(k[0] == "ttl-limit-svc" for k in REQUEST_TOTAL._metrics)
@@ -0,0 +1,151 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import REGISTRY
+
+from bridge.config import Config
+from bridge.health import IngestionState
+from bridge.pool import ConsumerPool, _publish_state, exposition_registry
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+
+class TestConsumerPool:
+    def test_requires_multiproc_dir(self, monkeypatch):
+        monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+        with pytest.raises(ValueError, match="PROMETHEUS_MULTIPROC_DIR"):
+            ConsumerPool(Config(consumer_processes=2))
+
+    def test_single_process_uses_default_registry(self, monkeypatch):
+        monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+        assert exposition_registry() is REGISTRY
+
+    def test_clear_stale_files_keeps_own(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        pool = ConsumerPool(Config(consumer_processes=2))
+        own = tmp_path / f"counter_{os.getpid()}.db"
+        stale = tmp_path / "counter_999999.db"
+        own.touch()
+        stale.touch()
+        pool._clear_stale_files()
+        assert own.exists()
+        assert not stale.exists()
+
+    def _running_pool(self, monkeypatch, tmp_path, workers=2):
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+        pool = ConsumerPool(Config(consumer_processes=workers, readiness_max_event_age_seconds=60))
+        pool._processes = [MagicMock(is_alive=MagicMock(return_value=True)) for _ in range(workers)]
+        return pool
+
+    def test_not_ready_before_workers_report(self, monkeypatch, tmp_path):
+        ready, details = self._running_pool(monkeypatch, tmp_path).readiness()
+        assert not ready
+        assert details["reason"] == "no partitions assigned"
+
+    def test_ready_when_any_worker_has_fresh_partitions(self, monkeypatch, tmp_path):
+        pool = self._running_pool(monkeypatch, tmp_path)
+        _publish_state(pool._states, 0, IngestionState(3, 5, time.time() - 1, 40.0))
+        ready, details = pool.readiness()
+        assert ready
+        assert details["assigned_partitions"] == 3
+        assert details["lag_messages"] == 5
+        assert details["workers_alive"] == 2
+        assert details["last_event_age_seconds"] < 60
+
+    def test_one_stale_lagging_worker_fails_readiness(self, monkeypatch, tmp_path):
+        pool = self._running_pool(monkeypatch, tmp_path)
+        _publish_state(pool._states, 0, IngestionState(3, 0, time.time() - 1, 40.0))
+        _publish_state(pool._states, 1, IngestionState(3, 500, time.time() - 300, 0.0))
+        ready, details = pool.readiness()
+        assert not ready
+        assert details["reason"] == "consumer lagging"
+        assert details["lag_messages"] == 500
+
+    def test_dead_worker_fails_readiness(self, monkeypatch, tmp_path):
+        pool = self._running_pool(monkeypatch, tmp_path)
+        _publish_state(pool._states, 0, IngestionState(3, 0, time.time(), 40.0))
+        pool._processes[1].is_alive.return_value = False
+        ready, details = pool.readiness()
+        assert not ready
+        assert details["reason"] == "consumer workers not running"
+
+
+def test_batches_from_separate_processes_merge(tmp_path):
+    """Deltas applied by two worker processes show up summed in one exposition."""
+    worker = textwrap.dedent("""
+        from bridge.aggregator import MetricBatch
+        batch = MetricBatch()
+        for latency in (10.0, 600.0):
+            batch.add({"service": "mp-svc", "endpoint": "/mp", "region": "us-east-1",
+                       "status_code": 500, "latency_ms": latency, "error": True})
+        batch.apply()
+    """)
+    collector = textwrap.dedent("""
+        from prometheus_client import generate_latest
+        from bridge.pool import exposition_registry
+        print(generate_latest(exposition_registry()).decode())
+    """)
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": str(APP_DIR)}
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], env=env, check=True, cwd=APP_DIR)
+    result = subprocess.run(
+        [sys.executable, "-c", collector],
+        env=env, check=True, cwd=APP_DIR, capture_output=True, text=True,
+    )
+    labels = 'endpoint="/mp",region="us-east-1",service="mp-svc"'
+    assert f"workload_errors_total{{{labels}}} 4.0" in result.stdout
+    assert f"workload_request_latency_ms_count{{{labels}}} 4.0" in result.stdout
+    bucket = 'workload_request_latency_ms_bucket{endpoint="/mp",le="%s",region="us-east-1"'
+    assert bucket % "10.0" + ',service="mp-svc"} 2.0' in result.stdout
+    assert bucket % "750.0" + ',service="mp-svc"} 4.0' in result.stdout
+
+
+def test_expiry_under_multiprocess_files(tmp_path):
+    """Removed gauges leave the merged exposition; counters are kept, not half-expired."""
+    worker = textwrap.dedent("""
+        import sys, time
+        from bridge.aggregator import MetricBatch
+        from bridge.metrics import REQUEST_TOTAL, expire_series, remove_gauge
+        from bridge.quantiles import LATENCY_QUANTILE, SERVICE_LATENCY_QUANTILE
+        batch = MetricBatch()
+        batch.add({"service": "mp-ttl-svc", "endpoint": "/t", "region": "eu",
+                   "status_code": 200, "latency_ms": 5})
+        batch.apply()
+        LATENCY_QUANTILE.labels("mp-ttl-svc", "/t", "eu", "1m", "0.99").set(5.0)
+        SERVICE_LATENCY_QUANTILE.labels("mp-ttl-svc", "1m", "0.99").set(float(sys.argv[1]))
+        if sys.argv[1] == "1":
+            remove_gauge(LATENCY_QUANTILE, ("mp-ttl-svc", "/t", "eu", "1m", "0.99"))
+            remove_gauge(SERVICE_LATENCY_QUANTILE, ("mp-ttl-svc", "1m", "0.99"))
+            assert expire_series(time.monotonic() + 3600) == (0, True)
+    """)
+    collector = textwrap.dedent("""
+        from prometheus_client import generate_latest
+        from bridge.pool import exposition_registry
+        print(generate_latest(exposition_registry()).decode())
+    """)
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": str(APP_DIR)}
+    subprocess.run([sys.executable, "-c", worker, "1"], env=env, check=True, cwd=APP_DIR)
+    result = subprocess.run(
+        [sys.executable, "-c", collector],
+        env=env, check=True, cwd=APP_DIR, capture_output=True, text=True,
+    )
+    assert "workload_request_latency_quantile_ms{" not in result.stdout
+    assert "workload_service_latency_quantile_ms{" not in result.stdout
+    # Counter values can't be removed from the files, so the series is not expired
+    labels = 'endpoint="/t",region="eu",service="mp-ttl-svc",status_code="200"'
+    assert f"workload_requests_total{{{labels}}} 1.0" in result.stdout
+
+    # A process still exporting the gauge outranks the removed marker
+    subprocess.run([sys.executable, "-c", worker, "7"], env=env, check=True, cwd=APP_DIR)
+    result = subprocess.run(
+        [sys.executable, "-c", collector],
+        env=env, check=True, cwd=APP_DIR, capture_output=True, text=True,
+    )
+    labels = 'quantile="0.99",service="mp-ttl-svc",window="1m"'
+    assert f"workload_service_latency_quantile_ms{{{labels}}} 7.0" in result.stdout
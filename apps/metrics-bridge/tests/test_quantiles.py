@@ -0,0 +1,81 @@
+from typing import Any
+
+from prometheus_client import Gauge
+
+from bridge.aggregator import MetricBatch
+from bridge.config import Config
+from bridge.quantiles import (
+    LATENCY_QUANTILE,
+    SERVICE_LATENCY_QUANTILE,
+    QuantileTracker,
+    RollingSketch,
+    window_label,
+)
+
+
+def _gauge(gauge: Gauge, *labels: str) -> float | None:
+    child: Any = gauge._metrics.get(labels)
+    return None if child is None else child._value.get()
+
+
+def _tracker() -> QuantileTracker:
+    return QuantileTracker(Config(quantile_windows_seconds=[60, 300], quantile_slot_seconds=10))
+
+
+class TestRollingSketch:
+    def test_windows_age_out_independently(self):
+        sketch = RollingSketch([1, 3])
+        sketch.add(0, {5: 1})
+        sketch.add(1, {5: 2})
+        sketch.advance(1)
+        assert sketch.totals() == [{5: 2}, {5: 3}]
+        sketch.advance(3)
+        assert sketch.totals() == [{}, {5: 2}]
+        assert not sketch.is_empty()
+        sketch.advance(4)
+        assert sketch.is_empty()
+
+
+class TestQuantileTracker:
+    def test_window_label(self):
+        assert window_label(60) == "1m"
+        assert window_label(300) == "5m"
+        assert window_label(3600) == "1h"
+        assert window_label(45) == "45s"
+
+    def test_exports_series_and_service_quantiles(self):
+        tracker = _tracker()
+        batch = MetricBatch(tracker)
+        for latency in range(1, 101):
+            batch.add({"service": "q-svc", "endpoint": "/a", "region": "eu", "latency_ms": latency})
+            batch.add({"service": "q-svc", "endpoint": "/b", "region": "eu", "latency_ms": 1000})
+        batch.apply()
+        tracker.refresh(0)
+
+        p50 = _gauge(LATENCY_QUANTILE, "q-svc", "/a", "eu", "1m", "0.5")
+        assert p50 is not None and abs(p50 - 50) <= 1
+        p99 = _gauge(LATENCY_QUANTILE, "q-svc", "/b", "eu", "5m", "0.99")
+        assert p99 is not None and abs(p99 - 1000) <= 10
+        # Merged across endpoints: half the requests are at 1000 ms
+        service_p95 = _gauge(SERVICE_LATENCY_QUANTILE, "q-svc", "1m", "0.95")
+        assert service_p95 is not None and abs(service_p95 - 1000) <= 10
+
+    def test_idle_series_removed_per_window(self):
+        tracker = _tracker()
+        tracker.observe(("q-idle", "/a", "eu"), [5.0], now=0)
+        tracker.refresh(0)
+        assert _gauge(LATENCY_QUANTILE, "q-idle", "/a", "eu", "1m", "0.5") is not None
+
+        tracker.refresh(65)
+        assert _gauge(LATENCY_QUANTILE, "q-idle", "/a", "eu", "1m", "0.5") is None
+        assert _gauge(LATENCY_QUANTILE, "q-idle", "/a", "eu", "5m", "0.5") is not None
+
+        tracker.refresh(305)
+        assert _gauge(LATENCY_QUANTILE, "q-idle", "/a", "eu", "5m", "0.5") is None
+        assert _gauge(SERVICE_LATENCY_QUANTILE, "q-idle", "5m", "0.5") is None
+        assert tracker._series == {}
+
+    def test_batch_without_tracker_skips_sketch(self):
+        batch = MetricBatch()
+        batch.add({"service": "q-none", "latency_ms": 5})
+        assert batch._series[("q-none", "/", "unknown")].latencies == []
@@ -0,0 +1,235 @@
+import struct
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import pytest
+from prometheus_client import CollectorRegistry, Counter, Gauge
+
+from bridge import snappy
+from bridge.config import Config
+from bridge.remote_write import (
+    RemoteWriteExporter,
+    Sample,
+    collect_samples,
+    encode_write_request,
+)
+
+
+def _read_varint(buf: bytes, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _fields(buf: bytes) -> Iterator[tuple[int, Any]]:
+    pos = 0
+    while pos < len(buf):
+        key, pos = _read_varint(buf, pos)
+        number, wire_type = key >> 3, key & 7
+        value: Any
+        if wire_type == 0:
+            value, pos = _read_varint(buf, pos)
+        elif wire_type == 1:
+            value = struct.unpack("<d", buf[pos:pos + 8])[0]
+            pos += 8
+        else:
+            length, pos = _read_varint(buf, pos)
+            value = buf[pos:pos + length]
+            pos += length
+        yield number, value
+
+
+def decode_write_request(buf: bytes) -> list[tuple[dict[str, str], float, int]]:
+    """Minimal WriteRequest decoder standing in for a remote-write receiver."""
+    series = []
+    for _, ts in _fields(buf):
+        labels: dict[str, str] = {}
+        value, timestamp = 0.0, 0
+        for number, field in _fields(ts):
+            if number == 1:
+                pair = dict(_fields(field))
+                labels[pair[1].decode()] = pair[2].decode()
+            else:
+                sample = dict(_fields(field))
+                value, timestamp = sample[1], sample[2]
+        series.append((labels, value, timestamp))
+    return series
+
+
+class _Receiver(ThreadingHTTPServer):
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.requests: list[tuple[dict[str, str], list[Any]]] = []
+        self.status = 204
+        self.connections: set[tuple[str, int]] = set()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: _Receiver
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.connections.add(self.client_address)
+        if self.server.status < 300:
+            payload = snappy.decompress(body)
+            self.server.requests.append((dict(self.headers), decode_write_request(payload)))
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def receiver():
+    server = _Receiver()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def registry():
+    return CollectorRegistry()
+
+
+def _exporter(
+    receiver: _Receiver, registry: CollectorRegistry, **overrides: Any
+) -> RemoteWriteExporter:
+    port = receiver.server_address[1]
+    config = Config(remote_write_url=f"http://127.0.0.1:{port}/api/v1/write", **overrides)
+    return RemoteWriteExporter(config, registry)
+
+
+class TestEncoding:
+    def test_round_trip(self):
+        samples: list[Sample] = [((("__name__", "up"), ("job", "bridge")), 1.5)]
+        decoded = decode_write_request(encode_write_request(samples, 1700000000000))
+        assert decoded == [({"__name__": "up", "job": "bridge"}, 1.5, 1700000000000)]
+
+    def test_collect_samples_sorted_and_without_created(self, registry):
+        Counter("rw_requests", "doc", ["service"], registry=registry).labels("a").inc()
+        samples = collect_samples(registry)
+        assert samples == [((("__name__", "rw_requests_total"), ("service", "a")), 1.0)]
+
+
+class TestRemoteWriteExporter:
+    def test_rejects_invalid_url(self, registry):
+        with pytest.raises(ValueError):
+            RemoteWriteExporter(Config(remote_write_url="kafka:9092"), registry)
+
+    def test_pushes_snappy_protobuf(self, receiver, registry):
+        Gauge("rw_gauge", "doc", registry=registry).set(7)
+        _exporter(receiver, registry).tick()
+        headers, series = receiver.requests[0]
+        assert headers["Content-Encoding"] == "snappy"
+        assert headers["Content-Type"] == "application/x-protobuf"
+        assert headers["X-Prometheus-Remote-Write-Version"] == "0.1.0"
+        assert series[0][0] == {"__name__": "rw_gauge"}
+        assert series[0][1] == 7.0
+
+    def test_only_changed_samples_resent(self, receiver, registry):
+        gauge = Gauge("rw_delta", "doc", ["k"], registry=registry)
+        gauge.labels("a").set(1)
+        gauge.labels("b").set(1)
+        exporter = _exporter(receiver, registry)
+        exporter.tick()
+        gauge.labels("b").set(2)
+        exporter.tick()
+        assert len(receiver.requests[0][1]) == 2
+        assert [s[0]["k"] for s in receiver.requests[1][1]] == ["b"]
+
+    def test_unchanged_samples_resent_after_interval(self, registry):
+        Gauge("rw_resend", "doc", registry=registry).set(1)
+        exporter = RemoteWriteExporter(
+            Config(remote_write_url="http://127.0.0.1:9/", remote_write_resend_seconds=30),
+            registry,
+        )
+        samples = collect_samples(registry)
+        assert len(exporter.select(samples, now=0)) == 1
+        assert exporter.select(samples, now=10) == []
+        assert len(exporter.select(samples, now=31)) == 1
+
+    def test_samples_per_tick_limited_oldest_first(self, registry):
+        gauge = Gauge("rw_limit", "doc", ["k"], registry=registry)
+        for i in range(5):
+            gauge.labels(str(i)).set(i)
+        exporter = RemoteWriteExporter(
+            Config(remote_write_url="http://127.0.0.1:9/", remote_write_max_samples_per_tick=2),
+            registry,
+        )
+        samples = collect_samples(registry)
+        ticks = [
+            {dict(labels)["k"] for labels, _ in exporter.select(samples, now)}
+            for now in (0, 1, 2, 3)
+        ]
+        assert [len(sent) for sent in ticks] == [2, 2, 1, 0]
+        assert set.union(*ticks) == {"0", "1", "2", "3", "4"}
+
+    def test_samples_per_tick_defaults_to_encoder(self, registry, monkeypatch):
+        config = Config(remote_write_url="http://127.0.0.1:9/")
+        monkeypatch.setattr(snappy, "NATIVE", False)
+        assert RemoteWriteExporter(config, registry).max_samples_per_tick == 10000
+        monkeypatch.setattr(snappy, "NATIVE", True)
+        assert RemoteWriteExporter(config, registry).max_samples_per_tick == 0
+
+    def test_batches_split_by_max_samples(self, receiver, registry):
+        gauge = Gauge("rw_split", "doc", ["k"], registry=registry)
+        for i in range(5):
+            gauge.labels(str(i)).set(i)
+        _exporter(receiver, registry, remote_write_max_samples_per_request=2).tick()
+        assert [len(series) for _, series in receiver.requests] == [2, 2, 1]
+
+    def test_connection_reused(self, receiver, registry):
+        gauge = Gauge("rw_reuse", "doc", ["k"], registry=registry)
+        for i in range(4):
+            gauge.labels(str(i)).set(i)
+        _exporter(receiver, registry, remote_write_max_samples_per_request=1).tick()
+        assert len(receiver.requests) == 4
+        assert len(receiver.connections) == 1
+
+    def test_failed_requests_stay_queued_and_retry(self, receiver, registry):
+        Gauge("rw_retry", "doc", registry=registry).set(3)
+        exporter = _exporter(receiver, registry)
+        receiver.status = 503
+        exporter.tick()
+        assert len(exporter._queue) == 1
+        receiver.status = 204
+        exporter.flush()
+        assert len(exporter._queue) == 0
+        assert receiver.requests[0][1][0][1] == 3.0
+
+    def test_client_errors_are_dropped(self, receiver, registry):
+        Gauge("rw_bad", "doc", registry=registry).set(1)
+        exporter = _exporter(receiver, registry)
+        receiver.status = 400
+        exporter.tick()
+        assert len(exporter._queue) == 0
+
+    def test_queue_bounded(self, registry):
+        gauge = Gauge("rw_bounded", "doc", ["k"], registry=registry)
+        for i in range(10):
+            gauge.labels(str(i)).set(i)
+        # Nothing listens on the discard port, so every send fails
+        exporter = RemoteWriteExporter(
+            Config(
+                remote_write_url="http://127.0.0.1:9/",
+                remote_write_max_samples_per_request=1,
+                remote_write_queue_max_requests=3,
+                remote_write_timeout_seconds=1,
+            ),
+            registry,
+        )
+        exporter.tick()
+        assert len(exporter._queue) == 3
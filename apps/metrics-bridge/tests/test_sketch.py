@@ -0,0 +1,75 @@
+import random
+
+import pytest
+
+from bridge.sketch import (
+    ZERO_BIN,
+    SketchMapping,
+    merge_bins,
+    quantiles,
+    rebin,
+    subtract_bins,
+)
+
+
+def _bins(mapping: SketchMapping, values: list[float]) -> dict[int, int]:
+    return dict(mapping.bins(values))
+
+
+class TestSketch:
+    def test_rejects_invalid_accuracy(self):
+        with pytest.raises(ValueError):
+            SketchMapping(0)
+
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(7)
+        values = sorted(rng.lognormvariate(4, 1) for _ in range(20000))
+        mapping = SketchMapping(0.01)
+        qs = [0.5, 0.95, 0.99, 0.999]
+        estimates = quantiles(_bins(mapping, values), mapping, qs)
+        assert estimates is not None
+        for q, estimate in zip(qs, estimates):
+            exact = values[int(q * (len(values) - 1))]
+            assert abs(estimate - exact) <= 0.01 * exact + 1e-9
+
+    def test_bulk_bins_match_index(self):
+        mapping = SketchMapping(0.01)
+        values = [0.0, 0.5, 1.0, 12.5, 12.5, 4000.0]
+        expected: dict[int, int] = {}
+        for value in values:
+            expected[mapping.index(value)] = expected.get(mapping.index(value), 0) + 1
+        assert mapping.bins(values) == expected
+
+    def test_zero_values(self):
+        mapping = SketchMapping(0.01)
+        assert mapping.index(0.0) == ZERO_BIN
+        assert quantiles(_bins(mapping, [0.0, 0.0, 100.0]), mapping, [0.5]) == [0.0]
+
+    def test_empty(self):
+        assert quantiles({}, SketchMapping(0.01), [0.5]) is None
+
+    def test_merge_then_subtract_restores(self):
+        mapping = SketchMapping(0.02)
+        a = _bins(mapping, [1.0, 10.0, 100.0])
+        b = _bins(mapping, [10.0, 1000.0])
+        merged = dict(a)
+        merge_bins(merged, b)
+        assert sum(merged.values()) == 5
+        subtract_bins(merged, b)
+        assert merged == a
+
+    def test_rebin_same_mapping_is_identity(self):
+        mapping = SketchMapping(0.01)
+        bins = _bins(mapping, [1.0, 10.0])
+        assert rebin(bins, SketchMapping(0.01), mapping) is bins
+
+    def test_rebin_to_coarser_mapping(self):
+        rng = random.Random(3)
+        values = sorted(rng.lognormvariate(4, 1) for _ in range(5000))
+        fine, coarse = SketchMapping(0.005), SketchMapping(0.02)
+        rebinned = rebin(_bins(fine, values), fine, coarse)
+        assert sum(rebinned.values()) == len(values)
+        estimate = quantiles(rebinned, coarse, [0.99])
+        assert estimate is not None
+        exact = values[int(0.99 * (len(values) - 1))]
+        assert abs(estimate[0] - exact) <= 0.025 * exact
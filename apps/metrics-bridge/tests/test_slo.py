@@ -0,0 +1,102 @@
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+from prometheus_client import Gauge
+
+from bridge.aggregator import MetricBatch
+from bridge.config import Config
+from bridge.slo import (
+    SLI_ERROR_RATIO,
+    SLO_BURN_RATE,
+    MinuteRing,
+    SliTracker,
+    SloDefinition,
+    load_slo_definitions,
+)
+
+SLO_DOCS = Path(__file__).resolve().parents[3] / "docs" / "slos"
+
+
+def _gauge(gauge: Gauge, *labels: str) -> float | None:
+    child: Any = gauge._metrics.get(labels)
+    return None if child is None else child._value.get()
+
+
+def _tracker(*definitions: SloDefinition) -> SliTracker:
+    return SliTracker(Config(slo_windows_seconds=[300, 3600]), list(definitions))
+
+
+class TestLoadDefinitions:
+    def test_loads_repo_slos(self):
+        definitions = load_slo_definitions(str(SLO_DOCS))
+        by_name = {d.name: d for d in definitions if d.service == "api-service"}
+        assert by_name["availability"].sli_type == "availability"
+        assert by_name["availability"].error_budget == pytest.approx(0.001)
+        assert by_name["latency_p99"].threshold_ms == 500.0
+        # Throughput is not a ratio SLI
+        assert "throughput" not in by_name
+
+    def test_latency_requires_threshold(self, tmp_path):
+        (tmp_path / "svc.yaml").write_text(
+            "service: svc\nslos:\n  - name: fast\n    target: 99\n    sli:\n      type: latency\n"
+        )
+        with pytest.raises(ValueError):
+            load_slo_definitions(str(tmp_path))
+
+
+class TestMinuteRing:
+    def test_windows_slide_per_minute(self):
+        ring = MinuteRing([2, 5])
+        ring.add(0, bad=1, total=10)
+        ring.add(1, bad=0, total=10)
+        assert ring.sums() == [(1, 20), (1, 20)]
+        ring.advance(2)
+        assert ring.sums() == [(0, 10), (1, 20)]
+        ring.advance(5)
+        assert ring.sums() == [(0, 0), (0, 10)]
+        ring.advance(6)
+        assert ring.sums() == [(0, 0), (0, 0)]
+
+    def test_long_gap_resets(self):
+        ring = MinuteRing([3])
+        ring.add(0, bad=2, total=4)
+        ring.add(100, bad=1, total=1)
+        assert ring.sums() == [(1, 1)]
+
+
+class TestSliTracker:
+    def test_exports_error_ratio_and_burn_rate(self):
+        tracker = _tracker(SloDefinition("slo-svc", "availability", 99.0, "availability"))
+        batch = MetricBatch(slis=tracker)
+        for i in range(100):
+            batch.add({"service": "slo-svc", "latency_ms": 10, "error": i < 5})
+        batch.add({"service": "other-svc", "latency_ms": 10, "error": True})
+        batch.apply()
+        tracker.refresh(time.monotonic())
+
+        ratio = _gauge(SLI_ERROR_RATIO, "slo-svc", "availability", "5m")
+        assert ratio == pytest.approx(0.05)
+        burn = _gauge(SLO_BURN_RATE, "slo-svc", "availability", "1h")
+        assert burn == pytest.approx(5.0)
+        assert _gauge(SLI_ERROR_RATIO, "other-svc", "availability", "5m") is None
+
+    def test_latency_sli_counts_slow_requests(self):
+        tracker = _tracker(SloDefinition("slo-lat", "latency_p99", 99.0, "latency", 500.0))
+        batch = MetricBatch(slis=tracker)
+        for latency in (100, 500, 501, 3000):
+            batch.add({"service": "slo-lat", "latency_ms": latency})
+        batch.apply()
+        tracker.refresh(time.monotonic())
+        assert _gauge(SLI_ERROR_RATIO, "slo-lat", "latency_p99", "5m") == pytest.approx(0.5)
+
+    def test_gauges_removed_when_window_empties(self):
+        tracker = _tracker(SloDefinition("slo-idle", "availability", 99.9, "availability"))
+        now = time.monotonic()
+        tracker.observe("slo-idle", 10, 1, [0] * 12, now)
+        tracker.refresh(now)
+        assert _gauge(SLI_ERROR_RATIO, "slo-idle", "availability", "5m") is not None
+        tracker.refresh(now + 6 * 60)
+        assert _gauge(SLI_ERROR_RATIO, "slo-idle", "availability", "5m") is None
+        assert _gauge(SLI_ERROR_RATIO, "slo-idle", "availability", "1h") is not None
@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from bridge.snappy import compress, compress_python, decompress
+
+
+class TestSnappy:
+    @pytest.mark.parametrize("data", [
+        b"",
+        b"a",
+        b"abcd" * 1000,
+        os.urandom(5000),
+        b"x" * 70000 + b"tail",
+        b'{"service":"api-service","endpoint":"/api/v1/users"}' * 200,
+    ])
+    def test_round_trip(self, data):
+        assert decompress(compress(data)) == data
+        assert decompress(compress_python(data)) == data
+
+    def test_compresses_repetitive_input(self):
+        data = b"workload_request_latency_ms_bucket" * 500
+        assert len(compress(data)) < len(data) // 10
+        assert len(compress_python(data)) < len(data) // 10
+
+    def test_known_encoding(self):
+        # Length preamble, 4-byte literal, then a copy of 8 bytes at offset 4
+        assert compress_python(b"abcdabcdabcd") == b"\x0c\x0cabcd\x11\x04"
+        assert decompress(b"\x0c\x0cabcd\x11\x04") == b"abcdabcdabcd"
+
+    def test_rejects_corrupt_offset(self):
+        with pytest.raises(ValueError):
+            decompress(b"\x08\x11\x04")
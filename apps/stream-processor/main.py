@@ -4,6 +4,7 @@ from types import FrameType
 from typing import Optional
 
 import structlog
+from prometheus_client import start_http_server
 
 from processor.config import Config
 from processor.consumer import StreamProcessor
@@ -39,6 +40,8 @@ def main() -> None:
         consumer_group=config.consumer_group,
         window_size_seconds=config.window_size_seconds,
     )
+    if config.metrics_port:
+        start_http_server(config.metrics_port)
     processor.run()
     sys.exit(0)
 
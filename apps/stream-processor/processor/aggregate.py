@@ -0,0 +1,66 @@
+"""Aggregate records: pre-aggregated requests of one series over an interval.
+
+The workload simulator can send these on the metrics topic in place of the
+individual events. Besides counts they carry a DDSketch latency sketch: bin `i`
+covers (gamma**(i-1), gamma**i] ms with gamma = (1 + a) / (1 - a) for relative
+accuracy `a`, and is represented by a value within `a` of every latency in it.
+"""
+
+import math
+import sys
+from typing import Any, List, Tuple
+
+# `type` field of an aggregate record; raw events have none
+AGGREGATE_TYPE = "aggregate"
+# Bin index of latencies too small for the logarithmic scale
+ZERO_BIN = -(1 << 30)
+# Smallest latency given its own bin (ms); anything lower counts as zero
+MIN_LATENCY_MS = 1e-3
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise TypeError(f"Expected an integer, got {value!r}")
+    return int(value)
+
+
+def latency_bins(payload: dict[str, Any]) -> List[Tuple[float, int]]:
+    """(representative latency in ms, count) per sketch bin of an aggregate record.
+
+    Raises TypeError or ValueError unless the bins map integer indices within the
+    sketch's representable range to non-negative counts.
+    """
+    sketch = payload.get("latency_sketch")
+    if not isinstance(sketch, dict) or not isinstance(sketch.get("bins"), dict):
+        raise TypeError("Aggregate record has no latency sketch bins")
+    accuracy = sketch.get("relative_accuracy")
+    if isinstance(accuracy, bool) or not isinstance(accuracy, (int, float)):
+        raise TypeError(f"relative_accuracy must be a number, got {accuracy!r}")
+    if not 0 < accuracy < 1:
+        raise ValueError(f"relative_accuracy must be in (0, 1), got {accuracy}")
+    gamma = (1 + accuracy) / (1 - accuracy)
+    multiplier = 1 / math.log(gamma)
+    min_index = math.ceil(math.log(MIN_LATENCY_MS) * multiplier)
+    max_index = math.floor(math.log(sys.float_info.max / 2) * multiplier)
+    bins = []
+    for index, count in sketch["bins"].items():
+        index, count = _to_int(index), _to_int(count)
+        if index != ZERO_BIN and not min_index <= index <= max_index:
+            raise ValueError(f"Latency bin {index} out of range")
+        if count < 0:
+            raise ValueError(f"Negative count in latency bin {index}")
+        if count:
+            value = 0.0 if index == ZERO_BIN else 2 * gamma**index / (gamma + 1)
+            bins.append((value, count))
+    return bins
+
+
+def error_count(payload: dict[str, Any], bins: List[Tuple[float, int]]) -> int:
+    """Errors of an aggregate record, checked against its `count` and latency bins."""
+    count = sum(n for _, n in bins)
+    if "count" in payload and _to_int(payload["count"]) != count:
+        raise ValueError("Aggregate record count does not match its latency bins")
+    errors = _to_int(payload.get("error_count", 0))
+    if not 0 <= errors <= count:
+        raise ValueError(f"error_count must be between 0 and {count}, got {errors}")
+    return errors
@@ -1,12 +1,13 @@
 import json
 import time
 from datetime import datetime, timezone
-from typing import Dict
+from typing import Any, Dict
 
 import structlog
 from confluent_kafka import Producer, KafkaException
 
 from processor.config import Config
+from processor.kafka_stats import ProducerStats, producer_profile
 from processor.rules import RuleViolation
 
 logger = structlog.get_logger(__name__)
@@ -18,11 +19,16 @@ class AlertPublisher:
     def __init__(self, config: Config) -> None:
         self._config = config
         self._active_alerts: Dict[str, float] = {}  # fingerprint -> last_fired_time
-        self._producer = Producer({
+        conf: Dict[str, Any] = {
             "bootstrap.servers": config.kafka_brokers,
             "acks": "all",
             "client.id": "stream-processor-alerter",
-        })
+            **producer_profile(config.alert_producer_profile),
+        }
+        if config.producer_stats_interval_ms:
+            conf["statistics.interval.ms"] = config.producer_stats_interval_ms
+            conf["stats_cb"] = ProducerStats(conf["client.id"], int(conf["batch.size"]))
+        self._producer = Producer(conf)
 
     def _fingerprint(self, violation: RuleViolation) -> str:
         return f"{violation.rule_name}:{violation.service}"
@@ -74,5 +80,9 @@ class AlertPublisher:
             logger.error("Failed to publish alert", error=str(e))
             return False
 
+    def poll(self) -> None:
+        """Serve producer callbacks (including statistics) between alerts."""
+        self._producer.poll(0)
+
     def close(self) -> None:
         self._producer.flush(timeout=10)
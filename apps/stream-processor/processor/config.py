@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -14,5 +16,17 @@ class Config(BaseSettings):
     traffic_drop_threshold: float = Field(default=0.5)
     alert_cooldown_seconds: int = Field(default=300)
     consecutive_windows_for_alert: int = Field(default=3)
+    # Topic of per-replica partial aggregates, merged per service by the replica
+    # owning the service's partition of it. Set it when producers spread a service
+    # over metrics_topic partitions; empty detects on the events each replica consumes.
+    merge_topic: str = Field(default="")
+    # Seconds of consumed events folded into each partial before it is sent
+    merge_interval_seconds: float = Field(default=5.0)
+    # Alerts are few and time-critical, so they skip batching by default
+    alert_producer_profile: Literal["latency", "balanced", "bulk"] = Field(default="latency")
+    # librdkafka statistics exported as kafka_producer_* metrics; 0 disables
+    producer_stats_interval_ms: int = Field(default=0)
+    # Serve Prometheus metrics on this port; 0 disables
+    metrics_port: int = Field(default=0)
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
@@ -1,16 +1,35 @@
 import json
+import time
+from typing import Any, Optional, Union
 
 import structlog
 from confluent_kafka import Consumer, KafkaError, Message
 
+from processor.aggregate import AGGREGATE_TYPE, error_count, latency_bins
 from processor.config import Config
 from processor.detector import AnomalyDetector
 from processor.alerter import AlertPublisher
+from processor.merge import PartialMerger
 from processor.state import WindowState
 
 logger = structlog.get_logger(__name__)
 
 
+def sample_weight(payload: dict[str, Any]) -> int:
+    """Requests a metric event stands for: its `sample_weight`, or 1 when unsampled."""
+    weight = payload.get("sample_weight")
+    if weight is None:
+        return 1
+    if (
+        isinstance(weight, bool)
+        or not isinstance(weight, (int, float))
+        or not 1 <= weight < float("inf")
+        or weight != int(weight)
+    ):
+        raise ValueError(f"sample_weight must be a positive integer, got {weight!r}")
+    return int(weight)
+
+
 class StreamProcessor:
     """Kafka consumer group with graceful shutdown and anomaly detection."""
 
@@ -19,6 +38,9 @@ class StreamProcessor:
         self._state = WindowState(config.window_size_seconds)
         self._detector = AnomalyDetector(config, self._state)
         self._alerter = AlertPublisher(config)
+        self._merger: Optional[PartialMerger] = None
+        if config.merge_topic:
+            self._merger = PartialMerger(config)
         self._consumer = self._create_consumer()
         self._running = False
         self._processed_count = 0
@@ -41,33 +63,52 @@ class StreamProcessor:
                 return
             payload = json.loads(raw.decode("utf-8"))
             service = payload.get("service", "unknown")
-            latency_ms = float(payload.get("latency_ms", 0))
-            error = bool(payload.get("error", False))
-
-            self._detector.record(service, latency_ms, error)
+            # With merging, consumed events only feed this replica's partials; the
+            # window is built from the merged partials of every replica
+            sink: Union[AnomalyDetector, PartialMerger] = self._detector
+            if self._merger is not None and msg.topic() != self._config.merge_topic:
+                sink = self._merger
+            if payload.get("type") == AGGREGATE_TYPE:
+                bins = latency_bins(payload)
+                sink.record_aggregate(service, bins, error_count(payload, bins))
+            else:
+                latency_ms = float(payload.get("latency_ms", 0))
+                error = bool(payload.get("error", False))
+                sink.record(service, latency_ms, error, sample_weight(payload))
             self._processed_count += 1
 
-            if self._processed_count % self._detection_interval == 0:
+            if self._merger is not None:
+                # Partials are few, so each merged one is checked right away
+                detect = sink is self._detector
+            else:
+                detect = self._processed_count % self._detection_interval == 0
+            if detect:
                 violations = self._detector.detect()
                 for violation in violations:
                     self._alerter.publish(violation)
 
             if self._processed_count % 1000 == 0:
                 logger.info("Processed events", count=self._processed_count)
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
-            logger.warning("Failed to process message", error=str(e))
+        except (KeyError, TypeError, ValueError, ArithmeticError, AttributeError) as e:
+            logger.warning("Dropping malformed message", error=str(e))
 
     def run(self) -> None:
-        self._consumer.subscribe([self._config.metrics_topic])
+        topics = [self._config.metrics_topic]
+        if self._merger is not None:
+            topics.append(self._config.merge_topic)
+        self._consumer.subscribe(topics)
         self._running = True
         logger.info(
             "Stream processor started",
-            topic=self._config.metrics_topic,
+            topics=topics,
             consumer_group=self._config.consumer_group,
         )
         try:
             while self._running:
                 msg = self._consumer.poll(timeout=self._config.consumer_timeout_ms / 1000)
+                self._alerter.poll()
+                if self._merger is not None and self._merger.due(time.monotonic()):
+                    self._merger.publish()
                 if msg is None:
                     continue
                 err = msg.error()
@@ -87,6 +128,8 @@ class StreamProcessor:
     def _shutdown(self) -> None:
         logger.info("Shutting down stream processor", total_processed=self._processed_count)
         self._consumer.close()
+        if self._merger is not None:
+            self._merger.close()
         self._alerter.close()
 
     def stop(self) -> None:
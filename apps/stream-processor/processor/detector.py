@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 
 import structlog
 
@@ -22,8 +22,13 @@ class AnomalyDetector:
         self._consecutive_violations: dict[str, int] = {}
         self._required_consecutive = config.consecutive_windows_for_alert
 
-    def record(self, service: str, latency_ms: float, error: bool) -> None:
-        self._state.record(service, latency_ms, error)
+    def record(self, service: str, latency_ms: float, error: bool, weight: int = 1) -> None:
+        self._state.record(service, latency_ms, error, weight)
+
+    def record_aggregate(
+        self, service: str, latency_bins: List[Tuple[float, int]], errors: int
+    ) -> None:
+        self._state.record_aggregate(service, latency_bins, errors)
 
     def detect(self) -> List[RuleViolation]:
         """Run all rules against all service windows, return confirmed violations."""
@@ -0,0 +1,161 @@
+"""Producer throughput profiles and librdkafka statistics export.
+
+librdkafka calls `stats_cb` from `poll()` every `statistics.interval.ms` with a
+JSON document (see librdkafka's STATISTICS.md); `ProducerStats` turns the parts
+that explain producer throughput into gauges labelled by `client.id`.
+
+Vendored from the workload simulator's `simulator/kafka_stats.py`, which owns
+the module and its tests; every app image is built from its own directory. Make
+changes there and copy them here: tests/test_vendored.py checks the copies match.
+"""
+
+import json
+from typing import Any, Union
+
+import structlog
+from prometheus_client import Gauge
+
+logger = structlog.get_logger(__name__)
+
+# Batching, compression and local queue limits per profile. The queue limits bound
+# producer memory; when they are hit `produce()` raises BufferError and callers wait.
+PRODUCER_PROFILES: dict[str, dict[str, Union[str, int]]] = {
+    # Send immediately in small uncompressed requests
+    "latency": {
+        "linger.ms": 0,
+        "batch.size": 65536,
+        "batch.num.messages": 1000,
+        "compression.type": "none",
+        "queue.buffering.max.messages": 10000,
+        "queue.buffering.max.kbytes": 32768,
+    },
+    # librdkafka's default linger with cheap compression
+    "balanced": {
+        "linger.ms": 5,
+        "batch.size": 262144,
+        "batch.num.messages": 10000,
+        "compression.type": "lz4",
+        "queue.buffering.max.messages": 100000,
+        "queue.buffering.max.kbytes": 131072,
+    },
+    # Large, well-compressed requests for sustained high rates
+    "bulk": {
+        "linger.ms": 50,
+        "batch.size": 1000000,
+        "batch.num.messages": 10000,
+        "compression.type": "zstd",
+        "queue.buffering.max.messages": 1000000,
+        "queue.buffering.max.kbytes": 262144,
+    },
+}
+
+QUEUE_MESSAGES = Gauge(
+    "kafka_producer_queue_messages",
+    "Messages waiting in the producer's local queue",
+    ["client"],
+)
+
+QUEUE_BYTES = Gauge(
+    "kafka_producer_queue_bytes",
+    "Bytes waiting in the producer's local queue",
+    ["client"],
+)
+
+QUEUE_FILL = Gauge(
+    "kafka_producer_queue_fill_ratio",
+    "Local queue use relative to the tighter of its message and size limits",
+    ["client"],
+)
+
+BATCH_MESSAGES = Gauge(
+    "kafka_producer_batch_messages",
+    "Messages per produce batch over the last statistics window",
+    ["client", "topic", "stat"],
+)
+
+BATCH_BYTES = Gauge(
+    "kafka_producer_batch_bytes",
+    "Bytes per produce batch over the last statistics window",
+    ["client", "topic", "stat"],
+)
+
+BATCH_FILL = Gauge(
+    "kafka_producer_batch_fill_ratio",
+    "Mean produce batch size relative to batch.size",
+    ["client", "topic"],
+)
+
+QUEUE_LATENCY = Gauge(
+    "kafka_producer_queue_latency_seconds",
+    "Time from produce() until the message is put in a request, per broker",
+    ["client", "broker", "stat"],
+)
+
+REQUEST_LATENCY = Gauge(
+    "kafka_producer_request_latency_seconds",
+    "Time produce requests wait to be sent, per broker",
+    ["client", "broker", "stat"],
+)
+
+BROKER_RTT = Gauge(
+    "kafka_producer_broker_rtt_seconds",
+    "Produce request round-trip time, per broker",
+    ["client", "broker", "stat"],
+)
+
+# Window statistics exported from each librdkafka histogram
+WINDOW_STATS = ("avg", "p99")
+
+
+def producer_profile(name: str) -> dict[str, Union[str, int]]:
+    try:
+        return dict(PRODUCER_PROFILES[name])
+    except KeyError:
+        raise ValueError(
+            f"producer profile must be one of {tuple(PRODUCER_PROFILES)}, got {name!r}"
+        ) from None
+
+
+class ProducerStats:
+    """`stats_cb` for a producer: exports queue depth, batch fill and broker latencies."""
+
+    def __init__(self, client_id: str, batch_size: int) -> None:
+        self._client = client_id
+        self._batch_size = batch_size
+
+    def __call__(self, stats_json: str) -> None:
+        try:
+            stats = json.loads(stats_json)
+            self._export(stats)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Could not parse producer statistics", client=self._client, error=str(e))
+
+    def _export(self, stats: dict[str, Any]) -> None:
+        client = self._client
+        QUEUE_MESSAGES.labels(client).set(stats["msg_cnt"])
+        QUEUE_BYTES.labels(client).set(stats["msg_size"])
+        QUEUE_FILL.labels(client).set(max(
+            stats["msg_cnt"] / stats["msg_max"] if stats["msg_max"] else 0.0,
+            stats["msg_size"] / stats["msg_size_max"] if stats["msg_size_max"] else 0.0,
+        ))
+        for topic, topic_stats in stats.get("topics", {}).items():
+            batch_bytes, batch_count = topic_stats["batchsize"], topic_stats["batchcnt"]
+            if not batch_count["cnt"]:
+                continue  # no batches sent in this window
+            for stat in WINDOW_STATS:
+                BATCH_MESSAGES.labels(client, topic, stat).set(batch_count[stat])
+                BATCH_BYTES.labels(client, topic, stat).set(batch_bytes[stat])
+            BATCH_FILL.labels(client, topic).set(batch_bytes["avg"] / self._batch_size)
+        for broker in stats.get("brokers", {}).values():
+            if broker["nodeid"] < 0:
+                continue  # bootstrap connection, not a cluster member
+            for gauge, window in (
+                (QUEUE_LATENCY, broker["int_latency"]),
+                (REQUEST_LATENCY, broker["outbuf_latency"]),
+                (BROKER_RTT, broker["rtt"]),
+            ):
+                if not window["cnt"]:
+                    continue
+                for stat in WINDOW_STATS:
+                    # librdkafka reports latencies in microseconds
+                    gauge.labels(client, broker["name"], stat).set(window[stat] / 1e6)
@@ -0,0 +1,154 @@
+"""Cross-replica merging of per-partition partial aggregates.
+
+Keyed by service, all of a service's events land on one partition and so on
+one replica, whose window sees everything. When producers spread a service
+over partitions (keyed by series or request, or unkeyed), every replica sees
+a slice of it and would detect on partial counts: error rates from a fraction
+of the requests, a traffic drop wherever a partition moves.
+
+With `merge_topic` set, replicas instead fold what they consume into partial
+aggregates per service (request count, errors and a DDSketch of latencies)
+and send them to `merge_topic` once per `merge_interval_seconds`, keyed by
+service. Partials are aggregate records, so the replica that owns a service's
+partition of `merge_topic` merges them into its window like any other
+aggregate: counts add up exactly and quantiles stay within the sketch's
+relative accuracy. A crashed replica loses at most its unsent interval.
+"""
+
+import json
+import math
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+from confluent_kafka import KafkaException, Producer
+
+from processor.aggregate import AGGREGATE_TYPE, MIN_LATENCY_MS, ZERO_BIN
+from processor.config import Config
+from processor.kafka_stats import producer_profile
+
+logger = structlog.get_logger(__name__)
+
+# Relative accuracy of the partials' latency sketches
+RELATIVE_ACCURACY = 0.01
+
+
+class _Partial:
+    __slots__ = ("bins", "count", "errors")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.bins: Dict[int, int] = {}
+
+
+class PartialAggregator:
+    """Per-service partial aggregates of one replica, built up until `drain`."""
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY) -> None:
+        self.relative_accuracy = relative_accuracy
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._multiplier = 1 / math.log(gamma)
+        self._partials: Dict[str, _Partial] = {}
+
+    def _index(self, latency_ms: float) -> int:
+        if latency_ms <= MIN_LATENCY_MS:
+            return ZERO_BIN
+        return math.ceil(math.log(latency_ms) * self._multiplier)
+
+    def _get(self, service: str) -> _Partial:
+        partial = self._partials.get(service)
+        if partial is None:
+            partial = self._partials[service] = _Partial()
+        return partial
+
+    def record(self, service: str, latency_ms: float, error: bool, weight: int = 1) -> None:
+        partial = self._get(service)
+        partial.count += weight
+        partial.errors += weight if error else 0
+        index = self._index(latency_ms)
+        partial.bins[index] = partial.bins.get(index, 0) + weight
+
+    def record_aggregate(
+        self, service: str, latency_bins: List[Tuple[float, int]], errors: int
+    ) -> None:
+        """Fold an aggregate record's (latency, count) bins into the service's sketch."""
+        partial = self._get(service)
+        for latency_ms, count in latency_bins:
+            partial.count += count
+            index = self._index(latency_ms)
+            partial.bins[index] = partial.bins.get(index, 0) + count
+        partial.errors += errors
+
+    def drain(self, interval_seconds: float) -> List[Dict[str, Any]]:
+        """Aggregate records of everything recorded since the last drain."""
+        drained, self._partials = self._partials, {}
+        timestamp = datetime.now(timezone.utc).isoformat()
+        return [
+            {
+                "type": AGGREGATE_TYPE,
+                "service": service,
+                "timestamp": timestamp,
+                "interval_seconds": round(interval_seconds, 3),
+                "count": partial.count,
+                "error_count": partial.errors,
+                "latency_sketch": {
+                    "relative_accuracy": self.relative_accuracy,
+                    "bins": {str(index): count for index, count in partial.bins.items()},
+                },
+            }
+            for service, partial in sorted(drained.items())
+            if partial.count
+        ]
+
+
+class PartialMerger:
+    """Sends a replica's partial aggregates to `merge_topic` once per interval."""
+
+    def __init__(self, config: Config) -> None:
+        self._config = config
+        self._aggregator = PartialAggregator()
+        self._started = time.monotonic()
+        self._producer = Producer({
+            "bootstrap.servers": config.kafka_brokers,
+            "acks": "all",
+            "client.id": "stream-processor-merger",
+            **producer_profile("balanced"),
+        })
+
+    def record(self, service: str, latency_ms: float, error: bool, weight: int = 1) -> None:
+        self._aggregator.record(service, latency_ms, error, weight)
+
+    def record_aggregate(
+        self, service: str, latency_bins: List[Tuple[float, int]], errors: int
+    ) -> None:
+        self._aggregator.record_aggregate(service, latency_bins, errors)
+
+    def due(self, now: float) -> bool:
+        return now - self._started >= self._config.merge_interval_seconds
+
+    def publish(self, now: Optional[float] = None) -> int:
+        """Send the partials recorded since the last publish; returns how many were sent."""
+        now = time.monotonic() if now is None else now
+        partials = self._aggregator.drain(now - self._started)
+        self._started = now
+        sent = 0
+        for partial in partials:
+            try:
+                self._producer.produce(
+                    topic=self._config.merge_topic,
+                    key=partial["service"].encode("utf-8"),
+                    value=json.dumps(partial).encode("utf-8"),
+                )
+                sent += 1
+            except (BufferError, KafkaException) as e:
+                logger.error(
+                    "Failed to publish partial aggregate", service=partial["service"], error=str(e)
+                )
+        self._producer.poll(0)
+        return sent
+
+    def close(self) -> None:
+        self.publish()
+        self._producer.flush(timeout=10)
@@ -1,7 +1,7 @@
 import time
 from collections import deque
 from dataclasses import dataclass, field
-from typing import Deque, Dict, List, Optional
+from typing import Deque, Dict, List, Optional, Tuple
 
 
 @dataclass
@@ -9,6 +9,14 @@ class MetricSample:
     timestamp: float
     latency_ms: float
     error: bool
+    # Requests this sample stands for; an aggregate record adds one sample per latency bin
+    count: int = 1
+    # Errors among them; defaults to all or none of them, per `error`
+    errors: int = -1
+
+    def __post_init__(self) -> None:
+        if self.errors < 0:
+            self.errors = self.count if self.error else 0
 
 
 @dataclass
@@ -19,13 +27,31 @@ class ServiceWindow:
     consecutive_violations: Dict[str, int] = field(default_factory=dict)
     baseline_rps: Optional[float] = None
 
-    def add_sample(self, latency_ms: float, error: bool) -> None:
+    def add_sample(self, latency_ms: float, error: bool, weight: int = 1) -> None:
+        """Add a request; `weight` is how many requests a sampled event stands for."""
         self.samples.append(MetricSample(
             timestamp=time.time(),
             latency_ms=latency_ms,
             error=error,
+            count=weight,
         ))
 
+    def add_aggregate(self, latency_bins: List[Tuple[float, int]], errors: int) -> None:
+        """Add pre-aggregated requests: (latency, count) per bin and their error count.
+
+        Which bins the errors fell in is unknown, so they are carried by the first sample.
+        """
+        now = time.time()
+        for i, (latency_ms, count) in enumerate(latency_bins):
+            carried = errors if i == 0 else 0
+            self.samples.append(MetricSample(
+                timestamp=now,
+                latency_ms=latency_ms,
+                error=carried > 0,
+                count=count,
+                errors=carried,
+            ))
+
     def prune(self, window_seconds: int) -> None:
         """Remove samples older than window_seconds."""
         cutoff = time.time() - window_seconds
@@ -35,20 +61,26 @@ class ServiceWindow:
     def get_p99_latency(self) -> Optional[float]:
         if not self.samples:
             return None
-        latencies = sorted(s.latency_ms for s in self.samples)
-        idx = int(len(latencies) * 0.99)
-        return latencies[min(idx, len(latencies) - 1)]
+        latencies = sorted((s.latency_ms, s.count) for s in self.samples)
+        total = sum(count for _, count in latencies)
+        rank = min(int(total * 0.99), total - 1)
+        seen = 0
+        for latency_ms, count in latencies:
+            seen += count
+            if seen > rank:
+                return latency_ms
+        return latencies[-1][0]
 
     def get_error_rate(self) -> Optional[float]:
         if not self.samples:
             return None
-        errors = sum(1 for s in self.samples if s.error)
-        return errors / len(self.samples)
+        errors = sum(s.errors for s in self.samples)
+        return errors / sum(s.count for s in self.samples)
 
     def get_rps(self, window_seconds: int) -> Optional[float]:
         if not self.samples:
             return None
-        return len(self.samples) / window_seconds
+        return sum(s.count for s in self.samples) / window_seconds
 
 
 class WindowState:
@@ -58,10 +90,18 @@ class WindowState:
         self._window_size = window_size_seconds
         self._windows: Dict[str, ServiceWindow] = {}
 
-    def record(self, service: str, latency_ms: float, error: bool) -> None:
+    def record(self, service: str, latency_ms: float, error: bool, weight: int = 1) -> None:
+        if service not in self._windows:
+            self._windows[service] = ServiceWindow()
+        self._windows[service].add_sample(latency_ms, error, weight)
+        self._windows[service].prune(self._window_size)
+
+    def record_aggregate(
+        self, service: str, latency_bins: List[Tuple[float, int]], errors: int
+    ) -> None:
         if service not in self._windows:
             self._windows[service] = ServiceWindow()
-        self._windows[service].add_sample(latency_ms, error)
+        self._windows[service].add_aggregate(latency_bins, errors)
         self._windows[service].prune(self._window_size)
 
     def get_window(self, service: str) -> Optional[ServiceWindow]:
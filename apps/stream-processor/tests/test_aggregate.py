@@ -0,0 +1,106 @@
+import json
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from processor.aggregate import AGGREGATE_TYPE, ZERO_BIN, error_count, latency_bins
+from processor.config import Config
+from processor.consumer import StreamProcessor, sample_weight
+
+
+def _record(bins: dict[str, int], accuracy: float = 0.01) -> dict[str, Any]:
+    return {
+        "type": AGGREGATE_TYPE,
+        "service": "api-service",
+        "endpoint": "/a",
+        "region": "eu-west-1",
+        "count": sum(bins.values()),
+        "error_count": 2,
+        "latency_sketch": {"relative_accuracy": accuracy, "bins": bins},
+    }
+
+
+class TestLatencyBins:
+    def test_representative_values(self):
+        gamma = 1.01 / 0.99
+        bins = latency_bins(_record({"230": 4, "231": 0, str(ZERO_BIN): 1}))
+        assert bins == [(pytest.approx(2 * gamma**230 / (gamma + 1)), 4), (0.0, 1)]
+        # Within the sketch's relative accuracy of everything in the bin
+        assert gamma**229 * 0.99 <= bins[0][0] <= gamma**230 * 1.01
+
+    @pytest.mark.parametrize("sketch", [
+        {"relative_accuracy": 1.5, "bins": {"1": 1}},
+        {"relative_accuracy": "0.01", "bins": {"1": 1}},
+        {"relative_accuracy": 0.01, "bins": {"1": -1}},
+        {"relative_accuracy": 0.01, "bins": {"100000": 1}},
+        {"relative_accuracy": 0.01, "bins": {"-100000": 1}},
+        {"relative_accuracy": 0.01, "bins": {"x": 1}},
+        {"relative_accuracy": 0.01, "bins": {"1": [1]}},
+        {"relative_accuracy": 0.01, "bins": [[1, 1]]},
+        None,
+    ])
+    def test_rejects_bad_sketch(self, sketch):
+        with pytest.raises((TypeError, ValueError)):
+            latency_bins({"type": AGGREGATE_TYPE, "latency_sketch": sketch})
+
+    def test_error_count_checked_against_count(self):
+        record = _record({"230": 4})
+        assert error_count(record, latency_bins(record)) == 2
+        for overrides in ({"error_count": 5}, {"error_count": -1}, {"count": 3}):
+            bad = {**record, **overrides}
+            with pytest.raises(ValueError):
+                error_count(bad, latency_bins(bad))
+
+
+class TestAggregateIngest:
+    def test_processor_records_aggregate(self, monkeypatch):
+        monkeypatch.setattr("processor.consumer.Consumer", MagicMock())
+        monkeypatch.setattr("processor.consumer.AlertPublisher", MagicMock())
+        processor = StreamProcessor(Config())
+        msg = MagicMock()
+        msg.value.return_value = json.dumps(_record({"230": 8, "300": 2})).encode()
+        processor._process_message(msg)
+
+        window = processor._state.get_window("api-service")
+        assert window is not None
+        assert window.get_error_rate() == pytest.approx(0.2)
+        assert window.get_rps(window_seconds=1) == 10
+
+    def test_processor_drops_malformed_aggregates(self, monkeypatch):
+        monkeypatch.setattr("processor.consumer.Consumer", MagicMock())
+        monkeypatch.setattr("processor.consumer.AlertPublisher", MagicMock())
+        processor = StreamProcessor(Config())
+        for record in (
+            _record({"100000": 1}),
+            {**_record({"230": 1}), "error_count": 2},
+            {**_record({}), "latency_sketch": {"relative_accuracy": 0.01, "bins": [1]}},
+            [1, 2],
+        ):
+            msg = MagicMock()
+            msg.value.return_value = json.dumps(record).encode()
+            processor._process_message(msg)
+        assert processor._state.get_window("api-service") is None
+
+    def test_processor_applies_sample_weight(self, monkeypatch):
+        monkeypatch.setattr("processor.consumer.Consumer", MagicMock())
+        monkeypatch.setattr("processor.consumer.AlertPublisher", MagicMock())
+        processor = StreamProcessor(Config())
+        for weight in (10, None, 0):
+            msg = MagicMock()
+            msg.value.return_value = json.dumps({
+                "service": "api-service", "latency_ms": 5.0, "error": weight is None,
+                "sample_weight": weight,
+            }).encode()
+            processor._process_message(msg)
+
+        window = processor._state.get_window("api-service")
+        assert window is not None
+        # The invalid weight is dropped; the rest count as 11 requests
+        assert window.get_rps(window_seconds=1) == 11
+        assert window.get_error_rate() == pytest.approx(1 / 11)
+
+    @pytest.mark.parametrize("weight", [0, 1.5, "2", True, float("inf")])
+    def test_invalid_sample_weight(self, weight):
+        with pytest.raises(ValueError):
+            sample_weight({"sample_weight": weight})
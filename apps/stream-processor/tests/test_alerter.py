@@ -95,3 +95,25 @@ class TestAlertPublisher:
     def test_close_flushes(self, alerter, mock_kafka_producer):
         alerter.close()
         mock_kafka_producer.flush.assert_called_once_with(timeout=10)
+
+    def test_poll_serves_callbacks(self, alerter, mock_kafka_producer):
+        alerter.poll()
+        mock_kafka_producer.poll.assert_called_once_with(0)
+
+
+class TestAlertProducerConfig:
+    def test_latency_profile_by_default(self):
+        with patch("processor.alerter.Producer") as MockProducer:
+            AlertPublisher(Config())
+        conf = MockProducer.call_args[0][0]
+        assert conf["linger.ms"] == 0
+        assert conf["acks"] == "all"
+        assert "stats_cb" not in conf
+
+    def test_stats_enabled(self):
+        with patch("processor.alerter.Producer") as MockProducer:
+            AlertPublisher(Config(alert_producer_profile="bulk", producer_stats_interval_ms=1000))
+        conf = MockProducer.call_args[0][0]
+        assert conf["compression.type"] == "zstd"
+        assert conf["statistics.interval.ms"] == 1000
+        assert callable(conf["stats_cb"])
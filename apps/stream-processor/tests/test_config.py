@@ -15,6 +15,9 @@ class TestConfig:
         assert config.traffic_drop_threshold == 0.5
         assert config.alert_cooldown_seconds == 300
         assert config.consecutive_windows_for_alert == 3
+        assert config.alert_producer_profile == "latency"
+        assert config.producer_stats_interval_ms == 0
+        assert config.metrics_port == 0
 
     def test_env_override(self, monkeypatch):
         monkeypatch.setenv("WINDOW_SIZE_SECONDS", "120")
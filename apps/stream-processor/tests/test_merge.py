@@ -0,0 +1,96 @@
+import json
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from processor.aggregate import AGGREGATE_TYPE, latency_bins
+from processor.config import Config
+from processor.consumer import StreamProcessor
+from processor.merge import PartialAggregator
+
+MERGE_TOPIC = "metrics.partials"
+
+
+def _message(topic: str, payload: dict[str, Any]) -> MagicMock:
+    msg = MagicMock()
+    msg.topic.return_value = topic
+    msg.value.return_value = json.dumps(payload).encode()
+    return msg
+
+
+def _replica(monkeypatch: pytest.MonkeyPatch) -> StreamProcessor:
+    monkeypatch.setattr("processor.consumer.Consumer", MagicMock())
+    monkeypatch.setattr("processor.consumer.AlertPublisher", MagicMock())
+    monkeypatch.setattr("processor.merge.Producer", MagicMock())
+    return StreamProcessor(Config(merge_topic=MERGE_TOPIC))
+
+
+def _partials(replica: StreamProcessor) -> list[MagicMock]:
+    assert replica._merger is not None
+    replica._merger.publish()
+    producer: Any = replica._merger._producer
+    return [
+        _message(c.kwargs["topic"], json.loads(c.kwargs["value"]))
+        for c in producer.produce.call_args_list
+    ]
+
+
+class TestPartialAggregator:
+    def test_drain(self):
+        aggregator = PartialAggregator()
+        aggregator.record("api-service", 100.0, False, weight=10)
+        aggregator.record("api-service", 900.0, True)
+        aggregator.record("auth-service", 0.0, False)
+        api, auth = aggregator.drain(5.0)
+        assert api["type"] == AGGREGATE_TYPE
+        assert (api["service"], api["count"], api["error_count"]) == ("api-service", 11, 1)
+        assert [count for _, count in latency_bins(api)] == [10, 1]
+        assert latency_bins(auth) == [(0.0, 1)]
+        assert aggregator.drain(5.0) == []
+
+    def test_aggregate_rebins_exactly(self):
+        source = PartialAggregator()
+        for latency in (3.0, 45.5, 45.6, 800.0):
+            source.record("api-service", latency, False)
+        (record,) = source.drain(1.0)
+        target = PartialAggregator()
+        target.record_aggregate("api-service", latency_bins(record), errors=2)
+        (merged,) = target.drain(1.0)
+        assert merged["latency_sketch"]["bins"] == record["latency_sketch"]["bins"]
+        assert merged["error_count"] == 2
+
+
+class TestCrossReplicaMerge:
+    def test_partials_merge_per_service(self, monkeypatch):
+        owner, other = _replica(monkeypatch), _replica(monkeypatch)
+        # A service spread over partitions: each replica sees only its slice
+        for i in range(90):
+            event = {"service": "api-service", "latency_ms": 10.0 + i, "error": False}
+            owner._process_message(_message("metrics.raw", event))
+        for _ in range(10):
+            event = {"service": "api-service", "latency_ms": 1000.0, "error": True}
+            other._process_message(_message("metrics.raw", event))
+        assert owner._state.get_window("api-service") is None
+        assert other._state.get_window("api-service") is None
+
+        partials = _partials(owner) + _partials(other)
+        assert {msg.topic() for msg in partials} == {MERGE_TOPIC}
+        for msg in partials:
+            owner._process_message(msg)
+
+        window = owner._state.get_window("api-service")
+        assert window is not None
+        assert window.get_rps(window_seconds=1) == 100
+        assert window.get_error_rate() == pytest.approx(0.1)
+        p99 = window.get_p99_latency()
+        assert p99 is not None and p99 == pytest.approx(1000.0, rel=0.01)
+
+    def test_without_merge_topic_events_reach_window(self, monkeypatch):
+        monkeypatch.setattr("processor.consumer.Consumer", MagicMock())
+        monkeypatch.setattr("processor.consumer.AlertPublisher", MagicMock())
+        processor = StreamProcessor(Config())
+        assert processor._merger is None
+        event = {"service": "api-service", "latency_ms": 10.0, "error": False}
+        processor._process_message(_message("metrics.raw", event))
+        assert processor._state.get_window("api-service") is not None
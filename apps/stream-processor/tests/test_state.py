@@ -11,6 +11,10 @@ class TestMetricSample:
         assert sample.timestamp == 1000.0
         assert sample.latency_ms == 120.5
         assert sample.error is False
+        assert (sample.count, sample.errors) == (1, 0)
+
+    def test_error_defaults_to_every_request(self):
+        assert MetricSample(timestamp=0, latency_ms=1, error=True, count=3).errors == 3
 
 
 class TestServiceWindow:
@@ -78,6 +82,23 @@ class TestServiceWindow:
             window.add_sample(latency_ms=100, error=False)
         assert window.get_rps(window_seconds=60) == pytest.approx(2.0)
 
+    def test_aggregate_weights_statistics(self):
+        window = ServiceWindow()
+        # 980 fast requests and 20 slow ones, 50 of them errors, in two samples
+        window.add_aggregate([(10.0, 980), (900.0, 20)], errors=50)
+        window.add_sample(latency_ms=10.0, error=False)
+        assert len(window.samples) == 3
+        assert window.get_p99_latency() == 900.0
+        assert window.get_error_rate() == pytest.approx(50 / 1001)
+        assert window.get_rps(window_seconds=10) == pytest.approx(100.1)
+
+    def test_aggregate_p99_matches_unit_samples(self):
+        unit, weighted = ServiceWindow(), ServiceWindow()
+        for i in range(100):
+            unit.add_sample(latency_ms=float(i % 10), error=False)
+        weighted.add_aggregate([(float(i), 10) for i in range(10)], errors=0)
+        assert weighted.get_p99_latency() == unit.get_p99_latency()
+
     def test_maxlen_enforced(self):
         window = ServiceWindow()
         for i in range(15000):
@@ -104,6 +125,23 @@ class TestWindowState:
         assert window is not None
         assert len(window.samples) == 1
 
+    def test_record_aggregate(self):
+        state = WindowState(window_size_seconds=60)
+        state.record_aggregate("api-service", [(100.0, 5)], errors=1)
+        window = state.get_window("api-service")
+        assert window is not None
+        assert window.get_error_rate() == pytest.approx(0.2)
+
     def test_get_window_nonexistent(self):
         state = WindowState(window_size_seconds=60)
         assert state.get_window("missing") is None
+
+    def test_weighted_samples(self):
+        state = WindowState(window_size_seconds=60)
+        state.record("api-service", latency_ms=20, error=False, weight=9)
+        state.record("api-service", latency_ms=900, error=True)
+        window = state.get_window("api-service")
+        assert window is not None
+        assert window.get_error_rate() == pytest.approx(0.1)
+        assert window.get_rps(window_seconds=10) == pytest.approx(1.0)
+        assert window.get_p99_latency() == 900
@@ -5,10 +5,14 @@ from types import FrameType
 from typing import Optional
 
 import structlog
+from prometheus_client import start_http_server
 
 from simulator.config import Config
 from simulator.metrics import MetricsGenerator
+from simulator.pool import WorkerPool
 from simulator.producer import KafkaProducerWrapper
+from simulator.replay import Replayer
+from simulator.virtual import ServiceScheduler
 
 structlog.configure(
     processors=[
@@ -26,9 +30,6 @@ logger = structlog.get_logger(__name__)
 
 def main() -> None:
     config = Config()
-    producer = KafkaProducerWrapper(config)
-    generator = MetricsGenerator(config, producer)
-
     stop_event = threading.Event()
 
     def handle_signal(signum: int, frame: Optional[FrameType]) -> None:
@@ -42,22 +43,52 @@ def main() -> None:
         "Starting workload simulator",
         kafka_brokers=config.kafka_brokers,
         events_per_second=config.events_per_second,
+        arrival_process=config.arrival_process,
         services=config.services,
+        worker_processes=config.worker_processes,
+        seed=config.seed,
     )
 
+    if config.metrics_port:
+        start_http_server(config.metrics_port)
+
+    if config.replay_file:
+        producer = KafkaProducerWrapper(config)
+        # Returns when the recording ends (unless looping) or on shutdown
+        Replayer(config, producer).run(stop_event)
+        producer.close()
+        sys.exit(0)
+
+    if config.worker_processes > 1:
+        # Workers own the producers; this process only aggregates their reports
+        WorkerPool(config).run(stop_event)
+        sys.exit(0)
+
+    producer = KafkaProducerWrapper(config)
+    generator = MetricsGenerator(config, producer)
     threads = []
-    for service in config.services:
+    if config.scheduler_mode or config.virtual_services is not None:
+        # One thread drives every service, however many there are
+        scheduler = ServiceScheduler(config, generator)
         t = threading.Thread(
-            target=generator.run_service,
-            args=(service, stop_event),
-            name=f"simulator-{service}",
-            daemon=True,
+            target=scheduler.run, args=(stop_event,), name="simulator-scheduler", daemon=True
         )
         t.start()
         threads.append(t)
+    else:
+        for service in config.services:
+            t = threading.Thread(
+                target=generator.run_service,
+                args=(service, stop_event),
+                name=f"simulator-{service}",
+                daemon=True,
+            )
+            t.start()
+            threads.append(t)
 
     stop_event.wait()
     logger.info("Shutting down gracefully...")
+    generator.flush_aggregates()
     producer.close()
     sys.exit(0)
 
@@ -0,0 +1,169 @@
+"""Client-side pre-aggregation of metric events into `MetricAggregate` records.
+
+With `metrics_format=aggregates` the generator folds each service's requests
+into one record per (endpoint, region) and sends those once per
+`aggregate_interval_seconds` instead of a record per request. Consumers only
+need counts, errors and the latency distribution, so broker traffic and their
+decoding work shrink by the number of requests per series and interval. Error
+logs are still sent per request.
+
+Latencies are counted in DDSketch bins, the mapping the metrics bridge keeps
+its quantiles in, so a quantile read from an aggregate is within
+`relative_accuracy` of a latency that was actually generated.
+"""
+
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from simulator.models import LatencySketch, MetricAggregate
+
+# Smallest latency given its own bin (ms); anything lower counts as zero
+MIN_LATENCY_MS = 1e-3
+# Bin index of latencies below MIN_LATENCY_MS; sorts below every real bin
+ZERO_BIN = -(1 << 30)
+
+
+class SketchMapping:
+    """Maps latencies onto logarithmic bins with a bounded relative error."""
+
+    def __init__(self, relative_accuracy: float) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy must be in (0, 1), got {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._multiplier = 1 / math.log(gamma)
+
+    def index(self, value: float) -> int:
+        if value <= MIN_LATENCY_MS:
+            return ZERO_BIN
+        return math.ceil(math.log(value) * self._multiplier)
+
+    def indices(self, values: np.ndarray) -> np.ndarray:
+        """Vectorized `index`."""
+        bins = np.ceil(np.log(np.maximum(values, MIN_LATENCY_MS)) * self._multiplier)
+        return np.where(values > MIN_LATENCY_MS, bins.astype(np.int64), ZERO_BIN)
+
+
+class _Series:
+    __slots__ = ("bins", "count", "errors", "latency_sum", "status_codes")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.status_codes: dict[int, int] = {}
+        self.bins: dict[int, int] = {}
+
+
+class ServiceAggregator:
+    """One service's requests per (endpoint, region), accumulated until `drain`.
+
+    `add`/`add_batch` run on the thread generating the service; `drain` may run
+    on another (e.g. the final flush at shutdown).
+    """
+
+    def __init__(
+        self,
+        service: str,
+        endpoints: list[str],
+        regions: list[str],
+        interval: float,
+        mapping: SketchMapping,
+    ) -> None:
+        self.service = service
+        self._endpoints = endpoints
+        self._regions = regions
+        self._interval = interval
+        self._mapping = mapping
+        self._lock = threading.Lock()
+        # endpoint index * len(regions) + region index -> counts
+        self._series: dict[int, _Series] = {}
+        self._started = time.monotonic()
+        self._started_at = time.time()
+
+    def _get(self, key: int) -> _Series:
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series()
+        return series
+
+    def add(
+        self, endpoint: int, region: int, latency_ms: float, status_code: int, error: bool
+    ) -> None:
+        """Count one request; `endpoint` and `region` index the aggregator's lists."""
+        index = self._mapping.index(latency_ms)
+        with self._lock:
+            series = self._get(endpoint * len(self._regions) + region)
+            series.count += 1
+            series.errors += error
+            series.latency_sum += latency_ms
+            series.status_codes[status_code] = series.status_codes.get(status_code, 0) + 1
+            series.bins[index] = series.bins.get(index, 0) + 1
+
+    def add_batch(
+        self,
+        endpoint_idx: np.ndarray,
+        region_idx: np.ndarray,
+        latencies: np.ndarray,
+        status_codes: np.ndarray,
+        errors: np.ndarray,
+    ) -> None:
+        """Vectorized `add`: counts are grouped with NumPy, then merged once per group."""
+        keys = endpoint_idx.astype(np.int64) * len(self._regions) + region_idx
+        counts = np.bincount(keys)
+        error_counts = np.bincount(keys, weights=errors)
+        sums = np.bincount(keys, weights=latencies)
+        # (series, bin) and (series, status code) pairs packed into one int64 each
+        bins, bin_counts = np.unique(
+            (keys << 32) | (self._mapping.indices(latencies) - ZERO_BIN), return_counts=True
+        )
+        codes, code_counts = np.unique((keys << 16) | status_codes, return_counts=True)
+        with self._lock:
+            for key in np.flatnonzero(counts).tolist():
+                series = self._get(key)
+                series.count += int(counts[key])
+                series.errors += int(error_counts[key])
+                series.latency_sum += float(sums[key])
+            for packed, count in zip(bins.tolist(), bin_counts.tolist()):
+                series = self._series[packed >> 32]
+                index = (packed & 0xFFFFFFFF) + ZERO_BIN
+                series.bins[index] = series.bins.get(index, 0) + count
+            for packed, count in zip(codes.tolist(), code_counts.tolist()):
+                series = self._series[packed >> 16]
+                code = packed & 0xFFFF
+                series.status_codes[code] = series.status_codes.get(code, 0) + count
+
+    def due(self, now: float) -> bool:
+        return now - self._started >= self._interval
+
+    def drain(self, now: Optional[float] = None) -> list[MetricAggregate]:
+        """Records for everything counted since the last drain, which starts a new interval."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            drained, self._series = self._series, {}
+            started, started_at = self._started, self._started_at
+            self._started, self._started_at = now, time.time()
+        timestamp = datetime.fromtimestamp(started_at, timezone.utc)
+        regions = len(self._regions)
+        return [
+            MetricAggregate(
+                service=self.service,
+                endpoint=self._endpoints[key // regions],
+                region=self._regions[key % regions],
+                timestamp=timestamp,
+                interval_seconds=round(now - started, 3),
+                count=series.count,
+                error_count=series.errors,
+                status_codes=series.status_codes,
+                latency_sum_ms=round(series.latency_sum, 2),
+                latency_sketch=LatencySketch(
+                    relative_accuracy=self._mapping.relative_accuracy, bins=series.bins
+                ),
+            )
+            for key, series in sorted(drained.items())
+        ]
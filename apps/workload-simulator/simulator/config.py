@@ -1,9 +1,30 @@
-from typing import List
+from typing import Dict, List, Literal, Optional
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 
 
+class VirtualServiceTemplate(BaseModel):
+    """Compact description of many generated services, e.g. VIRTUAL_SERVICES='{"count": 2000}'.
+
+    Each service gets a log-uniform rate in [rate_min, rate_max], between
+    endpoints_min and endpoints_max endpoints, and a normal latency range of
+    (low, low * latency_spread) with low uniform in [latency_low_ms_min,
+    latency_low_ms_max]. The same seed always yields the same services.
+    """
+
+    count: int = Field(default=100)
+    name_format: str = Field(default="virtual-{index:04d}")
+    rate_min: float = Field(default=1.0)
+    rate_max: float = Field(default=20.0)
+    endpoints_min: int = Field(default=2)
+    endpoints_max: int = Field(default=8)
+    latency_low_ms_min: float = Field(default=10.0)
+    latency_low_ms_max: float = Field(default=200.0)
+    latency_spread: float = Field(default=3.0)
+    seed: int = Field(default=0)
+
+
 class Config(BaseSettings):
     kafka_brokers: str = Field(default="kafka:9092")
     metrics_topic: str = Field(default="metrics.raw")
@@ -19,5 +40,82 @@ class Config(BaseSettings):
     )
     producer_retry_max: int = Field(default=3)
     producer_flush_timeout: int = Field(default=10)
+    # Batching/compression/queue limits: latency | balanced | bulk (simulator.kafka_stats)
+    producer_profile: Literal["latency", "balanced", "bulk"] = Field(default="balanced")
+    # librdkafka statistics exported as kafka_producer_* metrics; 0 disables
+    producer_stats_interval_ms: int = Field(default=0)
+    # Undelivered records are spooled here (simulator.spool) and replayed once the
+    # broker accepts records again, at most dead_letter_replay_rate per second
+    dead_letter_dir: str = Field(default="/tmp/workload-simulator/dead-letter")
+    dead_letter_max_bytes: int = Field(default=256 * 1024 * 1024)
+    dead_letter_segment_bytes: int = Field(default=16 * 1024 * 1024)
+    dead_letter_fsync_interval_ms: float = Field(default=200.0)
+    dead_letter_replay_rate: float = Field(default=500.0)
+    # Record key of metric events, which decides their partition: service (every
+    # service on one partition), series (service, region and endpoint), request
+    # (request ID, uniform) or sticky (no key; librdkafka fills one partition per
+    # batch). Past `service`, a service spans partitions, so run both the stream
+    # processor and the metrics bridge with a merge_topic: otherwise their
+    # per-service state (anomaly windows; quantiles, SLIs, active services) is
+    # split between consumers.
+    partition_strategy: Literal["service", "series", "request", "sticky"] = Field(
+        default="service"
+    )
+    # Events generated per draw; above 1, events are drawn and encoded in vectorized batches
+    generation_batch_size: int = Field(default=1)
+    # events: a record per request; aggregates: one MetricAggregate per endpoint and
+    # region every aggregate_interval_seconds instead (simulator.aggregate)
+    metrics_format: Literal["events", "aggregates"] = Field(default="events")
+    aggregate_interval_seconds: float = Field(default=10.0)
+    aggregate_relative_accuracy: float = Field(default=0.01)
+    # Head sampling of events: every error and every request slower than
+    # sample_keep_above_ms is sent, other requests one in sample_one_in (at random)
+    # with sample_weight set to sample_one_in. 1 sends everything.
+    sample_one_in: int = Field(default=1)
+    sample_keep_above_ms: float = Field(default=500.0)
+    # Encoded events share a timestamp string within this resolution
+    timestamp_resolution_ms: float = Field(default=1.0)
+    # Debug: check every encoded event against the pydantic models (slow)
+    validate_events: bool = Field(default=False)
+    # Pacing: events are released from a token bucket once per tick
+    arrival_process: Literal["constant", "poisson", "bursty"] = Field(default="constant")
+    pacing_tick_ms: float = Field(default=10.0)
+    pacing_max_burst_seconds: float = Field(default=1.0)
+    burst_factor: float = Field(default=5.0)
+    burst_fraction: float = Field(default=0.1)
+    burst_duration_seconds: float = Field(default=2.0)
+    rate_report_interval_seconds: float = Field(default=10.0)
+    # Drive every service from one scheduler thread instead of a thread per service;
+    # implied when virtual_services is set
+    scheduler_mode: bool = Field(default=False)
+    virtual_services: Optional[VirtualServiceTemplate] = Field(default=None)
+    # Generator processes, each with its own producer and a share of the services;
+    # 0 or 1 generates in this process
+    worker_processes: int = Field(default=0)
+    # Base seed making every service's event stream reproducible; unset draws from the OS
+    seed: Optional[int] = Field(default=None)
+    # YAML traffic scenario (see simulator.scenario); re-read when the file changes
+    scenario_file: str = Field(default="")
+    scenario_poll_seconds: float = Field(default=5.0)
+    # fixed: latency drawn from each service's normal range; queueing: plus M/M/c
+    # queueing delay and timeouts as the offered rate nears capacity (simulator.queueing)
+    latency_model: Literal["fixed", "queueing"] = Field(default="fixed")
+    # Capacity per service (events/s across regions); others get queue_headroom
+    # times their configured rate. Scenario `capacity` effects scale it at runtime.
+    queue_capacity_eps: Dict[str, float] = Field(default_factory=dict)
+    queue_headroom: float = Field(default=2.0)
+    queue_timeout_ms: float = Field(default=2000.0)
+    queue_update_seconds: float = Field(default=1.0)
+    # Record everything produced to this file (simulator.recording)
+    record_file: str = Field(default="")
+    # Re-emit a recording instead of generating: replay_speed 1.0 keeps the recorded
+    # pace, 2.0 doubles it, 0 sends as fast as Kafka accepts
+    replay_file: str = Field(default="")
+    replay_speed: float = Field(default=1.0)
+    # Replace each event's timestamp with its replay time; false sends recorded bytes as-is
+    replay_rewrite_timestamps: bool = Field(default=True)
+    replay_loop: bool = Field(default=False)
+    # Serve Prometheus metrics (achieved rates) on this port; 0 disables
+    metrics_port: int = Field(default=0)
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
@@ -0,0 +1,150 @@
+"""Pydantic-free encoding of simulator events for the generation hot path.
+
+The output is byte-for-byte what `MetricEvent.model_dump_json()` and
+`LogEvent.model_dump_json()` produce for the same field values, so consumers
+cannot tell which path produced a record. Setting `validate_events` re-checks
+every encoded value against the models.
+"""
+
+import itertools
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from simulator.models import LogEvent, MetricEvent
+
+
+def json_str(value: str) -> str:
+    """JSON string literal as written by `model_dump_json()` (UTF-8, not ASCII-escaped)."""
+    return json.dumps(value, ensure_ascii=False)
+
+
+class RequestIds:
+    """Unique, UUID-shaped request IDs from a random per-process prefix and a counter.
+
+    The prefix is the first four groups of a random UUID; the last group is a
+    48-bit counter. A forked child draws a new prefix so processes never collide.
+    Safe to share between threads: `itertools.count` increments atomically.
+    """
+
+    def __init__(self, prefix: Optional[str] = None) -> None:
+        """A fixed `prefix` (e.g. from a seeded RNG) makes the IDs reproducible."""
+        if prefix is None:
+            self._reset()
+            os.register_at_fork(after_in_child=self._reset)
+        else:
+            self._prefix = prefix
+            self._counter = itertools.count(1)
+
+    def _reset(self) -> None:
+        self._prefix = str(uuid.uuid4())[:24]
+        self._counter = itertools.count(1)
+
+    def next(self) -> str:
+        return f"{self._prefix}{next(self._counter):012x}"
+
+
+class CachedTimestamp:
+    """ISO-8601 UTC timestamp string, reformatted at most once per `resolution` seconds."""
+
+    def __init__(self, resolution: float) -> None:
+        self._resolution = resolution
+        self._at = 0.0
+        self._value = ""
+
+    def now(self, at: Optional[float] = None) -> str:
+        at = time.time() if at is None else at
+        if at - self._at >= self._resolution or at < self._at:
+            self._at = at
+            self._value = datetime.fromtimestamp(at, timezone.utc).isoformat()
+        return self._value
+
+
+class ServiceEncoder:
+    """Encodes one service's metric and log events from precomputed byte templates.
+
+    Everything that depends only on the service, endpoint, region and error flag is
+    rendered once; encoding an event only fills in the timestamp, latency, status
+    code and request ID.
+    """
+
+    def __init__(
+        self, service: str, endpoints: list[str], regions: list[str], validate: bool = False
+    ) -> None:
+        self.service = service
+        self.key = service.encode("utf-8")
+        self.endpoints = endpoints
+        self.regions = regions
+        self._validate = validate
+        service_json = json_str(service)
+        self._head = f'{{"service":{service_json},"timestamp":"'.encode()
+        # [endpoint][region][error] -> bytes between the status code and the request ID
+        self._metric_middle = [
+            [
+                [
+                    (
+                        f',"endpoint":{json_str(endpoint)},"region":{json_str(region)},'
+                        f'"error":{"true" if error else "false"},"request_id":"'
+                    ).encode()
+                    for error in (False, True)
+                ]
+                for region in regions
+            ]
+            for endpoint in endpoints
+        ]
+        self._log_endpoint = [f" on {endpoint}" for endpoint in endpoints]
+        # [endpoint][region] -> record key under the "series" partition strategy
+        self.series_keys = [
+            [f"{service}|{region}|{endpoint}".encode() for region in regions]
+            for endpoint in endpoints
+        ]
+
+    def encode_metric(
+        self,
+        timestamp: str,
+        latency_ms: float,
+        status_code: int,
+        endpoint: int,
+        region: int,
+        error: bool,
+        request_id: str,
+        sample_weight: Optional[int] = None,
+    ) -> bytes:
+        """Encode a metric event; `endpoint` and `region` index the encoder's lists."""
+        weight = "null" if sample_weight is None else int(sample_weight)
+        value = b"".join((
+            self._head,
+            f'{timestamp}","latency_ms":{float(latency_ms)!r},"status_code":{status_code}'.encode(),
+            self._metric_middle[endpoint][region][error],
+            f'{request_id}","rps":null,"sample_weight":{weight}}}'.encode(),
+        ))
+        if self._validate:
+            _check(MetricEvent, value)
+        return value
+
+    def encode_error_log(
+        self, timestamp: str, status_code: int, endpoint: int, request_id: str
+    ) -> bytes:
+        """Encode the ERROR log event emitted alongside a failed request."""
+        message = json_str(
+            f"Request failed with status {status_code}{self._log_endpoint[endpoint]}"
+        )
+        value = self._head + (
+            f'{timestamp}","level":"ERROR","message":{message},'
+            f'"trace_id":null,"span_id":null,"request_id":"{request_id}"}}'
+        ).encode()
+        if self._validate:
+            _check(LogEvent, value)
+        return value
+
+
+def _check(model: type[MetricEvent] | type[LogEvent], value: bytes) -> None:
+    """Fail loudly if `value` differs from the model's own serialization."""
+    expected = model.model_validate_json(value).model_dump_json().encode("utf-8")
+    if expected != value:
+        raise ValueError(
+            f"Encoded {model.__name__} differs from model_dump_json(): {value!r} != {expected!r}"
+        )
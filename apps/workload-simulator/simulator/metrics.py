@@ -1,13 +1,21 @@
 import random
 import threading
 import time
-from datetime import datetime, timezone
+import uuid
+import zlib
+from dataclasses import dataclass
+from typing import Optional
 
+import numpy as np
 import structlog
 
+from simulator.aggregate import ServiceAggregator, SketchMapping
 from simulator.config import Config
-from simulator.models import MetricEvent, LogEvent
+from simulator.encoding import CachedTimestamp, RequestIds, ServiceEncoder
+from simulator.pacing import Pacer, RateMeter
 from simulator.producer import KafkaProducerWrapper
+from simulator.queueing import TIMEOUT_STATUS_CODE, QueueingModel, mean_service_time
+from simulator.scenario import ActivePhase, ScenarioEngine
 
 logger = structlog.get_logger(__name__)
 
@@ -26,6 +34,37 @@ NORMAL_LATENCY_MS: dict[str, tuple[float, float]] = {
     "user-service": (30, 100),
 }
 
+DEFAULT_ENDPOINTS = ["/"]
+DEFAULT_LATENCY_MS = (50.0, 200.0)
+# Smaller micro-batches are cheaper to generate event by event than with NumPy
+MIN_VECTOR_BATCH = 8
+
+ERROR_STATUS_CODES = [500, 502, 503, 429, 400]
+SUCCESS_STATUS_CODES = [200, 200, 200, 200, 201, 204]
+
+# (latencies, status codes, endpoint indices, region indices, errors[, keep draws])
+Draws = tuple[np.ndarray, ...]
+
+
+@dataclass
+class ServiceStream:
+    """Per-service generation state: encoder and private random number generators.
+
+    Giving every service its own generators keeps threads off shared RNG state and,
+    with a seed, makes each service's event sequence reproducible whichever thread,
+    scheduler or worker process generates it.
+    """
+
+    encoder: ServiceEncoder
+    random: random.Random
+    rng: np.random.Generator
+    request_ids: RequestIds
+
+
+def service_seed(seed: int, service: str) -> np.random.SeedSequence:
+    """Seed for one service's stream; stable across runs, processes and worker counts."""
+    return np.random.SeedSequence([seed, zlib.crc32(service.encode("utf-8"))])
+
 
 class MetricsGenerator:
     """Generates realistic metric events with configurable failure scenarios."""
@@ -34,63 +73,416 @@ class MetricsGenerator:
         self._config = config
         self._producer = producer
         self._lock = threading.Lock()
+        self._random = random.Random()
+        self._streams: dict[str, ServiceStream] = {}
+        self._drawn: dict[str, Draws] = {}
+        self._endpoints: dict[str, list[str]] = dict(ENDPOINTS)
+        self._latency_ms: dict[str, tuple[float, float]] = dict(NORMAL_LATENCY_MS)
+        self._request_ids = RequestIds()
+        self._timestamp = CachedTimestamp(config.timestamp_resolution_ms / 1000)
+        self.scenario = (
+            ScenarioEngine(config.scenario_file, config.regions, config.scenario_poll_seconds)
+            if config.scenario_file
+            else None
+        )
+        self.queueing = QueueingModel(config) if config.latency_model == "queueing" else None
+        self._aggregators: dict[str, ServiceAggregator] = {}
+        self._sketch_mapping = (
+            SketchMapping(config.aggregate_relative_accuracy)
+            if config.metrics_format == "aggregates"
+            else None
+        )
+
+    def current_phase(self, now: Optional[float] = None) -> Optional[ActivePhase]:
+        return self.scenario.current(now) if self.scenario is not None else None
+
+    def rate_multiplier(self, service: str, now: float) -> float:
+        """Factor the active scenario phase applies to a service's configured rate."""
+        phase = self.current_phase(now)
+        return phase.rate_multiplier(service, now) if phase is not None else 1.0
+
+    def add_service(
+        self,
+        service: str,
+        endpoints: list[str],
+        latency_ms: tuple[float, float],
+        rate: Optional[float] = None,
+    ) -> None:
+        """Register the endpoints, normal latency range (ms) and configured rate of a service."""
+        self._endpoints[service] = endpoints
+        self._latency_ms[service] = latency_ms
+        self._streams.pop(service, None)
+        self._drawn.pop(service, None)
+        self._aggregators.pop(service, None)
+        if rate is not None and self.queueing is not None:
+            self.queueing.set_base_rate(service, rate)
+
+    def profile(self, service: str) -> tuple[list[str], tuple[float, float]]:
+        """Endpoints and normal latency range (ms) used for a service."""
+        return (
+            self._endpoints.get(service, DEFAULT_ENDPOINTS),
+            self._latency_ms.get(service, DEFAULT_LATENCY_MS),
+        )
+
+    def _stream(self, service: str) -> ServiceStream:
+        stream = self._streams.get(service)
+        if stream is None:
+            encoder = ServiceEncoder(
+                service,
+                self._endpoints.get(service, DEFAULT_ENDPOINTS),
+                self._config.regions,
+                validate=self._config.validate_events,
+            )
+            if self._config.seed is None:
+                stream = ServiceStream(
+                    encoder, random.Random(), np.random.default_rng(), self._request_ids
+                )
+            else:
+                seed = service_seed(self._config.seed, service)
+                rand = random.Random(int(seed.generate_state(1, np.uint64)[0]))
+                prefix = str(uuid.UUID(int=rand.getrandbits(128), version=4))[:24]
+                stream = ServiceStream(
+                    encoder, rand, np.random.default_rng(seed), RequestIds(prefix)
+                )
+            self._streams[service] = stream
+        return stream
+
+    def _aggregator(self, service: str) -> Optional[ServiceAggregator]:
+        """The service's aggregator when metrics are sent as aggregates, else None."""
+        if self._sketch_mapping is None:
+            return None
+        aggregator = self._aggregators.get(service)
+        if aggregator is None:
+            aggregator = self._aggregators[service] = ServiceAggregator(
+                service,
+                self._endpoints.get(service, DEFAULT_ENDPOINTS),
+                self._config.regions,
+                self._config.aggregate_interval_seconds,
+                self._sketch_mapping,
+            )
+        return aggregator
+
+    def _publish_aggregates(self, aggregator: ServiceAggregator) -> None:
+        drained = aggregator.drain()
+        if not drained:
+            return
+        records = [record.model_dump_json().encode("utf-8") for record in drained]
+        if self._config.partition_strategy == "service":
+            key = self._stream(aggregator.service).encoder.key
+            self._producer.publish_batch(self._config.metrics_topic, key, records)
+        else:
+            # Each record is one series, so every other strategy keys it by series
+            keys: list[Optional[bytes]] = [
+                f"{r.service}|{r.region}|{r.endpoint}".encode() for r in drained
+            ]
+            self._producer.publish_keyed(self._config.metrics_topic, keys, records)
+
+    def _metric_key(
+        self, encoder: ServiceEncoder, endpoint: int, region: int, request_id: str
+    ) -> Optional[bytes]:
+        """Record key of a metric event under `partition_strategy`; None lets the producer pick."""
+        strategy = self._config.partition_strategy
+        if strategy == "series":
+            return encoder.series_keys[endpoint][region]
+        if strategy == "request":
+            return request_id.encode("utf-8")
+        if strategy == "sticky":
+            return None
+        return encoder.key
+
+    def flush_aggregates(self) -> None:
+        """Send every service's partial interval, e.g. before the producer is closed."""
+        for aggregator in list(self._aggregators.values()):
+            self._publish_aggregates(aggregator)
 
     def _generate_latency(self, service: str, is_spike: bool) -> float:
-        lo, hi = NORMAL_LATENCY_MS.get(service, (50, 200))
+        rand = self._stream(service).random
+        lo, hi = self._latency_ms.get(service, DEFAULT_LATENCY_MS)
         if is_spike:
             # Simulate P99 spike: 3-10x normal upper bound
-            return random.uniform(hi * 3, hi * 10)
+            return rand.uniform(hi * 3, hi * 10)
         # Normal: Gaussian distribution clipped to [lo, hi*2]
         mean = (lo + hi) / 2
         std = (hi - lo) / 4
-        return max(lo, min(hi * 2, random.gauss(mean, std)))
+        return max(lo, min(hi * 2, rand.gauss(mean, std)))
 
-    def _generate_status_code(self, is_error: bool) -> int:
+    def _generate_status_code(self, is_error: bool, rand: Optional[random.Random] = None) -> int:
+        rand = rand or self._random
         if is_error:
-            return random.choice([500, 502, 503, 429, 400])
-        return random.choice([200, 200, 200, 200, 201, 204])
+            return rand.choice(ERROR_STATUS_CODES)
+        return rand.choice(SUCCESS_STATUS_CODES)
 
-    def _emit_event(self, service: str) -> None:
-        is_spike = random.random() < self._config.latency_spike_probability
-        is_error = random.random() < self._config.error_rate
-        region = random.choice(self._config.regions)
-        endpoints = ENDPOINTS.get(service, ["/"])
-        endpoint = random.choice(endpoints)
-
-        event = MetricEvent(
-            service=service,
-            timestamp=datetime.now(timezone.utc),
-            latency_ms=round(self._generate_latency(service, is_spike), 2),
-            status_code=self._generate_status_code(is_error),
-            endpoint=endpoint,
-            region=region,
-            error=is_error,
-        )
-        self._producer.publish_metric(event)
+    def _emit_event(self, service: str, phase: Optional[ActivePhase] = None) -> None:
+        stream = self._stream(service)
+        encoder, rand = stream.encoder, stream.random
+        is_spike = rand.random() < self._config.latency_spike_probability
+        error_draw = rand.random()
+        region = rand.randrange(len(encoder.regions))
+        endpoint = rand.randrange(len(encoder.endpoints))
+        error_rate = self._config.error_rate
+        if phase is not None and (rates := phase.error_rates(service)) is not None:
+            override = rates[region]
+            if override is not None:
+                error_rate = override
+        is_error = error_draw < error_rate
+        status_code = self._generate_status_code(is_error, rand)
+        latency = self._generate_latency(service, is_spike)
+        if phase is not None and (shift := phase.latency(service)) is not None:
+            latency = latency * shift[0][region] + shift[1][region]
+        if self.queueing is not None:
+            delay, timed_out = self.queueing.sample(service, region, rand)
+            latency += delay
+            if timed_out:
+                is_error, status_code = True, TIMEOUT_STATUS_CODE
+        timestamp = self._timestamp.now()
+        request_id = stream.request_ids.next()
 
+        aggregator = self._aggregator(service)
+        if aggregator is not None:
+            aggregator.add(endpoint, region, round(latency, 2), status_code, is_error)
+        else:
+            # Head sampling draws only for requests it may drop
+            weight: Optional[int] = None
+            one_in = self._config.sample_one_in
+            if one_in > 1 and not is_error and latency <= self._config.sample_keep_above_ms:
+                weight = one_in
+            if weight is None or rand.random() * one_in < 1:
+                self._producer.publish_value(
+                    self._config.metrics_topic,
+                    self._metric_key(encoder, endpoint, region, request_id),
+                    encoder.encode_metric(
+                        timestamp,
+                        round(latency, 2),
+                        status_code,
+                        endpoint,
+                        region,
+                        is_error,
+                        request_id,
+                        weight,
+                    ),
+                )
         if is_error:
-            log_event = LogEvent(
-                service=service,
-                level="ERROR",
-                message=f"Request failed with status {event.status_code} on {endpoint}",
-                request_id=event.request_id,
+            self._producer.publish_value(
+                self._config.logs_topic,
+                encoder.key,
+                encoder.encode_error_log(timestamp, status_code, endpoint, request_id),
+            )
+
+    def generate_batch(
+        self, service: str, size: int, phase: Optional[ActivePhase] = None
+    ) -> tuple[list[bytes], list[bytes]]:
+        """Generate `size` events for a service as encoded Kafka values.
+
+        Draws every random field for the whole batch at once with NumPy, from the
+        same distributions as `_generate_latency` and `_generate_status_code`, then
+        encodes them with the service's `ServiceEncoder`. Returns (metric values,
+        log values for the errors); both are byte-for-byte what `model_dump_json()`
+        produces for the same fields. Events in a batch share one timestamp. With head
+        sampling, fewer than `size` metric values are returned.
+        """
+        metrics, _, logs = self.generate_keyed_batch(service, size, phase)
+        return metrics, logs
+
+    def generate_keyed_batch(
+        self, service: str, size: int, phase: Optional[ActivePhase] = None
+    ) -> tuple[list[bytes], list[Optional[bytes]], list[bytes]]:
+        """`generate_batch` plus each metric value's key under `partition_strategy`."""
+        return self._encode_batch(service, self._draw_events(service, size, phase))
+
+    def _encode_batch(
+        self, service: str, draws: Draws
+    ) -> tuple[list[bytes], list[Optional[bytes]], list[bytes]]:
+        """Encode drawn events, head-sampled when `draws` carries keep draws."""
+        stream = self._stream(service)
+        encoder = stream.encoder
+        latencies, status_codes, endpoint_idx, region_idx, is_error = draws[:5]
+        weights: list[Optional[int]] = [None] * len(latencies)
+        one_in = self._config.sample_one_in
+        if len(draws) > 5:
+            sampled = ~is_error & (latencies <= self._config.sample_keep_above_ms)
+            kept = ~sampled | (draws[5] * one_in < 1)
+            weights = [one_in if s else None for s in sampled[kept].tolist()]
+            latencies, status_codes, endpoint_idx, region_idx, is_error = (
+                a[kept] for a in (latencies, status_codes, endpoint_idx, region_idx, is_error)
             )
-            self._producer.publish_log(log_event)
+        timestamp = self._timestamp.now()
+        next_id = stream.request_ids.next
+        encode_metric = encoder.encode_metric
+        metric_key = self._metric_key
+        metrics: list[bytes] = []
+        keys: list[Optional[bytes]] = []
+        logs: list[bytes] = []
+        for latency, status_code, endpoint, region, error, weight in zip(
+            latencies.tolist(),
+            status_codes.tolist(),
+            endpoint_idx.tolist(),
+            region_idx.tolist(),
+            is_error.tolist(),
+            weights,
+        ):
+            request_id = next_id()
+            metrics.append(encode_metric(
+                timestamp, latency, status_code, endpoint, region, error, request_id, weight
+            ))
+            keys.append(metric_key(encoder, endpoint, region, request_id))
+            if error:
+                logs.append(encoder.encode_error_log(timestamp, status_code, endpoint, request_id))
+        return metrics, keys, logs
+
+    def _draw_events(self, service: str, size: int, phase: Optional[ActivePhase]) -> Draws:
+        """`_draw_batch`, plus each event's keep draw when requests are head sampled."""
+        draws = self._draw_batch(service, size, phase)
+        if self._config.sample_one_in > 1:
+            return (*draws, self._stream(service).rng.random(size))
+        return draws
+
+    def _take_draws(self, service: str, size: int, phase: Optional[ActivePhase]) -> Draws:
+        """The service's next `size` (at most a batch) events, drawn a full batch at a time.
+
+        Seeded draws then don't depend on how ticks split the events: the rest of a
+        batch waits in `_drawn` and is encoded, with its own timestamp, once due.
+        """
+        drawn = self._drawn.get(service)
+        if drawn is None or len(drawn[0]) < size:
+            fresh = self._draw_events(service, self._config.generation_batch_size, phase)
+            if drawn is not None:
+                fresh = tuple(np.concatenate(pair) for pair in zip(drawn, fresh))
+            drawn = fresh
+        self._drawn[service] = tuple(a[size:] for a in drawn)
+        return tuple(a[:size] for a in drawn)
+
+    def _draw_batch(
+        self, service: str, size: int, phase: Optional[ActivePhase]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(latencies, status codes, endpoint indices, region indices, errors) for a batch."""
+        stream = self._stream(service)
+        rng, encoder = stream.rng, stream.encoder
+        lo, hi = self._latency_ms.get(service, DEFAULT_LATENCY_MS)
+
+        is_spike = rng.random(size) < self._config.latency_spike_probability
+        error_draws = rng.random(size)
+        normal = np.clip(rng.normal((lo + hi) / 2, (hi - lo) / 4, size), lo, hi * 2)
+        latencies = np.where(is_spike, rng.uniform(hi * 3, hi * 10, size), normal)
+        error_codes = rng.choice(ERROR_STATUS_CODES, size)
+        success_codes = rng.choice(SUCCESS_STATUS_CODES, size)
+        region_idx = rng.integers(len(encoder.regions), size=size)
+        endpoint_idx = rng.integers(len(encoder.endpoints), size=size)
+
+        error_rate: float | np.ndarray = self._config.error_rate
+        if phase is not None:
+            if (rates := phase.error_rates(service)) is not None:
+                default = self._config.error_rate
+                error_rate = np.array([default if r is None else r for r in rates])[region_idx]
+            if (shift := phase.latency(service)) is not None:
+                factors, added = np.array(shift[0]), np.array(shift[1])
+                latencies = latencies * factors[region_idx] + added[region_idx]
+        is_error = error_draws < error_rate
+        status_codes = np.where(is_error, error_codes, success_codes)
+        if self.queueing is not None and (
+            queued := self.queueing.sample_batch(service, region_idx, rng)
+        ) is not None:
+            delays, timed_out = queued
+            latencies = latencies + delays
+            is_error |= timed_out
+            status_codes = np.where(timed_out, TIMEOUT_STATUS_CODE, status_codes)
+        latencies = np.round(latencies, 2)
+        return latencies, status_codes, endpoint_idx, region_idx, is_error
+
+    def _emit_batch(self, service: str, size: int, phase: Optional[ActivePhase] = None) -> None:
+        self._send_batch(service, self._draw_events(service, size, phase))
+
+    def _send_batch(self, service: str, draws: Draws) -> None:
+        stream = self._stream(service)
+        key = stream.encoder.key
+        aggregator = self._aggregator(service)
+        if aggregator is None:
+            metrics, keys, logs = self._encode_batch(service, draws)
+            if self._config.partition_strategy == "service":
+                self._producer.publish_batch(self._config.metrics_topic, key, metrics)
+            else:
+                self._producer.publish_keyed(self._config.metrics_topic, keys, metrics)
+        else:
+            latencies, status_codes, endpoint_idx, region_idx, is_error = draws[:5]
+            aggregator.add_batch(endpoint_idx, region_idx, latencies, status_codes, is_error)
+            timestamp = self._timestamp.now()
+            logs = [
+                stream.encoder.encode_error_log(
+                    timestamp, int(status_codes[i]), int(endpoint_idx[i]), stream.request_ids.next()
+                )
+                for i in np.flatnonzero(is_error).tolist()
+            ]
+        if logs:
+            self._producer.publish_batch(self._config.logs_topic, key, logs)
+
+    def emit(self, service: str, count: int) -> int:
+        """Emit `count` events, in vectorized chunks when batch generation is enabled.
+
+        Returns how many events were emitted.
+        """
+        if not count:
+            return 0
+        phase = self.current_phase()
+        if self.queueing is not None:
+            self.queueing.observe(
+                service,
+                count,
+                time.monotonic(),
+                mean_service_time(self._latency_ms.get(service, DEFAULT_LATENCY_MS)),
+                phase.capacity(service) if phase is not None else None,
+            )
+        batch_size = self._config.generation_batch_size
+        if batch_size > 1 and self._config.seed is not None:
+            for offset in range(0, count, batch_size):
+                size = min(batch_size, count - offset)
+                self._send_batch(service, self._take_draws(service, size, phase))
+        elif batch_size > 1 and count >= MIN_VECTOR_BATCH:
+            for offset in range(0, count, batch_size):
+                self._emit_batch(service, min(batch_size, count - offset), phase)
+        else:
+            for _ in range(count):
+                self._emit_event(service, phase)
+        aggregator = self._aggregators.get(service)
+        if aggregator is not None and aggregator.due(time.monotonic()):
+            self._publish_aggregates(aggregator)
+        return count
 
     def run_service(self, service: str, stop_event: threading.Event) -> None:
-        """Run the metrics generator loop for a single service."""
-        interval = 1.0 / self._config.events_per_second
-        logger.info("Starting simulator thread", service=service, interval_ms=interval * 1000)
+        """Run the metrics generator loop for a single service.
 
+        Each tick releases the events a `Pacer` says are due, so the rate holds
+        regardless of how long generation and publishing take; a `RateMeter`
+        reports the achieved rate against the target.
+        """
+        pacer = Pacer.from_config(self._config)
+        meter = RateMeter(
+            service,
+            self._config.events_per_second,
+            self._config.rate_report_interval_seconds,
+            time.monotonic(),
+        )
+        logger.info(
+            "Starting simulator thread",
+            service=service,
+            events_per_second=self._config.events_per_second,
+            arrival_process=pacer.arrival,
+            tick_ms=pacer.tick_seconds * 1000,
+            batch_size=self._config.generation_batch_size,
+        )
+
+        base_rate = pacer.rate
         while not stop_event.is_set():
-            start = time.monotonic()
+            now = time.monotonic()
+            if self.scenario is not None:
+                pacer.rate = base_rate * self.rate_multiplier(service, now)
+                meter.set_target(pacer.rate)
+            due = pacer.take(now)
+            emitted = 0
             try:
-                self._emit_event(service)
+                emitted = self.emit(service, due)
             except Exception as e:
                 logger.exception("Unexpected error generating event", service=service, error=str(e))
-
-            elapsed = time.monotonic() - start
-            sleep_time = max(0.0, interval - elapsed)
-            stop_event.wait(timeout=sleep_time)
+            now = time.monotonic()
+            meter.record(emitted, now)
+            stop_event.wait(timeout=pacer.sleep_time(now))
 
         logger.info("Simulator thread stopped", service=service)
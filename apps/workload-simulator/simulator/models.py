@@ -1,12 +1,15 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PlainSerializer
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Annotated, Literal, Optional
 import uuid
 
+# Serialized with isoformat(), i.e. "+00:00" rather than pydantic's default "Z"
+Timestamp = Annotated[datetime, PlainSerializer(lambda v: v.isoformat(), when_used="json")]
+
 
 class MetricEvent(BaseModel):
     service: str
-    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    timestamp: Timestamp = Field(default_factory=lambda: datetime.now(timezone.utc))
     latency_ms: float
     status_code: int
     endpoint: str
@@ -14,29 +17,56 @@ class MetricEvent(BaseModel):
     error: bool
     request_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     rps: Optional[float] = None
+    # Requests this event stands for when the producer samples; unset means 1
+    sample_weight: Optional[int] = None
+
+
+class LatencySketch(BaseModel):
+    """Latency counts in logarithmic bins: bin `i` covers (gamma**(i-1), gamma**i] ms.
+
+    gamma is (1 + relative_accuracy) / (1 - relative_accuracy), the DDSketch mapping
+    the metrics bridge uses for its quantiles.
+    """
 
-    model_config = {"json_encoders": {datetime: lambda v: v.isoformat()}}
+    relative_accuracy: float
+    bins: dict[int, int]
+
+
+class MetricAggregate(BaseModel):
+    """Pre-aggregated requests of one (service, endpoint, region) over an interval.
+
+    Sent on the metrics topic in place of the individual `MetricEvent`s; `type`
+    tells the two apart.
+    """
+
+    type: Literal["aggregate"] = "aggregate"
+    service: str
+    endpoint: str
+    region: str
+    timestamp: Timestamp  # start of the interval
+    interval_seconds: float
+    count: int
+    error_count: int
+    status_codes: dict[int, int]
+    latency_sum_ms: float
+    latency_sketch: LatencySketch
 
 
 class LogEvent(BaseModel):
     service: str
-    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    timestamp: Timestamp = Field(default_factory=lambda: datetime.now(timezone.utc))
     level: str
     message: str
     trace_id: Optional[str] = None
     span_id: Optional[str] = None
     request_id: Optional[str] = None
 
-    model_config = {"json_encoders": {datetime: lambda v: v.isoformat()}}
-
 
 class AlertEvent(BaseModel):
     alert_name: str
     service: str
     severity: str
-    timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    timestamp: Timestamp = Field(default_factory=lambda: datetime.now(timezone.utc))
     labels: dict[str, str] = Field(default_factory=dict)
     annotations: dict[str, str] = Field(default_factory=dict)
     fingerprint: str = Field(default_factory=lambda: str(uuid.uuid4()))
-
-    model_config = {"json_encoders": {datetime: lambda v: v.isoformat()}}
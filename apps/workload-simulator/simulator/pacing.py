@@ -0,0 +1,175 @@
+import math
+from typing import Optional
+
+import numpy as np
+import structlog
+from prometheus_client import Counter, Gauge
+
+from simulator.config import Config
+
+logger = structlog.get_logger(__name__)
+
+ARRIVAL_PROCESSES = ("constant", "poisson", "bursty")
+
+TARGET_RATE = Gauge(
+    "simulator_target_events_per_second",
+    "Configured event rate per simulated service",
+    ["service"],
+)
+
+ACHIEVED_RATE = Gauge(
+    "simulator_achieved_events_per_second",
+    "Event rate actually generated over the last report interval",
+    ["service"],
+)
+
+EVENTS_GENERATED = Counter(
+    "simulator_events_generated_total",
+    "Metric events generated per simulated service",
+    ["service"],
+)
+
+
+class Pacer:
+    """Releases events in micro-batches from a token bucket refilled at the target rate.
+
+    Tokens accrue for the real time elapsed between calls to `take`, so a late
+    wake-up is made up on the next tick instead of lowering the rate. The bucket
+    holds at most `max_burst_seconds` worth of events, which bounds the catch-up
+    after a stall. Arrival processes:
+
+    * constant: exactly `rate` events per second, spread evenly over ticks.
+    * poisson: a Poisson number of events per tick with mean `rate * elapsed`.
+    * bursty: Poisson arrivals modulated by an on/off state (an MMPP). Bursts run
+      at `burst_factor` times the rate for `burst_fraction` of the time, with
+      a mean length of `burst_duration_seconds`; the quiet rate is lowered so the
+      long-run mean is still `rate`.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        tick_seconds: float = 0.01,
+        arrival: str = "constant",
+        max_burst_seconds: float = 1.0,
+        burst_factor: float = 5.0,
+        burst_fraction: float = 0.1,
+        burst_duration_seconds: float = 2.0,
+        rng: Optional[np.random.Generator] = None,
+    ) -> None:
+        if arrival not in ARRIVAL_PROCESSES:
+            raise ValueError(f"arrival must be one of {ARRIVAL_PROCESSES}, got {arrival!r}")
+        if arrival == "bursty" and not (
+            0 < burst_fraction < 1 and 1 <= burst_factor <= 1 / burst_fraction
+        ):
+            raise ValueError(
+                "bursty arrivals need 0 < burst_fraction < 1 and "
+                "1 <= burst_factor <= 1 / burst_fraction"
+            )
+        self.rate = rate
+        self.tick_seconds = tick_seconds
+        self.arrival = arrival
+        self._max_burst_seconds = max_burst_seconds
+        self._burst_factor = burst_factor
+        self._burst_seconds = burst_duration_seconds
+        if arrival == "bursty":
+            self._quiet_factor = (1 - burst_factor * burst_fraction) / (1 - burst_fraction)
+            # Mean quiet spell that makes bursts take up `burst_fraction` of the time
+            self._quiet_seconds = burst_duration_seconds * (1 - burst_fraction) / burst_fraction
+        self._rng = rng if rng is not None else np.random.default_rng()
+        self._tokens = 0.0
+        self._last: Optional[float] = None
+        self._deadline = 0.0
+        self.bursting = False
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Config,
+        rng: Optional[np.random.Generator] = None,
+        rate: Optional[float] = None,
+    ) -> "Pacer":
+        """Pacer for `rate` (default `events_per_second`), ticking at most once per
+        `pacing_tick_ms` and at least once per expected event for slow rates."""
+        rate = config.events_per_second if rate is None else rate
+        tick_seconds = config.pacing_tick_ms / 1000
+        return cls(
+            rate=rate,
+            tick_seconds=max(tick_seconds, 1 / rate) if rate > 0 else 1.0,
+            arrival=config.arrival_process,
+            max_burst_seconds=config.pacing_max_burst_seconds,
+            burst_factor=config.burst_factor,
+            burst_fraction=config.burst_fraction,
+            burst_duration_seconds=config.burst_duration_seconds,
+            rng=rng,
+        )
+
+    def _current_rate(self, elapsed: float) -> float:
+        if self.arrival != "bursty":
+            return self.rate
+        mean_stay = self._burst_seconds if self.bursting else self._quiet_seconds
+        if self._rng.random() < -math.expm1(-elapsed / mean_stay):
+            self.bursting = not self.bursting
+        return self.rate * (self._burst_factor if self.bursting else self._quiet_factor)
+
+    def take(self, now: float) -> int:
+        """Number of events due at `now` since the previous call."""
+        if self._last is None:
+            self._last = now
+            self._deadline = now
+            return 0
+        elapsed = max(0.0, now - self._last)
+        self._last = now
+        rate = self._current_rate(elapsed)
+        if self.arrival == "constant":
+            self._tokens += rate * elapsed
+        else:
+            self._tokens += float(self._rng.poisson(rate * elapsed))
+        self._tokens = min(self._tokens, max(1.0, self.rate * self._max_burst_seconds))
+        due = int(self._tokens)
+        self._tokens -= due
+        return due
+
+    def sleep_time(self, now: float) -> float:
+        """Time until the next tick, scheduled on a fixed grid so ticks don't drift."""
+        # Fell behind by more than a tick: resume from now, the bucket covers the gap
+        self._deadline = max(self._deadline + self.tick_seconds, now)
+        return self._deadline - now
+
+
+class RateMeter:
+    """Tracks achieved versus target rate for one service and reports it periodically."""
+
+    def __init__(self, service: str, target: float, interval_seconds: float, now: float) -> None:
+        self._service = service
+        self._interval = interval_seconds
+        self._start = now
+        self._count = 0
+        self._counter = EVENTS_GENERATED.labels(service)
+        self._achieved = ACHIEVED_RATE.labels(service)
+        self._target = TARGET_RATE.labels(service)
+        self.set_target(target)
+        self.achieved = 0.0
+
+    def set_target(self, target: float) -> None:
+        self.target = target
+        self._target.set(target)
+
+    def record(self, count: int, now: float) -> None:
+        if count:
+            self._count += count
+            self._counter.inc(count)
+        elapsed = now - self._start
+        if elapsed < self._interval:
+            return
+        self.achieved = self._count / elapsed
+        self._achieved.set(self.achieved)
+        logger.info(
+            "Generation rate",
+            service=self._service,
+            target_eps=self.target,
+            achieved_eps=round(self.achieved, 1),
+            achieved_ratio=round(self.achieved / self.target, 3) if self.target else None,
+        )
+        self._start = now
+        self._count = 0
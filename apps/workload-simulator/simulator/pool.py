@@ -0,0 +1,197 @@
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing.queues import Queue
+from multiprocessing.synchronize import Event
+from typing import Optional
+
+import numpy as np
+import structlog
+
+from simulator.config import Config
+from simulator.metrics import MetricsGenerator
+from simulator.pacing import RateMeter
+from simulator.producer import DELIVERY_ERRORS, KafkaProducerWrapper
+from simulator.scenario import ScenarioEngine
+from simulator.virtual import (
+    SCHEDULER_METER,
+    ServiceScheduler,
+    VirtualService,
+    configured_services,
+)
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class WorkerReport:
+    """Progress a worker sends to the parent once per report interval."""
+
+    worker: int
+    events: int  # generated since the previous report
+    delivery_errors: int  # since the previous report
+    dlq_size: int
+    target: float  # current target rate of the worker's services, after scenario effects
+
+
+def partition(services: list[VirtualService], workers: int) -> list[list[VirtualService]]:
+    """Split services across workers with roughly equal total rate.
+
+    Greedy: highest rates first, each to the currently least loaded worker. The
+    result only depends on the services, so a seeded run always has the same split.
+    """
+    shares: list[list[VirtualService]] = [[] for _ in range(workers)]
+    load = [0.0] * workers
+    for service in sorted(services, key=lambda s: (-s.rate, s.name)):
+        target = load.index(min(load))
+        shares[target].append(service)
+        load[target] += service.rate
+    return shares
+
+
+def worker_rng(config: Config, index: int) -> np.random.Generator:
+    """Arrival/stagger RNG of a worker: base seed plus worker index, or OS entropy."""
+    return np.random.default_rng(None if config.seed is None else [config.seed, index])
+
+
+def _worker_main(
+    config: Config,
+    index: int,
+    services: list[VirtualService],
+    reports: "Queue[WorkerReport]",
+    stop: Event,
+) -> None:
+    # The parent handles signals and sets `stop`; Ctrl-C reaches the whole group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # A spool and recording per worker; the same index gets the same paths after a restart
+    config = config.model_copy(update={
+        "dead_letter_dir": os.path.join(config.dead_letter_dir, f"worker-{index}"),
+        "record_file": f"{config.record_file}.worker-{index}" if config.record_file else "",
+    })
+    producer = KafkaProducerWrapper(config)
+    generator = MetricsGenerator(config, producer)
+    scheduler = ServiceScheduler(config, generator, services, rng=worker_rng(config, index))
+    local_stop = threading.Event()
+    thread = threading.Thread(target=scheduler.run, args=(local_stop,), daemon=True)
+    thread.start()
+
+    reported_events = reported_errors = 0
+    while True:
+        stopping = stop.wait(config.rate_report_interval_seconds)
+        events, errors = scheduler.generated, producer.delivery_errors
+        reports.put(WorkerReport(
+            index,
+            events - reported_events,
+            errors - reported_errors,
+            producer.get_dlq_size(),
+            scheduler.target,
+        ))
+        reported_events, reported_errors = events, errors
+        if stopping:
+            break
+    local_stop.set()
+    thread.join()
+    generator.flush_aggregates()
+    producer.close()
+
+
+class WorkerPool:
+    """Runs generation in `worker_processes` processes, each owning a share of the services.
+
+    Every worker has its own producer, scheduler and RNGs, so throughput scales
+    with cores instead of contending on one GIL. Workers report generated events
+    and delivery errors to the parent, which exports the combined achieved rate.
+    """
+
+    def __init__(self, config: Config) -> None:
+        self._config = config
+        self._ctx = mp.get_context("spawn")  # librdkafka threads don't survive fork
+        self.shares = partition(configured_services(config), config.worker_processes)
+        self._reports: Queue[WorkerReport] = self._ctx.Queue()
+        self._stop = self._ctx.Event()
+        self._processes: list[mp.process.BaseProcess] = []
+        self.events = [0] * config.worker_processes
+        self.delivery_errors = [0] * config.worker_processes
+        self.targets = [sum(service.rate for service in share) for share in self.shares]
+
+    def start(self) -> None:
+        for index, share in enumerate(self.shares):
+            process = self._ctx.Process(
+                target=_worker_main,
+                args=(self._config, index, share, self._reports, self._stop),
+                name=f"simulator-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        logger.info(
+            "Started worker pool",
+            workers=len(self._processes),
+            services_per_worker=[len(share) for share in self.shares],
+            seed=self._config.seed,
+        )
+
+    def _handle(self, report: WorkerReport, meter: RateMeter) -> None:
+        self.events[report.worker] += report.events
+        self.delivery_errors[report.worker] += report.delivery_errors
+        self.targets[report.worker] = report.target
+        if report.delivery_errors:
+            DELIVERY_ERRORS.labels(self._config.metrics_topic).inc(report.delivery_errors)
+        meter.set_target(sum(self.targets))
+        meter.record(report.events, time.monotonic())
+
+    def run(self, stop_event: threading.Event) -> None:
+        """Start the workers, aggregate their reports until `stop_event`, then shut down."""
+        self.start()
+        meter = RateMeter(
+            SCHEDULER_METER,
+            sum(self.targets),
+            self._config.rate_report_interval_seconds,
+            time.monotonic(),
+        )
+        # Workers apply the scenario themselves; this copy exports the phase metrics
+        scenario = (
+            ScenarioEngine(
+                self._config.scenario_file,
+                self._config.regions,
+                self._config.scenario_poll_seconds,
+            )
+            if self._config.scenario_file
+            else None
+        )
+        while not stop_event.is_set():
+            if scenario is not None:
+                scenario.current()
+            try:
+                self._handle(self._reports.get(timeout=0.5), meter)
+            except queue.Empty:
+                pass
+            if not any(process.is_alive() for process in self._processes):
+                logger.error("All simulator workers exited")
+                break
+        self.stop(meter)
+
+    def stop(self, meter: Optional[RateMeter] = None) -> None:
+        self._stop.set()
+        deadline = time.monotonic() + self._config.producer_flush_timeout + 5
+        for process in self._processes:
+            process.join(timeout=max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("Terminating unresponsive worker", worker=process.name)
+                process.terminate()
+        # Final reports sent on the way out
+        while meter is not None:
+            try:
+                self._handle(self._reports.get_nowait(), meter)
+            except queue.Empty:
+                break
+        logger.info(
+            "Worker pool stopped",
+            events=sum(self.events),
+            delivery_errors=sum(self.delivery_errors),
+            exit_codes=[process.exitcode for process in self._processes],
+        )
@@ -1,26 +1,62 @@
 import time
-from collections import deque
-from typing import Any, Optional, Union
+from typing import Any, Optional
 
 import structlog
-from confluent_kafka import KafkaException, Message, Producer
+from confluent_kafka import KafkaError, KafkaException, Message, Producer
+from prometheus_client import Counter
 
 from simulator.config import Config
+from simulator.kafka_stats import ProducerStats, producer_profile
 from simulator.models import MetricEvent, LogEvent
+from simulator.recording import Recorder
+from simulator.spool import DeadLetterSpool, SpoolDrainer
 
 logger = structlog.get_logger(__name__)
 
+DELIVERY_ERRORS = Counter(
+    "simulator_delivery_errors_total",
+    "Records the broker failed to accept after librdkafka's own retries",
+    ["topic"],
+)
+
+# Delivery failures that a replay can't fix, so they are not spooled
+PERMANENT_ERRORS = (
+    KafkaError.MSG_SIZE_TOO_LARGE,
+    KafkaError.INVALID_MSG,
+    KafkaError.INVALID_RECORD,
+    KafkaError.TOPIC_AUTHORIZATION_FAILED,
+)
+
 
 class KafkaProducerWrapper:
-    """Kafka producer with retry logic and dead-letter queue."""
+    """Kafka producer with retry logic and a disk-backed dead-letter spool.
+
+    Records that fail to produce, or whose delivery fails, go to a
+    `DeadLetterSpool`; a `SpoolDrainer` replays them at a bounded rate once
+    deliveries succeed again.
+    """
 
     def __init__(self, config: Config) -> None:
         self._config = config
-        self._dlq: deque[MetricEvent] = deque(maxlen=1000)
+        self.delivery_errors = 0
+        # Monotonic times of the latest successful and failed delivery
+        self._last_delivered = 0.0
+        self._last_failed = 0.0
         self._producer = self._create_producer()
+        self._spool = DeadLetterSpool(
+            config.dead_letter_dir,
+            segment_bytes=config.dead_letter_segment_bytes,
+            max_bytes=config.dead_letter_max_bytes,
+            fsync_interval=config.dead_letter_fsync_interval_ms / 1000,
+        )
+        self._drainer = SpoolDrainer(
+            self._spool, self._replay, self.broker_healthy, config.dead_letter_replay_rate
+        )
+        self._drainer.start()
+        self._recorder = Recorder(config.record_file) if config.record_file else None
 
     def _create_producer(self) -> Producer:
-        conf: dict[str, Union[str, int, float, bool]] = {
+        conf: dict[str, Any] = {
             "bootstrap.servers": self._config.kafka_brokers,
             "acks": "all",
             "retries": self._config.producer_retry_max,
@@ -28,17 +64,29 @@ class KafkaProducerWrapper:
             "delivery.timeout.ms": 30000,
             "enable.idempotence": True,
             "client.id": "workload-simulator",
+            **producer_profile(self._config.producer_profile),
         }
+        if self._config.producer_stats_interval_ms:
+            conf["statistics.interval.ms"] = self._config.producer_stats_interval_ms
+            conf["stats_cb"] = ProducerStats(conf["client.id"], int(conf["batch.size"]))
+        logger.info("Creating producer", profile=self._config.producer_profile)
         return Producer(conf)
 
     def _delivery_callback(self, err: Any, msg: Message) -> None:
         if err:
+            self.delivery_errors += 1
+            self._last_failed = time.monotonic()
+            DELIVERY_ERRORS.labels(msg.topic()).inc()
             logger.error(
                 "Message delivery failed",
                 topic=msg.topic(),
                 error=str(err),
             )
+            topic = msg.topic()
+            if topic is not None and err.code() not in PERMANENT_ERRORS:
+                self._spool.append(topic, msg.key() or b"", msg.value() or b"")
         else:
+            self._last_delivered = time.monotonic()
             logger.debug(
                 "Message delivered",
                 topic=msg.topic(),
@@ -46,16 +94,24 @@ class KafkaProducerWrapper:
                 offset=msg.offset(),
             )
 
+    def broker_healthy(self) -> bool:
+        """Whether a delivery has succeeded since the latest failure."""
+        return self._last_delivered > self._last_failed
+
     def publish_metric(self, event: MetricEvent, retries: int = 0) -> bool:
         """Publish a MetricEvent to Kafka with retry logic."""
+        key = event.service.encode("utf-8")
+        value = event.model_dump_json().encode("utf-8")
         try:
             self._producer.produce(
                 topic=self._config.metrics_topic,
-                key=event.service.encode("utf-8"),
-                value=event.model_dump_json().encode("utf-8"),
+                key=key,
+                value=value,
                 on_delivery=self._delivery_callback,
             )
             self._producer.poll(0)
+            if self._recorder is not None:
+                self._recorder.record(self._config.metrics_topic, key, [value])
             logger.debug("Published metric event", service=event.service, latency_ms=event.latency_ms)
             return True
         except KafkaException as e:
@@ -64,32 +120,119 @@ class KafkaProducerWrapper:
                 time.sleep(0.5 * (retries + 1))
                 return self.publish_metric(event, retries + 1)
             else:
-                logger.error("Max retries exceeded, sending to DLQ", error=str(e))
-                self._dlq.append(event)
+                logger.error("Max retries exceeded, spooling", error=str(e))
+                self._spool.append(self._config.metrics_topic, key, value)
                 return False
 
     def publish_log(self, event: LogEvent) -> bool:
         """Publish a LogEvent to Kafka."""
+        key = event.service.encode("utf-8")
+        value = event.model_dump_json().encode("utf-8")
         try:
             self._producer.produce(
                 topic=self._config.logs_topic,
-                key=event.service.encode("utf-8"),
-                value=event.model_dump_json().encode("utf-8"),
+                key=key,
+                value=value,
                 on_delivery=self._delivery_callback,
             )
             self._producer.poll(0)
+            if self._recorder is not None:
+                self._recorder.record(self._config.logs_topic, key, [value])
             return True
         except KafkaException as e:
-            logger.error("Failed to publish log event", error=str(e))
+            logger.error("Failed to publish log event, spooling", error=str(e))
+            self._spool.append(self._config.logs_topic, key, value)
+            return False
+
+    def _produce(self, topic: str, key: Optional[bytes], value: bytes) -> bool:
+        """Produce one pre-encoded value without polling; see `publish_batch`.
+
+        An empty or missing key leaves the partition to librdkafka's sticky partitioner.
+        """
+        retries = 0
+        while True:
+            try:
+                self._producer.produce(
+                    topic=topic, key=key or None, value=value, on_delivery=self._delivery_callback
+                )
+                return True
+            except BufferError:
+                # Local queue full: serve delivery reports until there is room
+                self._producer.poll(0.5)
+            except KafkaException as e:
+                if retries < self._config.producer_retry_max:
+                    retries += 1
+                    logger.warning("Retrying message publish", attempt=retries, error=str(e))
+                    time.sleep(0.5 * retries)
+                    continue
+                logger.error("Max retries exceeded, spooling", topic=topic, error=str(e))
+                self._spool.append(topic, key or b"", value)
+                return False
+
+    def _replay(self, topic: str, key: bytes, value: bytes) -> bool:
+        """Produce a spooled record; False leaves it spooled for the next attempt."""
+        try:
+            self._producer.produce(
+                topic=topic, key=key or None, value=value, on_delivery=self._delivery_callback
+            )
+        except (BufferError, KafkaException):
             return False
+        self._producer.poll(0)
+        return True
+
+    def publish_value(self, topic: str, key: Optional[bytes], value: bytes) -> bool:
+        """Publish a single pre-encoded value, e.g. from `ServiceEncoder`."""
+        if self._recorder is not None:
+            self._recorder.record(topic, key or b"", [value])
+        published = self._produce(topic, key, value)
+        self._producer.poll(0)
+        return published
+
+    def publish_batch(self, topic: str, key: Optional[bytes], values: list[bytes]) -> int:
+        """Publish pre-encoded values to a topic, serving delivery callbacks once per batch.
+
+        Waits for the local queue to drain when it is full. Values that still fail
+        after `producer_retry_max` attempts are spooled. Returns the number of values
+        handed to the producer.
+        """
+        if self._recorder is not None:
+            self._recorder.record(topic, key or b"", values)
+        published = 0
+        for value in values:
+            published += self._produce(topic, key, value)
+        self._producer.poll(0)
+        logger.debug("Published batch", topic=topic, published=published, size=len(values))
+        return published
+
+    def publish_keyed(
+        self, topic: str, keys: list[Optional[bytes]], values: list[bytes]
+    ) -> int:
+        """`publish_batch` with a key per value."""
+        if self._recorder is not None:
+            for key, value in zip(keys, values):
+                self._recorder.record(topic, key or b"", [value])
+        published = 0
+        for key, value in zip(keys, values):
+            published += self._produce(topic, key, value)
+        self._producer.poll(0)
+        return published
 
     def flush(self, timeout: Optional[int] = None) -> None:
         timeout = timeout or self._config.producer_flush_timeout
         self._producer.flush(timeout)
 
     def get_dlq_size(self) -> int:
-        return len(self._dlq)
+        return self._spool.records
 
     def close(self) -> None:
+        self._drainer.stop()
         self.flush()
+        if len(self._producer):
+            # Still undelivered after the flush timeout: purging fails them through
+            # the delivery callback, which spools them for the next run
+            self._producer.purge()
+            self._producer.flush(0)
+        self._spool.close()
+        if self._recorder is not None:
+            self._recorder.close()
         logger.info("Producer closed", dlq_size=self.get_dlq_size())
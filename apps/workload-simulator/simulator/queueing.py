@@ -0,0 +1,175 @@
+"""Load-dependent latency: each service and region is an M/M/c queue.
+
+A service in a region has `c` servers, each serving requests in the mean of
+its normal latency range, so its capacity is `c / service time`. Arrivals are
+the events the generator actually emits there, measured over
+`queue_update_seconds`. From the utilization, Erlang C gives the probability
+that a request waits and the waiting-time distribution (exponential with rate
+`c * mu - lambda`). Requests that would wait longer than `queue_timeout_ms`,
+and the excess beyond capacity when overloaded, fail with a 503 after the
+timeout.
+
+The queue parameters are recomputed once per update interval, so the per-event
+cost is one or two random draws.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from prometheus_client import Gauge
+
+from simulator.config import Config
+
+QUEUE_UTILIZATION = Gauge(
+    "simulator_queue_utilization",
+    "Offered load over capacity of a simulated service in a region",
+    ["service", "region"],
+)
+
+TIMEOUT_STATUS_CODE = 503
+# Utilization the stable part of an overloaded queue is modelled at
+MAX_STABLE_UTILIZATION = 0.99
+
+
+def erlang_c(servers: int, offered: float) -> float:
+    """Probability that an arrival waits in an M/M/c queue with `offered` erlangs."""
+    if offered <= 0:
+        return 0.0
+    if offered >= servers:
+        return 1.0
+    # Erlang B by recurrence, which stays stable for large server counts
+    blocking = 1.0
+    for k in range(1, servers + 1):
+        blocking = offered * blocking / (k + offered * blocking)
+    utilization = offered / servers
+    return blocking / (1 - utilization * (1 - blocking))
+
+
+@dataclass
+class QueueState:
+    """Per-region queue parameters of one service, refreshed every update interval."""
+
+    wait_probability: list[float]
+    drain_rate: list[float]  # per second: servers * mu - lambda
+    shed_probability: list[float]  # overload beyond capacity
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return (
+            np.array(self.wait_probability),
+            np.array(self.drain_rate),
+            np.array(self.shed_probability),
+        )
+
+
+class QueueingModel:
+    """Tracks offered load per service and samples queueing delay for its events."""
+
+    def __init__(self, config: Config) -> None:
+        self._config = config
+        self._regions = config.regions
+        self._timeout = config.queue_timeout_ms / 1000
+        self._interval = config.queue_update_seconds
+        self._base_rates: dict[str, float] = {}
+        self._counts: dict[str, int] = {}
+        self._window_start: dict[str, float] = {}
+        self._states: dict[str, QueueState] = {}
+        self._arrays: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def set_base_rate(self, service: str, rate: float) -> None:
+        """Configured rate of a service, the default capacity is relative to."""
+        self._base_rates[service] = rate
+
+    def capacity(self, service: str) -> float:
+        """Events per second the service handles across all regions."""
+        explicit = self._config.queue_capacity_eps.get(service)
+        if explicit is not None:
+            return explicit
+        base = self._base_rates.get(service, float(self._config.events_per_second))
+        return base * self._config.queue_headroom
+
+    def observe(
+        self,
+        service: str,
+        count: int,
+        now: float,
+        service_time: float,
+        capacity_factors: Optional[list[float]] = None,
+    ) -> None:
+        """Count `count` arrivals; refresh the queue parameters once per interval.
+
+        Events in the first interval of a service see no queueing delay.
+        `service_time` is the mean service time in seconds, `capacity_factors`
+        per-region multipliers on capacity (e.g. from a scenario phase).
+        """
+        start = self._window_start.setdefault(service, now)
+        self._counts[service] = self._counts.get(service, 0) + count
+        elapsed = now - start
+        if elapsed < self._interval:
+            return
+        rate = self._counts[service] / elapsed
+        self._counts[service] = 0
+        self._window_start[service] = now
+        self._update(service, rate, service_time, capacity_factors)
+
+    def _update(
+        self,
+        service: str,
+        rate: float,
+        service_time: float,
+        capacity_factors: Optional[list[float]],
+    ) -> None:
+        regions = len(self._regions)
+        region_rate = rate / regions
+        region_capacity = self.capacity(service) / regions
+        wait, drain, shed = [], [], []
+        for i, region in enumerate(self._regions):
+            factor = capacity_factors[i] if capacity_factors is not None else 1.0
+            servers = max(1, round(region_capacity * factor * service_time))
+            mu = 1 / service_time
+            utilization = region_rate / (servers * mu)
+            QUEUE_UTILIZATION.labels(service, region).set(utilization)
+            # Overloaded: the excess fails, the rest queues as at near-full load
+            served = min(region_rate, MAX_STABLE_UTILIZATION * servers * mu)
+            shed.append(1 - served / region_rate if region_rate > 0 else 0.0)
+            wait.append(erlang_c(servers, served / mu))
+            drain.append(servers * mu - served)
+        state = QueueState(wait, drain, shed)
+        self._states[service] = state
+        self._arrays[service] = state.arrays()
+
+    def sample(self, service: str, region: int, rand: random.Random) -> tuple[float, bool]:
+        """(queueing delay in ms, timed out) for one event."""
+        state = self._states.get(service)
+        if state is None:
+            return 0.0, False
+        if state.shed_probability[region] and rand.random() < state.shed_probability[region]:
+            return self._timeout * 1000, True
+        if rand.random() >= state.wait_probability[region]:
+            return 0.0, False
+        wait = rand.expovariate(state.drain_rate[region])
+        if wait > self._timeout:
+            return self._timeout * 1000, True
+        return wait * 1000, False
+
+    def sample_batch(
+        self, service: str, region_idx: np.ndarray, rng: np.random.Generator
+    ) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """Vectorized `sample` for a batch: (delays in ms, timed out), or None if idle."""
+        arrays = self._arrays.get(service)
+        if arrays is None:
+            return None
+        wait_probability, drain_rate, shed_probability = arrays
+        size = len(region_idx)
+        shed = rng.random(size) < shed_probability[region_idx]
+        waits = rng.random(size) < wait_probability[region_idx]
+        delays = np.where(waits, rng.exponential(1.0, size) / drain_rate[region_idx], 0.0)
+        timed_out = shed | (delays > self._timeout)
+        return np.where(timed_out, self._timeout, delays) * 1000, timed_out
+
+
+def mean_service_time(latency_ms: tuple[float, float]) -> float:
+    """Mean of a normal latency range in seconds, used as the M/M/c service time."""
+    low, high = latency_ms
+    return (low + high) / 2000
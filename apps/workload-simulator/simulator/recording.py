@@ -0,0 +1,151 @@
+"""Recording and replay of produced event streams.
+
+A recording is a file of independently compressed chunks, so it can be written
+while generating and read back in bounded memory:
+
+    magic (8 bytes)
+    chunk*: header (compressed length, record count), zlib-compressed records
+    record: header (seconds since recording start, topic length, key length,
+            value length), topic, key, value
+
+`Recorder` captures what the producer sends; `import_capture` converts a
+`kafka-console-consumer` dump of `metrics.raw` (one JSON value per line,
+optionally `key<TAB>value`) into a recording; `simulator.replay` plays one back.
+
+    python -m simulator.recording import-capture dump.jsonl incident.simrec
+"""
+
+import argparse
+import json
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import BinaryIO, Iterator, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+MAGIC = b"SIMREC1\n"
+CHUNK_HEADER = struct.Struct("<II")
+RECORD_HEADER = struct.Struct("<dHHI")
+# Uncompressed bytes buffered before a chunk is compressed and written
+CHUNK_BYTES = 1024 * 1024
+
+Record = tuple[float, str, bytes, bytes]
+
+
+class Recorder:
+    """Appends produced records to a recording; safe to call from any thread."""
+
+    def __init__(self, path: str, compression_level: int = 1) -> None:
+        self._file: BinaryIO = open(path, "wb")  # noqa: SIM115 - open until close()
+        self._file.write(MAGIC)
+        self._level = compression_level
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._chunk = bytearray()
+        self._count = 0
+        self.records = 0
+
+    def record(
+        self, topic: str, key: bytes, values: list[bytes], offset: Optional[float] = None
+    ) -> None:
+        """Append values produced together; `offset` defaults to the time since opening."""
+        offset = time.monotonic() - self._start if offset is None else offset
+        topic_bytes = topic.encode("utf-8")
+        with self._lock:
+            for value in values:
+                self._chunk += RECORD_HEADER.pack(offset, len(topic_bytes), len(key), len(value))
+                self._chunk += topic_bytes
+                self._chunk += key
+                self._chunk += value
+            self._count += len(values)
+            self.records += len(values)
+            if len(self._chunk) >= CHUNK_BYTES:
+                self._write_chunk()
+
+    def _write_chunk(self) -> None:
+        if not self._count:
+            return
+        compressed = zlib.compress(self._chunk, self._level)
+        self._file.write(CHUNK_HEADER.pack(len(compressed), self._count))
+        self._file.write(compressed)
+        self._chunk = bytearray()
+        self._count = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_chunk()
+            self._file.close()
+        logger.info("Recording closed", records=self.records)
+
+
+def read_chunks(path: str, buffer_bytes: int = 4 * 1024 * 1024) -> Iterator[list[Record]]:
+    """Decoded chunks of a recording, in order."""
+    with open(path, "rb", buffering=buffer_bytes) as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a simulator recording")
+        while header := f.read(CHUNK_HEADER.size):
+            if len(header) < CHUNK_HEADER.size:
+                raise ValueError(f"{path}: truncated chunk header")
+            length, count = CHUNK_HEADER.unpack(header)
+            data = zlib.decompress(f.read(length))
+            records: list[Record] = []
+            pos = 0
+            for _ in range(count):
+                offset, topic_len, key_len, value_len = RECORD_HEADER.unpack_from(data, pos)
+                pos += RECORD_HEADER.size
+                topic = data[pos : pos + topic_len].decode("utf-8")
+                pos += topic_len
+                key = data[pos : pos + key_len]
+                pos += key_len
+                records.append((offset, topic, key, data[pos : pos + value_len]))
+                pos += value_len
+            yield records
+
+
+def read_records(path: str) -> Iterator[Record]:
+    for chunk in read_chunks(path):
+        yield from chunk
+
+
+def import_capture(source: str, destination: str, topic: str = "metrics.raw") -> int:
+    """Convert a console-consumer dump into a recording, timed by the events' timestamps.
+
+    Keys default to the event's `service`. Returns the number of records written.
+    """
+    recorder = Recorder(destination, compression_level=6)
+    first: Optional[float] = None
+    with open(source, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            key: Optional[bytes] = None
+            if not line.startswith(b"{") and b"\t" in line:
+                key, line = line.split(b"\t", 1)
+            event = json.loads(line)
+            at = datetime.fromisoformat(event["timestamp"]).timestamp()
+            first = at if first is None else first
+            recorder.record(topic, key or event["service"].encode("utf-8"), [line], at - first)
+    recorder.close()
+    return recorder.records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulator recordings")
+    commands = parser.add_subparsers(dest="command", required=True)
+    capture = commands.add_parser("import-capture", help="Convert a metrics.raw dump")
+    capture.add_argument("source", help="kafka-console-consumer output, one JSON value per line")
+    capture.add_argument("destination")
+    capture.add_argument("--topic", default="metrics.raw")
+    args = parser.parse_args()
+    count = import_capture(args.source, args.destination, args.topic)
+    print(f"Wrote {count} records to {args.destination}")
+
+
+if __name__ == "__main__":
+    main()
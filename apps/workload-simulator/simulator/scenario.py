@@ -0,0 +1,276 @@
+"""Time-scripted traffic scenarios for the simulator.
+
+A scenario is a YAML list of phases, each active for `duration_seconds`:
+
+    name: checkout-incident
+    loop: false
+    phases:
+      - name: baseline
+        duration_seconds: 300
+      - name: ramp-up
+        duration_seconds: 120
+        rate: [{multiplier: 1.0, ramp_to: 5.0}]
+      - name: business-day
+        duration_seconds: 3600
+        rate: [{diurnal_amplitude: 0.5, diurnal_period_seconds: 3600}]
+      - name: payment-latency-eu
+        duration_seconds: 300
+        latency: [{services: [payment-service], regions: [eu-west-1], multiplier: 4}]
+      - name: api-error-burst
+        duration_seconds: 60
+        errors: [{services: [api-service], rate: 0.3}]
+      - name: auth-outage
+        duration_seconds: 60
+        rate: [{services: [auth-service], multiplier: 0}]
+      - name: lose-half-of-eu
+        duration_seconds: 300
+        capacity: [{regions: [eu-west-1], multiplier: 0.5}]
+
+Capacity effects scale the queueing latency model's capacity (LATENCY_MODEL=
+queueing). Effects without `services`/`regions` apply to all of them. Multiple matching
+effects multiply (rate, latency) or the last one wins (error rate). After the
+last phase the scenario loops or falls back to the plain configuration.
+
+The file is re-read when it changes, restarting the new scenario from its first
+phase, so scenarios switch without restarting the simulator.
+"""
+
+import math
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import structlog
+import yaml
+from prometheus_client import Gauge
+from pydantic import BaseModel, Field, ValidationError
+
+logger = structlog.get_logger(__name__)
+
+SCENARIO_PHASE = Gauge(
+    "simulator_scenario_phase_info",
+    "1 for the scenario phase currently being injected",
+    ["scenario", "phase"],
+)
+
+SCENARIO_PHASE_STARTED = Gauge(
+    "simulator_scenario_phase_start_timestamp_seconds",
+    "Wall-clock time the current scenario phase started",
+    ["scenario", "phase"],
+)
+
+
+class Selector(BaseModel):
+    services: list[str] = Field(default_factory=list)
+    regions: list[str] = Field(default_factory=list)
+
+    def matches(self, service: str, region: Optional[str] = None) -> bool:
+        if self.services and service not in self.services:
+            return False
+        return region is None or not self.regions or region in self.regions
+
+
+class RateEffect(Selector):
+    """Scales the event rate; per service only, so `regions` is ignored."""
+
+    multiplier: float = 1.0
+    # Ramp linearly from `multiplier` to this over the phase
+    ramp_to: Optional[float] = None
+    # multiplier * (1 + amplitude * sin(2 pi t / period)), t from the phase start
+    diurnal_amplitude: float = 0.0
+    diurnal_period_seconds: float = 86400.0
+
+    def at(self, elapsed: float, duration: float) -> float:
+        value = self.multiplier
+        if self.ramp_to is not None and duration > 0:
+            value += (self.ramp_to - self.multiplier) * min(1.0, elapsed / duration)
+        if self.diurnal_amplitude:
+            value *= 1 + self.diurnal_amplitude * math.sin(
+                2 * math.pi * elapsed / self.diurnal_period_seconds
+            )
+        return max(0.0, value)
+
+
+class LatencyEffect(Selector):
+    multiplier: float = 1.0
+    add_ms: float = 0.0
+
+
+class ErrorEffect(Selector):
+    rate: float
+
+
+class CapacityEffect(Selector):
+    multiplier: float = Field(gt=0)
+
+
+class Phase(BaseModel):
+    name: str
+    duration_seconds: float = Field(gt=0)
+    rate: list[RateEffect] = Field(default_factory=list)
+    latency: list[LatencyEffect] = Field(default_factory=list)
+    errors: list[ErrorEffect] = Field(default_factory=list)
+    capacity: list[CapacityEffect] = Field(default_factory=list)
+
+
+class Scenario(BaseModel):
+    name: str
+    loop: bool = False
+    phases: list[Phase]
+
+
+def load_scenario(path: str) -> Scenario:
+    with open(path) as f:
+        return Scenario.model_validate(yaml.safe_load(f))
+
+
+class ActivePhase:
+    """A phase being injected, with its effects resolved per service and region index."""
+
+    def __init__(
+        self, scenario: Scenario, index: int, started: float, regions: list[str]
+    ) -> None:
+        self.scenario = scenario
+        self.index = index
+        self.phase = scenario.phases[index]
+        self.started = started
+        self.ends = started + self.phase.duration_seconds
+        self._regions = regions
+        self._latency: dict[str, Optional[tuple[list[float], list[float]]]] = {}
+        self._errors: dict[str, Optional[list[Optional[float]]]] = {}
+        self._capacity: dict[str, Optional[list[float]]] = {}
+
+    def rate_multiplier(self, service: str, now: float) -> float:
+        multiplier = 1.0
+        for effect in self.phase.rate:
+            if effect.matches(service):
+                multiplier *= effect.at(now - self.started, self.phase.duration_seconds)
+        return multiplier
+
+    def latency(self, service: str) -> Optional[tuple[list[float], list[float]]]:
+        """(multiplier, added ms) per region index, or None when latency is untouched."""
+        if service not in self._latency:
+            factors = [1.0] * len(self._regions)
+            added = [0.0] * len(self._regions)
+            for effect in self.phase.latency:
+                for i, region in enumerate(self._regions):
+                    if effect.matches(service, region):
+                        factors[i] *= effect.multiplier
+                        added[i] += effect.add_ms
+            touched = any(f != 1.0 for f in factors) or any(added)
+            self._latency[service] = (factors, added) if touched else None
+        return self._latency[service]
+
+    def error_rates(self, service: str) -> Optional[list[Optional[float]]]:
+        """Overridden error rate per region index (None keeps the configured rate)."""
+        if service not in self._errors:
+            rates: list[Optional[float]] = [None] * len(self._regions)
+            for effect in self.phase.errors:
+                for i, region in enumerate(self._regions):
+                    if effect.matches(service, region):
+                        rates[i] = effect.rate
+            self._errors[service] = rates if any(r is not None for r in rates) else None
+        return self._errors[service]
+
+    def capacity(self, service: str) -> Optional[list[float]]:
+        """Capacity multiplier per region index, or None when capacity is untouched."""
+        if service not in self._capacity:
+            factors = [1.0] * len(self._regions)
+            for effect in self.phase.capacity:
+                for i, region in enumerate(self._regions):
+                    if effect.matches(service, region):
+                        factors[i] *= effect.multiplier
+            self._capacity[service] = factors if any(f != 1.0 for f in factors) else None
+        return self._capacity[service]
+
+
+class ScenarioEngine:
+    """Tracks the active phase of the scenario in `path`, reloading it when it changes.
+
+    `current()` is cheap while a phase runs; phase changes and file checks take
+    a lock, so any number of generator threads can share one engine.
+    """
+
+    def __init__(self, path: str, regions: list[str], poll_seconds: float = 5.0) -> None:
+        self._path = path
+        self._regions = regions
+        self._poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._next_poll = 0.0
+        self._scenario: Optional[Scenario] = None
+        self._active: Optional[ActivePhase] = None
+        self._ends = math.inf
+
+    def current(self, now: Optional[float] = None) -> Optional[ActivePhase]:
+        """The phase in effect at `now` (monotonic), or None to use the plain config."""
+        now = time.monotonic() if now is None else now
+        if now >= self._next_poll or now >= self._ends:
+            with self._lock:
+                self._update(now)
+        return self._active
+
+    def _update(self, now: float) -> None:
+        if now >= self._next_poll:
+            self._next_poll = now + self._poll_seconds
+            self._maybe_reload(now)
+        active = self._active
+        while active is not None and now >= active.ends:
+            scenario, index = active.scenario, active.index + 1
+            if index == len(scenario.phases):
+                if not scenario.loop:
+                    self._set_active(None)
+                    logger.info("Scenario finished", scenario=scenario.name)
+                    return
+                index = 0
+            # Chain from the previous end so phases don't drift with tick timing
+            active = ActivePhase(scenario, index, active.ends, self._regions)
+            self._set_active(active)
+
+    def _maybe_reload(self, now: float) -> None:
+        try:
+            mtime = os.stat(self._path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        if mtime is None:
+            # An empty ConfigMap mounts no file; that just means no scenario is set
+            logger.info("No scenario file; using the plain configuration", path=self._path)
+            self._scenario = None
+            self._set_active(None)
+            return
+        try:
+            scenario = load_scenario(self._path)
+        except (OSError, yaml.YAMLError, ValidationError) as e:
+            logger.error(
+                "Invalid scenario file; keeping the current one", path=self._path, error=str(e)
+            )
+            return
+        self._scenario = scenario
+        logger.info("Loaded scenario", scenario=scenario.name, phases=len(scenario.phases))
+        self._set_active(ActivePhase(scenario, 0, now, self._regions) if scenario.phases else None)
+
+    def _set_active(self, active: Optional[ActivePhase]) -> None:
+        previous = self._active
+        if previous is not None:
+            SCENARIO_PHASE.labels(previous.scenario.name, previous.phase.name).set(0)
+        self._active = active
+        self._ends = math.inf if active is None else active.ends
+        if active is None:
+            return
+        # Wall-clock start, so detection times can be compared with the injection
+        started_at = time.time() - (time.monotonic() - active.started)
+        SCENARIO_PHASE.labels(active.scenario.name, active.phase.name).set(1)
+        SCENARIO_PHASE_STARTED.labels(active.scenario.name, active.phase.name).set(started_at)
+        logger.info(
+            "Scenario phase started",
+            scenario=active.scenario.name,
+            phase=active.phase.name,
+            index=active.index,
+            duration_seconds=active.phase.duration_seconds,
+            started_at=datetime.fromtimestamp(started_at, timezone.utc).isoformat(),
+        )
@@ -0,0 +1,357 @@
+"""Disk-backed dead-letter spool for records the producer could not deliver.
+
+Records are appended to numbered segment files in `directory`; the active
+segment is fsynced at most once per `fsync_interval` seconds, so a broker
+outage costs one fsync per interval rather than one per record. Sealed
+segments are read back through `mmap` in append order and deleted once
+replayed; a small checkpoint file remembers how far into the oldest segment
+replay got, so a restart resumes there (replay is at-least-once). When the
+spool outgrows `max_bytes` the oldest sealed segment is dropped.
+
+Record layout: header (crc32 of the payload, topic length, key length, value
+length), then topic, key and value. A torn or corrupt record ends its segment.
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Iterator, Optional
+
+import structlog
+from prometheus_client import Counter, Gauge
+
+from simulator.pacing import Pacer
+
+logger = structlog.get_logger(__name__)
+
+SPOOL_RECORDS = Gauge(
+    "simulator_dead_letter_records",
+    "Undelivered records waiting in the dead-letter spool",
+)
+
+SPOOL_BYTES = Gauge(
+    "simulator_dead_letter_bytes",
+    "Size of the dead-letter spool segments on disk",
+)
+
+SPOOLED = Counter(
+    "simulator_dead_letter_spooled_total",
+    "Records written to the dead-letter spool",
+    ["topic"],
+)
+
+REPLAYED = Counter(
+    "simulator_dead_letter_replayed_total",
+    "Spooled records handed back to the producer",
+    ["topic"],
+)
+
+DROPPED = Counter(
+    "simulator_dead_letter_dropped_total",
+    "Spooled records discarded because the spool reached its size limit",
+)
+
+HEADER = struct.Struct("<IHHI")
+SEGMENT_SUFFIX = ".seg"
+CHECKPOINT = "replay.offset"
+
+Record = tuple[str, bytes, bytes]
+
+
+def _segment_name(seq: int) -> str:
+    return f"{seq:012d}{SEGMENT_SUFFIX}"
+
+
+def iter_records(buffer: "mmap.mmap | bytes", start: int = 0) -> Iterator[tuple[Record, int]]:
+    """(record, offset after it) for each intact record from `start`."""
+    offset = start
+    while offset + HEADER.size <= len(buffer):
+        crc, topic_len, key_len, value_len = HEADER.unpack_from(buffer, offset)
+        begin = offset + HEADER.size
+        end = begin + topic_len + key_len + value_len
+        if end > len(buffer) or zlib.crc32(buffer[begin:end]) != crc:
+            return
+        topic = bytes(buffer[begin : begin + topic_len]).decode("utf-8")
+        key = bytes(buffer[begin + topic_len : begin + topic_len + key_len])
+        yield (topic, key, bytes(buffer[begin + topic_len + key_len : end])), end
+        offset = end
+
+
+class DeadLetterSpool:
+    """Append-only segment files of undelivered records, replayed oldest first.
+
+    `append` may be called from any thread (including producer callbacks);
+    `replay` is meant for a single drainer thread.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = 16 * 1024 * 1024,
+        max_bytes: int = 256 * 1024 * 1024,
+        fsync_interval: float = 0.2,
+    ) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self._dir = directory
+        self._segment_bytes = segment_bytes
+        self._max_bytes = max_bytes
+        self._fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        # Sealed and active segments: seq -> [records left, bytes]
+        self._segments: dict[int, list[int]] = {}
+        # Totals over `_segments`, kept in step under the lock so they can be read without it
+        self._records = 0
+        self._bytes = 0
+        self._read_seq: Optional[int] = None
+        self._read_map: Optional[mmap.mmap] = None
+        self._read_pos = 0
+        self._recover()
+        self._active_seq = max(self._segments, default=0) + 1
+        self._active = open(self._path(self._active_seq), "ab")  # noqa: SIM115 - open across appends
+        self._segments[self._active_seq] = [0, 0]
+        self._last_sync = time.monotonic()
+        self._dirty = False
+        self._publish_size()
+        if self.records:
+            logger.info("Recovered dead-letter spool", records=self.records, bytes=self.size)
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self._dir, _segment_name(seq))
+
+    def _recover(self) -> None:
+        checkpoint = self._read_checkpoint()
+        for name in sorted(os.listdir(self._dir)):
+            if not name.endswith(SEGMENT_SUFFIX):
+                continue
+            seq = int(name[: -len(SEGMENT_SUFFIX)])
+            with open(self._path(seq), "rb") as f:
+                data = f.read()
+            start = checkpoint[1] if checkpoint and checkpoint[0] == seq else 0
+            count = sum(1 for _ in iter_records(data, start))
+            if count:
+                self._segments[seq] = [count, len(data)]
+                self._records += count
+                self._bytes += len(data)
+            else:
+                os.remove(self._path(seq))
+
+    def _read_checkpoint(self) -> Optional[tuple[int, int]]:
+        try:
+            with open(os.path.join(self._dir, CHECKPOINT)) as f:
+                seq, offset = f.read().split()
+            return int(seq), int(offset)
+        except (OSError, ValueError):
+            return None
+
+    def _write_checkpoint(self, seq: int, offset: int) -> None:
+        path = os.path.join(self._dir, CHECKPOINT)
+        with open(path + ".tmp", "w") as f:
+            f.write(f"{seq} {offset}")
+        os.replace(path + ".tmp", path)
+
+    @property
+    def records(self) -> int:
+        return self._records
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def _publish_size(self) -> None:
+        SPOOL_RECORDS.set(self.records)
+        SPOOL_BYTES.set(self.size)
+
+    def append(self, topic: str, key: bytes, value: bytes) -> None:
+        topic_bytes = topic.encode("utf-8")
+        payload = topic_bytes + key + value
+        record = HEADER.pack(zlib.crc32(payload), len(topic_bytes), len(key), len(value))
+        with self._lock:
+            self._active.write(record + payload)
+            self._dirty = True
+            active = self._segments[self._active_seq]
+            active[0] += 1
+            active[1] += len(record) + len(payload)
+            self._records += 1
+            self._bytes += len(record) + len(payload)
+            now = time.monotonic()
+            if active[1] >= self._segment_bytes:
+                self._roll()
+            elif now - self._last_sync >= self._fsync_interval:
+                self._sync(now)
+            self._enforce_limit()
+            self._publish_size()
+        SPOOLED.labels(topic).inc()
+
+    def _sync(self, now: float) -> None:
+        if self._dirty:
+            self._active.flush()
+            os.fsync(self._active.fileno())
+            self._dirty = False
+        self._last_sync = now
+
+    def _roll(self) -> None:
+        """Seal the active segment and start a new one. Caller holds the lock."""
+        self._sync(time.monotonic())
+        self._active.close()
+        if not self._segments[self._active_seq][0]:
+            del self._segments[self._active_seq]
+            os.remove(self._path(self._active_seq))
+        self._active_seq += 1
+        self._active = open(self._path(self._active_seq), "ab")  # noqa: SIM115 - open across appends
+        self._segments[self._active_seq] = [0, 0]
+
+    def _enforce_limit(self) -> None:
+        while self.size > self._max_bytes:
+            sealed = [
+                seq for seq in self._segments if seq not in (self._active_seq, self._read_seq)
+            ]
+            if not sealed:
+                return
+            oldest = min(sealed)
+            count, size = self._segments.pop(oldest)
+            self._records -= count
+            self._bytes -= size
+            os.remove(self._path(oldest))
+            DROPPED.inc(count)
+            logger.warning(
+                "Dead-letter spool full; dropped oldest segment", records=count, bytes=size
+            )
+
+    def flush(self) -> None:
+        with self._lock:
+            self._sync(time.monotonic())
+
+    def _open_next(self) -> bool:
+        """Map the oldest sealed segment for reading; seals the active one if it's all there is."""
+        with self._lock:
+            sealed = [seq for seq in self._segments if seq != self._active_seq]
+            if not sealed:
+                if not self._segments[self._active_seq][0]:
+                    return False
+                self._roll()
+                sealed = [seq for seq in self._segments if seq != self._active_seq]
+            self._read_seq = min(sealed)
+        checkpoint = self._read_checkpoint()
+        self._read_pos = checkpoint[1] if checkpoint and checkpoint[0] == self._read_seq else 0
+        with open(self._path(self._read_seq), "rb") as f:
+            self._read_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return True
+
+    def _close_read(self, finished: bool) -> None:
+        if self._read_map is not None:
+            self._read_map.close()
+        self._read_map = None
+        with self._lock:
+            # Released and dropped together, so `_enforce_limit` can't remove it in between
+            seq, self._read_seq = self._read_seq, None
+            if finished and seq is not None:
+                entry = self._segments.pop(seq, None)
+                if entry is not None:
+                    self._records -= entry[0]
+                    self._bytes -= entry[1]
+                    try:
+                        os.remove(self._path(seq))
+                    except FileNotFoundError:
+                        pass
+                self._publish_size()
+        if finished and seq is not None:
+            try:
+                os.remove(os.path.join(self._dir, CHECKPOINT))
+            except OSError:
+                pass
+
+    def replay(self, limit: int, publish: Callable[[str, bytes, bytes], bool]) -> int:
+        """Hand up to `limit` spooled records to `publish`, oldest first.
+
+        Stops early when `publish` returns False; that record stays spooled.
+        Returns the number of records published.
+        """
+        published = 0
+        while published < limit:
+            if self._read_map is None and not self._open_next():
+                break
+            assert self._read_map is not None and self._read_seq is not None
+            finished = True
+            for (topic, key, value), end in iter_records(self._read_map, self._read_pos):
+                if published >= limit or not publish(topic, key, value):
+                    finished = False
+                    break
+                REPLAYED.labels(topic).inc()
+                published += 1
+                self._read_pos = end
+                with self._lock:
+                    self._segments[self._read_seq][0] -= 1
+                    self._records -= 1
+            if not finished:
+                self._write_checkpoint(self._read_seq, self._read_pos)
+                break
+            self._close_read(finished=True)
+        with self._lock:
+            self._publish_size()
+        return published
+
+    def close(self) -> None:
+        if self._read_seq is not None:
+            self._write_checkpoint(self._read_seq, self._read_pos)
+            self._close_read(finished=False)
+        with self._lock:
+            self._sync(time.monotonic())
+            self._active.close()
+            if not self._segments[self._active_seq][0]:
+                del self._segments[self._active_seq]
+                os.remove(self._path(self._active_seq))
+
+
+class SpoolDrainer:
+    """Background thread replaying the spool at no more than `rate` records per second.
+
+    Replay only runs while `healthy()` says the broker is accepting records, so
+    a recovering broker sees a steady trickle instead of the whole backlog at once.
+    """
+
+    def __init__(
+        self,
+        spool: DeadLetterSpool,
+        publish: Callable[[str, bytes, bytes], bool],
+        healthy: Callable[[], bool],
+        rate: float,
+        tick_seconds: float = 0.1,
+    ) -> None:
+        self._spool = spool
+        self._publish = publish
+        self._healthy = healthy
+        self._pacer = Pacer(rate, tick_seconds=tick_seconds)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="dead-letter-drainer", daemon=True
+        )
+        self.replayed = 0
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        replaying = False
+        while not self._stop.is_set():
+            now = time.monotonic()
+            due = self._pacer.take(now)
+            if due and self._healthy() and self._spool.records:
+                if not replaying:
+                    logger.info("Replaying dead-letter spool", records=self._spool.records)
+                    replaying = True
+                try:
+                    self.replayed += self._spool.replay(due, self._publish)
+                except Exception as e:
+                    logger.exception("Dead-letter replay failed", error=str(e))
+                if not self._spool.records:
+                    logger.info("Dead-letter spool drained", replayed=self.replayed)
+                    replaying = False
+            self._stop.wait(self._pacer.sleep_time(time.monotonic()))
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
@@ -0,0 +1,147 @@
+import heapq
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import structlog
+
+from simulator.config import Config, VirtualServiceTemplate
+from simulator.metrics import (
+    DEFAULT_ENDPOINTS,
+    DEFAULT_LATENCY_MS,
+    ENDPOINTS,
+    NORMAL_LATENCY_MS,
+    MetricsGenerator,
+)
+from simulator.pacing import Pacer, RateMeter
+
+logger = structlog.get_logger(__name__)
+
+# RateMeter label for the scheduler's combined rate
+SCHEDULER_METER = "all-services"
+
+
+@dataclass(frozen=True)
+class VirtualService:
+    """A simulated service driven by the scheduler, with its own rate and profile."""
+
+    name: str
+    rate: float
+    endpoints: tuple[str, ...]
+    latency_ms: tuple[float, float]
+
+
+def expand_template(template: VirtualServiceTemplate) -> list[VirtualService]:
+    """Generate the services described by a template, deterministically from its seed."""
+    rng = random.Random(template.seed)
+    log_min, log_max = math.log(template.rate_min), math.log(template.rate_max)
+    services = []
+    for index in range(template.count):
+        low = rng.uniform(template.latency_low_ms_min, template.latency_low_ms_max)
+        endpoints = rng.randint(template.endpoints_min, template.endpoints_max)
+        services.append(VirtualService(
+            name=template.name_format.format(index=index),
+            rate=math.exp(rng.uniform(log_min, log_max)),
+            endpoints=tuple(f"/v1/resource-{j}" for j in range(endpoints)),
+            latency_ms=(round(low, 1), round(low * template.latency_spread, 1)),
+        ))
+    return services
+
+
+def configured_services(config: Config) -> list[VirtualService]:
+    """`config.services` at `events_per_second` each, followed by any virtual services."""
+    services = [
+        VirtualService(
+            name=name,
+            rate=config.events_per_second,
+            endpoints=tuple(ENDPOINTS.get(name, DEFAULT_ENDPOINTS)),
+            latency_ms=NORMAL_LATENCY_MS.get(name, DEFAULT_LATENCY_MS),
+        )
+        for name in config.services
+    ]
+    if config.virtual_services is not None:
+        services.extend(expand_template(config.virtual_services))
+    return services
+
+
+class ServiceScheduler:
+    """Drives any number of services from a single thread with a timer heap.
+
+    Every service has its own `Pacer`, and slow services tick only as often as
+    their rate requires, so they cost nothing between deadlines. First deadlines
+    are staggered over one tick so services don't all fire together.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        generator: MetricsGenerator,
+        services: Optional[list[VirtualService]] = None,
+        rng: Optional[np.random.Generator] = None,
+    ) -> None:
+        """Schedules `services` (default: `configured_services(config)`); `rng` drives
+        arrival draws and the start stagger."""
+        self._config = config
+        self._generator = generator
+        self._rng = rng if rng is not None else np.random.default_rng()
+        self.services = configured_services(config) if services is None else services
+        # Events generated so far and current total target rate; read by the worker pool
+        self.generated = 0
+        self.target = sum(service.rate for service in self.services)
+        for service in self.services:
+            generator.add_service(
+                service.name, list(service.endpoints), service.latency_ms, service.rate
+            )
+
+    def run(self, stop_event: threading.Event) -> None:
+        pacers = [
+            Pacer.from_config(self._config, rng=self._rng, rate=service.rate)
+            for service in self.services
+        ]
+        start = time.monotonic()
+        meter = RateMeter(
+            SCHEDULER_METER, self.target, self._config.rate_report_interval_seconds, start
+        )
+        scenario = self._generator.scenario is not None
+        heap = [
+            (start + self._rng.uniform(0, pacer.tick_seconds), index)
+            for index, pacer in enumerate(pacers)
+        ]
+        heapq.heapify(heap)
+        logger.info(
+            "Starting service scheduler",
+            services=len(self.services),
+            target_eps=round(meter.target, 1),
+            arrival_process=self._config.arrival_process,
+        )
+
+        while heap and not stop_event.is_set():
+            now = time.monotonic()
+            emitted = 0
+            while heap[0][0] <= now:
+                _, index = heap[0]
+                pacer, service = pacers[index], self.services[index]
+                if scenario:
+                    rate = service.rate * self._generator.rate_multiplier(service.name, now)
+                    self.target += rate - pacer.rate
+                    pacer.rate = rate
+                due = pacer.take(now)
+                try:
+                    emitted += self._generator.emit(service.name, due)
+                except Exception as e:
+                    logger.exception(
+                        "Unexpected error generating event", service=service.name, error=str(e)
+                    )
+                heapq.heapreplace(heap, (now + pacer.sleep_time(now), index))
+            now = time.monotonic()
+            self.generated += emitted
+            if scenario:
+                meter.set_target(self.target)
+            meter.record(emitted, now)
+            stop_event.wait(timeout=max(0.0, heap[0][0] - now))
+
+        logger.info("Service scheduler stopped")
@@ -0,0 +1,172 @@
+import math
+from typing import Any
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from simulator.aggregate import ZERO_BIN, ServiceAggregator, SketchMapping
+from simulator.config import Config
+from simulator.metrics import MetricsGenerator
+from simulator.models import MetricAggregate
+
+ENDPOINTS = ["/a", "/b"]
+REGIONS = ["us-east-1", "eu-west-1"]
+
+
+def _aggregator(interval: float = 10.0) -> ServiceAggregator:
+    return ServiceAggregator("api-service", ENDPOINTS, REGIONS, interval, SketchMapping(0.01))
+
+
+def _summary(records: list[MetricAggregate]) -> dict[tuple[str, str], Any]:
+    return {
+        (r.endpoint, r.region): (
+            r.count,
+            r.error_count,
+            r.status_codes,
+            round(r.latency_sum_ms, 6),
+            r.latency_sketch.bins,
+        )
+        for r in records
+    }
+
+
+def _aggregates(producer: MagicMock) -> list[MetricAggregate]:
+    return [
+        MetricAggregate.model_validate_json(value)
+        for c in producer.publish_batch.call_args_list
+        if c.args[0] == "metrics.raw"
+        for value in c.args[2]
+    ]
+
+
+class TestSketchMapping:
+    def test_relative_accuracy(self):
+        mapping = SketchMapping(0.01)
+        gamma = 1.01 / 0.99
+        for value in (0.5, 12.3, 150.0, 9999.0):
+            index = mapping.index(value)
+            assert gamma ** (index - 1) < value <= gamma ** index
+            representative = 2 * gamma ** index / (gamma + 1)
+            assert abs(representative - value) / value <= 0.01
+
+    def test_indices_match_index(self):
+        mapping = SketchMapping(0.02)
+        values = np.array([0.0, 0.0005, 1.0, 37.5, 420.0])
+        assert mapping.indices(values).tolist() == [mapping.index(v) for v in values]
+        assert mapping.index(0.0) == ZERO_BIN
+
+    def test_rejects_bad_accuracy(self):
+        with pytest.raises(ValueError):
+            SketchMapping(1.0)
+
+
+class TestServiceAggregator:
+    def test_add(self):
+        aggregator = _aggregator()
+        aggregator.add(0, 1, 100.0, 200, False)
+        aggregator.add(0, 1, 100.5, 503, True)
+        aggregator.add(1, 0, 20.0, 200, False)
+        records = aggregator.drain()
+        assert [(r.endpoint, r.region) for r in records] == [
+            ("/a", "eu-west-1"),
+            ("/b", "us-east-1"),
+        ]
+        first = records[0]
+        assert (first.count, first.error_count) == (2, 1)
+        assert first.status_codes == {200: 1, 503: 1}
+        assert first.latency_sum_ms == 200.5
+        assert sum(first.latency_sketch.bins.values()) == 2
+        assert aggregator.drain() == []
+
+    def test_batch_matches_per_event(self):
+        rng = np.random.default_rng(0)
+        size = 2000
+        endpoints = rng.integers(2, size=size)
+        regions = rng.integers(2, size=size)
+        latencies = np.round(rng.uniform(1, 500, size), 2)
+        codes = rng.choice([200, 201, 500, 503], size)
+        errors = codes >= 500
+        single, batched = _aggregator(), _aggregator()
+        for endpoint, region, latency, code, error in zip(
+            endpoints.tolist(),
+            regions.tolist(),
+            latencies.tolist(),
+            codes.tolist(),
+            errors.tolist(),
+        ):
+            single.add(endpoint, region, latency, code, error)
+        batched.add_batch(endpoints, regions, latencies, codes, errors)
+        assert _summary(batched.drain()) == _summary(single.drain())
+
+    def test_interval(self):
+        aggregator = _aggregator(interval=5.0)
+        start = aggregator.drain(now=100.0)
+        assert start == []
+        assert not aggregator.due(104.0)
+        assert aggregator.due(105.0)
+        aggregator.add(0, 0, 10.0, 200, False)
+        (record,) = aggregator.drain(now=105.0)
+        assert record.interval_seconds == 5.0
+
+
+class TestAggregateGeneration:
+    @pytest.mark.parametrize("batch_size", [1, 50])
+    def test_aggregates_replace_events(self, batch_size):
+        config = Config(
+            metrics_format="aggregates",
+            error_rate=0.1,
+            generation_batch_size=batch_size,
+            aggregate_interval_seconds=3600,
+            seed=3,
+        )
+        producer = MagicMock()
+        generator = MetricsGenerator(config, producer)
+        generator.emit("api-service", 500)
+        assert not [
+            c for c in producer.publish_value.call_args_list if c.args[0] == "metrics.raw"
+        ]
+        assert _aggregates(producer) == []
+
+        generator.flush_aggregates()
+        records = _aggregates(producer)
+        assert sum(r.count for r in records) == 500
+        errors = sum(r.error_count for r in records)
+        logs = [
+            c for c in producer.publish_value.call_args_list if c.args[0] == "logs.raw"
+        ] + [
+            value
+            for c in producer.publish_batch.call_args_list
+            if c.args[0] == "logs.raw"
+            for value in c.args[2]
+        ]
+        assert errors == len(logs) > 0
+        for record in records:
+            assert record.service == "api-service"
+            assert sum(record.latency_sketch.bins.values()) == record.count
+            assert sum(record.status_codes.values()) == record.count
+            mean = record.latency_sum_ms / record.count
+            assert 50 <= mean <= 1500
+
+    def test_same_draws_as_events(self):
+        """Aggregating must not change the seeded request stream."""
+        base: dict[str, Any] = {"generation_batch_size": 50, "seed": 9, "error_rate": 0.2}
+        events = MetricsGenerator(Config(**base), MagicMock())
+        draws = [events._draw_batch("api-service", 50, None) for _ in range(4)]
+        latencies, codes, errors = (np.concatenate([d[i] for d in draws]) for i in (0, 1, 4))
+        producer = MagicMock()
+        aggregates = MetricsGenerator(Config(**base, metrics_format="aggregates"), producer)
+        aggregates.emit("api-service", 200)
+        aggregates.flush_aggregates()
+        records = _aggregates(producer)
+        assert sum(r.error_count for r in records) == int(errors.sum())
+        assert math.isclose(
+            sum(r.latency_sum_ms for r in records), float(latencies.sum()), rel_tol=1e-9
+        )
+        assert sum(r.status_codes.get(503, 0) for r in records) == int((codes == 503).sum())
+
+    def test_due_interval_publishes(self):
+        config = Config(metrics_format="aggregates", aggregate_interval_seconds=0)
+        producer = MagicMock()
+        MetricsGenerator(config, producer).emit("auth-service", 10)
+        assert sum(r.count for r in _aggregates(producer)) == 10
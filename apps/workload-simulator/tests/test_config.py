@@ -1,3 +1,6 @@
+import pytest
+from pydantic import ValidationError
+
 from simulator.config import Config
 
 
@@ -14,6 +17,22 @@ class TestConfig:
         assert len(config.regions) == 3
         assert config.producer_retry_max == 3
         assert config.producer_flush_timeout == 10
+        assert config.producer_profile == "balanced"
+        assert config.producer_stats_interval_ms == 0
+        assert config.generation_batch_size == 1
+        assert config.metrics_format == "events"
+        assert config.arrival_process == "constant"
+        assert config.metrics_port == 0
+        assert config.scheduler_mode is False
+        assert config.virtual_services is None
+        assert config.worker_processes == 0
+        assert config.seed is None
+        assert config.scenario_file == ""
+        assert config.record_file == ""
+        assert config.replay_file == ""
+        assert config.replay_speed == 1.0
+        assert config.latency_model == "fixed"
+        assert config.queue_capacity_eps == {}
 
     def test_env_override(self, monkeypatch):
         monkeypatch.setenv("KAFKA_BROKERS", "localhost:9093")
@@ -23,3 +42,15 @@ class TestConfig:
         assert config.kafka_brokers == "localhost:9093"
         assert config.events_per_second == 50
         assert config.error_rate == 0.1
+
+    def test_rejects_unknown_arrival_process(self, monkeypatch):
+        monkeypatch.setenv("ARRIVAL_PROCESS", "uniform")
+        with pytest.raises(ValidationError):
+            Config()
+
+    def test_virtual_services_from_json_env(self, monkeypatch):
+        monkeypatch.setenv("VIRTUAL_SERVICES", '{"count": 250, "rate_max": 5}')
+        template = Config().virtual_services
+        assert template is not None
+        assert template.count == 250
+        assert template.rate_max == 5
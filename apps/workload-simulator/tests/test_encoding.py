@@ -0,0 +1,102 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from simulator.encoding import CachedTimestamp, RequestIds, ServiceEncoder
+from simulator.models import LogEvent, MetricEvent
+
+
+@pytest.fixture
+def encoder():
+    return ServiceEncoder(
+        "api-service", ["/api/v1/users", "/health"], ["us-east-1", "eu-west-1"], validate=True
+    )
+
+
+class TestServiceEncoder:
+    def test_metric_matches_model(self, encoder):
+        timestamp = datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+        value = encoder.encode_metric(
+            timestamp.isoformat(), 123.45, 503, 1, 0, True, "req-1"
+        )
+        expected = MetricEvent(
+            service="api-service",
+            timestamp=timestamp,
+            latency_ms=123.45,
+            status_code=503,
+            endpoint="/health",
+            region="us-east-1",
+            error=True,
+            request_id="req-1",
+        )
+        assert value == expected.model_dump_json().encode()
+
+    def test_sample_weight_matches_model(self, encoder):
+        value = encoder.encode_metric(
+            "2026-01-01T00:00:00+00:00", 10.5, 200, 0, 1, False, "id", sample_weight=10
+        )
+        assert MetricEvent.model_validate_json(value).sample_weight == 10
+        assert value.endswith(b'"rps":null,"sample_weight":10}')
+
+    def test_integral_latency_written_as_float(self, encoder):
+        value = encoder.encode_metric("2026-01-01T00:00:00+00:00", 100, 200, 0, 0, False, "id")
+        assert b'"latency_ms":100.0,' in value
+
+    def test_error_log_matches_model(self, encoder):
+        timestamp = datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        value = encoder.encode_error_log(timestamp.isoformat(), 500, 0, "req-2")
+        expected = LogEvent(
+            service="api-service",
+            timestamp=timestamp,
+            level="ERROR",
+            message="Request failed with status 500 on /api/v1/users",
+            request_id="req-2",
+        )
+        assert value == expected.model_dump_json().encode()
+
+    def test_strings_escaped_like_pydantic(self):
+        encoder = ServiceEncoder('svc "q" é', ["/a\\b"], ["r\n1"], validate=True)
+        value = encoder.encode_metric("2026-01-01T00:00:00+00:00", 1.0, 200, 0, 0, False, "id")
+        assert MetricEvent.model_validate_json(value).service == 'svc "q" é'
+
+    def test_validation_rejects_mismatch(self, encoder):
+        with pytest.raises(ValueError):
+            encoder.encode_metric("not-a-timestamp", 1.0, 200, 0, 0, False, "id")
+
+
+class TestRequestIds:
+    def test_unique_and_uuid_shaped(self):
+        ids = RequestIds()
+        values = [ids.next() for _ in range(1000)]
+        assert len(set(values)) == 1000
+        assert all(len(v) == 36 and v.count("-") == 4 for v in values)
+
+    def test_prefix_differs_per_instance(self):
+        assert RequestIds().next()[:24] != RequestIds().next()[:24]
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+    def test_forked_child_gets_new_prefix(self):
+        ids = RequestIds()
+        parent = ids.next()
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(write, ids.next().encode())
+            os._exit(0)
+        os.waitpid(pid, 0)
+        child = os.read(read, 64).decode()
+        assert child[:24] != parent[:24]
+
+
+class TestCachedTimestamp:
+    def test_reused_within_resolution(self):
+        clock = CachedTimestamp(resolution=0.01)
+        first = clock.now(1000.0)
+        assert clock.now(1000.005) == first
+        assert clock.now(1000.02) != first
+
+    def test_matches_isoformat(self):
+        clock = CachedTimestamp(resolution=0.001)
+        expected = datetime.fromtimestamp(1700000000.5, timezone.utc).isoformat()
+        assert clock.now(1700000000.5) == expected
@@ -0,0 +1,116 @@
+import json
+from typing import Any
+
+import pytest
+from prometheus_client import REGISTRY
+
+from simulator.kafka_stats import PRODUCER_PROFILES, ProducerStats, producer_profile
+
+
+def _window(avg: float, p99: float, cnt: int = 10) -> dict[str, Any]:
+    return {"min": 0, "max": p99, "avg": avg, "p50": avg, "p99": p99, "cnt": cnt}
+
+
+# Trimmed librdkafka statistics document
+STATS: dict[str, Any] = {
+    "client_id": "workload-simulator",
+    "msg_cnt": 250,
+    "msg_size": 80000,
+    "msg_max": 1000,
+    "msg_size_max": 1000000,
+    "brokers": {
+        "kafka:9092/bootstrap": {
+            "name": "kafka:9092/bootstrap",
+            "nodeid": -1,
+            "int_latency": _window(0, 0, 0),
+            "outbuf_latency": _window(0, 0, 0),
+            "rtt": _window(0, 0, 0),
+        },
+        "kafka-0:9092/0": {
+            "name": "kafka-0:9092/0",
+            "nodeid": 0,
+            "int_latency": _window(5000, 20000),
+            "outbuf_latency": _window(100, 400),
+            "rtt": _window(2000, 8000),
+        },
+    },
+    "topics": {
+        "metrics.raw": {
+            "topic": "metrics.raw",
+            "batchsize": _window(65536, 131072),
+            "batchcnt": _window(200, 400),
+        },
+        "logs.raw": {
+            "topic": "logs.raw",
+            "batchsize": _window(0, 0, 0),
+            "batchcnt": _window(0, 0, 0),
+        },
+    },
+}
+
+
+def _value(name: str, **labels: str) -> Any:
+    return REGISTRY.get_sample_value(name, labels)
+
+
+class TestProducerProfile:
+    def test_profiles_set_batching_and_limits(self):
+        for name in PRODUCER_PROFILES:
+            profile = producer_profile(name)
+            assert {
+                "linger.ms",
+                "batch.size",
+                "compression.type",
+                "queue.buffering.max.messages",
+                "queue.buffering.max.kbytes",
+            } <= profile.keys()
+        assert producer_profile("latency")["linger.ms"] == 0
+        assert producer_profile("bulk")["compression.type"] == "zstd"
+
+    def test_returns_a_copy(self):
+        producer_profile("bulk")["linger.ms"] = 1
+        assert PRODUCER_PROFILES["bulk"]["linger.ms"] == 50
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError, match="producer profile"):
+            producer_profile("fast")
+
+
+class TestProducerStats:
+    def test_exports_queue_batches_and_latencies(self):
+        ProducerStats("stats-test", batch_size=262144)(json.dumps(STATS))
+        assert _value("kafka_producer_queue_messages", client="stats-test") == 250
+        assert _value("kafka_producer_queue_bytes", client="stats-test") == 80000
+        assert _value("kafka_producer_queue_fill_ratio", client="stats-test") == 0.25
+        assert _value(
+            "kafka_producer_batch_messages", client="stats-test", topic="metrics.raw", stat="p99"
+        ) == 400
+        assert _value(
+            "kafka_producer_batch_fill_ratio", client="stats-test", topic="metrics.raw"
+        ) == 0.25
+        broker = "kafka-0:9092/0"
+        assert _value(
+            "kafka_producer_broker_rtt_seconds", client="stats-test", broker=broker, stat="avg"
+        ) == pytest.approx(0.002)
+        assert _value(
+            "kafka_producer_queue_latency_seconds", client="stats-test", broker=broker, stat="p99"
+        ) == pytest.approx(0.02)
+        assert _value(
+            "kafka_producer_request_latency_seconds", client="stats-test", broker=broker, stat="avg"
+        ) == pytest.approx(0.0001)
+
+    def test_skips_empty_windows_and_bootstrap_brokers(self):
+        ProducerStats("stats-empty", batch_size=262144)(json.dumps(STATS))
+        assert _value(
+            "kafka_producer_batch_fill_ratio", client="stats-empty", topic="logs.raw"
+        ) is None
+        assert _value(
+            "kafka_producer_broker_rtt_seconds",
+            client="stats-empty",
+            broker="kafka:9092/bootstrap",
+            stat="avg",
+        ) is None
+
+    def test_malformed_stats_are_ignored(self):
+        ProducerStats("stats-bad", batch_size=1)("{not json")
+        ProducerStats("stats-bad", batch_size=1)(json.dumps({"msg_cnt": 1}))
@@ -1,10 +1,13 @@
+import json
 import threading
+from typing import Any
 from unittest.mock import MagicMock
 
 import pytest
 
 from simulator.config import Config
 from simulator.metrics import MetricsGenerator, ENDPOINTS, NORMAL_LATENCY_MS
+from simulator.models import LogEvent, MetricEvent
 
 
 @pytest.fixture
@@ -17,9 +20,19 @@ def mock_producer():
     producer = MagicMock()
     producer.publish_metric = MagicMock(return_value=True)
     producer.publish_log = MagicMock(return_value=True)
+    producer.publish_value = MagicMock(return_value=True)
     return producer
 
 
+def _published(producer: MagicMock, topic: str) -> list[Any]:
+    return [
+        MetricEvent.model_validate_json(c.args[2]) if topic == "metrics.raw"
+        else LogEvent.model_validate_json(c.args[2])
+        for c in producer.publish_value.call_args_list
+        if c.args[0] == topic
+    ]
+
+
 @pytest.fixture
 def generator(config, mock_producer):
     return MetricsGenerator(config, mock_producer)
@@ -48,10 +61,15 @@ class TestMetricsGenerator:
             code = generator._generate_status_code(is_error=True)
             assert code in (500, 502, 503, 429, 400)
 
+    def test_emit_event_validated_in_debug_mode(self, mock_producer):
+        gen = MetricsGenerator(Config(validate_events=True, error_rate=0.5), mock_producer)
+        for _ in range(20):
+            gen._emit_event("payment-service")
+        assert mock_producer.publish_value.call_count >= 20
+
     def test_emit_event_publishes_metric(self, generator, mock_producer):
         generator._emit_event("api-service")
-        mock_producer.publish_metric.assert_called_once()
-        event = mock_producer.publish_metric.call_args[0][0]
+        [event] = _published(mock_producer, "metrics.raw")
         assert event.service == "api-service"
         assert event.endpoint in ENDPOINTS["api-service"]
 
@@ -59,17 +77,17 @@ class TestMetricsGenerator:
         config = Config(error_rate=1.0, latency_spike_probability=0.0)
         gen = MetricsGenerator(config, mock_producer)
         gen._emit_event("api-service")
-        mock_producer.publish_metric.assert_called_once()
-        mock_producer.publish_log.assert_called_once()
-        log_event = mock_producer.publish_log.call_args[0][0]
+        [event] = _published(mock_producer, "metrics.raw")
+        [log_event] = _published(mock_producer, "logs.raw")
         assert log_event.level == "ERROR"
+        assert log_event.request_id == event.request_id
 
     def test_run_service_respects_stop_event(self, generator, mock_producer):
         stop = threading.Event()
         stop.set()  # Stop immediately
         generator.run_service("api-service", stop)
         # Should exit without producing anything
-        mock_producer.publish_metric.assert_not_called()
+        mock_producer.publish_value.assert_not_called()
 
     def test_unknown_service_uses_default_latency(self, generator):
         latency = generator._generate_latency("unknown-service", is_spike=False)
@@ -78,7 +96,7 @@ class TestMetricsGenerator:
 
     def test_unknown_service_uses_default_endpoint(self, generator, mock_producer):
         generator._emit_event("unknown-service")
-        event = mock_producer.publish_metric.call_args[0][0]
+        [event] = _published(mock_producer, "metrics.raw")
         assert event.endpoint == "/"
 
     def test_endpoints_coverage(self):
@@ -86,3 +104,154 @@ class TestMetricsGenerator:
         assert "auth-service" in ENDPOINTS
         assert "payment-service" in ENDPOINTS
         assert "user-service" in ENDPOINTS
+
+
+class TestBatchGeneration:
+    def test_batch_size_and_fields(self, generator):
+        metrics, logs = generator.generate_batch("api-service", 500)
+        assert len(metrics) == 500
+        assert logs == []
+        lo, hi = NORMAL_LATENCY_MS["api-service"]
+        for value in metrics:
+            event = json.loads(value)
+            assert event["service"] == "api-service"
+            assert event["endpoint"] in ENDPOINTS["api-service"]
+            assert event["region"] in generator._config.regions
+            assert event["status_code"] in (200, 201, 204)
+            assert lo <= event["latency_ms"] <= hi * 2
+            assert event["error"] is False
+
+    def test_batch_matches_model_serialization(self, mock_producer):
+        gen = MetricsGenerator(Config(error_rate=0.5), mock_producer)
+        metrics, logs = gen.generate_batch("payment-service", 200)
+        for value in metrics:
+            assert MetricEvent.model_validate_json(value).model_dump_json().encode() == value
+        for value in logs:
+            assert LogEvent.model_validate_json(value).model_dump_json().encode() == value
+
+    def test_batch_errors_get_logs(self, mock_producer):
+        gen = MetricsGenerator(Config(error_rate=1.0), mock_producer)
+        metrics, logs = gen.generate_batch("auth-service", 50)
+        assert len(logs) == 50
+        for metric, log in zip(metrics, logs):
+            event, log_event = json.loads(metric), json.loads(log)
+            assert event["status_code"] in (500, 502, 503, 429, 400)
+            assert log_event["request_id"] == event["request_id"]
+            assert log_event["message"] == (
+                f"Request failed with status {event['status_code']} on {event['endpoint']}"
+            )
+
+    def test_batch_spike_latency(self, mock_producer):
+        gen = MetricsGenerator(Config(latency_spike_probability=1.0), mock_producer)
+        metrics, _ = gen.generate_batch("user-service", 100)
+        hi = NORMAL_LATENCY_MS["user-service"][1]
+        assert all(hi * 3 <= json.loads(v)["latency_ms"] <= hi * 10 for v in metrics)
+
+    def test_batch_unknown_service_defaults(self, generator):
+        metrics, _ = generator.generate_batch("unknown-service", 20)
+        for value in metrics:
+            event = json.loads(value)
+            assert event["endpoint"] == "/"
+            assert 50 <= event["latency_ms"] <= 400
+
+    def test_emit_batch_publishes_encoded_values(self, mock_producer):
+        gen = MetricsGenerator(Config(error_rate=1.0), mock_producer)
+        gen._emit_batch("api-service", 10)
+        topics = [c.args[0] for c in mock_producer.publish_batch.call_args_list]
+        assert topics == ["metrics.raw", "logs.raw"]
+        assert all(c.args[1] == b"api-service" for c in mock_producer.publish_batch.call_args_list)
+        assert len(mock_producer.publish_batch.call_args_list[0].args[2]) == 10
+
+
+class TestPartitioning:
+    @pytest.mark.parametrize("batch_size", [1, 50])
+    def test_keys_per_strategy(self, mock_producer, batch_size):
+        request_keys = set()
+        for strategy in ("series", "request", "sticky"):
+            producer = MagicMock()
+            config = Config(
+                partition_strategy=strategy, generation_batch_size=batch_size, seed=1
+            )
+            MetricsGenerator(config, producer).emit("api-service", 100)
+            pairs = [
+                (c.args[1], c.args[2])
+                for c in producer.publish_value.call_args_list
+                if c.args[0] == "metrics.raw"
+            ] + [
+                pair
+                for c in producer.publish_keyed.call_args_list
+                for pair in zip(c.args[1], c.args[2])
+            ]
+            assert len(pairs) == 100
+            for key, value in pairs:
+                event = MetricEvent.model_validate_json(value)
+                if strategy == "series":
+                    assert key == f"api-service|{event.region}|{event.endpoint}".encode()
+                elif strategy == "request":
+                    assert key == event.request_id.encode()
+                    request_keys.add(key)
+                else:
+                    assert key is None
+        assert len(request_keys) == 100
+
+    def test_service_strategy_keeps_service_key(self, mock_producer):
+        gen = MetricsGenerator(Config(generation_batch_size=50, seed=1), mock_producer)
+        gen.emit("api-service", 100)
+        assert not mock_producer.publish_keyed.called
+        assert {c.args[1] for c in mock_producer.publish_batch.call_args_list} == {b"api-service"}
+
+    def test_aggregates_keyed_by_series(self, mock_producer):
+        config = Config(
+            partition_strategy="sticky", metrics_format="aggregates", aggregate_interval_seconds=0
+        )
+        MetricsGenerator(config, mock_producer).emit("api-service", 50)
+        (call,) = mock_producer.publish_keyed.call_args_list
+        for key, value in zip(call.args[1], call.args[2]):
+            record = json.loads(value)
+            assert key == f"api-service|{record['region']}|{record['endpoint']}".encode()
+
+
+class TestHeadSampling:
+    @staticmethod
+    def _events(producer: MagicMock) -> list[MetricEvent]:
+        values = [
+            c.args[2] for c in producer.publish_value.call_args_list if c.args[0] == "metrics.raw"
+        ] + [
+            value
+            for c in producer.publish_batch.call_args_list
+            if c.args[0] == "metrics.raw"
+            for value in c.args[2]
+        ]
+        return [MetricEvent.model_validate_json(value) for value in values]
+
+    @pytest.mark.parametrize("batch_size", [1, 100])
+    def test_weighted_total_unbiased(self, mock_producer, batch_size):
+        config = Config(
+            error_rate=0.05,
+            latency_spike_probability=0.05,
+            sample_one_in=10,
+            sample_keep_above_ms=300.0,
+            generation_batch_size=batch_size,
+            validate_events=True,
+            seed=4,
+        )
+        gen = MetricsGenerator(config, mock_producer)
+        gen.emit("api-service", 20000)
+        events = self._events(mock_producer)
+        assert len(events) < 20000 * 0.3
+        # Errors and slow requests are always kept at weight 1
+        for event in events:
+            if event.error or event.latency_ms > 300:
+                assert event.sample_weight is None
+            else:
+                assert event.sample_weight == 10
+        kept = [e for e in events if e.sample_weight is None]
+        assert abs(len(kept) / 20000 - 0.1) < 0.02
+        total = sum(e.sample_weight or 1 for e in events)
+        assert total == pytest.approx(20000, rel=0.05)
+
+    def test_disabled_by_default(self, generator, mock_producer):
+        generator.emit("api-service", 50)
+        events = self._events(mock_producer)
+        assert len(events) == 50
+        assert all(e.sample_weight is None for e in events)
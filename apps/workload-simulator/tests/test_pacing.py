@@ -0,0 +1,111 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from simulator.config import Config
+from simulator.metrics import MetricsGenerator
+from simulator.pacing import ACHIEVED_RATE, Pacer, RateMeter
+
+
+def _run(pacer: Pacer, seconds: float, step: float, start: float = 100.0) -> int:
+    pacer.take(start)
+    total = 0
+    for i in range(1, int(seconds / step) + 1):
+        total += pacer.take(start + i * step)
+    return total
+
+
+class TestPacer:
+    def test_constant_rate_exact(self):
+        assert _run(Pacer(rate=1000), seconds=10, step=0.01) == pytest.approx(10000, abs=1)
+
+    def test_fractional_rate_accumulates(self):
+        # 10 eps at 10ms ticks: one event every 10th tick
+        assert _run(Pacer(rate=10), seconds=5, step=0.01) == pytest.approx(50, abs=1)
+
+    def test_late_wakeups_are_compensated(self):
+        pacer = Pacer(rate=5000)
+        rng = np.random.default_rng(1)
+        now, total = 0.0, 0
+        pacer.take(now)
+        while now < 10:
+            now += 0.01 + rng.exponential(0.005)
+            total += pacer.take(now)
+        assert total == pytest.approx(5000 * now, abs=1)
+
+    def test_catch_up_bounded_after_stall(self):
+        pacer = Pacer(rate=1000, max_burst_seconds=0.5)
+        pacer.take(0.0)
+        assert pacer.take(60.0) == 500
+
+    def test_poisson_mean(self):
+        pacer = Pacer(rate=2000, arrival="poisson", rng=np.random.default_rng(7))
+        assert _run(pacer, seconds=20, step=0.01) == pytest.approx(40000, rel=0.02)
+
+    def test_bursty_mean_and_bursts(self):
+        pacer = Pacer(
+            rate=1000,
+            arrival="bursty",
+            burst_factor=4,
+            burst_fraction=0.2,
+            burst_duration_seconds=1,
+            rng=np.random.default_rng(3),
+        )
+        pacer.take(0.0)
+        per_second = [sum(pacer.take(s + i / 100) for i in range(1, 101)) for s in range(600)]
+        assert sum(per_second) / len(per_second) == pytest.approx(1000, rel=0.1)
+        assert max(per_second) > 2500
+
+    def test_rejects_bad_arrival_settings(self):
+        with pytest.raises(ValueError):
+            Pacer(rate=10, arrival="uniform")
+        with pytest.raises(ValueError):
+            Pacer(rate=10, arrival="bursty", burst_factor=20, burst_fraction=0.1)
+
+    def test_sleep_time_follows_fixed_grid(self):
+        pacer = Pacer(rate=10, tick_seconds=0.01)
+        pacer.take(0.0)
+        assert pacer.sleep_time(0.004) == pytest.approx(0.006)
+        assert pacer.sleep_time(0.012) == pytest.approx(0.008)
+        # More than a tick behind: no sleep, then back on a grid from there
+        assert pacer.sleep_time(0.5) == 0
+        assert pacer.sleep_time(0.5) == pytest.approx(0.01)
+
+
+class TestRateMeter:
+    def test_reports_achieved_rate(self):
+        meter = RateMeter("meter-svc", target=100, interval_seconds=1, now=0.0)
+        meter.record(40, 0.5)
+        assert meter.achieved == 0
+        meter.record(40, 1.0)
+        assert meter.achieved == pytest.approx(80)
+        assert ACHIEVED_RATE.labels("meter-svc")._value.get() == pytest.approx(80)
+
+
+class TestRunService:
+    @pytest.mark.parametrize("batch_size", [1, 100])
+    def test_achieves_target_rate(self, batch_size):
+        producer = MagicMock()
+        generated = []
+        producer.publish_batch.side_effect = lambda topic, key, values: generated.extend(values)
+        producer.publish_value.side_effect = lambda topic, key, value: generated.append(value)
+        config = Config(
+            events_per_second=2000,
+            error_rate=0.0,
+            generation_batch_size=batch_size,
+            rate_report_interval_seconds=0.5,
+        )
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=MetricsGenerator(config, producer).run_service, args=("api-service", stop)
+        )
+        start = time.monotonic()
+        thread.start()
+        time.sleep(1.0)
+        stop.set()
+        thread.join()
+        elapsed = time.monotonic() - start
+        assert len(generated) == pytest.approx(2000 * elapsed, rel=0.2)
@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+from typing import Any
+from unittest.mock import MagicMock
+
+from simulator.config import Config, VirtualServiceTemplate
+from simulator.metrics import MetricsGenerator
+from simulator.pool import WorkerPool, partition, worker_rng
+from simulator.virtual import VirtualService, configured_services
+
+
+def _stream(
+    config: Config, splits: list[int], service: str = "api-service"
+) -> list[dict[str, Any]]:
+    """Events generated for `service` when ticks release `splits` events each."""
+    producer = MagicMock()
+    values: list[bytes] = []
+    producer.publish_value.side_effect = lambda topic, key, value: (
+        values.append(value) if topic == "metrics.raw" else None
+    )
+    producer.publish_batch.side_effect = lambda topic, key, batch: (
+        values.extend(batch) if topic == "metrics.raw" else None
+    )
+    generator = MetricsGenerator(config, producer)
+    for count in splits:
+        generator.emit(service, count)
+    events = [json.loads(value) for value in values]
+    for event in events:
+        del event["timestamp"]
+    return events
+
+
+class TestPartition:
+    def test_balances_rate(self):
+        rates = [100, 50, 50, 40, 30, 20, 10]
+        services = [VirtualService(f"s{i}", rate, ("/",), (10, 20)) for i, rate in enumerate(rates)]
+        shares = partition(services, 3)
+        loads = [sum(s.rate for s in share) for share in shares]
+        assert sorted(loads) == [100, 100, 100]
+        assert sorted(s.name for share in shares for s in share) == sorted(s.name for s in services)
+
+    def test_more_workers_than_services(self):
+        shares = partition(configured_services(Config()), 6)
+        assert sum(len(share) for share in shares) == 4
+        assert shares[5] == []
+
+
+class TestSeededStreams:
+    def test_same_seed_same_stream(self):
+        config = Config(seed=1234, error_rate=0.2)
+        assert _stream(config, [50]) == _stream(config, [50])
+
+    def test_different_seed_differs(self):
+        assert _stream(Config(seed=1), [50]) != _stream(Config(seed=2), [50])
+
+    def test_unseeded_streams_differ(self):
+        assert _stream(Config(), [50]) != _stream(Config(), [50])
+
+    def test_batch_stream_independent_of_tick_splits(self):
+        config = Config(seed=99, error_rate=0.1, generation_batch_size=16)
+        first = _stream(config, [5, 30, 1, 60])
+        second = _stream(config, [96])
+        assert len(first) == len(second) == 96
+        assert first == second
+
+    def test_batch_stream_sends_partial_batches_when_due(self):
+        config = Config(seed=99, error_rate=0.1, generation_batch_size=16)
+        assert _stream(config, [5]) == _stream(config, [96])[:5]
+        assert _stream(config, [5, 3]) == _stream(config, [96])[:8]
+
+    def test_services_have_independent_streams(self):
+        config = Config(seed=5)
+        alone = _stream(config, [20], "auth-service")
+        producer = MagicMock()
+        generator = MetricsGenerator(config, producer)
+        generator.emit("api-service", 20)
+        generator.emit("auth-service", 20)
+        interleaved = [
+            json.loads(c.args[2]) for c in producer.publish_value.call_args_list
+            if c.args[0] == "metrics.raw" and c.args[1] == b"auth-service"
+        ]
+        for event in interleaved:
+            del event["timestamp"]
+        assert interleaved == alone
+
+    def test_worker_rng_seeded_by_index(self):
+        config = Config(seed=7)
+        assert worker_rng(config, 0).random() == worker_rng(config, 0).random()
+        assert worker_rng(config, 0).random() != worker_rng(config, 1).random()
+
+
+class TestWorkerPool:
+    def test_workers_generate_and_report(self, tmp_path):
+        config = Config(
+            dead_letter_dir=str(tmp_path),
+            kafka_brokers="127.0.0.1:1",
+            worker_processes=2,
+            services=[],
+            virtual_services=VirtualServiceTemplate(count=20, rate_min=50, rate_max=50),
+            rate_report_interval_seconds=0.5,
+            producer_flush_timeout=1,
+            seed=3,
+        )
+        pool = WorkerPool(config)
+        assert [len(share) for share in pool.shares] == [10, 10]
+        stop = threading.Event()
+        threading.Timer(4.0, stop.set).start()
+        pool.run(stop)
+        assert all(events > 0 for events in pool.events)
+        assert all(process.exitcode == 0 for process in pool._processes)
+        # Nothing reached the (unreachable) broker, so each worker spooled its events
+        assert sorted(os.listdir(tmp_path)) == ["worker-0", "worker-1"]
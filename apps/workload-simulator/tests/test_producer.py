@@ -1,3 +1,4 @@
+from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -8,8 +9,8 @@ from simulator.producer import KafkaProducerWrapper
 
 
 @pytest.fixture
-def config():
-    return Config()
+def config(tmp_path):
+    return Config(dead_letter_dir=str(tmp_path / "dead-letter"))
 
 
 @pytest.fixture
@@ -93,5 +94,94 @@ class TestKafkaProducerWrapper:
         wrapper.close()
         mock_producer.flush.assert_called_once()
 
-    def test_dlq_bounded_size(self, wrapper):
-        assert wrapper._dlq.maxlen == 1000
+    def test_failed_log_is_spooled(self, wrapper, mock_producer, sample_log):
+        from confluent_kafka import KafkaException
+
+        mock_producer.produce.side_effect = KafkaException(
+            MagicMock(str=lambda self: "Broker unavailable")
+        )
+        assert wrapper.publish_log(sample_log) is False
+        assert wrapper.get_dlq_size() == 1
+
+    def test_delivery_failure_is_spooled(self, wrapper):
+        from confluent_kafka import KafkaError
+
+        msg = MagicMock()
+        msg.topic.return_value = "logs.raw"
+        msg.key.return_value = b"api-service"
+        msg.value.return_value = b"{}"
+        wrapper._delivery_callback(KafkaError(KafkaError._MSG_TIMED_OUT), msg)
+        assert wrapper.get_dlq_size() == 1
+        assert not wrapper.broker_healthy()
+        wrapper._delivery_callback(KafkaError(KafkaError.MSG_SIZE_TOO_LARGE), msg)
+        assert wrapper.get_dlq_size() == 1
+        wrapper._delivery_callback(None, msg)
+        assert wrapper.broker_healthy()
+
+    def test_close_purges_undelivered(self, wrapper, mock_producer):
+        mock_producer.__len__.return_value = 5
+        wrapper.close()
+        mock_producer.purge.assert_called_once()
+
+    def test_publish_batch(self, wrapper, mock_producer, sample_metric):
+        values = [sample_metric.model_dump_json().encode()] * 3
+        assert wrapper.publish_batch("metrics.raw", b"api-service", values) == 3
+        assert mock_producer.produce.call_count == 3
+        mock_producer.poll.assert_called_once_with(0)
+
+    def test_publish_batch_waits_when_queue_full(self, wrapper, mock_producer, sample_metric):
+        mock_producer.produce.side_effect = [BufferError(), None]
+        value = sample_metric.model_dump_json().encode()
+        assert wrapper.publish_batch("metrics.raw", b"api-service", [value]) == 1
+        assert mock_producer.produce.call_count == 2
+        mock_producer.poll.assert_any_call(0.5)
+
+    def test_publish_batch_failed_metrics_go_to_dlq(self, wrapper, mock_producer, sample_metric):
+        from confluent_kafka import KafkaException
+
+        mock_producer.produce.side_effect = KafkaException(
+            MagicMock(str=lambda self: "Broker unavailable")
+        )
+        value = sample_metric.model_dump_json().encode()
+        with patch("simulator.producer.time.sleep"):
+            assert wrapper.publish_batch("metrics.raw", b"api-service", [value]) == 0
+        assert wrapper.get_dlq_size() == 1
+
+    def test_publish_keyed(self, wrapper, mock_producer, sample_metric):
+        value = sample_metric.model_dump_json().encode()
+        keys = [b"api-service|us-east-1|/a", None]
+        assert wrapper.publish_keyed("metrics.raw", keys, [value, value]) == 2
+        assert [c.kwargs["key"] for c in mock_producer.produce.call_args_list] == [keys[0], None]
+        mock_producer.poll.assert_called_once_with(0)
+
+    def test_unkeyed_record_spools_and_replays_unkeyed(self, wrapper, mock_producer, sample_metric):
+        from confluent_kafka import KafkaException
+
+        value = sample_metric.model_dump_json().encode()
+        mock_producer.produce.side_effect = KafkaException(MagicMock())
+        with patch("simulator.producer.time.sleep"):
+            assert wrapper.publish_value("metrics.raw", None, value) is False
+        mock_producer.produce.side_effect = None
+        mock_producer.produce.reset_mock()
+        assert wrapper._spool.replay(10, wrapper._replay) == 1
+        assert mock_producer.produce.call_args.kwargs["key"] is None
+
+
+class TestProducerConfig:
+    def _conf(self, config: Config) -> dict[str, Any]:
+        with patch("simulator.producer.Producer") as MockProducer:
+            KafkaProducerWrapper(config)
+        conf: dict[str, Any] = MockProducer.call_args[0][0]
+        return conf
+
+    def test_profile_applied(self, config):
+        conf = self._conf(config.model_copy(update={"producer_profile": "bulk"}))
+        assert conf["linger.ms"] == 50
+        assert conf["compression.type"] == "zstd"
+        assert conf["acks"] == "all"
+        assert "stats_cb" not in conf
+
+    def test_stats_enabled(self, config):
+        conf = self._conf(config.model_copy(update={"producer_stats_interval_ms": 5000}))
+        assert conf["statistics.interval.ms"] == 5000
+        assert callable(conf["stats_cb"])
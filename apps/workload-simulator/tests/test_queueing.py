@@ -0,0 +1,128 @@
+import random
+import time
+from typing import Any
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from simulator.config import Config
+from simulator.metrics import MetricsGenerator
+from simulator.models import MetricEvent
+from simulator.queueing import QueueingModel, erlang_c, mean_service_time
+
+
+def _model(**overrides: Any) -> QueueingModel:
+    defaults: dict[str, Any] = {
+        "regions": ["us-east-1"],
+        "queue_capacity_eps": {"api-service": 100.0},
+        "queue_timeout_ms": 2000.0,
+    }
+    return QueueingModel(Config(**{**defaults, **overrides}))
+
+
+def _offer(model: QueueingModel, rate: float, factors: Any = None) -> None:
+    """One full update interval at `rate` events/s, 100 ms mean service time."""
+    model.observe("api-service", 0, 0.0, 0.1, factors)
+    model.observe("api-service", int(rate), 1.0, 0.1, factors)
+
+
+def _mean_delay(model: QueueingModel, n: int = 20000) -> float:
+    rand = random.Random(1)
+    return sum(model.sample("api-service", 0, rand)[0] for _ in range(n)) / n
+
+
+class TestErlangC:
+    def test_single_server_waits_with_utilization(self):
+        assert erlang_c(1, 0.5) == pytest.approx(0.5)
+
+    def test_two_servers(self):
+        # M/M/2 at utilization 0.5: 2 rho^2 / (1 + rho)
+        assert erlang_c(2, 1.0) == pytest.approx(1 / 3)
+
+    def test_bounds(self):
+        assert erlang_c(10, 0) == 0
+        assert erlang_c(10, 10) == 1
+        assert 0 < erlang_c(1000, 900) < 1
+
+
+class TestQueueingModel:
+    def test_no_delay_before_first_interval(self):
+        model = _model()
+        model.observe("api-service", 50, 0.0, 0.1)
+        assert model.sample("api-service", 0, random.Random()) == (0.0, False)
+
+    def test_delay_grows_with_load(self):
+        delays = []
+        for rate in (30, 80, 97):
+            model = _model()
+            _offer(model, rate)
+            delays.append(_mean_delay(model))
+        assert delays[0] < delays[1] < delays[2]
+        assert delays[0] < 1
+        # M/M/10 at utilization 0.97: C / (c mu - lambda) is about 290 ms
+        assert delays[2] == pytest.approx(290, rel=0.15)
+
+    def test_overload_sheds_excess(self):
+        model = _model()
+        _offer(model, 200)
+        rand = random.Random(2)
+        timed_out = sum(model.sample("api-service", 0, rand)[1] for _ in range(10000))
+        # The excess over 99% of capacity fails; some of the rest waits past the timeout
+        assert 1 - 99 / 200 - 0.02 < timed_out / 10000 < 0.65
+
+    def test_capacity_factor(self):
+        model = _model()
+        _offer(model, 60, [0.5])
+        assert _mean_delay(model) > 100
+
+    def test_headroom_over_base_rate(self):
+        model = _model(queue_capacity_eps={}, queue_headroom=3.0)
+        model.set_base_rate("api-service", 20)
+        assert model.capacity("api-service") == 60
+        assert model.capacity("other") == Config().events_per_second * 3.0
+
+    def test_batch_matches_per_event(self):
+        model = _model()
+        _offer(model, 95)
+        delays, timed_out = model.sample_batch(
+            "api-service", np.zeros(50000, dtype=np.int64), np.random.default_rng(3)
+        ) or (np.array([]), np.array([]))
+        assert delays.mean() == pytest.approx(_mean_delay(model, 50000), rel=0.1)
+        assert not timed_out.any() or delays[timed_out].min() == 2000
+
+
+class TestGeneratorIntegration:
+    @pytest.mark.parametrize("batch_size", [1, 64])
+    def test_overload_adds_latency_and_503s(self, batch_size):
+        config = Config(
+            latency_model="queueing",
+            queue_capacity_eps={"api-service": 10.0},
+            error_rate=0.0,
+            latency_spike_probability=0.0,
+            generation_batch_size=batch_size,
+            seed=1,
+        )
+        producer = MagicMock()
+        generator = MetricsGenerator(config, producer)
+        assert generator.queueing is not None
+        service_time = mean_service_time((50, 150))
+        now = time.monotonic()
+        generator.queueing.observe("api-service", 0, now - 1.0, service_time)
+        generator.queueing.observe("api-service", 1000, now, service_time)
+        generator.emit("api-service", 256)
+        values = [
+            value
+            for c in producer.publish_batch.call_args_list
+            if c.args[0] == "metrics.raw"
+            for value in c.args[2]
+        ] + [
+            c.args[2] for c in producer.publish_value.call_args_list if c.args[0] == "metrics.raw"
+        ]
+        events = [MetricEvent.model_validate_json(value) for value in values]
+        timeouts = [e for e in events if e.status_code == 503 and e.error]
+        assert len(timeouts) > len(events) * 0.9
+        assert all(e.latency_ms >= 2000 for e in timeouts)
+
+    def test_fixed_model_by_default(self):
+        assert MetricsGenerator(Config(), MagicMock()).queueing is None
@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from simulator.config import Config
+from simulator.encoding import ServiceEncoder
+from simulator.producer import KafkaProducerWrapper
+from simulator.recording import Recorder, import_capture, read_chunks, read_records
+from simulator.replay import Replayer
+
+TIMESTAMP = "2024-01-01T00:00:00+00:00"
+
+
+def _values(count: int) -> list[bytes]:
+    encoder = ServiceEncoder("api-service", ["/"], ["us-east-1"])
+    return [
+        encoder.encode_metric(TIMESTAMP, 10.0 + i, 200, 0, 0, False, f"id-{i}")
+        for i in range(count)
+    ]
+
+
+def _record(path: Path, offsets: list[float]) -> list[bytes]:
+    values = _values(len(offsets))
+    recorder = Recorder(str(path))
+    for offset, value in zip(offsets, values):
+        recorder.record("metrics.raw", b"api-service", [value], offset)
+    recorder.close()
+    return values
+
+
+def _replayed(producer: MagicMock) -> list[bytes]:
+    return [value for c in producer.publish_batch.call_args_list for value in c.args[2]]
+
+
+class TestRecording:
+    def test_round_trip(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("simulator.recording.CHUNK_BYTES", 1000)
+        values = _record(tmp_path / "r.simrec", [i / 10 for i in range(50)])
+        assert len(list(read_chunks(str(tmp_path / "r.simrec")))) > 1
+        records = list(read_records(str(tmp_path / "r.simrec")))
+        assert [record[3] for record in records] == values
+        assert records[7][0] == pytest.approx(0.7)
+        assert records[7][1:3] == ("metrics.raw", b"api-service")
+
+    def test_rejects_other_files(self, tmp_path):
+        (tmp_path / "dump.jsonl").write_text("{}\n")
+        with pytest.raises(ValueError, match="not a simulator recording"):
+            list(read_records(str(tmp_path / "dump.jsonl")))
+
+    def test_import_capture(self, tmp_path):
+        events = [
+            {"service": "api-service", "timestamp": "2024-01-01T00:00:00+00:00"},
+            {"service": "auth-service", "timestamp": "2024-01-01T00:00:02.500000+00:00"},
+        ]
+        lines = [json.dumps(events[0]), "custom-key\t" + json.dumps(events[1])]
+        (tmp_path / "dump.jsonl").write_text("\n".join(lines) + "\n")
+        assert import_capture(str(tmp_path / "dump.jsonl"), str(tmp_path / "r.simrec")) == 2
+        records = list(read_records(str(tmp_path / "r.simrec")))
+        assert [(r[0], r[2]) for r in records] == [(0.0, b"api-service"), (2.5, b"custom-key")]
+        assert json.loads(records[1][3]) == events[1]
+
+    def test_producer_records_published_values(self, tmp_path):
+        config = Config(
+            dead_letter_dir=str(tmp_path / "dlq"), record_file=str(tmp_path / "out.simrec")
+        )
+        with patch("simulator.producer.Producer"):
+            producer = KafkaProducerWrapper(config)
+            producer.publish_batch("metrics.raw", b"api-service", [b"a", b"b"])
+            producer.publish_value("logs.raw", b"api-service", b"c")
+            producer.close()
+        records = list(read_records(config.record_file))
+        assert [(r[1], r[3]) for r in records] == [
+            ("metrics.raw", b"a"), ("metrics.raw", b"b"), ("logs.raw", b"c")
+        ]
+
+
+class TestReplayer:
+    def _replay(self, path: Path, **overrides: Any) -> tuple[MagicMock, float]:
+        config = Config(replay_file=str(path), **overrides)
+        producer = MagicMock()
+        started = time.monotonic()
+        Replayer(config, producer).run(threading.Event())
+        return producer, time.monotonic() - started
+
+    def test_max_speed_is_byte_identical(self, tmp_path):
+        values = _record(tmp_path / "r.simrec", [i * 10.0 for i in range(20)])
+        producer, elapsed = self._replay(
+            tmp_path / "r.simrec", replay_speed=0, replay_rewrite_timestamps=False
+        )
+        assert _replayed(producer) == values
+        assert elapsed < 1
+
+    def test_rewrites_timestamps(self, tmp_path):
+        _record(tmp_path / "r.simrec", [0.0, 0.0])
+        producer, _ = self._replay(tmp_path / "r.simrec", replay_speed=0)
+        for value in _replayed(producer):
+            event = json.loads(value)
+            assert event["timestamp"] != TIMESTAMP
+            assert event["request_id"].startswith("id-")
+
+    @pytest.mark.parametrize("speed, expected", [(1.0, 0.3), (3.0, 0.1)])
+    def test_keeps_recorded_pace(self, tmp_path, speed, expected):
+        values = _record(tmp_path / "r.simrec", [0.0, 0.1, 0.2, 0.3])
+        producer, elapsed = self._replay(tmp_path / "r.simrec", replay_speed=speed)
+        assert len(_replayed(producer)) == len(values)
+        assert elapsed == pytest.approx(expected, abs=0.08)
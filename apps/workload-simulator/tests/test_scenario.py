@@ -0,0 +1,200 @@
+import json
+import os
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+import yaml
+from pydantic import ValidationError
+
+from simulator.config import Config
+from simulator.metrics import MetricsGenerator
+from simulator.models import MetricEvent
+from simulator.scenario import ActivePhase, RateEffect, ScenarioEngine, Selector, load_scenario
+
+REGIONS = ["us-east-1", "eu-west-1"]
+
+INCIDENT: dict[str, Any] = {
+    "name": "incident",
+    "phases": [
+        {"name": "baseline", "duration_seconds": 10},
+        {
+            "name": "outage",
+            "duration_seconds": 5,
+            "rate": [{"services": ["auth-service"], "multiplier": 0}],
+            "errors": [{"regions": ["eu-west-1"], "rate": 0.5}],
+            "latency": [{"services": ["api-service"], "multiplier": 2, "add_ms": 10}],
+        },
+    ],
+}
+
+ERRORS_IN_EU: dict[str, Any] = {
+    "name": "eu-errors",
+    "phases": [{
+        "name": "eu-errors",
+        "duration_seconds": 3600,
+        "errors": [{"regions": ["eu-west-1"], "rate": 1.0}],
+        "latency": [{"regions": ["eu-west-1"], "add_ms": 10000}],
+        "rate": [{"services": ["api-service"], "multiplier": 3}],
+    }],
+}
+
+
+def _active(engine: ScenarioEngine, now: float) -> ActivePhase:
+    active = engine.current(now)
+    assert active is not None
+    return active
+
+
+def _write(path: Path, scenario: dict[str, Any]) -> str:
+    path.write_text(yaml.safe_dump(scenario))
+    return str(path)
+
+
+def _engine(tmp_path: Path, scenario: dict[str, Any]) -> ScenarioEngine:
+    return ScenarioEngine(_write(tmp_path / "scenario.yaml", scenario), REGIONS, poll_seconds=3600)
+
+
+class TestScenarioModel:
+    def test_load_example(self):
+        path = Path(__file__).parents[3] / "docs" / "scenarios" / "checkout-incident.yaml"
+        scenario = load_scenario(str(path))
+        assert scenario.phases[0].name == "baseline"
+
+    def test_phase_needs_positive_duration(self, tmp_path):
+        path = _write(tmp_path / "s.yaml", {"name": "s", "phases": [
+            {"name": "p", "duration_seconds": 0}
+        ]})
+        with pytest.raises(ValidationError):
+            load_scenario(path)
+
+    def test_selector(self):
+        selector = Selector(services=["api-service"], regions=["eu-west-1"])
+        assert selector.matches("api-service", "eu-west-1")
+        assert selector.matches("api-service")
+        assert not selector.matches("api-service", "us-east-1")
+        assert not selector.matches("auth-service", "eu-west-1")
+        assert Selector().matches("anything", "anywhere")
+
+    def test_ramp(self):
+        effect = RateEffect(multiplier=1.0, ramp_to=5.0)
+        assert effect.at(0, 100) == 1.0
+        assert effect.at(50, 100) == 3.0
+        assert effect.at(200, 100) == 5.0
+
+    def test_diurnal(self):
+        effect = RateEffect(diurnal_amplitude=0.5, diurnal_period_seconds=100)
+        assert effect.at(0, 1000) == pytest.approx(1.0)
+        assert effect.at(25, 1000) == pytest.approx(1.5)
+        assert effect.at(75, 1000) == pytest.approx(0.5)
+
+
+class TestScenarioEngine:
+    def test_phases_progress_then_finish(self, tmp_path):
+        engine = _engine(tmp_path, INCIDENT)
+        assert _active(engine, 100.0).phase.name == "baseline"
+        assert _active(engine, 109.9).phase.name == "baseline"
+        outage = _active(engine, 110.0)
+        assert outage.phase.name == "outage"
+        assert outage.started == 110.0
+        assert engine.current(115.0) is None
+
+    def test_loop_chains_phases(self, tmp_path):
+        engine = _engine(tmp_path, {**INCIDENT, "loop": True})
+        engine.current(0.0)
+        # Skipping ahead still lands on the phase a continuous run would be in
+        active = _active(engine, 32.0)
+        assert active.phase.name == "baseline"
+        assert active.started == 30.0
+
+    def test_effects(self, tmp_path):
+        engine = _engine(tmp_path, INCIDENT)
+        engine.current(0.0)
+        outage = _active(engine, 10.0)
+        assert outage.rate_multiplier("auth-service", 11.0) == 0
+        assert outage.rate_multiplier("api-service", 11.0) == 1.0
+        assert outage.error_rates("user-service") == [None, 0.5]
+        assert outage.latency("api-service") == ([2.0, 2.0], [10.0, 10.0])
+        assert outage.latency("user-service") is None
+
+    def test_reloads_changed_file(self, tmp_path):
+        engine = ScenarioEngine(
+            _write(tmp_path / "s.yaml", INCIDENT), REGIONS, poll_seconds=1
+        )
+        assert _active(engine, 0.0).phase.name == "baseline"
+        path = _write(tmp_path / "s.yaml", {"name": "other", "phases": [
+            {"name": "storm", "duration_seconds": 60}
+        ]})
+        os.utime(path, (1, 1))
+        active = _active(engine, 2.0)
+        assert active.scenario.name == "other"
+        assert active.started == 2.0
+
+    def test_invalid_reload_keeps_scenario(self, tmp_path):
+        engine = ScenarioEngine(
+            _write(tmp_path / "s.yaml", INCIDENT), REGIONS, poll_seconds=1
+        )
+        engine.current(0.0)
+        path = tmp_path / "s.yaml"
+        path.write_text("name: broken\nphases: [{name: p}]\n")
+        os.utime(path, (1, 1))
+        assert _active(engine, 2.0).scenario.name == "incident"
+
+    def test_missing_file(self, tmp_path):
+        assert ScenarioEngine(str(tmp_path / "missing.yaml"), REGIONS).current(0.0) is None
+
+
+class TestScenarioGeneration:
+    def _generator(
+        self, tmp_path: Path, **overrides: Any
+    ) -> tuple[MetricsGenerator, MagicMock]:
+        config = Config(
+            error_rate=0.0,
+            latency_spike_probability=0.0,
+            regions=REGIONS,
+            scenario_file=_write(tmp_path / "s.yaml", ERRORS_IN_EU),
+            **overrides,
+        )
+        producer = MagicMock()
+        return MetricsGenerator(config, producer), producer
+
+    @staticmethod
+    def _check(events: list[MetricEvent]) -> None:
+        regions = {event.region for event in events}
+        assert regions == set(REGIONS)
+        for event in events:
+            in_eu = event.region == "eu-west-1"
+            assert event.error is in_eu
+            assert (event.latency_ms > 10000) is in_eu
+
+    def test_per_event(self, tmp_path):
+        generator, producer = self._generator(tmp_path)
+        generator.emit("api-service", 200)
+        self._check([
+            MetricEvent.model_validate_json(c.args[2])
+            for c in producer.publish_value.call_args_list
+            if c.args[0] == "metrics.raw"
+        ])
+
+    def test_batch(self, tmp_path):
+        generator, producer = self._generator(tmp_path, generation_batch_size=100)
+        generator.emit("api-service", 200)
+        values = [
+            value
+            for c in producer.publish_batch.call_args_list
+            if c.args[0] == "metrics.raw"
+            for value in c.args[2]
+        ]
+        assert len(values) == 200
+        self._check([MetricEvent.model_validate(json.loads(value)) for value in values])
+
+    def test_rate_multiplier(self, tmp_path):
+        generator, _ = self._generator(tmp_path)
+        assert generator.rate_multiplier("api-service", 0.0) == 3
+        assert generator.rate_multiplier("auth-service", 0.0) == 1
+
+    def test_without_scenario(self):
+        generator = MetricsGenerator(Config(), MagicMock())
+        assert generator.scenario is None
+        assert generator.rate_multiplier("api-service", 0.0) == 1
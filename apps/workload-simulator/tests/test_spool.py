@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from typing import Callable
+
+import pytest
+
+from simulator.spool import DeadLetterSpool, SpoolDrainer, iter_records
+
+
+def _collect(into: list[bytes]) -> Callable[[str, bytes, bytes], bool]:
+    def publish(topic: str, key: bytes, value: bytes) -> bool:
+        into.append(value)
+        return True
+
+    return publish
+
+
+def _fill(spool: DeadLetterSpool, count: int, topic: str = "metrics.raw") -> None:
+    for i in range(count):
+        spool.append(topic, b"api-service", f'{{"n": {i}}}'.encode())
+
+
+class TestDeadLetterSpool:
+    def test_replays_in_order(self, tmp_path):
+        spool = DeadLetterSpool(str(tmp_path), segment_bytes=200)
+        _fill(spool, 10)
+        spool.append("logs.raw", b"", b"log")
+        assert spool.records == 11
+        replayed: list[tuple[str, bytes, bytes]] = []
+
+        def publish(topic: str, key: bytes, value: bytes) -> bool:
+            replayed.append((topic, key, value))
+            return True
+
+        assert spool.replay(100, publish) == 11
+        assert [value for _, _, value in replayed[:2]] == [b'{"n": 0}', b'{"n": 1}']
+        assert replayed[-1] == ("logs.raw", b"", b"log")
+        assert spool.records == 0
+        assert [name for name in os.listdir(tmp_path) if name.endswith(".seg")] == [
+            f"{spool._active_seq:012d}.seg"
+        ]
+
+    def test_replay_limit_and_refusal(self, tmp_path):
+        spool = DeadLetterSpool(str(tmp_path))
+        _fill(spool, 5)
+        assert spool.replay(2, lambda *record: True) == 2
+        assert spool.replay(10, lambda *record: False) == 0
+        assert spool.records == 3
+
+    def test_survives_restart_with_checkpoint(self, tmp_path):
+        spool = DeadLetterSpool(str(tmp_path))
+        _fill(spool, 6)
+        spool.replay(2, lambda *record: True)
+        spool.close()
+
+        reopened = DeadLetterSpool(str(tmp_path))
+        assert reopened.records == 4
+        replayed: list[bytes] = []
+        reopened.replay(10, _collect(replayed))
+        assert replayed[0] == b'{"n": 2}'
+        assert reopened.records == 0
+
+    def test_torn_tail_is_ignored(self, tmp_path):
+        spool = DeadLetterSpool(str(tmp_path))
+        _fill(spool, 3)
+        spool.flush()
+        path = os.path.join(tmp_path, f"{spool._active_seq:012d}.seg")
+        with open(path, "ab") as f:
+            f.write(b"\x01\x02\x03")  # partial header from a crash mid-write
+        with open(path, "rb") as f:
+            assert len(list(iter_records(f.read()))) == 3
+        assert DeadLetterSpool(str(tmp_path)).records == 3
+
+    def test_drops_oldest_segment_when_full(self, tmp_path):
+        spool = DeadLetterSpool(str(tmp_path), segment_bytes=100, max_bytes=300)
+        _fill(spool, 50)
+        assert spool.size <= 300 + 100
+        replayed: list[bytes] = []
+        spool.replay(100, _collect(replayed))
+        assert replayed[-1] == b'{"n": 49}'
+        assert b'{"n": 0}' not in replayed
+
+    def test_totals_track_segments_under_concurrent_appends(self, tmp_path):
+        spool = DeadLetterSpool(str(tmp_path), segment_bytes=200, max_bytes=2000)
+        done = threading.Event()
+        errors: list[RuntimeError] = []
+
+        def read() -> None:
+            while not done.is_set():
+                try:
+                    assert spool.records >= 0 and spool.size >= 0
+                except RuntimeError as e:
+                    errors.append(e)
+                    return
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        appenders = [threading.Thread(target=_fill, args=(spool, 100)) for _ in range(4)]
+        for thread in appenders:
+            thread.start()
+        for thread in appenders:
+            thread.join()
+        spool.replay(50, _collect([]))
+        done.set()
+        reader.join()
+        assert not errors
+        assert spool.records == sum(count for count, _ in spool._segments.values())
+        assert spool.size == sum(size for _, size in spool._segments.values())
+
+    def test_replay_while_appends_drop_segments(self, tmp_path):
+        spool = DeadLetterSpool(str(tmp_path), segment_bytes=100, max_bytes=300)
+        appender = threading.Thread(target=_fill, args=(spool, 3000))
+        appender.start()
+        while appender.is_alive():
+            spool.replay(5, _collect([]))
+        appender.join()
+        spool.replay(10000, _collect([]))
+        assert spool.records == sum(count for count, _ in spool._segments.values()) == 0
+        assert spool.size == sum(size for _, size in spool._segments.values())
+
+    def test_finishing_a_segment_already_dropped(self, tmp_path):
+        spool = DeadLetterSpool(str(tmp_path))
+        _fill(spool, 3)
+        assert spool._open_next()
+        with spool._lock:
+            seq = spool._read_seq
+            assert seq is not None
+            count, size = spool._segments.pop(seq)
+            spool._records -= count
+            spool._bytes -= size
+            os.remove(spool._path(seq))
+        spool._close_read(finished=True)
+        assert spool.records == 0 and spool.size == 0
+
+
+class TestSpoolDrainer:
+    def test_rate_bounded_and_waits_for_health(self, tmp_path):
+        spool = DeadLetterSpool(str(tmp_path))
+        _fill(spool, 1000)
+        healthy = threading.Event()
+        replayed: list[bytes] = []
+        drainer = SpoolDrainer(
+            spool,
+            _collect(replayed),
+            healthy.is_set,
+            rate=200,
+            tick_seconds=0.02,
+        )
+        drainer.start()
+        time.sleep(0.2)
+        assert replayed == []
+        healthy.set()
+        time.sleep(0.5)
+        drainer.stop()
+        assert len(replayed) == pytest.approx(100, abs=45)
+        assert spool.records == 1000 - len(replayed)
@@ -0,0 +1,83 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from simulator.config import Config, VirtualServiceTemplate
+from simulator.metrics import ENDPOINTS, NORMAL_LATENCY_MS, MetricsGenerator
+from simulator.virtual import ServiceScheduler, expand_template
+
+
+def _collecting_producer() -> MagicMock:
+    producer = MagicMock()
+    producer.generated = []
+    producer.publish_batch.side_effect = lambda topic, key, values: (
+        producer.generated.extend((key, v) for v in values) if topic == "metrics.raw" else None
+    )
+    producer.publish_value.side_effect = lambda topic, key, value: (
+        producer.generated.append((key, value)) if topic == "metrics.raw" else None
+    )
+    return producer
+
+
+class TestExpandTemplate:
+    def test_deterministic_for_seed(self):
+        template = VirtualServiceTemplate(count=50, seed=42)
+        assert expand_template(template) == expand_template(template)
+        assert expand_template(template) != expand_template(VirtualServiceTemplate(count=50))
+
+    def test_within_template_bounds(self):
+        template = VirtualServiceTemplate(
+            count=200, rate_min=2, rate_max=50, endpoints_min=1, endpoints_max=3
+        )
+        services = expand_template(template)
+        assert len({s.name for s in services}) == 200
+        assert services[7].name == "virtual-0007"
+        for service in services:
+            assert 2 <= service.rate <= 50
+            assert 1 <= len(service.endpoints) <= 3
+            low, high = service.latency_ms
+            assert 10 <= low <= 200
+            assert high == pytest.approx(low * 3, abs=0.2)
+
+
+class TestServiceScheduler:
+    def test_includes_configured_and_virtual_services(self):
+        config = Config(virtual_services=VirtualServiceTemplate(count=10))
+        generator = MetricsGenerator(config, MagicMock())
+        scheduler = ServiceScheduler(config, generator)
+        assert len(scheduler.services) == len(config.services) + 10
+        api = scheduler.services[0]
+        assert api.endpoints == tuple(ENDPOINTS["api-service"])
+        assert api.latency_ms == NORMAL_LATENCY_MS["api-service"]
+        virtual = scheduler.services[-1]
+        assert generator.profile(virtual.name) == (list(virtual.endpoints), virtual.latency_ms)
+
+    def test_drives_many_services_from_one_thread(self):
+        producer = _collecting_producer()
+        config = Config(
+            services=[],
+            error_rate=0.0,
+            generation_batch_size=64,
+            virtual_services=VirtualServiceTemplate(count=200, rate_min=20, rate_max=20),
+        )
+        scheduler = ServiceScheduler(config, MetricsGenerator(config, producer))
+        stop = threading.Event()
+        thread = threading.Thread(target=scheduler.run, args=(stop,))
+        start = time.monotonic()
+        thread.start()
+        time.sleep(1.0)
+        stop.set()
+        thread.join()
+        elapsed = time.monotonic() - start
+        assert len(producer.generated) == pytest.approx(4000 * elapsed, rel=0.2)
+        assert len({key for key, _ in producer.generated}) == 200
+
+    def test_stops_immediately(self):
+        producer = _collecting_producer()
+        config = Config()
+        stop = threading.Event()
+        stop.set()
+        ServiceScheduler(config, MetricsGenerator(config, producer)).run(stop)
+        assert producer.generated == []
@@ -5,6 +5,12 @@ by patching environment variables via kubectl.
 Usage:
     python scripts/load_test.py --target-rps 100 --duration 120
 
+With --scenario, the YAML scenario (see docs/scenarios) is pushed to the
+simulator's scenario ConfigMap instead; pods pick it up without restarting.
+Needs the chart installed with scenario.enabled=true.
+
+    python scripts/load_test.py --scenario docs/scenarios/checkout-incident.yaml --duration 1800
+
 Watch the Grafana Golden Signals dashboard for HPA scaling events.
 """
 import argparse
@@ -40,6 +46,25 @@ def kubectl_patch_env(namespace: str, deployment: str, env_var: str, value: str)
     return True
 
 
+def kubectl_apply_scenario(namespace: str, deployment: str, path: str) -> bool:
+    """Replace the scenario ConfigMap mounted by the simulator pods."""
+    manifest = subprocess.run(
+        ["kubectl", "create", "configmap", f"{deployment}-scenario",
+         "-n", namespace, f"--from-file=scenario.yaml={path}",
+         "--dry-run=client", "-o", "yaml"],
+        capture_output=True, text=True,
+    )
+    result = subprocess.run(
+        ["kubectl", "apply", "-n", namespace, "-f", "-"],
+        input=manifest.stdout, capture_output=True, text=True,
+    ) if manifest.returncode == 0 else manifest
+    if result.returncode != 0:
+        print(f"  ERROR applying scenario: {result.stderr.strip()}")
+        return False
+    print(f"  Applied scenario {path} (picked up within the kubelet sync period)")
+    return True
+
+
 def get_hpa_status(namespace: str) -> str:
     result = subprocess.run(
         ["kubectl", "get", "hpa", "-n", namespace, "--no-headers"],
@@ -56,8 +81,13 @@ def main() -> None:
     parser.add_argument("--error-rate", type=float, default=0.1, help="Error rate during load (0-1)")
     parser.add_argument("--duration", type=int, default=120, help="Duration in seconds")
     parser.add_argument("--baseline-rps", type=int, default=10, help="RPS after test ends")
+    parser.add_argument("--scenario", help="Scenario YAML to run instead of a single step change")
     args = parser.parse_args()
 
+    if args.scenario:
+        run_scenario(args)
+        return
+
     print(f"""
 === Load Test: Real-Time Observability Platform ===
 Target:    {args.target_rps} events/sec for {args.duration}s
@@ -77,13 +107,7 @@ Watch in Grafana:
     kubectl_patch_env(args.namespace, args.deployment, "ERROR_RATE", str(args.error_rate))
     print(f"\nLoad running for {args.duration}s...\n")
 
-    check_interval = 30
-    for elapsed in range(check_interval, args.duration + check_interval, check_interval):
-        time.sleep(min(check_interval, max(0, args.duration - (elapsed - check_interval))))
-        print(f"[{elapsed}s] HPA status:")
-        print(f"  {get_hpa_status(args.namespace)}")
-        if elapsed >= args.duration:
-            break
+    watch_hpa(args.namespace, args.duration)
 
     # --- Ramp down ---
     print("\n=== RAMPING DOWN ===")
@@ -98,5 +122,33 @@ Load test complete!
 """)
 
 
+def watch_hpa(namespace: str, duration: int) -> None:
+    check_interval = 30
+    for elapsed in range(check_interval, duration + check_interval, check_interval):
+        time.sleep(min(check_interval, max(0, duration - (elapsed - check_interval))))
+        print(f"[{elapsed}s] HPA status:")
+        print(f"  {get_hpa_status(namespace)}")
+        if elapsed >= duration:
+            break
+
+
+def run_scenario(args: argparse.Namespace) -> None:
+    print(f"""
+=== Scenario Load Test: {args.scenario} ===
+Namespace: {args.namespace}
+Deployment: {args.deployment}
+
+Phase start times are exported as simulator_scenario_phase_start_timestamp_seconds;
+compare them with alert firing and HPA scaling times.
+""")
+    if not kubectl_apply_scenario(args.namespace, args.deployment, args.scenario):
+        sys.exit(1)
+    watch_hpa(args.namespace, args.duration)
+    print("""
+Scenario watch complete. The scenario keeps running (or has finished) in the pods;
+apply another with --scenario to switch.
+""")
+
+
 if __name__ == "__main__":
     main()
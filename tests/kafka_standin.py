@@ -0,0 +1,739 @@
+"""
+In-memory stand-in for a Kafka broker and the confluent_kafka client API the apps use.
+
+`Broker` keeps topics as in-memory partitions with offsets and tracks consumer
+groups (eager rebalancing, committed offsets). `Producer` and `Consumer`
+implement the subset of confluent_kafka's clients the apps call: produce,
+poll, flush, purge and len() on producers; subscribe with rebalance callbacks,
+poll, consume, commit, position, watermarks and close on consumers.
+
+`bootstrap.servers` selects the broker: `memory://<name>` is a broker in this
+process, `host:port` one served to other processes with `serve()`. `install()`
+swaps the clients into confluent_kafka before the apps import it, so they run
+unmodified:
+
+    broker = Broker()
+    host, port = serve(broker)
+    # in each app process, with KAFKA_BROKERS=host:port:
+    kafka_standin.install()
+
+Producers batch records like librdkafka (`linger.ms`, `batch.num.messages`,
+`queue.buffering.max.messages`) and deliver from a background thread;
+delivery callbacks run from poll() and flush(). Keyed records are partitioned
+by a CRC32 of the key, unkeyed ones stick to one random partition per batch.
+Consumers record the latency from produce() to their hand-off to the app,
+which `Broker.stats()` reports per group. Not implemented: transactions,
+headers, compression, statistics callbacks and broker-side failures.
+"""
+import itertools
+import math
+import random
+import threading
+import time
+import zlib
+from collections import deque
+from multiprocessing.managers import BaseManager
+from typing import Any, Callable, Optional
+
+from confluent_kafka import TIMESTAMP_CREATE_TIME, KafkaError, TopicPartition
+
+AUTHKEY = b"kafka-standin"
+MEMORY_PREFIX = "memory://"
+OFFSET_INVALID = -1001
+# Records a consumer fetches per request
+FETCH_MESSAGES = 500
+# Growth of the latency histogram bins; quantiles are within ~2.5%
+LATENCY_GAMMA = 1.05
+
+TP = tuple[str, int]
+# (partition or None to pick one, key, value, timestamp in ms)
+ProducedRecord = tuple[Optional[int], Optional[bytes], bytes, int]
+# (topic, partition, offset, key, value, timestamp in ms)
+FetchedRecord = tuple[str, int, int, Optional[bytes], bytes, int]
+# A member's delivered offsets, records handed to the app and their latency histogram
+Report = tuple[dict[TP, int], int, dict[int, int]]
+
+
+def latency_bin(latency_ms: float) -> int:
+    return math.ceil(math.log(max(latency_ms, 0.001)) / math.log(LATENCY_GAMMA))
+
+
+def latency_quantile(bins: dict[int, int], q: float) -> Optional[float]:
+    """Quantile in ms of a latency histogram from `Broker.stats()`, None if empty."""
+    total = sum(bins.values())
+    if not total:
+        return None
+    rank = min(int(total * q), total - 1)
+    seen = 0
+    for index in sorted(bins):
+        seen += bins[index]
+        if seen > rank:
+            return 2 * LATENCY_GAMMA**index / (LATENCY_GAMMA + 1)
+    return None
+
+
+class _Partition:
+    __slots__ = ("low", "records")
+
+    def __init__(self) -> None:
+        self.low = 0
+        # (key, value, timestamp ms) from offset `low` on
+        self.records: list[tuple[Optional[bytes], bytes, int]] = []
+
+    @property
+    def high(self) -> int:
+        return self.low + len(self.records)
+
+
+class _Group:
+    def __init__(self) -> None:
+        self.members: dict[str, list[str]] = {}  # member -> subscribed topics
+        self.generation = 0
+        self.assignments: dict[str, list[TP]] = {}
+        self.committed: dict[TP, int] = {}
+        # Next offset handed to the app per partition, as last reported by its owner
+        self.delivered: dict[TP, int] = {}
+        self.consumed = 0
+        self.latency_bins: dict[int, int] = {}
+
+
+class Broker:
+    """Topics, partitions and consumer groups; every method is safe to call from any thread.
+
+    Partitions keep at most `retention_messages` records; older ones are dropped
+    in halves, moving the low watermark.
+    """
+
+    def __init__(self, default_partitions: int = 3, retention_messages: int = 2_000_000) -> None:
+        self._default_partitions = default_partitions
+        self._retention = retention_messages
+        self._lock = threading.Lock()
+        self._data = threading.Condition(self._lock)
+        self._topics: dict[str, list[_Partition]] = {}
+        self._produced: dict[str, int] = {}
+        self._groups: dict[str, _Group] = {}
+        self._member_ids = itertools.count(1)
+        self._random = random.Random()
+
+    def _partitions(self, topic: str, count: Optional[int] = None) -> list[_Partition]:
+        """A topic's partitions, created on first use. Caller holds the lock."""
+        partitions = self._topics.get(topic)
+        if partitions is None:
+            count = count or self._default_partitions
+            partitions = self._topics[topic] = [_Partition() for _ in range(count)]
+            self._produced[topic] = 0
+        return partitions
+
+    def create_topic(self, topic: str, partitions: int) -> None:
+        with self._lock:
+            if topic in self._topics:
+                raise ValueError(f"Topic {topic} already exists")
+            self._partitions(topic, partitions)
+
+    def partition_count(self, topic: str) -> int:
+        with self._lock:
+            return len(self._partitions(topic))
+
+    def append(self, topic: str, records: list[ProducedRecord]) -> list[tuple[int, int]]:
+        """Append records; returns the (partition, offset) each was written at."""
+        written: list[tuple[int, int]] = []
+        with self._lock:
+            partitions = self._partitions(topic)
+            sticky: Optional[int] = None
+            for partition, key, value, timestamp in records:
+                if partition is None or partition < 0:
+                    if key is None:
+                        if sticky is None:
+                            sticky = self._random.randrange(len(partitions))
+                        partition = sticky
+                    else:
+                        partition = zlib.crc32(key) % len(partitions)
+                elif partition >= len(partitions):
+                    raise ValueError(f"{topic} has no partition {partition}")
+                log = partitions[partition]
+                written.append((partition, log.high))
+                log.records.append((key, value, timestamp))
+                if len(log.records) > self._retention:
+                    dropped = len(log.records) // 2
+                    del log.records[:dropped]
+                    log.low += dropped
+            self._produced[topic] += len(records)
+            self._data.notify_all()
+        return written
+
+    def join(self, group: str, topics: list[str]) -> str:
+        """Add a member subscribed to `topics`; every member of the group rebalances."""
+        with self._lock:
+            for topic in topics:
+                self._partitions(topic)
+            state = self._groups.setdefault(group, _Group())
+            member = f"member-{next(self._member_ids)}"
+            state.members[member] = list(topics)
+            self._rebalance(state)
+        return member
+
+    def leave(self, group: str, member: str) -> None:
+        with self._lock:
+            state = self._groups.get(group)
+            if state is not None and state.members.pop(member, None) is not None:
+                self._rebalance(state)
+
+    def _rebalance(self, state: _Group) -> None:
+        """Round-robin each topic's partitions over its subscribers. Caller holds the lock."""
+        state.generation += 1
+        state.assignments = {member: [] for member in state.members}
+        for topic in sorted({t for topics in state.members.values() for t in topics}):
+            subscribers = sorted(m for m, topics in state.members.items() if topic in topics)
+            for partition in range(len(self._topics[topic])):
+                owner = subscribers[partition % len(subscribers)]
+                state.assignments[owner].append((topic, partition))
+        # Members blocked in fetch return and pick up the new generation
+        self._data.notify_all()
+
+    def assignment(self, group: str, member: str, reset: str) -> tuple[int, dict[TP, int]]:
+        """(generation, starting offset per assigned partition): committed, else per `reset`."""
+        with self._lock:
+            state = self._groups[group]
+            offsets: dict[TP, int] = {}
+            for tp in state.assignments.get(member, []):
+                log = self._topics[tp[0]][tp[1]]
+                start = state.committed.get(tp)
+                if start is None:
+                    start = log.low if reset in ("earliest", "smallest", "beginning") else log.high
+                offsets[tp] = start
+                state.delivered.setdefault(tp, start)
+            return state.generation, offsets
+
+    def fetch(
+        self,
+        group: str,
+        member: str,
+        generation: int,
+        positions: list[tuple[TP, int]],
+        max_messages: int,
+        timeout: float,
+        report: Optional[Report] = None,
+        commit: Optional[dict[TP, int]] = None,
+    ) -> tuple[int, list[FetchedRecord], dict[TP, int]]:
+        """Records from `positions` on, waiting up to `timeout` seconds for any.
+
+        Returns (generation, records, high watermarks); a changed generation means
+        the member must fetch its new assignment. `report` (see `report`) and
+        `commit` ride along, so a fetch is a single round trip.
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            state = self._groups[group]
+            if commit:
+                state.committed.update(commit)
+            if report is not None:
+                self._report(state, report)
+            records: list[FetchedRecord] = []
+            while state.generation == generation and member in state.members:
+                for (topic, partition), offset in positions:
+                    log = self._topics[topic][partition]
+                    start = max(offset, log.low)
+                    chunk = log.records[start - log.low : start - log.low + max_messages]
+                    records.extend(
+                        (topic, partition, start + i, key, value, timestamp)
+                        for i, (key, value, timestamp) in enumerate(chunk)
+                    )
+                    max_messages -= len(chunk)
+                    if max_messages <= 0:
+                        break
+                remaining = deadline - time.monotonic()
+                if records or remaining <= 0:
+                    break
+                self._data.wait(remaining)
+            highs = {tp: self._topics[tp[0]][tp[1]].high for tp, _ in positions}
+            return state.generation, records, highs
+
+    def report(self, group: str, report: Report) -> None:
+        """Record what a member handed to the app since its last fetch."""
+        with self._lock:
+            self._report(self._groups.setdefault(group, _Group()), report)
+
+    def _report(self, state: _Group, report: Report) -> None:
+        delivered, consumed, bins = report
+        state.delivered.update(delivered)
+        state.consumed += consumed
+        for index, count in bins.items():
+            state.latency_bins[index] = state.latency_bins.get(index, 0) + count
+
+    def commit(self, group: str, offsets: dict[TP, int]) -> None:
+        with self._lock:
+            self._groups.setdefault(group, _Group()).committed.update(offsets)
+
+    def committed(self, group: str, partitions: list[TP]) -> dict[TP, int]:
+        with self._lock:
+            state = self._groups.get(group)
+            committed = state.committed if state is not None else {}
+            return {tp: committed.get(tp, OFFSET_INVALID) for tp in partitions}
+
+    def watermarks(self, topic: str, partition: int) -> tuple[int, int]:
+        with self._lock:
+            log = self._partitions(topic)[partition]
+            return log.low, log.high
+
+    def stats(self) -> dict[str, Any]:
+        """Records produced per topic; per group: members, records consumed, latency, lag."""
+        with self._lock:
+            topics = {
+                topic: {"partitions": len(partitions), "produced": self._produced[topic]}
+                for topic, partitions in self._topics.items()
+            }
+            groups = {}
+            for name, state in self._groups.items():
+                lag = sum(
+                    max(0, self._topics[topic][partition].high - offset)
+                    for (topic, partition), offset in state.delivered.items()
+                )
+                groups[name] = {
+                    "members": len(state.members),
+                    "consumed": state.consumed,
+                    "latency_bins": dict(state.latency_bins),
+                    "lag": lag,
+                }
+            return {"topics": topics, "groups": groups}
+
+
+_local_brokers: dict[str, Broker] = {}
+_local_lock = threading.Lock()
+
+
+def local_broker(name: str = "default") -> Broker:
+    """The in-process broker behind `memory://<name>`."""
+    with _local_lock:
+        broker = _local_brokers.get(name)
+        if broker is None:
+            broker = _local_brokers[name] = Broker()
+        return broker
+
+
+def serve(broker: Broker, host: str = "127.0.0.1", port: int = 0) -> tuple[str, int]:
+    """Serve `broker` to other processes from a background thread; returns its address."""
+
+    class _Server(BaseManager):
+        pass
+
+    _Server.register("broker", callable=lambda: broker)
+    server = _Server(address=(host, port), authkey=AUTHKEY).get_server()
+    threading.Thread(target=server.serve_forever, name="kafka-standin", daemon=True).start()
+    address: Any = server.address
+    return address[0], address[1]
+
+
+def connect(bootstrap_servers: str) -> Any:
+    """The broker named by `bootstrap.servers`: in-process, or a proxy to a served one."""
+    if bootstrap_servers.startswith(MEMORY_PREFIX):
+        return local_broker(bootstrap_servers[len(MEMORY_PREFIX) :] or "default")
+
+    class _Client(BaseManager):
+        pass
+
+    _Client.register("broker")
+    host, _, port = bootstrap_servers.split(",")[0].rpartition(":")
+    manager = _Client(address=(host, int(port)), authkey=AUTHKEY)
+    manager.connect()
+    return manager.broker()  # type: ignore[attr-defined]
+
+
+class Message:
+    """A produced or consumed record, with confluent_kafka.Message's accessors."""
+
+    __slots__ = ("_error", "_key", "_offset", "_partition", "_timestamp", "_topic", "_value")
+
+    def __init__(
+        self,
+        topic: str,
+        partition: int,
+        offset: int,
+        key: Optional[bytes],
+        value: bytes,
+        timestamp_ms: int,
+        error: Optional[KafkaError] = None,
+    ) -> None:
+        self._topic = topic
+        self._partition = partition
+        self._offset = offset
+        self._key = key
+        self._value = value
+        self._timestamp = timestamp_ms
+        self._error = error
+
+    def topic(self) -> str:
+        return self._topic
+
+    def partition(self) -> int:
+        return self._partition
+
+    def offset(self) -> int:
+        return self._offset
+
+    def key(self) -> Optional[bytes]:
+        return self._key
+
+    def value(self) -> bytes:
+        return self._value
+
+    def error(self) -> Optional[KafkaError]:
+        return self._error
+
+    def timestamp(self) -> tuple[int, int]:
+        return TIMESTAMP_CREATE_TIME, self._timestamp
+
+    def headers(self) -> None:
+        return None
+
+    def __len__(self) -> int:
+        return len(self._value)
+
+
+DeliveryCallback = Callable[[Optional[KafkaError], Message], None]
+_Pending = tuple[Optional[int], Optional[bytes], bytes, int, Optional[DeliveryCallback]]
+_DeliveryReport = tuple[Optional[DeliveryCallback], Optional[KafkaError], Message]
+
+
+class Producer:
+    """confluent_kafka.Producer on the stand-in broker.
+
+    Records are sent in per-topic batches by a background thread once
+    `batch.num.messages` are queued or the oldest has waited `linger.ms`.
+    """
+
+    def __init__(self, conf: dict[str, Any]) -> None:
+        self._broker = connect(str(conf["bootstrap.servers"]))
+        self._linger = float(conf.get("linger.ms", 5)) / 1000
+        self._batch_messages = int(conf.get("batch.num.messages", 10000))
+        self._max_queued = int(conf.get("queue.buffering.max.messages", 100000))
+        self._default_callback: Optional[DeliveryCallback] = conf.get("on_delivery")
+        self._cond = threading.Condition()
+        self._pending: dict[str, list[_Pending]] = {}
+        self._pending_count = 0
+        self._oldest = 0.0
+        # Produced but not yet served by poll() or flush()
+        self._queued = 0
+        self._reports: deque[_DeliveryReport] = deque()
+        self._flushing = False
+        self._closed = False
+        self._sender = threading.Thread(
+            target=self._send_loop, name="kafka-standin-producer", daemon=True
+        )
+        self._sender.start()
+
+    def produce(
+        self,
+        topic: str,
+        value: Optional[bytes] = None,
+        key: Optional[bytes] = None,
+        partition: int = -1,
+        on_delivery: Optional[DeliveryCallback] = None,
+        callback: Optional[DeliveryCallback] = None,
+        timestamp: int = 0,
+        headers: Any = None,
+    ) -> None:
+        if isinstance(key, str):
+            key = key.encode("utf-8")
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        with self._cond:
+            if self._queued >= self._max_queued:
+                raise BufferError("Local: Queue full")
+            first = not self._pending_count
+            if first:
+                self._oldest = time.monotonic()
+            self._pending.setdefault(topic, []).append((
+                partition,
+                key,
+                value or b"",
+                timestamp or int(time.time() * 1000),
+                on_delivery or callback or self._default_callback,
+            ))
+            self._pending_count += 1
+            self._queued += 1
+            # The sender sleeps untimed while idle: wake it to start the linger
+            if first or self._pending_count >= self._batch_messages or not self._linger:
+                self._cond.notify_all()
+
+    def _ready(self) -> bool:
+        return bool(self._pending_count) and (
+            self._flushing
+            or self._pending_count >= self._batch_messages
+            or time.monotonic() - self._oldest >= self._linger
+        )
+
+    def _send_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and not self._ready():
+                    wait = None
+                    if self._pending_count:
+                        wait = max(0.0, self._linger - (time.monotonic() - self._oldest))
+                    self._cond.wait(wait)
+                if self._closed and not self._pending_count:
+                    return
+                batches, self._pending = self._pending, {}
+                self._pending_count = 0
+            for topic, batch in batches.items():
+                self._send(topic, batch)
+
+    def _send(self, topic: str, batch: list[_Pending]) -> None:
+        error: Optional[KafkaError] = None
+        try:
+            written = self._broker.append(topic, [record[:4] for record in batch])
+        except Exception as e:
+            error = KafkaError(KafkaError._TRANSPORT, str(e))
+            written = [(-1, -1)] * len(batch)
+        reports = [
+            (record[4], error, Message(topic, partition, offset, record[1], record[2], record[3]))
+            for record, (partition, offset) in zip(batch, written)
+        ]
+        with self._cond:
+            self._reports.extend(reports)
+            self._cond.notify_all()
+
+    def _serve(self) -> int:
+        """Run the delivery callbacks of everything sent so far."""
+        with self._cond:
+            reports, self._reports = self._reports, deque()
+            self._queued -= len(reports)
+        for callback, error, message in reports:
+            if callback is not None:
+                callback(error, message)
+        return len(reports)
+
+    def poll(self, timeout: Optional[float] = None) -> int:
+        deadline = None if timeout is None or timeout < 0 else time.monotonic() + timeout
+        with self._cond:
+            while not self._reports and self._queued:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        return self._serve()
+
+    def flush(self, timeout: Optional[float] = None) -> int:
+        """Send everything queued and serve its callbacks; returns how many are still queued."""
+        deadline = None if timeout is None or timeout < 0 else time.monotonic() + timeout
+        with self._cond:
+            self._flushing = True
+            self._cond.notify_all()
+        try:
+            while True:
+                self._serve()
+                with self._cond:
+                    if not self._queued:
+                        return 0
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return self._queued
+                    if not self._reports:
+                        self._cond.wait(remaining)
+        finally:
+            with self._cond:
+                self._flushing = False
+
+    def purge(self, in_queue: bool = True, in_flight: bool = True, blocking: bool = True) -> None:
+        """Fail records not yet sent; their callbacks report _PURGE_QUEUE from the next poll."""
+        if not in_queue:
+            return
+        with self._cond:
+            batches, self._pending = self._pending, {}
+            self._pending_count = 0
+            error = KafkaError(KafkaError._PURGE_QUEUE)
+            for topic, batch in batches.items():
+                self._reports.extend(
+                    (record[4], error, Message(topic, -1, -1, record[1], record[2], record[3]))
+                    for record in batch
+                )
+
+    def close(self) -> None:
+        """Stop the sender thread once everything queued is sent (not in confluent_kafka)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._sender.join()
+
+    def __len__(self) -> int:
+        return self._queued
+
+
+class Consumer:
+    """confluent_kafka.Consumer on the stand-in broker, as a member of `group.id`.
+
+    With `enable.auto.commit` the delivered offsets are committed with every fetch.
+    """
+
+    def __init__(self, conf: dict[str, Any]) -> None:
+        self._broker = connect(str(conf["bootstrap.servers"]))
+        self._group = str(conf["group.id"])
+        self._reset = str(conf.get("auto.offset.reset", "latest"))
+        self._auto_commit = bool(conf.get("enable.auto.commit", True))
+        self._member: Optional[str] = None
+        self._generation = -1
+        self._assignment: list[TP] = []
+        self._on_assign: Optional[Callable[..., None]] = None
+        self._on_revoke: Optional[Callable[..., None]] = None
+        # Next offset to fetch, and next offset to hand to the app, per partition
+        self._fetch_positions: dict[TP, int] = {}
+        self._positions: dict[TP, int] = {}
+        self._highs: dict[TP, int] = {}
+        self._buffer: deque[Message] = deque()
+        self._rotation = 0
+        # Hand-offs since the last fetch, reported with the next one
+        self._consumed = 0
+        self._latency_bins: dict[int, int] = {}
+
+    def subscribe(
+        self,
+        topics: list[str],
+        on_assign: Optional[Callable[..., None]] = None,
+        on_revoke: Optional[Callable[..., None]] = None,
+        on_lost: Optional[Callable[..., None]] = None,
+    ) -> None:
+        if self._member is not None:
+            self._broker.leave(self._group, self._member)
+        self._on_assign, self._on_revoke = on_assign, on_revoke
+        self._member = self._broker.join(self._group, list(topics))
+
+    def _rebalance(self) -> None:
+        """Eager rebalance: revoke the whole assignment, then take up the new one."""
+        assert self._member is not None
+        if self._assignment:
+            if self._auto_commit:
+                self._broker.commit(self._group, dict(self._positions))
+            if self._on_revoke is not None:
+                self._on_revoke(self, [TopicPartition(t, p) for t, p in self._assignment])
+        self._generation, offsets = self._broker.assignment(self._group, self._member, self._reset)
+        self._assignment = list(offsets)
+        self._positions = dict(offsets)
+        self._fetch_positions = dict(offsets)
+        self._highs = {}
+        self._buffer.clear()
+        if self._on_assign is not None:
+            self._on_assign(self, [TopicPartition(t, p, o) for (t, p), o in offsets.items()])
+
+    def _fetch(self, timeout: float) -> None:
+        """Fill the buffer with up to FETCH_MESSAGES records, rebalancing first if needed."""
+        if self._member is None:
+            time.sleep(timeout)
+            return
+        deadline = time.monotonic() + timeout
+        while not self._buffer:
+            positions = list(self._fetch_positions.items())
+            if positions:
+                # Rotate the start so one busy partition can't starve the others
+                self._rotation = (self._rotation + 1) % len(positions)
+                positions = positions[self._rotation :] + positions[: self._rotation]
+            report = self._report()
+            generation, records, highs = self._broker.fetch(
+                self._group,
+                self._member,
+                self._generation,
+                positions,
+                FETCH_MESSAGES,
+                max(0.0, deadline - time.monotonic()),
+                report,
+                dict(self._positions) if self._auto_commit else None,
+            )
+            if generation != self._generation:
+                self._rebalance()
+            else:
+                self._highs.update(highs)
+                for topic, partition, offset, key, value, timestamp in records:
+                    self._buffer.append(Message(topic, partition, offset, key, value, timestamp))
+                    self._fetch_positions[(topic, partition)] = offset + 1
+            if time.monotonic() >= deadline:
+                return
+
+    def _report(self) -> Report:
+        report = (dict(self._positions), self._consumed, self._latency_bins)
+        self._consumed, self._latency_bins = 0, {}
+        return report
+
+    def _take(self, count: int) -> list[Message]:
+        taken = [self._buffer.popleft() for _ in range(min(count, len(self._buffer)))]
+        now_ms = time.time() * 1000
+        bins = self._latency_bins
+        for msg in taken:
+            self._positions[(msg.topic(), msg.partition())] = msg.offset() + 1
+            index = latency_bin(now_ms - msg.timestamp()[1])
+            bins[index] = bins.get(index, 0) + 1
+        self._consumed += len(taken)
+        return taken
+
+    def poll(self, timeout: Optional[float] = None) -> Optional[Message]:
+        if not self._buffer:
+            self._fetch(3600.0 if timeout is None or timeout < 0 else timeout)
+        taken = self._take(1)
+        return taken[0] if taken else None
+
+    def consume(self, num_messages: int = 1, timeout: Optional[float] = None) -> list[Message]:
+        if not self._buffer:
+            self._fetch(3600.0 if timeout is None or timeout < 0 else timeout)
+        return self._take(num_messages)
+
+    def commit(
+        self,
+        message: Optional[Message] = None,
+        offsets: Optional[list[TopicPartition]] = None,
+        asynchronous: bool = True,
+    ) -> Optional[list[TopicPartition]]:
+        """Commit `message`, `offsets` or the delivered positions; sync commits return them."""
+        if message is not None:
+            commit = {(message.topic(), message.partition()): message.offset() + 1}
+        elif offsets is not None:
+            commit = {(tp.topic, tp.partition): tp.offset for tp in offsets}
+        else:
+            commit = dict(self._positions)
+        self._broker.commit(self._group, commit)
+        if asynchronous:
+            return None
+        return [TopicPartition(t, p, o) for (t, p), o in commit.items()]
+
+    def committed(
+        self, partitions: list[TopicPartition], timeout: Optional[float] = None
+    ) -> list[TopicPartition]:
+        tps = [(tp.topic, tp.partition) for tp in partitions]
+        offsets = self._broker.committed(self._group, tps)
+        return [TopicPartition(t, p, o) for (t, p), o in offsets.items()]
+
+    def assignment(self) -> list[TopicPartition]:
+        return [TopicPartition(t, p) for t, p in self._assignment]
+
+    def position(self, partitions: list[TopicPartition]) -> list[TopicPartition]:
+        positions = self._positions
+        return [
+            TopicPartition(
+                tp.topic, tp.partition, positions.get((tp.topic, tp.partition), OFFSET_INVALID)
+            )
+            for tp in partitions
+        ]
+
+    def get_watermark_offsets(
+        self, partition: TopicPartition, timeout: Optional[float] = None, cached: bool = False
+    ) -> tuple[int, int]:
+        """(low, high); `cached` answers from the last fetch without asking the broker."""
+        if cached:
+            return OFFSET_INVALID, self._highs.get(
+                (partition.topic, partition.partition), OFFSET_INVALID
+            )
+        low, high = self._broker.watermarks(partition.topic, partition.partition)
+        return low, high
+
+    def close(self) -> None:
+        if self._member is None:
+            return
+        if self._auto_commit and self._positions:
+            self._broker.commit(self._group, dict(self._positions))
+        self._broker.report(self._group, self._report())
+        self._broker.leave(self._group, self._member)
+        self._member = None
+
+
+def install() -> None:
+    """Swap the stand-in clients into confluent_kafka; call before the apps are imported."""
+    import confluent_kafka
+
+    confluent_kafka.Producer = Producer  # type: ignore[misc,assignment]
+    confluent_kafka.Consumer = Consumer  # type: ignore[misc,assignment]
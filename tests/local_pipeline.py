@@ -0,0 +1,246 @@
+"""
+Local end-to-end benchmark: workload simulator -> stream processor + metrics bridge,
+on the in-memory Kafka stand-in (tests/kafka_standin.py) instead of a cluster.
+
+The broker is served from this process; each app runs unmodified as a local
+process with confluent_kafka's Producer and Consumer swapped for the stand-in's,
+configured through its environment as in its Helm chart. The apps get a process
+each rather than sharing one: they register producer metrics under the same
+names, and one interpreter would put the whole pipeline behind a single GIL.
+Their Python dependencies must be installed in this interpreter.
+
+After a warm-up, it reports records produced per second per topic and, per
+consumer group, records consumed per second and the end-to-end latency from
+produce() to the hand-off to the app. Then the simulator stops and the
+consumers get `--drain` seconds to catch up; the exit status is 1 if they
+don't or an app exits early.
+
+Usage:
+    python tests/local_pipeline.py --duration 30 --events-per-second 500
+    python tests/local_pipeline.py --env GENERATION_BATCH_SIZE=500 --env METRICS_FORMAT=aggregates
+    python tests/local_pipeline.py --env PARTITION_STRATEGY=series \
+        --env stream-processor:MERGE_TOPIC=metrics.partials \
+        --env metrics-bridge:MERGE_TOPIC=metrics.bridge-partials
+    python tests/local_pipeline.py --json > bench.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from typing import Any, Optional
+
+from kafka_standin import Broker, latency_quantile, serve
+
+TESTS_DIR = Path(__file__).resolve().parent
+APPS_DIR = TESTS_DIR.parent / "apps"
+
+# Mirrors the topics of helm/observability-platform
+TOPICS = {
+    "metrics.raw": 3,
+    "metrics.partials": 3,
+    "metrics.bridge-partials": 3,
+    "logs.raw": 2,
+    "alerts.fired": 1,
+}
+CONSUMER_APPS = {
+    "stream-processor": "stream-processor-group",
+    "metrics-bridge": "metrics-bridge-group",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port: int = s.getsockname()[1]
+        return port
+
+
+def _run_app(app: str, env: dict[str, str], log_path: str) -> None:
+    """Entry point of an app process: stand-in clients, then the app's own main."""
+    log = os.open(log_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    os.dup2(log, 1)
+    os.dup2(log, 2)
+    os.environ.update(env)
+    sys.path[:0] = [str(APPS_DIR / app), str(TESTS_DIR)]
+    import kafka_standin
+
+    kafka_standin.install()
+    if app == "metrics-bridge":
+        import uvicorn
+
+        uvicorn.run("main:app", host="127.0.0.1", port=int(env["SERVER_PORT"]), log_config=None)
+    else:
+        import main
+
+        main.main()
+
+
+def _start(app: str, env: dict[str, str], workdir: str) -> BaseProcess:
+    process = multiprocessing.get_context("spawn").Process(
+        target=_run_app, args=(app, env, os.path.join(workdir, f"{app}.log")), name=app
+    )
+    process.start()
+    return process
+
+
+def _stop(process: BaseProcess, timeout: float = 15.0) -> None:
+    if process.is_alive() and process.pid is not None:
+        os.kill(process.pid, signal.SIGTERM)
+    process.join(timeout)
+    if process.is_alive():
+        process.kill()
+        process.join()
+
+
+def _wait_for_groups(broker: Broker, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        groups = broker.stats()["groups"]
+        if all(groups.get(g, {}).get("members") for g in CONSUMER_APPS.values()):
+            return True
+        time.sleep(0.2)
+    return False
+
+
+def _diff_bins(end: dict[int, int], start: dict[int, int]) -> dict[int, int]:
+    return {i: n - start.get(i, 0) for i, n in end.items() if n > start.get(i, 0)}
+
+
+def summarize(start: dict[str, Any], end: dict[str, Any], seconds: float) -> dict[str, Any]:
+    """Rates and latency percentiles between two `Broker.stats()` snapshots."""
+    topics = {
+        topic: {
+            "produced": stats["produced"] - start["topics"].get(topic, {}).get("produced", 0),
+            "per_second": round(
+                (stats["produced"] - start["topics"].get(topic, {}).get("produced", 0)) / seconds,
+                1,
+            ),
+        }
+        for topic, stats in end["topics"].items()
+    }
+    groups = {}
+    for group, stats in end["groups"].items():
+        before = start["groups"].get(group, {"consumed": 0, "latency_bins": {}})
+        bins = _diff_bins(stats["latency_bins"], before["latency_bins"])
+        consumed = stats["consumed"] - before["consumed"]
+        groups[group] = {
+            "consumed": consumed,
+            "per_second": round(consumed / seconds, 1),
+            "latency_ms": {
+                name: None if (value := latency_quantile(bins, q)) is None else round(value, 2)
+                for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+            },
+            "lag": stats["lag"],
+        }
+    return {"seconds": round(seconds, 1), "topics": topics, "groups": groups}
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(f"\n=== Local pipeline: {report['seconds']}s measured ===\n")
+    print(f"{'topic':<24}{'produced':>12}{'per second':>14}")
+    for topic, stats in report["topics"].items():
+        print(f"{topic:<24}{stats['produced']:>12}{stats['per_second']:>14}")
+    print(
+        f"\n{'consumer group':<26}{'consumed':>10}{'per second':>12}"
+        f"{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'lag':>8}"
+    )
+    for group, stats in report["groups"].items():
+        latency = ["-" if v is None else f"{v:.1f}" for v in stats["latency_ms"].values()]
+        print(
+            f"{group:<26}{stats['consumed']:>10}{stats['per_second']:>12}"
+            f"{latency[0]:>10}{latency[1]:>10}{latency[2]:>10}{stats['lag']:>8}"
+        )
+    drained = report.get("drained_seconds")
+    if drained is None:
+        print("\nFAIL: consumers did not catch up")
+    else:
+        print(f"\nDrained in {drained}s")
+
+
+def run(args: argparse.Namespace) -> tuple[dict[str, Any], bool]:
+    broker = Broker(default_partitions=args.partitions or 3)
+    for topic, partitions in TOPICS.items():
+        broker.create_topic(topic, args.partitions or partitions)
+    host, port = serve(broker)
+    workdir = tempfile.mkdtemp(prefix="local-pipeline-")
+    common = {"KAFKA_BROKERS": f"{host}:{port}", "PYTHONUNBUFFERED": "1"}
+    envs = {
+        "stream-processor": {**common},
+        "metrics-bridge": {**common, "SERVER_PORT": str(_free_port())},
+        "workload-simulator": {
+            **common,
+            "EVENTS_PER_SECOND": str(args.events_per_second),
+            "DEAD_LETTER_DIR": os.path.join(workdir, "dead-letter"),
+        },
+    }
+    for item in args.env:
+        key, value = item.split("=", 1)
+        app, _, name = key.rpartition(":")
+        for env in [envs[app]] if app else envs.values():
+            env[name] = value
+    print(f"App logs in {workdir}", file=sys.stderr)
+
+    processes = {app: _start(app, envs[app], workdir) for app in CONSUMER_APPS}
+    ok = _wait_for_groups(broker, timeout=60)
+    simulator = "workload-simulator"
+    processes[simulator] = _start(simulator, envs[simulator], workdir)
+    drained: Optional[float] = None
+    try:
+        time.sleep(args.warmup)
+        start, started = broker.stats(), time.monotonic()
+        time.sleep(args.duration)
+        end, seconds = broker.stats(), time.monotonic() - started
+        ok = ok and all(p.is_alive() for p in processes.values())
+
+        _stop(processes[simulator])
+        stopped = time.monotonic()
+        while time.monotonic() - stopped < args.drain:
+            if all(g["lag"] == 0 for g in broker.stats()["groups"].values()):
+                drained = round(time.monotonic() - stopped, 1)
+                break
+            time.sleep(0.2)
+    finally:
+        for process in processes.values():
+            _stop(process)
+    report = summarize(start, end, seconds)
+    report["drained_seconds"] = drained
+    report["logs"] = workdir
+    return report, ok and drained is not None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on an in-memory broker")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds measured")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds before measuring")
+    parser.add_argument("--drain", type=float, default=30.0, help="Seconds allowed to catch up")
+    parser.add_argument(
+        "--events-per-second", type=int, default=100, help="Simulator rate per service"
+    )
+    parser.add_argument(
+        "--partitions", type=int, default=0, help="Partitions per topic (default: as in Helm)"
+    )
+    parser.add_argument(
+        "--env", action="append", default=[], metavar="[APP:]KEY=VALUE",
+        help="Environment for every app, or one app if prefixed, e.g. "
+        "GENERATION_BATCH_SIZE=500 or stream-processor:MERGE_TOPIC=metrics.partials (repeatable)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report, ok = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
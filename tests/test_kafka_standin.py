@@ -0,0 +1,168 @@
+"""Tests for the in-memory Kafka stand-in (python -m pytest tests/test_kafka_standin.py)."""
+import itertools
+import multiprocessing
+
+from confluent_kafka import KafkaError
+
+import kafka_standin
+from kafka_standin import Broker, Consumer, Producer, latency_quantile, serve
+
+_names = itertools.count()
+
+
+def _conf(**extra: object) -> dict[str, object]:
+    return {"bootstrap.servers": f"memory://test-{next(_names)}", **extra}
+
+
+def _produce_remote(address: str, count: int) -> None:
+    producer = Producer({"bootstrap.servers": address})
+    for i in range(count):
+        producer.produce("metrics.raw", value=str(i).encode(), key=b"api-service")
+    producer.flush()
+
+
+class TestProducer:
+    def test_delivery_reports(self):
+        conf = _conf(**{"linger.ms": 0})
+        producer = Producer(conf)
+        delivered = []
+
+        def on_delivery(error, msg):
+            delivered.append((error, msg))
+
+        for key in (b"a", b"b", b"a"):
+            producer.produce("metrics.raw", value=b"v", key=key, on_delivery=on_delivery)
+        assert producer.flush(5) == 0
+        assert len(producer) == 0
+        assert [e for e, _ in delivered] == [None] * 3
+        first, _, third = (m for _, m in delivered)
+        # Same key, same partition, consecutive offsets
+        assert first.partition() == third.partition()
+        assert third.offset() == first.offset() + 1
+
+    def test_unkeyed_batch_sticks_to_one_partition(self):
+        conf = _conf(**{"linger.ms": 1000, "batch.num.messages": 100000})
+        producer = Producer(conf)
+        partitions = set()
+        for _ in range(50):
+            producer.produce(
+                "logs.raw", value=b"v", on_delivery=lambda e, m: partitions.add(m.partition())
+            )
+        producer.flush(5)
+        assert len(partitions) == 1
+
+    def test_lingering_batch_is_sent_without_flush(self):
+        producer = Producer(_conf(**{"linger.ms": 20}))
+        delivered = []
+        producer.produce("metrics.raw", value=b"v", on_delivery=lambda e, m: delivered.append(e))
+        assert producer.poll(2) == 1
+        assert delivered == [None]
+
+    def test_queue_full_and_purge(self):
+        conf = _conf(**{"linger.ms": 60000, "queue.buffering.max.messages": 2})
+        producer = Producer(conf)
+        errors = []
+        for _ in range(2):
+            producer.produce("metrics.raw", value=b"v", on_delivery=lambda e, m: errors.append(e))
+        try:
+            producer.produce("metrics.raw", value=b"v")
+            raise AssertionError("expected BufferError")
+        except BufferError:
+            pass
+        producer.purge()
+        producer.poll(0)
+        assert [e.code() for e in errors] == [KafkaError._PURGE_QUEUE] * 2
+        assert len(producer) == 0
+
+
+class TestConsumer:
+    def test_group_splits_partitions_and_resumes_from_commit(self):
+        conf = _conf()
+        producer = Producer({**conf, "linger.ms": 0})
+        first = Consumer({**conf, "group.id": "g", "auto.offset.reset": "earliest"})
+        second = Consumer({**conf, "group.id": "g", "auto.offset.reset": "earliest"})
+        assigned: list[int] = []
+        first.subscribe(["metrics.raw"], on_assign=lambda c, tps: assigned.append(len(tps)))
+        second.subscribe(["metrics.raw"])
+        for i in range(30):
+            producer.produce("metrics.raw", value=str(i).encode(), key=str(i).encode())
+        producer.flush(5)
+
+        values = [m.value() for m in first.consume(100, timeout=1)]
+        values += [m.value() for m in second.consume(100, timeout=1)]
+        assert sorted(values) == sorted(str(i).encode() for i in range(30))
+        # Both members split the 3 partitions of the topic
+        assert assigned[-1] in (1, 2)
+        assert {tp.partition for tp in first.assignment()}.isdisjoint(
+            tp.partition for tp in second.assignment()
+        )
+
+        first.close()
+        second.close()
+        producer.produce("metrics.raw", value=b"late", key=b"x")
+        producer.flush(5)
+        resumed = Consumer({**conf, "group.id": "g", "auto.offset.reset": "earliest"})
+        resumed.subscribe(["metrics.raw"])
+        assert [m.value() for m in resumed.consume(100, timeout=1)] == [b"late"]
+
+    def test_latest_reset_and_watermarks(self):
+        conf = _conf()
+        producer = Producer({**conf, "linger.ms": 0})
+        producer.produce("metrics.raw", value=b"old", partition=0)
+        producer.flush(5)
+        consumer = Consumer({**conf, "group.id": "g", "enable.auto.commit": False})
+        consumer.subscribe(["metrics.raw"])
+        assert consumer.poll(0.1) is None
+        producer.produce("metrics.raw", value=b"new", partition=0)
+        producer.flush(5)
+        msg = consumer.poll(1)
+        assert msg is not None and msg.value() == b"new" and msg.offset() == 1
+        (tp,) = [tp for tp in consumer.position(consumer.assignment()) if tp.partition == 0]
+        assert tp.offset == 2
+        assert consumer.get_watermark_offsets(tp) == (0, 2)
+        assert consumer.get_watermark_offsets(tp, cached=True)[1] == 2
+        consumer.commit(asynchronous=False)
+        (committed,) = consumer.committed([tp])
+        assert committed.offset == 2
+
+    def test_stats_report_consumption(self):
+        name = f"memory://test-{next(_names)}"
+        broker = kafka_standin.local_broker(name[len("memory://") :])
+        producer = Producer({"bootstrap.servers": name, "linger.ms": 0})
+        consumer = Consumer({"bootstrap.servers": name, "group.id": "g"})
+        consumer.subscribe(["metrics.raw"])
+        consumer.poll(0)
+        for _ in range(10):
+            producer.produce("metrics.raw", value=b"v")
+        producer.flush(5)
+        assert len(consumer.consume(5, timeout=1)) == 5
+        consumer.close()
+        stats = broker.stats()
+        assert stats["topics"]["metrics.raw"]["produced"] == 10
+        group = stats["groups"]["g"]
+        assert group["consumed"] == 5
+        assert group["lag"] == 5
+        assert latency_quantile(group["latency_bins"], 0.5) is not None
+
+
+class TestServe:
+    def test_cross_process(self):
+        broker = Broker(default_partitions=2)
+        host, port = serve(broker)
+        address = f"{host}:{port}"
+        consumer = Consumer({"bootstrap.servers": address, "group.id": "g"})
+        consumer.subscribe(["metrics.raw"])
+        consumer.poll(0)
+        process = multiprocessing.get_context("spawn").Process(
+            target=_produce_remote, args=(address, 100)
+        )
+        process.start()
+        process.join(30)
+        assert process.exitcode == 0
+        received = []
+        while len(received) < 100:
+            msgs = consumer.consume(100, timeout=2)
+            assert msgs
+            received.extend(msgs)
+        assert {m.key() for m in received} == {b"api-service"}
+        assert broker.stats()["topics"]["metrics.raw"]["produced"] == 100
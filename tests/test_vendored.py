@@ -0,0 +1,28 @@
+"""Checks that modules vendored between apps match (python -m pytest tests/test_vendored.py)."""
+import ast
+from pathlib import Path
+
+import pytest
+
+APPS = Path(__file__).resolve().parent.parent / "apps"
+
+# (vendored copy, source)
+VENDORED = [
+    (
+        "stream-processor/processor/kafka_stats.py",
+        "workload-simulator/simulator/kafka_stats.py",
+    ),
+]
+
+
+def _code(path: Path) -> str:
+    """The module's AST without its docstring, which notes where a copy comes from."""
+    module = ast.parse(path.read_text())
+    if ast.get_docstring(module) is not None:
+        module.body = module.body[1:]
+    return ast.dump(module)
+
+
+@pytest.mark.parametrize(("copy", "source"), VENDORED)
+def test_copy_matches_source(copy: str, source: str) -> None:
+    assert _code(APPS / copy) == _code(APPS / source), f"Copy {source} to {copy}"